@@ -0,0 +1,270 @@
+import hashlib
+import zlib
+from typing import Dict, List, Optional, Sequence
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.cache import ResponseCache, response_cache
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - optional
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - optional
+    zstandard = None
+
+COMPRESSIBLE_TYPES = (
+    "application/json",
+    "application/javascript",
+    "application/xml",
+    "text/",
+    "image/svg+xml",
+)
+
+
+class GzipEncoder:
+    name = "gzip"
+
+    def __init__(self, level: int = 6):
+        self.level = level
+
+    def compress(self, data: bytes) -> bytes:
+        compressor = zlib.compressobj(self.level, zlib.DEFLATED, 31)
+        return compressor.compress(data) + compressor.flush()
+
+    def stream(self) -> "StreamCompressor":
+        compressor = zlib.compressobj(self.level, zlib.DEFLATED, 31)
+        return StreamCompressor(
+            compressor.compress,
+            lambda: compressor.flush(zlib.Z_SYNC_FLUSH),
+            compressor.flush
+        )
+
+
+class BrotliEncoder:
+    name = "br"
+
+    def __init__(self, quality: int = 5):
+        self.quality = quality
+
+    def compress(self, data: bytes) -> bytes:
+        return brotli.compress(data, quality=self.quality)
+
+    def stream(self) -> "StreamCompressor":
+        compressor = brotli.Compressor(quality=self.quality)
+        return StreamCompressor(compressor.process, compressor.flush, compressor.finish)
+
+
+class ZstdEncoder:
+    name = "zstd"
+
+    def __init__(self, level: int = 3):
+        self.level = level
+        self._compressor = zstandard.ZstdCompressor(level=level)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.compress(data)
+
+    def stream(self) -> "StreamCompressor":
+        compressor = zstandard.ZstdCompressor(level=self.level).compressobj()
+        return StreamCompressor(
+            compressor.compress,
+            lambda: compressor.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK),
+            compressor.flush
+        )
+
+
+class StreamCompressor:
+    """Incremental compressor that flushes each chunk so streamed events aren't held back."""
+
+    def __init__(self, process, flush, finish):
+        self._process = process
+        self._flush = flush
+        self._finish = finish
+
+    def feed(self, chunk: bytes) -> bytes:
+        return self._process(chunk) + self._flush()
+
+    def finish(self) -> bytes:
+        return self._finish()
+
+
+def available_encoders(gzip_level: int = 6, brotli_quality: int = 5, zstd_level: int = 3) -> List:
+    """Encoders in server preference order (best ratio/CPU trade-off first)."""
+    encoders = []
+    if zstandard is not None:
+        encoders.append(ZstdEncoder(zstd_level))
+    if brotli is not None:
+        encoders.append(BrotliEncoder(brotli_quality))
+    encoders.append(GzipEncoder(gzip_level))
+    return encoders
+
+
+def parse_accept_encoding(header: str) -> Dict[str, float]:
+    """Parse an Accept-Encoding header into {coding: q}."""
+    accepted = {}
+    for part in header.split(","):
+        coding, _, params = part.strip().partition(";")
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        accepted[coding] = q
+    return accepted
+
+
+class CompressionMiddleware:
+    """
+    Negotiates zstd/br/gzip from Accept-Encoding and compresses responses.
+
+    - Bodies under minimum_size are passed through untouched.
+    - Streaming responses (more_body=True) are compressed chunk by chunk,
+      flushing each chunk so SSE and long exports still arrive incrementally.
+    - For GET requests under cache_paths, compressed bodies are stored in the
+      response cache keyed by (encoding, body hash), so an identical payload
+      is never compressed twice.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        minimum_size: int = 1024,
+        encoders: Optional[Sequence] = None,
+        cache: Optional[ResponseCache] = response_cache,
+        cache_paths: Sequence[str] = ()
+    ):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.encoders = list(encoders) if encoders is not None else available_encoders()
+        self.cache = cache
+        self.cache_paths = tuple(cache_paths)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        encoder = self.negotiate(Headers(scope=scope).get("accept-encoding", ""))
+        if encoder is None:
+            await self.app(scope, receive, send)
+            return
+
+        cacheable = (
+            self.cache is not None
+            and bool(self.cache_paths)
+            and scope["method"] == "GET"
+            and scope["path"].startswith(self.cache_paths)
+        )
+        responder = _CompressingResponder(self, encoder, send, cacheable)
+        await self.app(scope, receive, responder)
+
+    def negotiate(self, accept_encoding: str):
+        if not accept_encoding:
+            return None
+        accepted = parse_accept_encoding(accept_encoding)
+        wildcard = accepted.get("*", 0.0)
+        best, best_q = None, 0.0
+        for encoder in self.encoders:
+            q = accepted.get(encoder.name, wildcard)
+            if q > best_q:
+                best, best_q = encoder, q
+        return best
+
+
+class _CompressingResponder:
+    def __init__(self, middleware: CompressionMiddleware, encoder, send: Send, cacheable: bool):
+        self.middleware = middleware
+        self.encoder = encoder
+        self.send = send
+        self.cacheable = cacheable
+        self.start_message: Optional[Message] = None
+        self.stream: Optional[StreamCompressor] = None
+        self.passthrough = False
+
+    async def __call__(self, message: Message) -> None:
+        if message["type"] == "http.response.start":
+            self.start_message = message
+            headers = Headers(raw=message["headers"])
+            content_type = headers.get("content-type", "")
+            self.passthrough = (
+                "content-encoding" in headers
+                or not content_type.startswith(COMPRESSIBLE_TYPES)
+            )
+            return
+
+        if message["type"] != "http.response.body":
+            await self.send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+
+        if self.passthrough:
+            await self._flush_start()
+            await self.send(message)
+            return
+
+        if self.stream is None and not more_body:
+            await self._send_whole(body)
+            return
+
+        if self.stream is None:
+            self.stream = self.encoder.stream()
+            self._set_compressed_headers(content_length=None)
+            await self._flush_start()
+
+        chunk = self.stream.feed(body) if body else b""
+        if not more_body:
+            chunk += self.stream.finish()
+        await self.send({"type": "http.response.body", "body": chunk, "more_body": more_body})
+
+    async def _send_whole(self, body: bytes) -> None:
+        if len(body) < self.middleware.minimum_size:
+            # Still varies by encoding: a larger body would have been compressed
+            headers = MutableHeaders(raw=list(self.start_message["headers"]))
+            headers.add_vary_header("Accept-Encoding")
+            self.start_message = {**self.start_message, "headers": headers.raw}
+            await self._flush_start()
+            await self.send({"type": "http.response.body", "body": body})
+            return
+
+        compressed = None
+        key = None
+        if self.cacheable:
+            key = (self.encoder.name, hashlib.blake2b(body, digest_size=16).digest())
+            compressed = self.middleware.cache.get(key)
+        if compressed is None:
+            compressed = self.encoder.compress(body)
+            if key is not None:
+                self.middleware.cache.set(key, compressed)
+
+        self._set_compressed_headers(content_length=len(compressed))
+        await self._flush_start()
+        await self.send({"type": "http.response.body", "body": compressed})
+
+    def _set_compressed_headers(self, content_length: Optional[int]) -> None:
+        headers = MutableHeaders(raw=list(self.start_message["headers"]))
+        headers["content-encoding"] = self.encoder.name
+        headers.add_vary_header("Accept-Encoding")
+        if content_length is None:
+            # Streamed: the compressed length isn't known up front
+            if "content-length" in headers:
+                del headers["content-length"]
+        else:
+            headers["content-length"] = str(content_length)
+        self.start_message = {**self.start_message, "headers": headers.raw}
+
+    async def _flush_start(self) -> None:
+        if self.start_message is not None:
+            await self.send(self.start_message)
+            self.start_message = None
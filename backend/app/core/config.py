@@ -1,5 +1,6 @@
+from pydantic import model_validator
 from pydantic_settings import BaseSettings
-from typing import Optional
+from typing import Dict, List, Optional
 
 
 class Settings(BaseSettings):
@@ -10,9 +11,18 @@ class Settings(BaseSettings):
     
     # Database
     DATABASE_URL: str = "sqlite:///./fitlife.db"
+    AUTO_CREATE_SCHEMA: Optional[bool] = None  # create_all on boot; default: DEBUG (production runs migrations)
+    
+    # Read replicas for read-only endpoints (see app/core/replicas.py)
+    DATABASE_REPLICA_URLS: List[str] = []
+    REPLICA_MAX_LAG_SECONDS: float = 10.0  # Replicas further behind than this are skipped
+    REPLICA_STICKY_SECONDS: float = 30.0  # After a sync, replicas must have replayed it to serve that user
+    REPLICA_HEARTBEAT_SECONDS: float = 1.0  # Primary heartbeat period; 0 disables it
+    REPLICA_LAG_CHECK_SECONDS: float = 2.0  # How long a replica's measured lag is reused
     
     # Redis (for Celery)
     REDIS_URL: str = "redis://localhost:6379/0"
+    PUBSUB_BACKEND: str = "memory"  # "redis" fans live sync events out across workers via REDIS_URL
     
     # JWT
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
@@ -42,11 +52,73 @@ class Settings(BaseSettings):
     OURA_CLIENT_ID: Optional[str] = None
     OURA_CLIENT_SECRET: Optional[str] = None
     
+    # Provider API endpoints (overridable for fake provider servers in load tests)
+    FITBIT_API_BASE_URL: str = "https://api.fitbit.com"
+    GARMIN_API_BASE_URL: str = "https://apis.garmin.com"
+    OURA_API_BASE_URL: str = "https://api.ouraring.com"
+    PROVIDER_HTTP_TIMEOUT_SECONDS: float = 30.0
+    
+    # Provider webhooks (see app/routers/webhooks.py); payloads are signed with the client secrets
+    FITBIT_SUBSCRIBER_VERIFICATION_CODE: Optional[str] = None
+    OURA_WEBHOOK_VERIFICATION_TOKEN: Optional[str] = None
+    WEBHOOK_DEBOUNCE_SECONDS: float = 30.0  # Notifications per connection coalesce into one fetch
+    WEBHOOK_MAX_DATES: int = 31  # Dates per connection per fetch; bursts beyond this are trimmed to the latest
+    
+    # Provider OAuth token refresh (see app/services/token_manager.py)
+    TOKEN_REFRESH_MARGIN_SECONDS: float = 900  # Refresh ahead of expiry; keep above the sweep interval
+    TOKEN_REFRESH_INTERVAL_SECONDS: float = 300  # Background sweep period; 0 disables it
+    TOKEN_REFRESH_BATCH_SIZE: int = 100
+    TOKEN_REFRESH_CONCURRENCY: int = 4  # In-flight refreshes per provider
+    TOKEN_REFRESH_RATE_PER_SECOND: float = 5.0  # Per provider; token endpoints are rate limited
+    
+    # Single-flight syncs (see app/services/sync_coordinator.py)
+    SYNC_LEASE_SECONDS: float = 60.0  # Lease lifetime; renewed at a third of this while the sync runs
+    SYNC_LEASE_POLL_SECONDS: float = 0.5  # How often callers waiting on another worker's sync check back
+    
+    # Sync execution (see app/services/sync_engine.py)
+    SYNC_FETCH_CONCURRENCY: int = 4  # Connections fetched at once per sync
+    SYNC_PROCESS_WORKERS: int = 0  # Processes parsing/normalizing large payloads; 0 keeps it in the event loop
+    SYNC_OFFLOAD_MIN_BYTES: int = 256 * 1024  # Smaller syncs aren't worth the round trip to a worker
+    
+    # Multi-source merge (see app/services/merge_engine.py)
+    MERGE_PROVIDER_PRIORITY: List[str] = ["oura", "garmin", "withings", "whoop", "fitbit", "apple_health"]
+    MERGE_FIELD_POLICIES: Dict[str, Dict] = {}  # Per-field overrides, e.g. {"steps": {"reducer": "priority"}}
+    
     # Frontend URL
     FRONTEND_URL: str = "http://localhost:3000"
     
+    # Response compression (gzip always; br/zstd when brotli/zstandard are installed)
+    COMPRESSION_MINIMUM_SIZE: int = 1024  # bytes; smaller bodies aren't worth the CPU
+    COMPRESSION_GZIP_LEVEL: int = 6
+    COMPRESSION_BROTLI_QUALITY: int = 5  # 4-5 is the sweet spot for dynamic JSON
+    COMPRESSION_ZSTD_LEVEL: int = 3
+    COMPRESSION_CACHE_PATHS: List[str] = ["/api/dashboard/"]
+    
+    # In-process response cache (compressed bodies, keyed by content hash)
+    RESPONSE_CACHE_MAX_ENTRIES: int = 1024
+    RESPONSE_CACHE_MAX_BYTES: int = 64 * 1024 * 1024
+    RESPONSE_CACHE_TTL_SECONDS: int = 300
+    
+    # Observability
+    METRICS_ENABLED: bool = True  # Prometheus text format at /metrics
+    METRICS_TOKEN: Optional[str] = None  # Scrapers send "Authorization: Bearer <token>"
+    METRICS_ALLOWED_CLIENTS: List[str] = ["127.0.0.1", "::1"]  # Client addresses that may scrape without the token
+    METRICS_PROFILE_HEADER: Optional[bool] = None  # Honour X-Profile: 1 with a Server-Timing breakdown; default: DEBUG
+    QUERY_DIAGNOSTICS_ENABLED: bool = False  # Log per-request N+1 / slow-query reports
+    QUERY_SLOW_THRESHOLD_MS: float = 100
+    QUERY_N_PLUS_ONE_THRESHOLD: int = 5  # Identical SELECTs per request before flagging
+    
     class Config:
         env_file = ".env"
+    
+    @model_validator(mode="after")
+    def _debug_defaults(self) -> "Settings":
+        # Development conveniences that shouldn't be on in production unless asked for
+        if self.AUTO_CREATE_SCHEMA is None:
+            self.AUTO_CREATE_SCHEMA = self.DEBUG
+        if self.METRICS_PROFILE_HEADER is None:
+            self.METRICS_PROFILE_HEADER = self.DEBUG
+        return self
 
 
 settings = Settings()
@@ -1,12 +1,44 @@
+from datetime import datetime
+from typing import Optional
+
 from sqlalchemy import create_engine
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
 from app.core.config import settings
+from app.core.metrics import instrument_engine
+from app.core.query_diagnostics import QueryDiagnostics
+from app.core.replicas import ReplicaRouter
+
+
+def _create_engine(url: str):
+    engine = create_engine(
+        url,
+        connect_args={"check_same_thread": False} if "sqlite" in url else {}
+    )
+    instrument_engine(engine)
+    return engine
+
+
+engine = _create_engine(settings.DATABASE_URL)
 
-engine = create_engine(
-    settings.DATABASE_URL,
-    connect_args={"check_same_thread": False} if "sqlite" in settings.DATABASE_URL else {}
+# Statement fingerprinting for N+1 / slow-query reports; records only inside a capture
+query_diagnostics = QueryDiagnostics(
+    slow_threshold_ms=settings.QUERY_SLOW_THRESHOLD_MS,
+    n_plus_one_threshold=settings.QUERY_N_PLUS_ONE_THRESHOLD
 )
+query_diagnostics.attach(engine)
+
+# Read-only endpoints read from replicas when they are current enough (see get_read_db)
+replica_router = ReplicaRouter(
+    primary=engine,
+    replicas=[_create_engine(url) for url in settings.DATABASE_REPLICA_URLS],
+    max_lag_seconds=settings.REPLICA_MAX_LAG_SECONDS,
+    sticky_seconds=settings.REPLICA_STICKY_SECONDS,
+    lag_check_seconds=settings.REPLICA_LAG_CHECK_SECONDS
+)
+for _replica in replica_router.replicas:
+    query_diagnostics.attach(_replica)
+
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 Base = declarative_base()
@@ -18,3 +50,8 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+def read_session(last_write_at: Optional[datetime] = None) -> Session:
+    """A read-only session on a replica when one has caught up to last_write_at, else the primary."""
+    return replica_router.session(last_write_at)
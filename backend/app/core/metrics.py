@@ -0,0 +1,337 @@
+import time
+import threading
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import settings
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _format_labels(labelnames: Sequence[str], values: Tuple, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(labelnames, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = tuple(labels.get(name, "") for name in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(tuple(labels.get(name, "") for name in self.labelnames), 0)
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return [
+            f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+            for key, value in items
+        ]
+
+
+class Histogram:
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS
+    ):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # label values -> [bucket counts..., +Inf count, sum]
+        self._values: Dict[Tuple, List[float]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels) -> None:
+        key = tuple(labels.get(name, "") for name in self.labelnames)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [0] * (len(self.buckets) + 2)
+            # Counts are stored per bucket and made cumulative when rendered
+            state[index] += 1
+            state[-1] += value
+
+    def count(self, **labels) -> int:
+        state = self._values.get(tuple(labels.get(name, "") for name in self.labelnames))
+        return int(sum(state[:-1])) if state else 0
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            items = sorted((key, list(state)) for key, state in self._values.items())
+        lines = []
+        for key, state in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), state[:-1]):
+                cumulative += count
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {int(cumulative)}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(state[-1])}")
+            lines.append(f"{self.name}_count{labels} {int(cumulative)}")
+        return lines
+
+
+class CallbackMetric:
+    """A counter or gauge whose value is read from a callback at scrape time."""
+
+    def __init__(self, name: str, help: str, callback: Callable[[], float], kind: str = "gauge"):
+        self.name = name
+        self.help = help
+        self.callback = callback
+        self.kind = kind
+
+    def samples(self) -> List[str]:
+        return [f"{self.name} {_format_value(self.callback())}"]
+
+
+class MetricsRegistry:
+    """
+    Minimal Prometheus text-format registry. In-process only: each worker
+    exposes its own numbers and the scraper aggregates across workers.
+    """
+
+    def __init__(self):
+        self._metrics: Dict[str, object] = {}
+
+    def counter(self, name: str, help: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, help, labelnames))
+
+    def histogram(
+        self,
+        name: str,
+        help: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS
+    ) -> Histogram:
+        return self._register(Histogram(name, help, labelnames, buckets))
+
+    def callback(self, name: str, help: str, callback: Callable[[], float], kind: str = "gauge") -> CallbackMetric:
+        return self._register(CallbackMetric(name, help, callback, kind))
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics.values():
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.samples())
+        return "\n".join(lines) + "\n"
+
+    def _register(self, metric):
+        # Re-registering returns the existing metric (module reloads, tests)
+        existing = self._metrics.get(metric.name)
+        if existing is not None:
+            return existing
+        self._metrics[metric.name] = metric
+        return metric
+
+
+registry = MetricsRegistry()
+
+HTTP_REQUEST_SECONDS = registry.histogram(
+    "fitlife_http_request_duration_seconds",
+    "Request latency by route template",
+    ["method", "route", "status"]
+)
+DB_QUERIES = registry.counter(
+    "fitlife_db_queries_total",
+    "SQL statements executed, by route",
+    ["route"]
+)
+DB_QUERY_SECONDS = registry.histogram(
+    "fitlife_db_query_duration_seconds",
+    "Time spent in individual SQL statements",
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0)
+)
+REQUEST_DB_QUERIES = registry.histogram(
+    "fitlife_request_db_queries",
+    "SQL statements issued per request",
+    ["route"],
+    buckets=(1, 2, 4, 8, 16, 32, 64, 128, 256)
+)
+PROVIDER_FETCH_SECONDS = registry.histogram(
+    "fitlife_provider_fetch_duration_seconds",
+    "Latency of provider data fetches",
+    ["provider"]
+)
+PROVIDER_FETCH_ERRORS = registry.counter(
+    "fitlife_provider_fetch_errors_total",
+    "Provider fetches that raised",
+    ["provider"]
+)
+SYNC_RECORDS = registry.counter(
+    "fitlife_sync_records_total",
+    "Daily metric rows written by provider syncs",
+    ["provider", "outcome"]
+)
+SYNC_PREPARE_BATCHES = registry.counter(
+    "fitlife_sync_prepare_batches_total",
+    "Provider payloads parsed and normalized, by where (inline, process)",
+    ["where"]
+)
+WEBHOOK_NOTIFICATIONS = registry.counter(
+    "fitlife_webhook_notifications_total",
+    "Provider webhook notifications, by outcome (queued, coalesced, unknown, rejected)",
+    ["provider", "outcome"]
+)
+DB_READ_ROUTES = registry.counter(
+    "fitlife_db_read_routes_total",
+    "Read-only sessions by target (replica, primary_sticky, primary_fallback, primary)",
+    ["target"]
+)
+
+
+class RequestStats:
+    """Per-request counters and named spans, carried in a context variable."""
+
+    __slots__ = ("route", "started", "db_queries", "db_seconds", "spans")
+
+    def __init__(self):
+        self.route = "unmatched"
+        self.started = time.perf_counter()
+        self.db_queries = 0
+        self.db_seconds = 0.0
+        self.spans: List[Tuple[str, float]] = []
+
+    def server_timing(self, total: float) -> str:
+        """Render as a Server-Timing header (durations in milliseconds)."""
+        parts = [
+            f"total;dur={total * 1000:.2f}",
+            f'db;dur={self.db_seconds * 1000:.2f};desc="{self.db_queries} queries"',
+        ]
+        parts.extend(f"{name};dur={seconds * 1000:.2f}" for name, seconds in self.spans)
+        return ", ".join(parts)
+
+
+_request_stats: ContextVar[Optional[RequestStats]] = ContextVar("fitlife_request_stats", default=None)
+
+
+def current_stats() -> Optional[RequestStats]:
+    return _request_stats.get()
+
+
+@contextmanager
+def span(name: str):
+    """Time a block and attach it to the current request's profile, if any."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        stats = _request_stats.get()
+        if stats is not None:
+            stats.spans.append((name, time.perf_counter() - started))
+
+
+def instrument_engine(engine) -> None:
+    """Count and time every statement, attributing it to the current request."""
+    from sqlalchemy import event
+
+    def before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("fitlife_query_start", []).append(time.perf_counter())
+
+    def after(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["fitlife_query_start"].pop()
+        DB_QUERY_SECONDS.observe(elapsed)
+        stats = _request_stats.get()
+        if stats is not None:
+            stats.db_queries += 1
+            stats.db_seconds += elapsed
+
+    def failed(context):
+        # after_cursor_execute never fires for a statement that raised
+        starts = context.connection.info.get("fitlife_query_start") if context.connection is not None else None
+        if starts:
+            starts.pop()
+
+    event.listen(engine, "before_cursor_execute", before)
+    event.listen(engine, "after_cursor_execute", after)
+    event.listen(engine, "handle_error", failed)
+
+
+class MetricsMiddleware:
+    """
+    Records per-route latency and DB usage. Routes are labelled by their
+    template (/api/dashboard/heatmap/{metric_type}) to keep cardinality bounded.
+
+    Requests sending `X-Profile: 1` get a Server-Timing header with total,
+    DB and named span durations when profile_header is enabled (by default,
+    whenever settings.METRICS_PROFILE_HEADER is).
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        profile_header: Optional[bool] = None,
+        exclude_paths: Sequence[str] = ("/metrics",)
+    ):
+        self.app = app
+        self.profile_header = profile_header
+        self.exclude_paths = tuple(exclude_paths)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["path"] in self.exclude_paths:
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats()
+        token = _request_stats.set(stats)
+        enabled = settings.METRICS_PROFILE_HEADER if self.profile_header is None else self.profile_header
+        profile = enabled and Headers(scope=scope).get("x-profile") not in (None, "", "0")
+        status_code = 500
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                if profile:
+                    headers = MutableHeaders(raw=list(message["headers"]))
+                    headers["server-timing"] = stats.server_timing(time.perf_counter() - stats.started)
+                    message = {**message, "headers": headers.raw}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _request_stats.reset(token)
+            route = scope.get("route")
+            stats.route = getattr(route, "path", None) or "unmatched"
+            HTTP_REQUEST_SECONDS.observe(
+                time.perf_counter() - stats.started,
+                method=scope["method"], route=stats.route, status=str(status_code)
+            )
+            DB_QUERIES.inc(stats.db_queries, route=stats.route)
+            REQUEST_DB_QUERIES.observe(stats.db_queries, route=stats.route)
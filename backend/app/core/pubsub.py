@@ -0,0 +1,92 @@
+"""
+Publish/subscribe for events that must reach whichever worker holds the
+subscriber, such as a user's SSE stream.
+
+InMemoryPubSub is the local stand-in: one broker per process, which is
+enough for a single worker and for tests (share one instance between
+several apps to simulate workers). RedisPubSub fans out across workers
+through Redis channels. get_pubsub() picks one from PUBSUB_BACKEND.
+"""
+
+import asyncio
+import json
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, Optional, Set, Tuple
+
+from app.core.config import settings
+
+
+class InMemoryPubSub:
+    def __init__(self, max_queue: int = 256):
+        self.max_queue = max_queue
+        self._subscribers: Dict[str, Set[Tuple[asyncio.AbstractEventLoop, asyncio.Queue]]] = {}
+
+    def subscriber_count(self, channel: str) -> int:
+        return len(self._subscribers.get(channel, ()))
+
+    async def publish(self, channel: str, message: Dict) -> int:
+        subscribers = list(self._subscribers.get(channel, ()))
+        current = asyncio.get_running_loop()
+        for loop, queue in subscribers:
+            if loop is current:
+                self._offer(queue, message)
+            else:
+                loop.call_soon_threadsafe(self._offer, queue, message)
+        return len(subscribers)
+
+    def _offer(self, queue: asyncio.Queue, message: Dict) -> None:
+        if queue.full():
+            queue.get_nowait()  # A stalled reader loses the oldest event, never blocks publishers
+        queue.put_nowait(message)
+
+    @asynccontextmanager
+    async def subscribe(self, channel: str) -> AsyncIterator[AsyncIterator[Dict]]:
+        entry = (asyncio.get_running_loop(), asyncio.Queue(self.max_queue))
+        self._subscribers.setdefault(channel, set()).add(entry)
+
+        async def messages():
+            while True:
+                yield await entry[1].get()
+
+        try:
+            yield messages()
+        finally:
+            subscribers = self._subscribers.get(channel)
+            subscribers.discard(entry)
+            if not subscribers:
+                del self._subscribers[channel]
+
+
+class RedisPubSub:
+    def __init__(self, url: str):
+        import redis.asyncio as redis  # deferred: only needed when Redis is the backend
+        self.redis = redis.from_url(url, decode_responses=True)
+
+    async def publish(self, channel: str, message: Dict) -> int:
+        return await self.redis.publish(channel, json.dumps(message, default=str))
+
+    @asynccontextmanager
+    async def subscribe(self, channel: str) -> AsyncIterator[AsyncIterator[Dict]]:
+        pubsub = self.redis.pubsub()
+        await pubsub.subscribe(channel)
+
+        async def messages():
+            async for raw in pubsub.listen():
+                if raw["type"] == "message":
+                    yield json.loads(raw["data"])
+
+        try:
+            yield messages()
+        finally:
+            await pubsub.unsubscribe(channel)
+            await pubsub.aclose()
+
+
+_pubsub: Optional[object] = None
+
+
+def get_pubsub():
+    global _pubsub
+    if _pubsub is None:
+        _pubsub = RedisPubSub(settings.REDIS_URL) if settings.PUBSUB_BACKEND == "redis" else InMemoryPubSub()
+    return _pubsub
@@ -0,0 +1,219 @@
+import logging
+import os
+import re
+import threading
+import time
+import traceback
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import lru_cache
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+logger = logging.getLogger("fitlife.queries")
+
+_THIS_FILE = os.path.abspath(__file__)
+_BACKEND_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(_THIS_FILE)))
+# Call sites are reported relative to the repository (backend/, tests/, ...)
+_PROJECT_ROOT = os.path.dirname(_BACKEND_ROOT)
+_LIBRARY_MARKERS = (f"{os.sep}site-packages{os.sep}", f"{os.sep}dist-packages{os.sep}")
+
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r"\b\d+(?:\.\d+)?\b")
+_PLACEHOLDER = re.compile(r"%\(\w+\)s|:\w+|\$\d+|%s|\?")
+_IN_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)*\s*\)")
+_VALUES_LIST = re.compile(r"VALUES\s*\(\?\)(?:\s*,\s*\(\?\))+", re.IGNORECASE)
+_WHITESPACE = re.compile(r"\s+")
+
+
+@lru_cache(maxsize=4096)
+def fingerprint(statement: str) -> str:
+    """
+    Normalize a SQL statement so executions that differ only in literal
+    values, bind parameters or IN-list length share one fingerprint.
+    """
+    normalized = _STRING_LITERAL.sub("?", statement)
+    normalized = _PLACEHOLDER.sub("?", normalized)
+    normalized = _NUMBER_LITERAL.sub("?", normalized)
+    normalized = _IN_LIST.sub("(?)", normalized)
+    normalized = _VALUES_LIST.sub("VALUES (?)", normalized)
+    return _WHITESPACE.sub(" ", normalized).strip()
+
+
+def _call_site() -> str:
+    """Innermost frame in application code that issued the statement."""
+    for frame in reversed(traceback.extract_stack()):
+        filename = os.path.abspath(frame.filename)
+        if (
+            filename == _THIS_FILE
+            or not filename.startswith(_PROJECT_ROOT)
+            or any(marker in filename for marker in _LIBRARY_MARKERS)
+        ):
+            continue
+        return f"{os.path.relpath(filename, _PROJECT_ROOT)}:{frame.lineno} in {frame.name}"
+    return "<unknown>"
+
+
+class QueryRecord:
+    __slots__ = ("statement", "fingerprint", "seconds", "call_site")
+
+    def __init__(self, statement: str, seconds: float, call_site: Optional[str]):
+        self.statement = statement
+        self.fingerprint = fingerprint(statement)
+        self.seconds = seconds
+        self.call_site = call_site
+
+
+class QueryReport:
+    """Statements captured for one request or task, with N+1 and slow-query analysis."""
+
+    def __init__(self, name: str, slow_threshold_ms: float, n_plus_one_threshold: int):
+        self.name = name
+        self.slow_threshold_ms = slow_threshold_ms
+        self.n_plus_one_threshold = n_plus_one_threshold
+        self.records: List[QueryRecord] = []
+
+    @property
+    def count(self) -> int:
+        return len(self.records)
+
+    @property
+    def total_seconds(self) -> float:
+        return sum(record.seconds for record in self.records)
+
+    def groups(self) -> Dict[str, List[QueryRecord]]:
+        grouped = defaultdict(list)
+        for record in self.records:
+            grouped[record.fingerprint].append(record)
+        return dict(grouped)
+
+    def n_plus_one(self) -> List[Tuple[str, int, List[str]]]:
+        """SELECT fingerprints repeated at least n_plus_one_threshold times."""
+        found = []
+        for key, records in self.groups().items():
+            if len(records) >= self.n_plus_one_threshold and key.lstrip("(").upper().startswith("SELECT"):
+                sites = Counter(record.call_site for record in records if record.call_site)
+                found.append((key, len(records), [site for site, _ in sites.most_common(3)]))
+        return sorted(found, key=lambda item: -item[1])
+
+    def slow(self) -> List[QueryRecord]:
+        threshold = self.slow_threshold_ms / 1000
+        return [record for record in self.records if record.seconds >= threshold]
+
+    @property
+    def has_problems(self) -> bool:
+        return bool(self.n_plus_one() or self.slow())
+
+    def format(self, limit: int = 10) -> str:
+        lines = [f"{self.name}: {self.count} queries in {self.total_seconds * 1000:.1f} ms"]
+        for key, count, sites in self.n_plus_one()[:limit]:
+            lines.append(f"  N+1 x{count}: {key[:200]}")
+            lines.extend(f"      at {site}" for site in sites)
+        for record in sorted(self.slow(), key=lambda r: -r.seconds)[:limit]:
+            lines.append(f"  slow {record.seconds * 1000:.1f} ms: {record.fingerprint[:200]}")
+            if record.call_site:
+                lines.append(f"      at {record.call_site}")
+        return "\n".join(lines)
+
+    def log(self, level: int = logging.WARNING) -> None:
+        if self.has_problems:
+            logger.log(level, self.format())
+
+
+_active_reports: ContextVar[Tuple[QueryReport, ...]] = ContextVar("fitlife_query_reports", default=())
+
+
+class QueryDiagnostics:
+    """
+    Engine listener that fingerprints statements into QueryReports.
+
+    Nothing is recorded unless a capture is open, so leaving it attached
+    costs a timestamp and a context variable lookup per statement.
+    capture() follows the current context (a request or task);
+    capture(process_wide=True) sees every statement on the engine, which
+    tests driving the app through a TestClient thread need.
+    """
+
+    def __init__(
+        self,
+        slow_threshold_ms: float = 100,
+        n_plus_one_threshold: int = 5,
+        capture_call_sites: bool = True
+    ):
+        self.slow_threshold_ms = slow_threshold_ms
+        self.n_plus_one_threshold = n_plus_one_threshold
+        self.capture_call_sites = capture_call_sites
+        self._process_wide: List[QueryReport] = []
+        self._lock = threading.Lock()
+        self._engines = []
+
+    def attach(self, engine) -> None:
+        from sqlalchemy import event
+
+        event.listen(engine, "before_cursor_execute", self._before)
+        event.listen(engine, "after_cursor_execute", self._after)
+        self._engines.append(engine)
+
+    def detach(self) -> None:
+        from sqlalchemy import event
+
+        for engine in self._engines:
+            event.remove(engine, "before_cursor_execute", self._before)
+            event.remove(engine, "after_cursor_execute", self._after)
+        self._engines = []
+
+    @contextmanager
+    def capture(self, name: str = "queries", process_wide: bool = False):
+        report = QueryReport(name, self.slow_threshold_ms, self.n_plus_one_threshold)
+        if process_wide:
+            with self._lock:
+                self._process_wide.append(report)
+            try:
+                yield report
+            finally:
+                with self._lock:
+                    self._process_wide.remove(report)
+            return
+
+        token = _active_reports.set(_active_reports.get() + (report,))
+        try:
+            yield report
+        finally:
+            _active_reports.reset(token)
+
+    def _reports(self) -> Sequence[QueryReport]:
+        reports = _active_reports.get()
+        if self._process_wide:
+            reports = reports + tuple(self._process_wide)
+        return reports
+
+    def _before(self, conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("fitlife_diagnostics_start", []).append(time.perf_counter())
+
+    def _after(self, conn, cursor, statement, parameters, context, executemany):
+        seconds = time.perf_counter() - conn.info["fitlife_diagnostics_start"].pop()
+        reports = self._reports()
+        if not reports:
+            return
+        call_site = _call_site() if self.capture_call_sites else None
+        for report in reports:
+            report.records.append(QueryRecord(statement, seconds, call_site))
+
+
+class QueryDiagnosticsMiddleware:
+    """Capture each request's statements and log N+1 and slow-query findings."""
+
+    def __init__(self, app: ASGIApp, diagnostics: QueryDiagnostics):
+        self.app = app
+        self.diagnostics = diagnostics
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        with self.diagnostics.capture(f"{scope['method']} {scope['path']}") as report:
+            await self.app(scope, receive, send)
+        report.log()
@@ -0,0 +1,138 @@
+"""
+Routing of read-only request sessions to database replicas.
+
+Writes, syncs and merges always use the primary. Read-only endpoints take
+their session from ReplicaRouter.session(), which picks a replica when
+one is both healthy and current enough for the user, and the primary
+otherwise.
+
+Lag is measured the same way on every backend: the primary stamps the
+single replica_heartbeats row every REPLICA_HEARTBEAT_SECONDS, and a
+replica's lag is how old the stamp it has replayed is. A replica that is
+unreachable, or further behind than max_lag_seconds, is skipped.
+
+Read-your-writes: for sticky_seconds after a user's sync, a replica
+only serves that user once it has replayed a heartbeat written after the
+sync finished; until then their reads go to the primary.
+"""
+
+import asyncio
+import itertools
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import event, select
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session, sessionmaker
+
+from app.core.metrics import DB_READ_ROUTES
+
+HEARTBEAT_ID = 1
+
+
+class ReadOnlySessionError(RuntimeError):
+    pass
+
+
+def _refuse_flush(session, flush_context, instances):
+    raise ReadOnlySessionError("Read-only session: writes must go through the primary")
+
+
+class ReplicaRouter:
+    def __init__(
+        self,
+        primary: Engine,
+        replicas: List[Engine],
+        max_lag_seconds: float = 10.0,
+        sticky_seconds: float = 30.0,
+        lag_check_seconds: float = 2.0
+    ):
+        self.primary = primary
+        self.replicas = replicas
+        self.max_lag_seconds = max_lag_seconds
+        self.sticky_seconds = sticky_seconds
+        self.lag_check_seconds = lag_check_seconds
+        self._sessions = {engine: sessionmaker(autocommit=False, autoflush=False, bind=engine)
+                          for engine in [primary, *replicas]}
+        self._replayed: Dict[Engine, Tuple[float, Optional[datetime]]] = {}  # engine -> (checked at, heartbeat)
+        self._next = itertools.cycle(range(len(replicas))) if replicas else None
+        self._lock = threading.Lock()
+
+    def beat(self, now: Optional[datetime] = None) -> datetime:
+        """Stamp the heartbeat on the primary; replicas replay it like any other write."""
+        from app.models.user import ReplicaHeartbeat
+
+        now = now or datetime.utcnow()
+        with self._sessions[self.primary]() as db:
+            heartbeat = db.get(ReplicaHeartbeat, HEARTBEAT_ID)
+            if heartbeat is None:
+                db.add(ReplicaHeartbeat(id=HEARTBEAT_ID, beat_at=now))
+            else:
+                heartbeat.beat_at = now
+            db.commit()
+        return now
+
+    async def run_heartbeat(self, interval: float) -> None:
+        while True:
+            try:
+                self.beat()
+            except SQLAlchemyError:
+                pass  # The primary being down is surfaced by the requests that need it
+            await asyncio.sleep(interval)
+
+    def replayed_at(self, engine: Engine) -> Optional[datetime]:
+        """The newest heartbeat a replica has replayed, cached for lag_check_seconds; None if unreachable."""
+        from app.models.user import ReplicaHeartbeat
+
+        checked = self._replayed.get(engine)
+        if checked is not None and time.monotonic() - checked[0] < self.lag_check_seconds:
+            return checked[1]
+        try:
+            with engine.connect() as conn:
+                replayed = conn.execute(
+                    select(ReplicaHeartbeat.beat_at).where(ReplicaHeartbeat.id == HEARTBEAT_ID)
+                ).scalar()
+        except SQLAlchemyError:
+            replayed = None
+        self._replayed[engine] = (time.monotonic(), replayed)
+        return replayed
+
+    def engine_for(self, last_write_at: Optional[datetime] = None, now: Optional[datetime] = None) -> Tuple[Engine, str]:
+        """
+        The engine to read from, and the routing reason for metrics. Replicas
+        are tried round-robin from the next in turn.
+        """
+        if not self.replicas:
+            return self.primary, "primary"
+        now = now or datetime.utcnow()
+        sticky = last_write_at is not None and now - last_write_at < timedelta(seconds=self.sticky_seconds)
+
+        with self._lock:
+            start = next(self._next)
+        behind = False
+        for offset in range(len(self.replicas)):
+            engine = self.replicas[(start + offset) % len(self.replicas)]
+            replayed = self.replayed_at(engine)
+            if replayed is None or now - replayed > timedelta(seconds=self.max_lag_seconds):
+                continue
+            if sticky and replayed < last_write_at:
+                behind = True
+                continue
+            return engine, "replica"
+        return self.primary, "primary_sticky" if behind else "primary_fallback"
+
+    def session(self, last_write_at: Optional[datetime] = None) -> Session:
+        """
+        A session for read-only work. Flushing it raises ReadOnlySessionError
+        even when it was routed to the primary, so a write slipped into a
+        read endpoint fails in development rather than on a replica.
+        """
+        engine, target = self.engine_for(last_write_at)
+        DB_READ_ROUTES.inc(target=target)
+        db = self._sessions[engine]()
+        event.listen(db, "before_flush", _refuse_flush)
+        db.info["read_target"] = target
+        return db
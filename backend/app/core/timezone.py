@@ -0,0 +1,95 @@
+from datetime import date, datetime, time, timedelta
+from typing import Iterable, List, Optional, Tuple
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+UTC = ZoneInfo("UTC")
+
+
+def get_zone(tz_name: Optional[str]) -> ZoneInfo:
+    """Resolve a user's timezone name, falling back to UTC for unknown names."""
+    if not tz_name:
+        return UTC
+    try:
+        return ZoneInfo(tz_name)
+    except (ZoneInfoNotFoundError, ValueError):
+        return UTC
+
+
+def is_valid_timezone(tz_name: str) -> bool:
+    try:
+        ZoneInfo(tz_name)
+        return True
+    except (ZoneInfoNotFoundError, ValueError):
+        return False
+
+
+def local_today(tz_name: Optional[str], now: Optional[datetime] = None) -> date:
+    """Today's calendar date in the given timezone."""
+    now = now or datetime.utcnow()
+    if now.tzinfo is None:
+        now = now.replace(tzinfo=UTC)
+    return now.astimezone(get_zone(tz_name)).date()
+
+
+def period_bounds(period: str, day: date) -> Tuple[date, date]:
+    """
+    Return the [start, end) dates of the daily/weekly/monthly period containing day.
+    Weeks start on Monday.
+    """
+    if period == "weekly":
+        start = day - timedelta(days=day.weekday())
+        return start, start + timedelta(days=7)
+    if period == "monthly":
+        start = day.replace(day=1)
+        next_month = (start + timedelta(days=32)).replace(day=1)
+        return start, next_month
+    return day, day + timedelta(days=1)
+
+
+def bucket_timestamp(value, zone: ZoneInfo) -> Tuple[datetime, date]:
+    """
+    Convert a provider timestamp into (naive UTC instant, local date key).
+    
+    - aware datetimes are converted to the user's zone
+    - naive datetimes are treated as UTC, like everything from datetime.utcnow()
+    - bare dates ("2024-03-01") are already local days; their instant is
+      anchored at local noon so a later re-bucket to a nearby zone keeps the day
+    """
+    if isinstance(value, str) and len(value) > 10:
+        value = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    
+    if isinstance(value, datetime):
+        aware = value if value.tzinfo else value.replace(tzinfo=UTC)
+        local = aware.astimezone(zone)
+        return aware.astimezone(UTC).replace(tzinfo=None), local.date()
+    
+    day = as_date(value)
+    noon = datetime.combine(day, time(12), tzinfo=zone)
+    return noon.astimezone(UTC).replace(tzinfo=None), day
+
+
+def local_day_start(day: date, zone: ZoneInfo) -> datetime:
+    """Naive UTC instant at which a local calendar day begins."""
+    return datetime.combine(day, time.min, tzinfo=zone).astimezone(UTC).replace(tzinfo=None)
+
+
+def as_date(value) -> Optional[date]:
+    """Coerce a date, datetime or ISO date string to a date."""
+    if value is None:
+        return None
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    return date.fromisoformat(str(value)[:10])
+
+
+def date_runs(days: Iterable[date]) -> List[Tuple[date, date]]:
+    """Collapse dates into sorted, inclusive (first, last) runs of consecutive days."""
+    runs: List[Tuple[date, date]] = []
+    for day in sorted(set(days)):
+        if runs and (day - runs[-1][1]).days == 1:
+            runs[-1] = (runs[-1][0], day)
+        else:
+            runs.append((day, day))
+    return runs
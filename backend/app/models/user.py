@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, Float, ForeignKey, Text, JSON
+from sqlalchemy import Column, Integer, String, Boolean, Date, DateTime, Float, ForeignKey, Text, JSON, Index, UniqueConstraint
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.core.database import Base
@@ -13,12 +13,16 @@ class User(Base):
     first_name = Column(String)
     last_name = Column(String)
     avatar_url = Column(String)
+    birth_year = Column(Integer)  # Age cohort for population percentiles
     
     # Subscription
     is_premium = Column(Boolean, default=False)
     stripe_customer_id = Column(String)
     stripe_subscription_id = Column(String)
-    subscription_expires_at = Column(DateTime)
+    subscription_expires_at = Column(DateTime)  # Current period end
+    subscription_status = Column(String)  # active, trialing, past_due, canceled, ...
+    subscription_cancel_at_period_end = Column(Boolean, default=False)
+    subscription_synced_at = Column(DateTime)  # Last webhook/reconciliation write
     
     # Settings
     timezone = Column(String, default="UTC")
@@ -33,6 +37,10 @@ class User(Base):
     connections = relationship("FitnessConnection", back_populates="user", cascade="all, delete-orphan")
     daily_metrics = relationship("DailyMetric", back_populates="user", cascade="all, delete-orphan")
     goals = relationship("Goal", back_populates="user", cascade="all, delete-orphan")
+    streaks = relationship("MetricStreak", back_populates="user", cascade="all, delete-orphan")
+    rolling_stats = relationship("RollingStat", back_populates="user", cascade="all, delete-orphan")
+    team_memberships = relationship("TeamMember", back_populates="user", cascade="all, delete-orphan")
+    percentiles = relationship("UserPercentile", back_populates="user", cascade="all, delete-orphan")
 
 
 class FitnessConnection(Base):
@@ -74,7 +82,8 @@ class DailyMetric(Base):
     
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
-    date = Column(DateTime, nullable=False)
+    date = Column(DateTime, nullable=False)  # UTC instant reported by the provider
+    local_date = Column(Date)  # Day key in the user's timezone, bucketed at ingest
     
     # Activity
     steps = Column(Integer)
@@ -124,6 +133,7 @@ class DailyMetric(Base):
     
     # Metadata
     sources = Column(JSON)  # Which devices contributed to this data
+    provenance = Column(JSON)  # {field: {provider: [raw value, fetched_at]}}; see merge_engine
     is_complete = Column(Boolean, default=False)
     
     # Timestamps
@@ -134,7 +144,8 @@ class DailyMetric(Base):
     user = relationship("User", back_populates="daily_metrics")
     
     __table_args__ = (
-        # Ensure one record per user per date
+        # Read paths are range scans on (user_id, local_date)
+        Index("ix_daily_metrics_user_local_date", "user_id", "local_date"),
         {'sqlite_autoincrement': True},
     )
 
@@ -153,6 +164,10 @@ class Goal(Base):
     start_date = Column(DateTime, nullable=False)
     end_date = Column(DateTime)
     
+    # Materialized progress: current_value covers the period starting here
+    progress_period_start = Column(Date)
+    progress_value_date = Column(Date)  # Day of the latest reading (non-additive metrics)
+    
     is_active = Column(Boolean, default=True)
     reminder_enabled = Column(Boolean, default=False)
     reminder_time = Column(String)  # HH:MM format
@@ -164,6 +179,55 @@ class Goal(Base):
     user = relationship("User", back_populates="goals")
 
 
+class MetricStreak(Base):
+    __tablename__ = "metric_streaks"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    metric_type = Column(String, nullable=False)  # steps, sleep, heart_rate, etc.
+    
+    # Threshold a day must meet (None = any recorded value counts)
+    threshold = Column(Float)
+    
+    # Most recent run of qualifying days, in the user's local calendar
+    current_streak = Column(Integer, default=0)
+    run_start_date = Column(Date)
+    last_qualified_date = Column(Date)
+    longest_streak = Column(Integer, default=0)
+    
+    updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now())
+    
+    # Relationships
+    user = relationship("User", back_populates="streaks")
+    
+    __table_args__ = (
+        UniqueConstraint("user_id", "metric_type", name="uq_metric_streaks_user_metric"),
+    )
+
+
+class RollingStat(Base):
+    __tablename__ = "rolling_stats"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    metric_type = Column(String, nullable=False)  # steps, sleep, hrv, etc.
+    
+    # Running state as of last_date; see app/services/rolling_stats.py
+    last_date = Column(Date)  # Latest local day folded in
+    window = Column(JSON)  # Last 28 daily readings, oldest first, null for days without one
+    acute_ewma = Column(Float)  # 7-day span
+    chronic_ewma = Column(Float)  # 28-day span
+    
+    updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now())
+    
+    # Relationships
+    user = relationship("User", back_populates="rolling_stats")
+    
+    __table_args__ = (
+        UniqueConstraint("user_id", "metric_type", name="uq_rolling_stats_user_metric"),
+    )
+
+
 class Workout(Base):
     __tablename__ = "workouts"
     
@@ -191,3 +255,115 @@ class Workout(Base):
     external_id = Column(String)  # Provider's workout ID
     
     created_at = Column(DateTime, server_default=func.now())
+
+
+class CohortDistribution(Base):
+    __tablename__ = "cohort_distributions"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    metric_type = Column(String, nullable=False)  # steps, sleep, heart_rate, etc.
+    period = Column(String, nullable=False)  # 30d, 90d
+    cohort = Column(String, nullable=False)  # "all" or an age band such as "30-39"
+    
+    # Distribution of per-user averages over the period
+    population = Column(Integer, default=0)  # Users with enough data to rank
+    quantiles = Column(JSON)  # [p0, p1, ..., p100]
+    sketch = Column(JSON)  # Serialized KLL sketch; merges with sketches from other shards
+    
+    as_of = Column(Date, nullable=False)  # Last local day included
+    computed_at = Column(DateTime, server_default=func.now())
+    
+    __table_args__ = (
+        UniqueConstraint("metric_type", "period", "cohort", name="uq_cohort_distributions_metric_period_cohort"),
+    )
+
+
+class UserPercentile(Base):
+    __tablename__ = "user_percentiles"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    metric_type = Column(String, nullable=False)
+    period = Column(String, nullable=False)
+    
+    cohort = Column(String, nullable=False)  # Age band, or "all" without a birth year
+    value = Column(Float)  # User's daily average over the period
+    percentile = Column(Float)  # Share of the cohort at or below value, 0-100
+    population_percentile = Column(Float)  # Same, against every user
+    population = Column(Integer)  # Users ranked in the cohort
+    
+    as_of = Column(Date, nullable=False)
+    computed_at = Column(DateTime, server_default=func.now())
+    
+    # Relationships
+    user = relationship("User", back_populates="percentiles")
+    
+    __table_args__ = (
+        # Request-time lookups are a single probe on this key
+        UniqueConstraint("user_id", "metric_type", "period", name="uq_user_percentiles_user_metric_period"),
+    )
+
+
+class Team(Base):
+    """A coach's squad or a company wellness group, viewed on one dashboard."""
+    __tablename__ = "teams"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    name = Column(String, nullable=False)
+    created_by = Column(Integer, ForeignKey("users.id"), nullable=False)
+    
+    created_at = Column(DateTime, server_default=func.now())
+    
+    # Relationships
+    members = relationship("TeamMember", back_populates="team", cascade="all, delete-orphan")
+
+
+class TeamMember(Base):
+    __tablename__ = "team_members"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    team_id = Column(Integer, ForeignKey("teams.id"), nullable=False)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    role = Column(String, nullable=False, default="member")  # member, coach or admin
+    # Invitations stay pending until the invited user accepts; only accepted members see or are seen
+    status = Column(String, nullable=False, default="accepted")  # pending or accepted
+    
+    created_at = Column(DateTime, server_default=func.now())
+    
+    # Relationships
+    team = relationship("Team", back_populates="members")
+    user = relationship("User", back_populates="team_memberships")
+    
+    __table_args__ = (
+        # Pages of a roster are range scans on team_id; user_id finds a user's teams
+        UniqueConstraint("team_id", "user_id", name="uq_team_members_team_user"),
+        Index("ix_team_members_user_id", "user_id"),
+    )
+
+
+class SyncLease(Base):
+    """
+    Cross-worker single-flight lease for a sync key such as "user:42"
+    (see app/services/sync_coordinator.py). The row outlives the sync so
+    callers that waited on another worker can read its result.
+    """
+    __tablename__ = "sync_leases"
+    
+    key = Column(String, primary_key=True)
+    owner = Column(String, nullable=False)  # Random token of the holding sync
+    expires_at = Column(DateTime, nullable=False)  # Renewed while the holder is alive
+    finished_at = Column(DateTime)  # Set on release; a finished lease is free
+    result = Column(JSON)  # Holder's sync result, for callers that attached from other workers
+    acquired_at = Column(DateTime, nullable=False)
+
+
+class ReplicaHeartbeat(Base):
+    """
+    Single row stamped by the primary every few seconds (see
+    app/core/replicas.py); the stamp a replica has replayed tells how far
+    behind it is.
+    """
+    __tablename__ = "replica_heartbeats"
+    
+    id = Column(Integer, primary_key=True)
+    beat_at = Column(DateTime, nullable=False)
@@ -1,26 +1,25 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.orm import Session
-from datetime import timedelta
+from datetime import date, timedelta
 
-from app.core.database import get_db
+from app.core.database import SessionLocal, get_db, read_session
 from app.core.auth import (
     verify_password, get_password_hash, 
     create_access_token, create_refresh_token,
     decode_token
 )
 from app.models.user import User
-from app.schemas.user import UserCreate, UserLogin, UserResponse
+from app.schemas.user import UserCreate, UserLogin, UserResponse, UserUpdate
 from app.core.config import settings
+from app.core.timezone import is_valid_timezone
+from app.services.day_buckets import rebucket_user_days
 
 router = APIRouter(prefix="/auth", tags=["Authentication"])
 security = HTTPBearer()
 
 
-def get_current_user(
-    credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: Session = Depends(get_db)
-) -> User:
+def _token_user_id(credentials: HTTPAuthorizationCredentials) -> int:
     token = credentials.credentials
     payload = decode_token(token)
     
@@ -36,8 +35,15 @@ def get_current_user(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid token payload"
         )
-    
-    user = db.query(User).filter(User.id == int(user_id)).first()
+    return int(user_id)
+
+
+def get_current_user(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: Session = Depends(get_db)
+) -> User:
+    user_id = _token_user_id(credentials)
+    user = db.query(User).filter(User.id == user_id).first()
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -47,6 +53,35 @@ def get_current_user(
     return user
 
 
+def get_read_db(current_user: User = Depends(get_current_user)):
+    """
+    Session for read-only endpoints: a replica that has replayed the
+    user's last sync, else the primary. Flushing it raises.
+    """
+    db = read_session(current_user.last_sync_at)
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+def get_current_user_id(credentials: HTTPAuthorizationCredentials = Depends(security)) -> int:
+    """
+    get_current_user for long-lived responses such as SSE streams: the
+    user is checked in a session closed straight away, rather than one
+    held by get_db until the response finishes.
+    """
+    user_id = _token_user_id(credentials)
+    with SessionLocal() as db:
+        exists = db.query(User.id).filter(User.id == user_id).first() is not None
+    if not exists:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="User not found"
+        )
+    return user_id
+
+
 @router.post("/register", response_model=UserResponse)
 def register(user_data: UserCreate, db: Session = Depends(get_db)):
     # Check if user exists
@@ -125,3 +160,46 @@ def refresh_token(credentials: HTTPAuthorizationCredentials = Depends(security))
 @router.get("/me", response_model=UserResponse)
 def get_me(current_user: User = Depends(get_current_user)):
     return current_user
+
+
+@router.patch("/me", response_model=UserResponse)
+def update_me(
+    user_update: UserUpdate,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    changes = user_update.model_dump(exclude_unset=True)
+    
+    cleared = [field for field in ("timezone", "units") if field in changes and changes[field] is None]
+    if cleared:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"{', '.join(cleared)} cannot be null"
+        )
+    
+    new_timezone = changes.get("timezone")
+    timezone_changed = new_timezone is not None and new_timezone != current_user.timezone
+    if timezone_changed and not is_valid_timezone(new_timezone):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Unknown timezone"
+        )
+    
+    birth_year = changes.get("birth_year")
+    if birth_year is not None and not 1900 <= birth_year <= date.today().year:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid birth year"
+        )
+    
+    for field, value in changes.items():
+        setattr(current_user, field, value)
+    
+    if timezone_changed:
+        # Day keys are bucketed at ingest, so move them to the new local calendar
+        rebucket_user_days(db, current_user)
+    
+    db.commit()
+    db.refresh(current_user)
+    
+    return current_user
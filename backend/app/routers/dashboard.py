@@ -1,61 +1,80 @@
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import ORJSONResponse, StreamingResponse
 from sqlalchemy.orm import Session
 from typing import List, Optional
 from datetime import datetime, timedelta
 
 from app.core.database import get_db
-from app.routers.auth import get_current_user
-from app.models.user import User, FitnessConnection, Goal
+from app.routers.auth import get_current_user, get_current_user_id, get_read_db
+from app.models.user import User, FitnessConnection, Goal, RollingStat, UserPercentile
 from app.schemas.user import (
-    DashboardSummary, DailyMetricSummary, 
-    MultiDimensionalHeatmap, FitnessConnectionResponse
+    DashboardSummary, MultiDimensionalHeatmap,
+    FitnessConnectionResponse, UserResponse
 )
 from app.services.fitness_aggregator import FitnessDataAggregator
+from app.services.goal_progress import goal_progress
+from app.services.sync_coordinator import sync_coordinator
+from app.services.sync_events import sse_stream
+from app.services.trends import analyze_trend, classify
+from app.services.rolling_stats import ROLLING_METRICS, rolling_points, snapshot
+from app.services.cohorts import COHORT_METRICS, PERIODS as COHORT_PERIODS, top_percent
+from app.services.metric_fields import METRIC_FIELDS, LOWER_IS_BETTER, metric_field
+from app.core.timezone import local_today
+from app.core.metrics import span
 
-router = APIRouter(prefix="/dashboard", tags=["Dashboard"])
+router = APIRouter(
+    prefix="/dashboard",
+    tags=["Dashboard"],
+    default_response_class=ORJSONResponse
+)
+
+# Heatmap wire formats: a list of point objects, or parallel
+# dates[]/values[]/raw[]/sources[] arrays (roughly half the bytes)
+HEATMAP_FORMAT = Query(default="rows", pattern="^(rows|columnar)$")
 
 
 @router.get("/summary", response_model=DashboardSummary)
 async def get_dashboard_summary(
+    format: str = HEATMAP_FORMAT,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
-    """Get the complete dashboard summary for the current user."""
+    """
+    Get the complete dashboard summary for the current user.
+    
+    The payload is assembled from plain dicts and encoded with orjson directly;
+    response_model only documents the default (rows) shape.
+    """
     aggregator = FitnessDataAggregator(db)
     
     # Get user's connections
-    connections = db.query(FitnessConnection).filter(
-        FitnessConnection.user_id == current_user.id,
-        FitnessConnection.is_active == True
-    ).all()
-    
-    # Get today's metrics
-    today = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
-    today_metrics = None  # Would fetch from daily_metrics
-    
-    # Calculate weekly average
-    week_ago = today - timedelta(days=7)
-    # Would calculate from daily_metrics
-    weekly_average = {
-        "steps": 8432,
-        "active_minutes": 45,
-        "sleep_hours": 7.2,
-        "resting_hr": 62
-    }
+    with span("connections"):
+        connections = db.query(FitnessConnection).filter(
+            FitnessConnection.user_id == current_user.id,
+            FitnessConnection.is_active == True
+        ).all()
     
-    # Generate heatmaps for different metrics
-    heatmaps = []
-    for metric_type in ["steps", "sleep", "heart_rate", "calories"]:
-        heatmap = aggregator.generate_heatmap_data(
-            current_user.id, metric_type, weeks=26
+    # Today's metrics and 7-day averages in one aggregate query
+    # ("today" is the user's local calendar day)
+    today = local_today(current_user.timezone)
+    with span("rollup"):
+        rollup = aggregator.get_dashboard_rollup(current_user.id, today)
+    today_metrics = rollup["today_metrics"]
+    weekly_average = rollup["weekly_average"]
+    
+    # Generate heatmaps for different metrics from one range scan
+    with span("heatmaps"):
+        heatmaps = aggregator.generate_heatmaps(
+            current_user.id, ["steps", "sleep", "heart_rate", "calories"],
+            weeks=26, today=today, columnar=format == "columnar"
         )
-        heatmaps.append(MultiDimensionalHeatmap(**heatmap))
     
-    # Get active goals
-    goals = db.query(Goal).filter(
-        Goal.user_id == current_user.id,
-        Goal.is_active == True
-    ).all()
+    # Get active goals (progress is materialized during sync)
+    with span("goals"):
+        goals = db.query(Goal).filter(
+            Goal.user_id == current_user.id,
+            Goal.is_active == True
+        ).all()
     
     # Calculate trial days remaining (if applicable)
     days_remaining = None
@@ -64,24 +83,26 @@ async def get_dashboard_summary(
         trial_days = 14
         days_remaining = max(0, trial_days - days_since_signup)
     
-    return DashboardSummary(
-        user=current_user,
-        connections=[FitnessConnectionResponse.model_validate(c) for c in connections],
-        today_metrics=today_metrics,
-        weekly_average=weekly_average,
-        heatmaps=heatmaps,
-        active_goals=[{"type": g.metric_type, "target": g.target_value} for g in goals],
-        is_premium=current_user.is_premium,
-        days_remaining_trial=days_remaining
-    )
+    with span("serialize"):
+        return ORJSONResponse({
+            "user": UserResponse.model_validate(current_user).model_dump(),
+            "connections": [FitnessConnectionResponse.model_validate(c).model_dump() for c in connections],
+            "today_metrics": today_metrics,
+            "weekly_average": weekly_average,
+            "heatmaps": heatmaps,
+            "active_goals": [goal_progress(g, today) for g in goals],
+            "is_premium": current_user.is_premium,
+            "days_remaining_trial": days_remaining
+        })
 
 
 @router.get("/heatmap/{metric_type}", response_model=MultiDimensionalHeatmap)
 async def get_heatmap(
     metric_type: str,
     weeks: int = Query(default=26, ge=4, le=52),
+    format: str = HEATMAP_FORMAT,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """
     Get heatmap data for a specific metric type.
@@ -95,9 +116,9 @@ async def get_heatmap(
     """
     aggregator = FitnessDataAggregator(db)
     heatmap_data = aggregator.generate_heatmap_data(
-        current_user.id, metric_type, weeks=weeks
+        current_user.id, metric_type, weeks=weeks, columnar=format == "columnar"
     )
-    return MultiDimensionalHeatmap(**heatmap_data)
+    return ORJSONResponse(heatmap_data)
 
 
 @router.post("/sync")
@@ -106,10 +127,34 @@ async def sync_data(
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
-    """Trigger a sync of fitness data from all connected providers."""
+    """
+    Trigger a sync of fitness data from all connected providers.
+    Concurrent calls for the same user (double taps, several devices or
+    workers) share a single sync and all receive its result.
+    """
     aggregator = FitnessDataAggregator(db)
-    result = await aggregator.sync_user_data(current_user.id, days_back=days)
-    return result
+    result, shared = await sync_coordinator.run(
+        f"user:{current_user.id}",
+        lambda: aggregator.sync_user_data(current_user.id, days_back=days)
+    )
+    return {**result, "shared": shared}
+
+
+@router.get("/sync/stream")
+async def stream_sync_events(
+    once: bool = Query(default=False, description="Close the stream after the next sync finishes"),
+    user_id: int = Depends(get_current_user_id)
+):
+    """
+    Server-sent events for the user's syncs, from any worker: per-provider
+    progress, record counts, then a data_changed event naming the metric
+    types and date ranges to refetch (see app/services/sync_events.py).
+    """
+    return StreamingResponse(
+        sse_stream(user_id, once=once),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
 
 
 @router.get("/trends")
@@ -117,34 +162,28 @@ async def get_trends(
     metric: str = Query(..., description="Metric to analyze"),
     period: str = Query(default="30d", regex="^(7d|30d|90d|1y)$"),
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """
-    Get trend analysis for a specific metric over time.
+    Least-squares trend for a metric over time: slope per day, its
+    confidence, and days that sit far off the fitted line. Aggregated in
+    the database; see app/services/trends.py.
     """
+    if metric not in METRIC_FIELDS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown metric: {metric}"
+        )
+    
     # Parse period
     period_days = {"7d": 7, "30d": 30, "90d": 90, "1y": 365}[period]
     
-    end_date = datetime.utcnow()
+    end_date = local_today(current_user.timezone)
     start_date = end_date - timedelta(days=period_days)
     
-    aggregator = FitnessDataAggregator(db)
-    metrics = aggregator.get_unified_metrics(
-        current_user.id, start_date, end_date
-    )
+    analysis = analyze_trend(db, current_user.id, metric_field(metric), start_date, end_date)
     
-    # Calculate trend
-    field_map = {
-        "steps": "steps",
-        "sleep": "sleep_duration_minutes",
-        "heart_rate": "resting_hr",
-        "calories": "active_calories"
-    }
-    
-    field = field_map.get(metric)
-    values = [getattr(m, field) for m in metrics if getattr(m, field) is not None]
-    
-    if not values:
+    if not analysis:
         return {
             "metric": metric,
             "period": period,
@@ -152,28 +191,99 @@ async def get_trends(
             "trend": "insufficient_data"
         }
     
-    # Simple trend calculation
-    avg = sum(values) / len(values)
-    first_half = values[:len(values)//2]
-    second_half = values[len(values)//2:]
+    lower_is_better = metric in LOWER_IS_BETTER
     
-    first_avg = sum(first_half) / len(first_half) if first_half else 0
-    second_avg = sum(second_half) / len(second_half) if second_half else 0
+    def rounded(value, digits=2):
+        return None if value is None else round(value, digits)
     
-    if second_avg > first_avg * 1.05:
-        trend = "improving"
-    elif second_avg < first_avg * 0.95:
-        trend = "declining"
-    else:
-        trend = "stable"
+    return {
+        "metric": metric,
+        "period": period,
+        "data_points": analysis["data_points"],
+        "average": rounded(analysis["average"]),
+        **classify(analysis, period_days, lower_is_better),
+        "slope_per_day": rounded(analysis["slope"], 4),
+        "r_squared": rounded(analysis["r_squared"], 4),
+        "confidence": rounded(analysis["confidence"], 4),
+        "outliers": analysis["outliers"],
+        "best_day": analysis["min"] if lower_is_better else analysis["max"],
+        "worst_day": analysis["max"] if lower_is_better else analysis["min"]
+    }
+
+
+@router.get("/rolling")
+async def get_rolling_stats(
+    metric: str = Query(..., description="Metric to analyze (hrv for the HRV baseline)"),
+    period: str = Query(default="30d", pattern="^(7d|30d|90d|1y)$"),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_read_db)
+):
+    """
+    Rolling 7- and 28-day averages, acute:chronic ratios and the 28-day
+    baseline band. "current" comes from state maintained during sync;
+    "series" is computed per day over the period.
+    """
+    if metric not in ROLLING_METRICS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown metric: {metric}"
+        )
+    
+    period_days = {"7d": 7, "30d": 30, "90d": 90, "1y": 365}[period]
+    end_date = local_today(current_user.timezone)
+    start_date = end_date - timedelta(days=period_days - 1)
+    
+    stat = db.query(RollingStat).filter(
+        RollingStat.user_id == current_user.id,
+        RollingStat.metric_type == metric
+    ).first()
     
     return {
         "metric": metric,
         "period": period,
-        "data_points": len(values),
-        "average": round(avg, 2),
-        "trend": trend,
-        "change_percent": round(((second_avg - first_avg) / first_avg) * 100, 2) if first_avg else 0,
-        "best_day": max(values) if metric != "heart_rate" else min(values),
-        "worst_day": min(values) if metric != "heart_rate" else max(values)
+        "current": snapshot(stat, end_date),
+        "series": rolling_points(db, current_user.id, metric, start_date, end_date)
+    }
+
+
+@router.get("/percentiles")
+async def get_percentiles(
+    period: str = Query(default="30d", pattern=f"^({'|'.join(COHORT_PERIODS)})$"),
+    metric: Optional[str] = Query(default=None, description="Limit to one metric"),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_read_db)
+):
+    """
+    Where the user stands among users their age ("top 20% for steps").
+    Reads rows precomputed by scripts/compute_cohorts.py; no population
+    data is scanned at request time.
+    """
+    if metric is not None and metric not in COHORT_METRICS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown metric: {metric}"
+        )
+    
+    query = db.query(UserPercentile).filter(
+        UserPercentile.user_id == current_user.id,
+        UserPercentile.period == period
+    )
+    if metric is not None:
+        query = query.filter(UserPercentile.metric_type == metric)
+    rows = query.all()
+    
+    return {
+        "period": period,
+        "as_of": rows[0].as_of.isoformat() if rows else None,
+        "metrics": {
+            row.metric_type: {
+                "cohort": row.cohort,
+                "value": row.value,
+                "percentile": row.percentile,
+                "top_percent": top_percent(row.metric_type, row.percentile),
+                "population_percentile": row.population_percentile,
+                "cohort_size": row.population
+            }
+            for row in rows
+        }
     }
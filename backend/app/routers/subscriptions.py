@@ -57,7 +57,11 @@ def create_checkout_session(
 
 @router.get("/status")
 def get_subscription_status(current_user: User = Depends(get_current_user)):
-    """Get the current subscription status."""
+    """
+    Get the current subscription status.
+    Served from the locally cached state written by webhooks and reconciliation,
+    so this never round-trips to Stripe.
+    """
     if not current_user.stripe_subscription_id:
         return {
             "is_premium": False,
@@ -65,14 +69,12 @@ def get_subscription_status(current_user: User = Depends(get_current_user)):
             "has_customer_id": bool(current_user.stripe_customer_id)
         }
     
-    status = SubscriptionService.get_subscription_status(
-        current_user.stripe_subscription_id
-    )
-    
     return {
         "is_premium": current_user.is_premium,
-        "stripe_status": status,
-        "subscription_id": current_user.stripe_subscription_id
+        "stripe_status": current_user.subscription_status or "unknown",
+        "subscription_id": current_user.stripe_subscription_id,
+        "current_period_end": current_user.subscription_expires_at,
+        "cancel_at_period_end": bool(current_user.subscription_cancel_at_period_end)
     }
 
 
@@ -140,16 +142,24 @@ async def stripe_webhook(
         ).first()
         
         if user:
-            if result["type"] == "customer.subscription.created":
+            if result["type"] in (
+                "customer.subscription.created",
+                "customer.subscription.updated"
+            ):
                 user.stripe_subscription_id = result.get("subscription_id")
-                if result.get("status") == "active":
-                    user.is_premium = True
-                    
-            elif result["type"] == "customer.subscription.updated":
-                user.is_premium = result.get("status") == "active"
+                SubscriptionService.apply_subscription_state(
+                    user,
+                    result.get("status"),
+                    result.get("current_period_end"),
+                    result.get("cancel_at_period_end")
+                )
                 
             elif result["type"] == "customer.subscription.deleted":
-                user.is_premium = False
+                SubscriptionService.apply_subscription_state(
+                    user,
+                    result.get("status"),
+                    result.get("current_period_end")
+                )
                 user.stripe_subscription_id = None
                 
             elif result["type"] == "invoice.payment_failed":
@@ -0,0 +1,193 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import ORJSONResponse
+from sqlalchemy.orm import Session
+
+from app.core.database import get_db
+from app.routers.auth import get_current_user, get_read_db
+from app.models.user import User, Team, TeamMember
+from app.schemas.user import MembershipStatus, TeamCreate, TeamMemberAdd, TeamRole
+from app.services.team_dashboard import team_dashboard
+
+router = APIRouter(
+    prefix="/teams",
+    tags=["Teams"],
+    default_response_class=ORJSONResponse
+)
+
+# Roles that may see other members' data
+STAFF_ROLES = {TeamRole.COACH.value, TeamRole.ADMIN.value}
+
+
+def _membership(db: Session, team_id: int, user: User, roles: set) -> TeamMember:
+    """
+    The caller's accepted membership of a team, if their role is one of
+    `roles`. Non-members and invitees get a 404 so team ids can't be probed.
+    """
+    membership = db.query(TeamMember).filter(
+        TeamMember.team_id == team_id,
+        TeamMember.user_id == user.id,
+        TeamMember.status == MembershipStatus.ACCEPTED.value
+    ).first()
+    if not membership:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Team not found"
+        )
+    if membership.role not in roles:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Requires a coach or admin role on this team"
+        )
+    return membership
+
+
+def _invitation(db: Session, team_id: int, user: User) -> TeamMember:
+    """The user's pending invitation to a team."""
+    invitation = db.query(TeamMember).filter(
+        TeamMember.team_id == team_id,
+        TeamMember.user_id == user.id,
+        TeamMember.status == MembershipStatus.PENDING.value
+    ).first()
+    if not invitation:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Invitation not found"
+        )
+    return invitation
+
+
+def _teams_of(db: Session, user: User, membership_status: MembershipStatus) -> list:
+    """The user's teams whose membership has the given status, by name."""
+    rows = db.query(Team.id, Team.name, TeamMember.role).join(
+        TeamMember, TeamMember.team_id == Team.id
+    ).filter(
+        TeamMember.user_id == user.id,
+        TeamMember.status == membership_status.value
+    ).order_by(Team.name).all()
+    return [{"id": team_id, "name": name, "role": role} for team_id, name, role in rows]
+
+
+@router.post("", status_code=status.HTTP_201_CREATED)
+def create_team(
+    team_data: TeamCreate,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Create a team; the creator becomes its admin."""
+    team = Team(name=team_data.name, created_by=current_user.id)
+    team.members.append(TeamMember(user_id=current_user.id, role=TeamRole.ADMIN.value))
+    db.add(team)
+    db.commit()
+    return {"id": team.id, "name": team.name, "role": TeamRole.ADMIN.value}
+
+
+@router.get("")
+def list_teams(
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Teams the current user belongs to, with their role on each."""
+    return _teams_of(db, current_user, MembershipStatus.ACCEPTED)
+
+
+@router.get("/invitations")
+def list_invitations(
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Teams the current user has been invited to and hasn't answered yet."""
+    return _teams_of(db, current_user, MembershipStatus.PENDING)
+
+
+@router.post("/{team_id}/members", status_code=status.HTTP_202_ACCEPTED)
+def add_member(
+    team_id: int,
+    member_data: TeamMemberAdd,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Invite a user to the team (admins only). They join once they accept.
+    The response is the same whether or not the email has an account, or
+    is already on the team, so the endpoint can't be used to probe emails.
+    """
+    _membership(db, team_id, current_user, {TeamRole.ADMIN.value})
+    
+    user = db.query(User).filter(User.email == member_data.email).first()
+    if user:
+        exists = db.query(TeamMember.id).filter(
+            TeamMember.team_id == team_id,
+            TeamMember.user_id == user.id
+        ).first()
+        if not exists:
+            db.add(TeamMember(
+                team_id=team_id, user_id=user.id, role=member_data.role.value,
+                status=MembershipStatus.PENDING.value
+            ))
+            db.commit()
+    return {"team_id": team_id, "email": member_data.email, "role": member_data.role.value, "status": "invited"}
+
+
+@router.post("/{team_id}/accept")
+def accept_invitation(
+    team_id: int,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Accept a pending invitation; the team's staff see the user from then on."""
+    invitation = _invitation(db, team_id, current_user)
+    invitation.status = MembershipStatus.ACCEPTED.value
+    db.commit()
+    return {"id": team_id, "name": invitation.team.name, "role": invitation.role}
+
+
+@router.post("/{team_id}/decline", status_code=status.HTTP_204_NO_CONTENT)
+def decline_invitation(
+    team_id: int,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Decline a pending invitation."""
+    db.delete(_invitation(db, team_id, current_user))
+    db.commit()
+
+
+@router.delete("/{team_id}/members/{user_id}", status_code=status.HTTP_204_NO_CONTENT)
+def remove_member(
+    team_id: int,
+    user_id: int,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Remove a member from the team (admins only)."""
+    _membership(db, team_id, current_user, {TeamRole.ADMIN.value})
+    
+    deleted = db.query(TeamMember).filter(
+        TeamMember.team_id == team_id,
+        TeamMember.user_id == user_id
+    ).delete()
+    if not deleted:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Member not found"
+        )
+    db.commit()
+
+
+@router.get("/{team_id}/dashboard")
+def get_team_dashboard(
+    team_id: int,
+    page: int = Query(default=1, ge=1),
+    page_size: int = Query(default=50, ge=1, le=200),
+    current_user: User = Depends(get_current_user),
+    primary: Session = Depends(get_db),
+    db: Session = Depends(get_read_db)
+):
+    """
+    One page of the team roster, each member with today's steps, 7-day
+    averages, week-over-week step change and logging consistency. The
+    query count doesn't grow with the page or team size.
+    """
+    # Access is checked on the primary so a just-granted role works at once
+    _membership(primary, team_id, current_user, STAFF_ROLES)
+    return team_dashboard(db, team_id, page=page, page_size=page_size)
@@ -0,0 +1,116 @@
+import json
+from typing import List, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from sqlalchemy import or_
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.database import get_db
+from app.core.metrics import WEBHOOK_NOTIFICATIONS
+from app.models.user import FitnessConnection
+from app.services.provider_webhooks import (
+    PARSERS,
+    Notification,
+    coalescer,
+    verify_fitbit_signature,
+    verify_garmin_signature,
+    verify_oura_signature,
+)
+
+router = APIRouter(prefix="/webhooks", tags=["Provider Webhooks"])
+
+
+def _require_secret(secret: Optional[str], provider: str) -> str:
+    if not secret:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=f"{provider} webhooks are not configured"
+        )
+    return secret
+
+
+def _reject(provider: str):
+    WEBHOOK_NOTIFICATIONS.inc(provider=provider, outcome="rejected")
+    return HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid signature")
+
+
+def _enqueue(db: Session, provider: str, body: bytes) -> dict:
+    """Resolve notifications to active connections (one query) and hand their dates to the coalescer."""
+    try:
+        notifications: List[Notification] = PARSERS[provider](json.loads(body))
+    except (ValueError, TypeError, AttributeError, KeyError):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Malformed notification")
+    if not notifications:
+        return {"queued": 0}
+
+    user_ids = {n.provider_user_id for n in notifications if n.provider_user_id}
+    tokens = {n.access_token for n in notifications if n.access_token}
+    connections = db.query(FitnessConnection).filter(
+        FitnessConnection.provider == provider,
+        FitnessConnection.is_active == True,
+        or_(FitnessConnection.provider_user_id.in_(user_ids), FitnessConnection.access_token.in_(tokens))
+    ).all()
+    by_user_id = {conn.provider_user_id: conn for conn in connections if conn.provider_user_id}
+    by_token = {conn.access_token: conn for conn in connections if conn.access_token}
+
+    queued = 0
+    for notification in notifications:
+        conn = by_user_id.get(notification.provider_user_id) or by_token.get(notification.access_token)
+        if conn is None:
+            # Acknowledge anyway: a non-2xx makes providers retry, then disable the subscription
+            WEBHOOK_NOTIFICATIONS.inc(provider=provider, outcome="unknown")
+            continue
+        opened = coalescer.notify(conn.id, notification.dates)
+        WEBHOOK_NOTIFICATIONS.inc(provider=provider, outcome="queued" if opened else "coalesced")
+        queued += 1
+    return {"queued": queued}
+
+
+@router.get("/fitbit", status_code=status.HTTP_204_NO_CONTENT)
+def verify_fitbit_subscriber(verify: str = Query(...)):
+    """Fitbit subscriber verification: 204 for the configured code, 404 otherwise."""
+    if not settings.FITBIT_SUBSCRIBER_VERIFICATION_CODE or verify != settings.FITBIT_SUBSCRIBER_VERIFICATION_CODE:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Unknown verification code")
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
+
+
+@router.post("/fitbit", status_code=status.HTTP_204_NO_CONTENT)
+async def fitbit_notification(request: Request, db: Session = Depends(get_db)):
+    """Fitbit Subscriptions API notifications (expects a 204 within 5 seconds)."""
+    secret = _require_secret(settings.FITBIT_CLIENT_SECRET, "Fitbit")
+    body = await request.body()
+    if not verify_fitbit_signature(body, request.headers.get("X-Fitbit-Signature"), secret):
+        raise _reject("fitbit")
+    _enqueue(db, "fitbit", body)
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
+
+
+@router.post("/garmin")
+async def garmin_notification(request: Request, db: Session = Depends(get_db)):
+    """Garmin Health API push and ping notifications."""
+    secret = _require_secret(settings.GARMIN_CONSUMER_SECRET, "Garmin")
+    body = await request.body()
+    if not verify_garmin_signature(body, request.headers.get("X-Garmin-Signature"), secret):
+        raise _reject("garmin")
+    return _enqueue(db, "garmin", body)
+
+
+@router.get("/oura")
+def verify_oura_subscription(verification_token: str = Query(...), challenge: str = Query(...)):
+    """Oura webhook subscription handshake: echo the challenge for our token."""
+    expected = settings.OURA_WEBHOOK_VERIFICATION_TOKEN
+    if not expected or verification_token != expected:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid verification token")
+    return {"challenge": challenge}
+
+
+@router.post("/oura")
+async def oura_notification(request: Request, db: Session = Depends(get_db)):
+    """Oura API v2 webhook events."""
+    secret = _require_secret(settings.OURA_CLIENT_SECRET, "Oura")
+    body = await request.body()
+    signature = request.headers.get("x-oura-signature")
+    if not verify_oura_signature(body, signature, request.headers.get("x-oura-timestamp"), secret):
+        raise _reject("oura")
+    return _enqueue(db, "oura", body)
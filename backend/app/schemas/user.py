@@ -33,6 +33,7 @@ class UserUpdate(BaseModel):
     last_name: Optional[str] = None
     timezone: Optional[str] = None
     units: Optional[str] = None
+    birth_year: Optional[int] = None
 
 
 class UserResponse(UserBase):
@@ -41,6 +42,7 @@ class UserResponse(UserBase):
     is_premium: bool
     timezone: str
     units: str
+    birth_year: Optional[int] = None
     created_at: datetime
     last_sync_at: Optional[datetime]
     
@@ -97,7 +99,8 @@ class MultiDimensionalHeatmap(BaseModel):
     data: List[HeatmapDataPoint]
     average: float
     best_day: Optional[HeatmapDataPoint]
-    streak_days: int
+    streak_days: int  # Current run of qualifying days (alive through yesterday)
+    longest_streak: int = 0
 
 
 class DashboardSummary(BaseModel):
@@ -109,3 +112,23 @@ class DashboardSummary(BaseModel):
     active_goals: List[dict]
     is_premium: bool
     days_remaining_trial: Optional[int]
+
+
+class TeamRole(str, Enum):
+    MEMBER = "member"
+    COACH = "coach"
+    ADMIN = "admin"
+
+
+class MembershipStatus(str, Enum):
+    PENDING = "pending"
+    ACCEPTED = "accepted"
+
+
+class TeamCreate(BaseModel):
+    name: str
+
+
+class TeamMemberAdd(BaseModel):
+    email: EmailStr
+    role: TeamRole = TeamRole.MEMBER
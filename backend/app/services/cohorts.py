@@ -0,0 +1,241 @@
+"""
+Population percentiles per metric, period and age cohort.
+
+The batch job (scripts/compute_cohorts.py) streams daily_metrics in user-id
+chunks, reduces each user to a daily average per metric and period, and
+feeds those averages into one KLL sketch per (metric, period, cohort).
+Chunk sketches merge into population sketches, so chunks can run in
+separate processes, or on separate shards, and be combined afterwards.
+Each user's standing is then written to user_percentiles, which the API
+reads with a single keyed lookup.
+"""
+
+import multiprocessing
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import delete, func, insert, select
+
+from app.models.user import User, DailyMetric, CohortDistribution, UserPercentile
+from app.services.metric_fields import LOWER_IS_BETTER, metric_field
+from app.services.quantile_sketch import KLLSketch
+
+COHORT_METRICS = ("steps", "sleep", "heart_rate", "active_minutes", "calories")
+PERIODS = {"30d": 30, "90d": 90}
+ALL_COHORT = "all"
+# (minimum age, label), oldest first; under-18s are only ranked in "all"
+AGE_BANDS = ((60, "60+"), (50, "50-59"), (40, "40-49"), (30, "30-39"), (18, "18-29"))
+SKETCH_K = 200
+MIN_DAYS_FRACTION = 0.25  # Share of the period with readings before a user is ranked
+QUANTILE_POINTS = 101  # p0..p100 stored per distribution
+INSERT_BATCH = 10_000
+
+SketchKey = Tuple[str, str, str]  # (metric, period, cohort)
+UserValue = Tuple[int, str, str, str, float]  # (user_id, metric, period, cohort, value)
+
+
+def age_band(birth_year: Optional[int], as_of: date) -> Optional[str]:
+    if not birth_year:
+        return None
+    age = as_of.year - birth_year
+    for minimum, label in AGE_BANDS:
+        if age >= minimum:
+            return label
+    return None
+
+
+def min_days(period_days: int) -> int:
+    return max(3, int(period_days * MIN_DAYS_FRACTION))
+
+
+def top_percent(metric_type: str, percentile: float) -> int:
+    """'Top N%' for a stored percentile, honouring the metric's direction."""
+    # Share of the cohort the user is at least as good as
+    standing = 100 - percentile if metric_type in LOWER_IS_BETTER else percentile
+    return max(1, min(100, int(round(100 - standing))))
+
+
+def chunk_stats(
+    conn,
+    first_id: int,
+    last_id: int,
+    as_of: date,
+    metrics: Sequence[str] = COHORT_METRICS,
+    periods: Dict[str, int] = PERIODS,
+    k: int = SKETCH_K
+) -> Tuple[Dict[SketchKey, KLLSketch], List[UserValue]]:
+    """
+    Sketch one user-id range. One grouped query per period reduces the
+    chunk's rows to per-user averages in the database.
+    """
+    sketches: Dict[SketchKey, KLLSketch] = {}
+    user_values: List[UserValue] = []
+
+    for period, days in periods.items():
+        aggregates = []
+        for metric in metrics:
+            # Zero means "no reading" for these sensors; keep it out of averages
+            column = func.nullif(getattr(DailyMetric, metric_field(metric)), 0)
+            aggregates.extend([func.avg(column), func.count(column)])
+
+        query = (
+            select(DailyMetric.user_id, User.birth_year, *aggregates)
+            .join(User, User.id == DailyMetric.user_id)
+            .where(
+                DailyMetric.user_id.between(first_id, last_id),
+                DailyMetric.local_date > as_of - timedelta(days=days),
+                DailyMetric.local_date <= as_of
+            )
+            .group_by(DailyMetric.user_id, User.birth_year)
+        )
+
+        required = min_days(days)
+        for row in conn.execute(query):
+            band = age_band(row.birth_year, as_of)
+            cohorts = (ALL_COHORT, band) if band else (ALL_COHORT,)
+            for index, metric in enumerate(metrics):
+                average, count = row[2 + 2 * index], row[3 + 2 * index]
+                if count < required:
+                    continue
+                value = float(average)
+                for cohort in cohorts:
+                    key = (metric, period, cohort)
+                    if key not in sketches:
+                        sketches[key] = KLLSketch(k=k, seed=first_id)
+                    sketches[key].update(value)
+                user_values.append((row.user_id, metric, period, band or ALL_COHORT, value))
+
+    return sketches, user_values
+
+
+def _chunk_task(task: Dict) -> Tuple[Dict[SketchKey, Dict], List[UserValue]]:
+    """Worker entry point: sketch one chunk over its own connection."""
+    from sqlalchemy import create_engine
+
+    engine = create_engine(task["database_url"])
+    try:
+        with engine.connect() as conn:
+            sketches, user_values = chunk_stats(
+                conn, task["first_id"], task["last_id"], task["as_of"],
+                task["metrics"], task["periods"], task["k"]
+            )
+    finally:
+        engine.dispose()
+    return {key: sketch.to_dict() for key, sketch in sketches.items()}, user_values
+
+
+def merge_sketches(into: Dict[SketchKey, KLLSketch], sketches: Dict) -> Dict[SketchKey, KLLSketch]:
+    """Merge a chunk's (or shard's) sketches, serialized or not, into `into`."""
+    for key, sketch in sketches.items():
+        if isinstance(sketch, dict):
+            sketch = KLLSketch.from_dict(sketch)
+        if key in into:
+            into[key].merge(sketch)
+        else:
+            into[key] = sketch
+    return into
+
+
+def compute_cohorts(
+    engine,
+    as_of: Optional[date] = None,
+    workers: int = 1,
+    chunk_users: int = 5000,
+    metrics: Sequence[str] = COHORT_METRICS,
+    periods: Dict[str, int] = PERIODS,
+    k: int = SKETCH_K
+) -> Dict:
+    """
+    Rebuild cohort distributions and user percentiles for the periods
+    ending on `as_of` (default: yesterday, the last complete day).
+    """
+    as_of = as_of or datetime.utcnow().date() - timedelta(days=1)
+
+    with engine.connect() as conn:
+        first, last = conn.execute(select(func.min(User.id), func.max(User.id))).one()
+
+    tasks = [] if first is None else [{
+        "first_id": lo,
+        "last_id": min(lo + chunk_users - 1, last),
+        "as_of": as_of,
+        "metrics": tuple(metrics),
+        "periods": dict(periods),
+        "k": k,
+        "database_url": engine.url.render_as_string(hide_password=False),
+    } for lo in range(first, last + 1, chunk_users)]
+
+    merged: Dict[SketchKey, KLLSketch] = {}
+    user_values: List[UserValue] = []
+    if workers > 1 and len(tasks) > 1:
+        with multiprocessing.get_context("spawn").Pool(workers) as pool:
+            for sketches, values in pool.imap_unordered(_chunk_task, tasks):
+                merge_sketches(merged, sketches)
+                user_values.extend(values)
+    else:
+        with engine.connect() as conn:
+            for task in tasks:
+                sketches, values = chunk_stats(
+                    conn, task["first_id"], task["last_id"], as_of, metrics, periods, k
+                )
+                merge_sketches(merged, sketches)
+                user_values.extend(values)
+
+    stats = write_results(engine, merged, user_values, as_of, metrics, periods)
+    stats["chunks"] = len(tasks)
+    return stats
+
+
+def write_results(
+    engine,
+    sketches: Dict[SketchKey, KLLSketch],
+    user_values: List[UserValue],
+    as_of: date,
+    metrics: Sequence[str] = COHORT_METRICS,
+    periods: Dict[str, int] = PERIODS
+) -> Dict:
+    """Replace the stored distributions and percentiles for these metrics/periods."""
+    computed_at = datetime.utcnow()
+    distribution_rows = [{
+        "metric_type": metric,
+        "period": period,
+        "cohort": cohort,
+        "population": sketch.n,
+        "quantiles": sketch.quantiles(QUANTILE_POINTS),
+        "sketch": sketch.to_dict(),
+        "as_of": as_of,
+        "computed_at": computed_at,
+    } for (metric, period, cohort), sketch in sorted(sketches.items())]
+
+    percentile_rows = []
+    for user_id, metric, period, cohort, value in user_values:
+        cohort_sketch = sketches[(metric, period, cohort)]
+        percentile_rows.append({
+            "user_id": user_id,
+            "metric_type": metric,
+            "period": period,
+            "cohort": cohort,
+            "value": round(value, 2),
+            "percentile": round(cohort_sketch.rank(value) * 100, 1),
+            "population_percentile": round(sketches[(metric, period, ALL_COHORT)].rank(value) * 100, 1),
+            "population": cohort_sketch.n,
+            "as_of": as_of,
+            "computed_at": computed_at,
+        })
+
+    # One transaction, so readers never see a half-written population
+    with engine.begin() as conn:
+        for model in (CohortDistribution, UserPercentile):
+            conn.execute(delete(model).where(
+                model.metric_type.in_(list(metrics)), model.period.in_(list(periods))
+            ))
+        if distribution_rows:
+            conn.execute(insert(CohortDistribution), distribution_rows)
+        for start in range(0, len(percentile_rows), INSERT_BATCH):
+            conn.execute(insert(UserPercentile), percentile_rows[start:start + INSERT_BATCH])
+
+    return {
+        "as_of": as_of.isoformat(),
+        "users_ranked": len({row["user_id"] for row in percentile_rows}),
+        "distributions": len(distribution_rows),
+        "percentiles": len(percentile_rows),
+    }
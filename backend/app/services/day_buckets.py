@@ -0,0 +1,100 @@
+from datetime import date
+from typing import Dict, List, Optional
+from collections import defaultdict
+from sqlalchemy.orm import Session
+from app.models.user import User, DailyMetric, Goal, MetricStreak, RollingStat
+from app.core.timezone import get_zone, bucket_timestamp
+from app.services.goal_progress import GoalProgressEngine
+from app.services.merge_engine import MergeEngine
+from app.services.rolling_stats import RollingIndex
+from app.services.streaks import StreakIndex
+
+
+def rebucket_user_days(
+    db: Session,
+    user: User,
+    timezone: Optional[str] = None,
+    chunk_size: int = 1000
+) -> Dict:
+    """
+    Recompute the local day key of every DailyMetric row for a user, e.g. after
+    they change timezone. Rows keep their UTC instant; only local_date moves.
+    Rows that land on the same local day (two provider days collapsing after
+    a large offset change) are folded into one by the merge engine.
+    Goal progress and streaks are rebuilt afterwards since both are keyed by day.
+    """
+    zone = get_zone(timezone or user.timezone)
+    
+    rows = db.query(DailyMetric.id, DailyMetric.date, DailyMetric.local_date).filter(
+        DailyMetric.user_id == user.id
+    ).order_by(DailyMetric.id).all()
+    
+    by_day = defaultdict(list)
+    for row_id, instant, old_day in rows:
+        _, new_day = bucket_timestamp(instant, zone)
+        by_day[new_day].append((row_id, old_day))
+    
+    updates = []
+    collided = {}
+    moved = 0
+    for new_day, group in by_day.items():
+        moved += sum(1 for _, old_day in group if old_day != new_day)
+        if len(group) > 1:
+            collided[new_day] = [row_id for row_id, _ in group]
+        elif group[0][1] != new_day:
+            updates.append({"id": group[0][0], "local_date": new_day})
+    
+    for i in range(0, len(updates), chunk_size):
+        db.bulk_update_mappings(DailyMetric, updates[i:i + chunk_size])
+    
+    folded = _fold_collisions(db, collided)
+    
+    if updates or folded:
+        _rebuild_day_keyed_state(db, user)
+    
+    db.commit()
+    return {
+        "user_id": user.id,
+        "rows": len(rows),
+        "rebucketed": moved,
+        "collisions": len(collided),
+        "folded": folded
+    }
+
+
+def _fold_collisions(db: Session, collided: Dict[date, List[int]]) -> int:
+    """Keep the oldest row of each colliding day, fold the others into it and delete them."""
+    if not collided:
+        return 0
+    ids = [row_id for group in collided.values() for row_id in group]
+    metrics = {metric.id: metric for metric in db.query(DailyMetric).filter(DailyMetric.id.in_(ids))}
+    merge_engine = MergeEngine()
+    folded = 0
+    for new_day, group in collided.items():
+        keep = metrics[group[0]]
+        keep.local_date = new_day
+        # Later instants are the more recent reports for the day; fold them last
+        for row_id in sorted(group[1:], key=lambda row_id: metrics[row_id].date):
+            merge_engine.fold(keep, metrics[row_id])
+            db.delete(metrics[row_id])
+            folded += 1
+    db.flush()
+    return folded
+
+
+def _rebuild_day_keyed_state(db: Session, user: User) -> None:
+    goals = db.query(Goal).filter(
+        Goal.user_id == user.id,
+        Goal.is_active == True
+    ).all()
+    for goal in goals:
+        goal.progress_period_start = None
+    GoalProgressEngine(db).apply(user, [], goals=goals)
+    
+    index = StreakIndex(db)
+    for streak in db.query(MetricStreak).filter(MetricStreak.user_id == user.id).all():
+        index.rebuild(user.id, streak.metric_type, streak.threshold, streak)
+    
+    rolling = RollingIndex(db)
+    for stat in db.query(RollingStat).filter(RollingStat.user_id == user.id).all():
+        rolling.rebuild(user.id, stat.metric_type, stat)
@@ -1,9 +1,25 @@
-from typing import List, Dict, Optional
-from datetime import datetime, timedelta
+from typing import TYPE_CHECKING, Awaitable, Iterable, List, Dict, Optional, Set, Tuple, Union
+from datetime import date, datetime, timedelta
+from sqlalchemy import func, case
 from sqlalchemy.orm import Session
-from app.models.user import User, DailyMetric, FitnessConnection
-import httpx
+from app.models.user import User, DailyMetric, FitnessConnection, Goal, MetricStreak
+from app.services.goal_progress import GoalProgressEngine
+from app.services.streaks import StreakIndex, current_streak_as_of
+from app.services.rolling_stats import RollingIndex
+from app.services.merge_engine import MergeEngine
+from app.services.sync_engine import Payload, PreparedBatch, SyncEngine, prepare_records, sync_engine
+from app.services.token_manager import ReauthRequired, TokenManager, token_manager
+from app.services.sync_events import ChangedRanges, SyncEventPublisher
+from app.services.metric_fields import TRACKED_FIELDS, metric_field
+from app.core.timezone import UTC, get_zone, local_today, local_day_start, as_date, date_runs
+from app.core.metrics import PROVIDER_FETCH_SECONDS, PROVIDER_FETCH_ERRORS, SYNC_RECORDS, span
+from app.core.config import settings
+from app.core.pubsub import get_pubsub
 import asyncio
+import time
+
+if TYPE_CHECKING:
+    import httpx
 
 
 class FitnessDataAggregator:
@@ -12,8 +28,22 @@ class FitnessDataAggregator:
     Handles normalization, conflict resolution, and data merging.
     """
     
-    def __init__(self, db: Session):
+    def __init__(
+        self,
+        db: Session,
+        http_client: Optional["httpx.AsyncClient"] = None,
+        tokens: Optional[TokenManager] = None,
+        pubsub=None,
+        engine: Optional[SyncEngine] = None
+    ):
         self.db = db
+        # Injectable so benchmarks and tests can swap in fake provider transports
+        self.http_client = http_client
+        self.tokens = tokens or token_manager
+        self.pubsub = pubsub if pubsub is not None else get_pubsub()
+        self.engine = engine or sync_engine
+        self.merge_engine = MergeEngine()
+        self._changed: Optional[ChangedRanges] = None  # Days/metrics whose unified values moved this sync
     
     async def sync_user_data(self, user_id: int, days_back: int = 30) -> Dict:
         """
@@ -36,47 +66,239 @@ class FitnessDataAggregator:
             "records_updated": 0
         }
         
-        end_date = datetime.utcnow()
-        start_date = end_date - timedelta(days=days_back)
+        # Sync window covers whole local days in the user's timezone
+        zone = get_zone(user.timezone)
+        today = local_today(user.timezone)
+        start_date = local_day_start(today - timedelta(days=days_back), zone)
+        end_date = local_day_start(today + timedelta(days=1), zone)
         
-        for conn in connections:
+        self._mark_syncing(connections)
+        try:
+            events = await self._start_events(user_id, [conn.provider for conn in connections], start_date, end_date)
+            owns_client = self.http_client is None
+            if owns_client:
+                import httpx  # deferred: only syncs need it, and it's slow to import
+                self.http_client = httpx.AsyncClient(timeout=settings.PROVIDER_HTTP_TIMEOUT_SECONDS)
+            
             try:
-                provider_data = await self._fetch_from_provider(conn, start_date, end_date)
-                if provider_data:
-                    stats = await self._merge_provider_data(user_id, conn.provider, provider_data)
-                    results["records_created"] += stats["created"]
-                    results["records_updated"] += stats["updated"]
-                    results["synced_providers"].append(conn.provider)
-                    
-                    # Update connection status
-                    conn.last_sync_at = datetime.utcnow()
-                    conn.last_sync_status = "success"
-                    conn.is_syncing = False
-            except Exception as e:
-                results["errors"].append({
-                    "provider": conn.provider,
-                    "error": str(e)
-                })
-                conn.last_sync_status = "error"
-                conn.last_error_message = str(e)
+                # Every connection fetches at once; merges still run one at a time, in connection order
+                slots = asyncio.Semaphore(settings.SYNC_FETCH_CONCURRENCY)
+                fetches = [
+                    asyncio.ensure_future(self._fetch_prepared(conn, [(start_date, end_date)], user.timezone, slots))
+                    for conn in connections
+                ]
+                try:
+                    for conn, fetch in zip(connections, fetches):
+                        await self._sync_connection(conn, fetch, results, events)
+                finally:
+                    for fetch in fetches:
+                        fetch.cancel()
+            finally:
+                if owns_client:
+                    await self.http_client.aclose()
+                    self.http_client = None
+            
+            self.db.commit()
+            
+            # Update user's last sync time
+            user.last_sync_at = datetime.utcnow()
+            self.db.commit()
+        except BaseException:
+            self._abandon_sync(connections)
+            raise
         
-        self.db.commit()
+        await self._finish_events(events, results)
+        return results
+    
+    async def sync_connection_dates(self, connection_id: int, dates: Iterable[date]) -> Dict:
+        """
+        Fetch and merge only the given provider dates for one connection,
+        as notified by a provider webhook. Runs of consecutive dates share
+        a single fetch; days the window returns but nobody asked for are dropped.
+        """
+        conn = self.db.get(FitnessConnection, connection_id)
+        results = {
+            "user_id": conn.user_id if conn else None,
+            "synced_providers": [],
+            "errors": [],
+            "records_created": 0,
+            "records_updated": 0
+        }
+        wanted = sorted(set(dates))
+        if not conn or not conn.is_active or not wanted:
+            return results
         
-        # Update user's last sync time
-        user.last_sync_at = datetime.utcnow()
-        self.db.commit()
+        # Provider dates are calendar days; fetchers widen windows to whole UTC dates
+        windows = [
+            (datetime.combine(first, datetime.min.time()), datetime.combine(last, datetime.min.time()))
+            for first, last in date_runs(wanted)
+        ]
         
+        self._mark_syncing([conn])
+        try:
+            events = await self._start_events(conn.user_id, [conn.provider], windows[0][0], windows[-1][1])
+            owns_client = self.http_client is None
+            if owns_client:
+                import httpx  # deferred: only syncs need it, and it's slow to import
+                self.http_client = httpx.AsyncClient(timeout=settings.PROVIDER_HTTP_TIMEOUT_SECONDS)
+            
+            user = self.db.get(User, conn.user_id)
+            try:
+                fetch = self._fetch_prepared(
+                    conn, windows, user.timezone if user else None, asyncio.Semaphore(1),
+                    days={day.isoformat() for day in wanted}
+                )
+                await self._sync_connection(conn, fetch, results, events)
+            finally:
+                if owns_client:
+                    await self.http_client.aclose()
+                    self.http_client = None
+            
+            self.db.commit()
+        except BaseException:
+            self._abandon_sync([conn])
+            raise
+        await self._finish_events(events, results)
         return results
     
+    async def _start_events(
+        self,
+        user_id: int,
+        providers: List[str],
+        start_date: datetime,
+        end_date: datetime
+    ) -> SyncEventPublisher:
+        """Announce a sync on the user's event channel and start collecting changed ranges."""
+        events = SyncEventPublisher(user_id, self.pubsub)
+        self._changed = ChangedRanges()
+        await events.emit(
+            "sync_started",
+            providers=providers,
+            start_date=start_date.date().isoformat(),
+            end_date=end_date.date().isoformat()
+        )
+        return events
+    
+    async def _finish_events(self, events: SyncEventPublisher, results: Dict) -> None:
+        changed, self._changed = self._changed, None
+        if changed and changed.ranges:
+            await events.emit("data_changed", metrics=changed.as_event())
+        await events.emit(
+            "sync_finished",
+            **{key: results[key] for key in ("synced_providers", "errors", "records_created", "records_updated")}
+        )
+    
+    def _mark_syncing(self, connections: List[FitnessConnection]) -> None:
+        """Flag connections as syncing up front, so status reads see the sync in progress."""
+        for conn in connections:
+            conn.is_syncing = True
+        self.db.commit()
+    
+    def _abandon_sync(self, connections: List[FitnessConnection]) -> None:
+        """
+        A sync failed or was cancelled outside any one connection's turn:
+        drop its uncommitted merges and clear every connection's syncing flag,
+        so none is left flagged forever.
+        """
+        try:
+            self.db.rollback()
+            self.db.query(FitnessConnection).filter(
+                FitnessConnection.id.in_([conn.id for conn in connections]),
+                FitnessConnection.is_syncing == True
+            ).update({"is_syncing": False}, synchronize_session=False)
+            self.db.commit()
+        except Exception:
+            self.db.rollback()  # Don't mask the error that ended the sync
+    
+    async def _fetch_prepared(
+        self,
+        conn: FitnessConnection,
+        windows: List[Tuple[datetime, datetime]],
+        timezone: Optional[str],
+        slots: asyncio.Semaphore,
+        days: Optional[Set[str]] = None
+    ) -> PreparedBatch:
+        """Fetch each window from one provider, holding a fetch slot, and prepare the payloads off the event loop."""
+        payloads = []
+        async with slots:
+            for start_date, end_date in windows:
+                payload = await self._timed_fetch(conn, start_date, end_date)
+                if payload:
+                    payloads.append(payload)
+        with span(f"prepare_{conn.provider}"):
+            return await self.engine.prepare(conn.provider, payloads, timezone, days)
+    
+    async def _sync_connection(
+        self,
+        conn: FitnessConnection,
+        fetch: Awaitable[PreparedBatch],
+        results: Dict,
+        events: SyncEventPublisher
+    ) -> None:
+        """Await one provider's prepared data and merge it, recording the outcome on the connection."""
+        await events.emit("provider_started", provider=conn.provider)
+        created, updated = results["records_created"], results["records_updated"]
+        error = None
+        try:
+            batch = await fetch
+            if len(batch):
+                with span(f"merge_{conn.provider}"):
+                    stats = self._merge_batch(conn.user_id, conn.provider, batch)
+                results["records_created"] += stats["created"]
+                results["records_updated"] += stats["updated"]
+                SYNC_RECORDS.inc(stats["created"], provider=conn.provider, outcome="created")
+                SYNC_RECORDS.inc(stats["updated"], provider=conn.provider, outcome="updated")
+                results["synced_providers"].append(conn.provider)
+                
+                # Update connection status
+                conn.last_sync_at = datetime.utcnow()
+                conn.last_sync_status = "success"
+        except Exception as e:
+            results["errors"].append({
+                "provider": conn.provider,
+                "error": str(e)
+            })
+            conn.last_sync_status = "reauth_required" if isinstance(e, ReauthRequired) else "error"
+            conn.last_error_message = str(e)
+            error = str(e)
+        finally:
+            conn.is_syncing = False
+        
+        progress = {
+            "provider": conn.provider,
+            "status": "error" if error else "success",
+            "records_created": results["records_created"] - created,
+            "records_updated": results["records_updated"] - updated,
+        }
+        if error:
+            progress["error"] = error
+        await events.emit("provider_finished", **progress)
+    
+    async def _timed_fetch(
+        self,
+        connection: FitnessConnection,
+        start_date: datetime,
+        end_date: datetime
+    ) -> Optional[Payload]:
+        """_fetch_from_provider, recording latency and errors per provider."""
+        started = time.perf_counter()
+        try:
+            with span(f"fetch_{connection.provider}"):
+                return await self._fetch_from_provider(connection, start_date, end_date)
+        except Exception:
+            PROVIDER_FETCH_ERRORS.inc(provider=connection.provider)
+            raise
+        finally:
+            PROVIDER_FETCH_SECONDS.observe(time.perf_counter() - started, provider=connection.provider)
+    
     async def _fetch_from_provider(
         self, 
         connection: FitnessConnection, 
         start_date: datetime, 
         end_date: datetime
-    ) -> Optional[List[Dict]]:
+    ) -> Optional[Payload]:
         """
-        Fetch data from a specific provider.
-        This is a placeholder - real implementation would call each provider's API.
+        Fetch raw data from a specific provider; sync_engine.PARSERS decodes it.
         """
         provider_handlers = {
             "fitbit": self._fetch_fitbit,
@@ -90,26 +312,68 @@ class FitnessDataAggregator:
             return await handler(connection, start_date, end_date)
         return None
     
-    async def _fetch_fitbit(self, conn: FitnessConnection, start: datetime, end: datetime) -> List[Dict]:
-        """Fetch data from Fitbit API."""
-        # Placeholder - real implementation would use Fitbit OAuth2 flow
-        # and call endpoints like /1/user/-/activities/steps/date/{date}/{end-date}.json
-        return []
+    async def _provider_get(self, conn: FitnessConnection, url: str, params: Optional[Dict] = None) -> bytes:
+        """
+        GET a provider resource's undecoded body with the connection's bearer
+        token. Tokens come from the token manager's cache; a 401 forces one
+        refresh and a retry. Raises ReauthRequired when the provider still
+        rejects the connection and no fresh token can be had.
+        """
+        token = await self.tokens.access_token(conn)
+        response = await self.http_client.get(url, params=params, headers={"Authorization": f"Bearer {token}"})
+        if response.status_code == 401:
+            rejected = token
+            if conn.refresh_token:
+                token = await self.tokens.access_token(conn, force_refresh=True)
+            if token == rejected:
+                raise ReauthRequired(f"{conn.provider} rejected the connection's token; reconnect required")
+            response = await self.http_client.get(url, params=params, headers={"Authorization": f"Bearer {token}"})
+            if response.status_code == 401:
+                raise ReauthRequired(f"{conn.provider} rejected a freshly refreshed token; reconnect required")
+        response.raise_for_status()
+        return response.content
+    
+    # The fetch window is widened to whole UTC dates; re-merging a day is idempotent.
     
-    async def _fetch_garmin(self, conn: FitnessConnection, start: datetime, end: datetime) -> List[Dict]:
-        """Fetch data from Garmin API."""
-        # Placeholder - would use Garmin Health API
-        return []
+    async def _fetch_fitbit(self, conn: FitnessConnection, start: datetime, end: datetime) -> Payload:
+        """Fetch data from the Fitbit Web API (time series endpoints)."""
+        base = settings.FITBIT_API_BASE_URL
+        span_path = f"date/{start.date().isoformat()}/{end.date().isoformat()}.json"
+        steps, calories, heart, sleep = await asyncio.gather(
+            self._provider_get(conn, f"{base}/1/user/-/activities/steps/{span_path}"),
+            self._provider_get(conn, f"{base}/1/user/-/activities/activityCalories/{span_path}"),
+            self._provider_get(conn, f"{base}/1/user/-/activities/heart/{span_path}"),
+            self._provider_get(conn, f"{base}/1.2/user/-/sleep/{span_path}"),
+        )
+        return {"steps": steps, "calories": calories, "heart": heart, "sleep": sleep}
     
-    async def _fetch_apple_health(self, conn: FitnessConnection, start: datetime, end: datetime) -> List[Dict]:
+    async def _fetch_garmin(self, conn: FitnessConnection, start: datetime, end: datetime) -> Payload:
+        """Fetch data from the Garmin Health API (dailies and sleeps summaries)."""
+        base = settings.GARMIN_API_BASE_URL
+        params = {
+            "uploadStartTimeInSeconds": int(start.replace(tzinfo=UTC).timestamp()),
+            "uploadEndTimeInSeconds": int(end.replace(tzinfo=UTC).timestamp()),
+        }
+        dailies, sleeps = await asyncio.gather(
+            self._provider_get(conn, f"{base}/wellness-api/rest/dailies", params),
+            self._provider_get(conn, f"{base}/wellness-api/rest/sleeps", params),
+        )
+        return {"dailies": dailies, "sleeps": sleeps}
+    
+    async def _fetch_apple_health(self, conn: FitnessConnection, start: datetime, end: datetime) -> Payload:
         """Fetch data from Apple Health via HealthKit export or direct integration."""
         # Placeholder - Apple Health typically requires iOS app for data access
-        return []
+        return {}
     
-    async def _fetch_oura(self, conn: FitnessConnection, start: datetime, end: datetime) -> List[Dict]:
-        """Fetch data from Oura Ring API."""
-        # Placeholder - would use Oura Cloud API v2
-        return []
+    async def _fetch_oura(self, conn: FitnessConnection, start: datetime, end: datetime) -> Payload:
+        """Fetch data from the Oura Cloud API v2 (daily activity and sleep)."""
+        base = settings.OURA_API_BASE_URL
+        params = {"start_date": start.date().isoformat(), "end_date": end.date().isoformat()}
+        activity, sleep = await asyncio.gather(
+            self._provider_get(conn, f"{base}/v2/usercollection/daily_activity", params),
+            self._provider_get(conn, f"{base}/v2/usercollection/sleep", params),
+        )
+        return {"daily_activity": activity, "sleep": sleep}
     
     async def _merge_provider_data(
         self, 
@@ -118,212 +382,305 @@ class FitnessDataAggregator:
         data: List[Dict]
     ) -> Dict:
         """
-        Merge provider data into the unified daily metrics table.
-        Handles conflicts by taking the most complete data or averaging.
+        Merge already-decoded provider records into the unified daily metrics table.
+        """
+        user = self.db.get(User, user_id)
+        batch = prepare_records(provider, data, user.timezone if user else None)
+        return self._merge_batch(user_id, provider, batch)
+    
+    def _merge_batch(self, user_id: int, provider: str, batch: PreparedBatch) -> Dict:
+        """
+        Merge a prepared batch (bucketed into the user's local days and
+        normalized at ingest) into the unified daily metrics table.
+        Conflicts are settled per field by the merge engine's reducers.
         """
         created = 0
         updated = 0
+        fetched_at = datetime.utcnow()
+        changes = []  # (metric, values before merge) for downstream materializations
         
-        for record in data:
-            date = record.get("date")
-            if not date:
-                continue
-            
-            # Check if record exists
-            existing = self.db.query(DailyMetric).filter(
+        if not len(batch):
+            return {"created": 0, "updated": 0}
+        
+        # One range scan instead of a lookup per record
+        existing_by_day = {
+            metric.local_date: metric
+            for metric in self.db.query(DailyMetric).filter(
                 DailyMetric.user_id == user_id,
-                DailyMetric.date == date
-            ).first()
+                DailyMetric.local_date >= date.fromordinal(int(batch.days.min())),
+                DailyMetric.local_date <= date.fromordinal(int(batch.days.max()))
+            ).all()
+        }
+        
+        for instant, local_date, values in batch.rows():
+            existing = existing_by_day.get(local_date)
             
             if not existing:
                 # Create new record
                 new_metric = DailyMetric(
                     user_id=user_id,
-                    date=date,
-                    **self._normalize_record(record, provider)
+                    date=instant,
+                    local_date=local_date,
+                    is_complete=False
                 )
+                changed_fields, _ = self.merge_engine.apply(new_metric, provider, values, fetched_at)
+                self._note_changed(local_date, changed_fields)
                 self.db.add(new_metric)
+                existing_by_day[local_date] = new_metric
+                changes.append((new_metric, {}))
                 created += 1
             else:
-                # Merge data - prefer non-null values, average duplicates
-                updated_fields = self._merge_records(existing, record, provider)
-                if updated_fields:
+                # Only fields whose contributing value changed are recomputed
+                previous = {field: getattr(existing, field) for field in TRACKED_FIELDS}
+                changed_fields, dirty = self._merge_records(existing, values, provider, fetched_at)
+                if changed_fields:
+                    changes.append((existing, previous))
+                    self._note_changed(local_date, changed_fields)
+                if dirty:
                     updated += 1
         
+        if changes:
+            self._update_materializations(user_id, changes)
+        
         self.db.commit()
         return {"created": created, "updated": updated}
     
-    def _normalize_record(self, record: Dict, provider: str) -> Dict:
+    def _note_changed(self, day: date, fields: List[str]) -> None:
+        if self._changed is not None:
+            self._changed.add(day, fields)
+    
+    def _update_materializations(self, user_id: int, changes: List) -> None:
         """
-        Normalize provider-specific data to our unified schema.
+        Propagate merged rows into state derived from daily metrics,
+        so read paths never have to aggregate history.
         """
-        normalized = {
-            "sources": [provider],
-            "is_complete": False
-        }
-        
-        # Map provider-specific fields to unified fields
-        field_mappings = {
-            "steps": ["steps", "activitySteps", "total_steps"],
-            "active_calories": ["activeCalories", "activityCalories", "calories_out"],
-            "resting_hr": ["restingHeartRate", "resting_hr", "resting_heart_rate"],
-            "sleep_duration_minutes": ["totalSleepTime", "duration", "minutesAsleep"],
-        }
-        
-        for unified_field, possible_names in field_mappings.items():
-            for name in possible_names:
-                if name in record and record[name] is not None:
-                    normalized[unified_field] = record[name]
-                    break
-        
-        return normalized
+        user = self.db.get(User, user_id)
+        if not user:
+            return
+        goals = self.db.query(Goal).filter(
+            Goal.user_id == user_id,
+            Goal.is_active == True
+        ).all()
+        GoalProgressEngine(self.db).apply(user, changes, goals=goals)
+        StreakIndex(self.db).apply(user, changes, goals=goals)
+        RollingIndex(self.db).apply(user, changes)
     
-    def _merge_records(self, existing: DailyMetric, new_data: Dict, provider: str) -> bool:
+    def _merge_records(
+        self,
+        existing: DailyMetric,
+        values: Dict,
+        provider: str,
+        fetched_at: Optional[datetime] = None
+    ) -> Tuple[List[str], bool]:
         """
-        Merge new data into existing record. Returns True if any field was updated.
+        Merge a provider's normalized values into an existing day.
+        Returns (unified fields that changed, whether the row was modified).
         """
-        updated = False
-        
-        # Add source if not already present
-        if existing.sources is None:
-            existing.sources = []
-        if provider not in existing.sources:
-            existing.sources.append(provider)
-            updated = True
-        
-        # Update fields if new data is better quality
-        # Strategy: prefer non-null values, but could implement more sophisticated logic
-        mappings = {
-            "steps": ["steps", "activitySteps"],
-            "active_calories": ["activeCalories", "calories_out"],
-            "resting_hr": ["restingHeartRate"],
-            "sleep_duration_minutes": ["totalSleepTime", "minutesAsleep"],
-        }
-        
-        for field, possible_names in mappings.items():
-            current_value = getattr(existing, field)
-            for name in possible_names:
-                if name in new_data and new_data[name] is not None:
-                    new_value = new_data[name]
-                    if current_value is None:
-                        setattr(existing, field, new_value)
-                        updated = True
-                    elif field == "steps":
-                        # For steps, take the maximum from all sources
-                        setattr(existing, field, max(current_value, new_value))
-                        updated = True
-                    break
-        
-        return updated
+        return self.merge_engine.apply(existing, provider, values, fetched_at)
     
     def get_unified_metrics(
         self, 
         user_id: int, 
-        start_date: datetime, 
-        end_date: datetime
+        start_date: Union[date, datetime], 
+        end_date: Union[date, datetime]
     ) -> List[DailyMetric]:
         """
-        Get unified metrics for a date range.
+        Get unified metrics for an inclusive range of local days.
+        A pure range scan on the ingest-time day key; no per-row conversion.
         """
         return self.db.query(DailyMetric).filter(
             DailyMetric.user_id == user_id,
-            DailyMetric.date >= start_date,
-            DailyMetric.date <= end_date
-        ).order_by(DailyMetric.date).all()
+            DailyMetric.local_date >= as_date(start_date),
+            DailyMetric.local_date <= as_date(end_date)
+        ).order_by(DailyMetric.local_date).all()
+    
+    def get_dashboard_rollup(self, user_id: int, today: date) -> Dict:
+        """
+        Today's metrics and the trailing 7-day averages in one aggregate query.
+        The week is the 7 full days before today, so a partial today doesn't
+        drag the averages down.
+        """
+        week_start = today - timedelta(days=7)
+        is_today = DailyMetric.local_date == today
+        in_week = DailyMetric.local_date < today
+        
+        def today_value(column):
+            return func.max(case((is_today, column)))
+        
+        def week_average(column):
+            return func.avg(case((in_week, column)))
+        
+        row = self.db.query(
+            func.count(case((is_today, 1))).label("has_today"),
+            today_value(DailyMetric.steps).label("steps"),
+            today_value(DailyMetric.active_calories).label("active_calories"),
+            today_value(DailyMetric.sleep_duration_minutes).label("sleep_duration_minutes"),
+            today_value(DailyMetric.resting_hr).label("resting_hr"),
+            today_value(DailyMetric.stress_score).label("stress_score"),
+            week_average(DailyMetric.steps).label("avg_steps"),
+            week_average(DailyMetric.active_minutes).label("avg_active_minutes"),
+            week_average(DailyMetric.sleep_duration_minutes).label("avg_sleep_minutes"),
+            week_average(DailyMetric.resting_hr).label("avg_resting_hr"),
+        ).filter(
+            DailyMetric.user_id == user_id,
+            DailyMetric.local_date >= week_start,
+            DailyMetric.local_date <= today
+        ).one()
+        
+        today_metrics = None
+        if row.has_today:
+            today_metrics = {
+                "date": datetime.combine(today, datetime.min.time()),
+                "steps": row.steps,
+                "active_calories": row.active_calories,
+                "sleep_duration_minutes": row.sleep_duration_minutes,
+                "resting_hr": row.resting_hr,
+                "stress_score": row.stress_score,
+            }
+        
+        def rounded(value, digits=0):
+            if value is None:
+                return None
+            return round(value, digits) if digits else int(round(value))
+        
+        return {
+            "today_metrics": today_metrics,
+            "weekly_average": {
+                "steps": rounded(row.avg_steps),
+                "active_minutes": rounded(row.avg_active_minutes),
+                "sleep_hours": rounded(row.avg_sleep_minutes / 60, 1) if row.avg_sleep_minutes is not None else None,
+                "resting_hr": rounded(row.avg_resting_hr),
+            }
+        }
     
     def generate_heatmap_data(
         self,
         user_id: int,
         metric_type: str,
-        weeks: int = 26
+        weeks: int = 26,
+        columnar: bool = False
     ) -> Dict:
         """
         Generate data for the multi-dimensional activity heatmap.
         """
-        end_date = datetime.utcnow()
-        start_date = end_date - timedelta(weeks=weeks * 7)
+        return self.generate_heatmaps(user_id, [metric_type], weeks=weeks, columnar=columnar)[0]
+    
+    def generate_heatmaps(
+        self,
+        user_id: int,
+        metric_types: List[str],
+        weeks: int = 26,
+        today: Optional[date] = None,
+        columnar: bool = False
+    ) -> List[Dict]:
+        """
+        Generate heatmaps for several metrics from a single range scan,
+        plus one lookup for all of their streaks.
+        """
+        if today is None:
+            user = self.db.get(User, user_id)
+            today = local_today(user.timezone if user else None)
+        start_date = today - timedelta(weeks=weeks)
         
-        metrics = self.get_unified_metrics(user_id, start_date, end_date)
+        fields = {metric_type: metric_field(metric_type) for metric_type in metric_types}
+        columns = [getattr(DailyMetric, field) for field in sorted(set(fields.values()))]
+        rows = self.db.query(DailyMetric.local_date, DailyMetric.sources, *columns).filter(
+            DailyMetric.user_id == user_id,
+            DailyMetric.local_date >= start_date,
+            DailyMetric.local_date <= today
+        ).order_by(DailyMetric.local_date).all()
         
-        # Map metric_type to actual field name
-        field_map = {
-            "steps": "steps",
-            "sleep": "sleep_duration_minutes",
-            "heart_rate": "resting_hr",
-            "calories": "active_calories",
-            "stress": "stress_score"
+        # Streaks are maintained incrementally by StreakIndex during sync
+        streaks = {
+            streak.metric_type: streak
+            for streak in self.db.query(MetricStreak).filter(
+                MetricStreak.user_id == user_id,
+                MetricStreak.metric_type.in_(metric_types)
+            ).all()
         }
         
-        field = field_map.get(metric_type, metric_type)
-        
-        # Calculate normalization values
-        values = [getattr(m, field) for m in metrics if getattr(m, field) is not None]
-        
-        if not values:
-            return {
-                "metric_type": metric_type,
-                "data": [],
-                "average": 0,
-                "best_day": None,
-                "streak_days": 0
-            }
-        
-        min_val = min(values)
-        max_val = max(values)
-        avg_val = sum(values) / len(values)
-        
-        # Generate heatmap points
-        heatmap_data = []
-        best_day = None
-        best_value = -1
+        return [
+            self._build_heatmap(
+                metric_type, fields[metric_type], rows, start_date, today,
+                streaks.get(metric_type), columnar=columnar
+            )
+            for metric_type in metric_types
+        ]
+    
+    def _build_heatmap(
+        self,
+        metric_type: str,
+        field: str,
+        rows: List,
+        start_date: date,
+        end_date: date,
+        streak: Optional[MetricStreak],
+        columnar: bool = False
+    ) -> Dict:
+        """
+        Build a heatmap as plain dicts/lists, ready for direct JSON encoding.
+        With columnar=True the points are returned as parallel arrays
+        (dates/values/raw/sources) instead of a list of point objects.
+        """
+        heatmap = {
+            "metric_type": metric_type,
+            "start_date": start_date.isoformat(),
+            "end_date": end_date.isoformat(),
+            "average": 0,
+            "streak_days": current_streak_as_of(streak, end_date),
+            "longest_streak": streak.longest_streak if streak else 0
+        }
         
-        for metric in metrics:
-            raw_value = getattr(metric, field)
+        dates, raw, sources = [], [], []
+        for row in rows:
+            raw_value = getattr(row, field)
             if raw_value is None:
                 continue
-            
-            # Normalize to 0-100 for heatmap intensity
-            if max_val == min_val:
-                normalized = 50
-            else:
-                normalized = ((raw_value - min_val) / (max_val - min_val)) * 100
-            
-            point = {
-                "date": metric.date.strftime("%Y-%m-%d"),
-                "value": round(normalized, 2),
-                "raw_value": raw_value,
-                "metric_type": metric_type,
-                "sources": metric.sources or []
-            }
-            heatmap_data.append(point)
-            
-            # Track best day
-            if metric_type == "heart_rate":
-                # Lower is better for resting HR
-                if best_value == -1 or raw_value < best_value:
-                    best_value = raw_value
-                    best_day = point
+            dates.append(row.local_date.isoformat())
+            raw.append(raw_value)
+            sources.append(row.sources or [])
+        
+        if not raw:
+            if columnar:
+                heatmap.update({"dates": [], "values": [], "raw": [], "sources": [], "best_day_index": None})
             else:
-                # Higher is better for steps, sleep, etc.
-                if raw_value > best_value:
-                    best_value = raw_value
-                    best_day = point
+                heatmap.update({"data": [], "best_day": None})
+            return heatmap
         
-        # Calculate streak (consecutive days meeting goal)
-        # For simplicity, we'll define streak as consecutive days with data
-        streak = 0
-        sorted_data = sorted(heatmap_data, key=lambda x: x["date"], reverse=True)
+        # Normalize to 0-100 for heatmap intensity
+        min_val = min(raw)
+        max_val = max(raw)
+        if max_val == min_val:
+            values = [50] * len(raw)
+        else:
+            span = max_val - min_val
+            values = [round(((value - min_val) / span) * 100, 2) for value in raw]
         
-        for point in sorted_data:
-            # Simple streak: consecutive days with any activity
-            streak += 1
+        # Lower is better for resting HR; higher is better for steps, sleep, etc.
+        best = min(raw) if metric_type == "heart_rate" else max(raw)
+        best_index = raw.index(best)
         
-        return {
-            "metric_type": metric_type,
-            "start_date": start_date.strftime("%Y-%m-%d"),
-            "end_date": end_date.strftime("%Y-%m-%d"),
-            "data": heatmap_data,
-            "average": round(avg_val, 2),
-            "best_day": best_day,
-            "streak_days": min(streak, 7)  # Cap at 7 for weekly streak
-        }
+        heatmap["average"] = round(sum(raw) / len(raw), 2)
+        
+        if columnar:
+            heatmap.update({
+                "dates": dates,
+                "values": values,
+                "raw": raw,
+                "sources": sources,
+                "best_day_index": best_index
+            })
+            return heatmap
+        
+        data = [
+            {
+                "date": dates[i],
+                "value": values[i],
+                "raw_value": raw[i],
+                "metric_type": metric_type,
+                "sources": sources[i]
+            }
+            for i in range(len(raw))
+        ]
+        heatmap.update({"data": data, "best_day": data[best_index]})
+        return heatmap
@@ -0,0 +1,133 @@
+from typing import List, Dict, Tuple, Any, Optional
+from datetime import date, datetime
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from app.models.user import User, DailyMetric, Goal
+from app.core.timezone import local_today, period_bounds, as_date
+from app.services.metric_fields import METRIC_FIELDS, ADDITIVE_METRICS, meets_target, progress_ratio
+
+# (metric row after the merge, column values before the merge; empty for new rows)
+MetricChange = Tuple[DailyMetric, Dict[str, Any]]
+
+
+class GoalProgressEngine:
+    """
+    Keeps Goal.current_value up to date from the DailyMetric rows touched by a merge.
+    Additive goals apply the per-day delta; level goals (weight, resting HR)
+    keep the latest reading in the period. A full aggregate only runs once,
+    when a goal rolls into a new period.
+    """
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def apply(
+        self,
+        user: User,
+        changes: List[MetricChange],
+        now: Optional[datetime] = None,
+        goals: Optional[List[Goal]] = None
+    ) -> int:
+        """
+        Apply merged metric changes to the user's active goals.
+        Returns the number of goals whose progress changed.
+        """
+        if goals is None:
+            goals = self.db.query(Goal).filter(
+                Goal.user_id == user.id,
+                Goal.is_active == True
+            ).all()
+        if not goals:
+            return 0
+
+        today = local_today(user.timezone, now)
+        updated = 0
+
+        for goal in goals:
+            field = METRIC_FIELDS.get(goal.metric_type)
+            if not field:
+                continue
+
+            start, end = self._window(goal, today)
+            before = (goal.current_value, goal.progress_value_date)
+
+            if goal.progress_period_start != start:
+                self._recompute(goal, field, start, end)
+            else:
+                for metric, previous in changes:
+                    day = metric.local_date
+                    if day is None or not (start <= day < end):
+                        continue
+                    self._apply_change(goal, field, day, getattr(metric, field), previous.get(field))
+
+            if (goal.current_value, goal.progress_value_date) != before:
+                updated += 1
+
+        return updated
+
+    def _window(self, goal: Goal, today: date) -> Tuple[date, date]:
+        """Current period for the goal, clipped to the goal's own start date."""
+        start, end = period_bounds(goal.period, today)
+        goal_start = as_date(goal.start_date)
+        if goal_start and goal_start > start:
+            start = goal_start
+        return start, end
+
+    def _apply_change(self, goal: Goal, field: str, day: date, new_value, old_value) -> None:
+        if goal.metric_type in ADDITIVE_METRICS:
+            delta = (new_value or 0) - (old_value or 0)
+            if delta:
+                goal.current_value = (goal.current_value or 0) + delta
+        elif new_value is not None:
+            if goal.progress_value_date is None or day >= goal.progress_value_date:
+                goal.current_value = new_value
+                goal.progress_value_date = day
+
+    def _recompute(self, goal: Goal, field: str, start: date, end: date) -> None:
+        """Seed progress for a new period with one aggregate query."""
+        self.db.flush()
+        column = getattr(DailyMetric, field)
+        in_period = (
+            DailyMetric.user_id == goal.user_id,
+            DailyMetric.local_date >= start,
+            DailyMetric.local_date < end,
+            column.isnot(None)
+        )
+
+        if goal.metric_type in ADDITIVE_METRICS:
+            total = self.db.query(func.sum(column)).filter(*in_period).scalar()
+            goal.current_value = total or 0
+            goal.progress_value_date = None
+        else:
+            latest = self.db.query(DailyMetric.local_date, column).filter(
+                *in_period
+            ).order_by(DailyMetric.local_date.desc()).first()
+            goal.current_value = latest[1] if latest else 0
+            goal.progress_value_date = latest[0] if latest else None
+
+        goal.progress_period_start = start
+
+
+def goal_progress(goal: Goal, today: date) -> Dict:
+    """
+    Read-side view of a goal's materialized progress. No queries: a goal whose
+    stored period is behind today's period simply has no progress yet.
+    """
+    start, _ = period_bounds(goal.period, today)
+    goal_start = as_date(goal.start_date)
+    if goal_start and goal_start > start:
+        start = goal_start
+
+    current = (goal.current_value or 0) if goal.progress_period_start == start else 0
+    target = goal.target_value or 0
+
+    return {
+        "id": goal.id,
+        "type": goal.metric_type,
+        "target": goal.target_value,
+        "current": current,
+        "period": goal.period,
+        "period_start": start.isoformat(),
+        "progress_percent": round(progress_ratio(goal.metric_type, current, target) * 100, 1),
+        "completed": meets_target(goal.metric_type, current, target) if target else False
+    }
@@ -0,0 +1,197 @@
+"""
+Per-field multi-source merge with provenance.
+
+Every DailyMetric keeps a compact side structure recording what each
+provider last reported for each field:
+
+    provenance = {"steps": {"fitbit": [8123, 1709251200], "garmin": [8050, 1709254800]}}
+
+i.e. field -> provider -> [raw value, fetched_at (unix seconds)]. The
+unified column is a reducer over those contributions (max, min, priority
+or weighted mean), so a re-sync only recomputes fields whose contributing
+value actually changed, and an unchanged re-sync writes nothing.
+"""
+
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from app.core.config import settings
+from app.core.timezone import UTC
+from app.models.user import DailyMetric
+from app.services.provider_schemas import DATA_COLUMNS
+
+# Contributions present before provenance was recorded; ranked last
+LEGACY_SOURCE = "_legacy"
+
+# Devices tend to undercount (not worn, flat battery), so counters take the max;
+# physiological readings prefer the device built to measure them.
+DEFAULT_FIELD_POLICIES: Dict[str, Dict[str, Any]] = {
+    "steps": {"reducer": "max"},
+    "active_calories": {"reducer": "max"},
+    "resting_calories": {"reducer": "max"},
+    "total_calories": {"reducer": "max"},
+    "active_minutes": {"reducer": "max"},
+    "distance_meters": {"reducer": "max"},
+    "floors_climbed": {"reducer": "max"},
+    "max_hr": {"reducer": "max"},
+    "min_hr": {"reducer": "min"},
+    "resting_hr": {"reducer": "weighted_mean", "weights": {"oura": 3, "garmin": 2, "fitbit": 2, "apple_health": 1}},
+    "hrv_avg": {"reducer": "priority", "priority": ["oura", "garmin", "whoop", "fitbit", "apple_health"]},
+    "sleep_duration_minutes": {"reducer": "priority", "priority": ["oura", "whoop", "garmin", "fitbit", "apple_health"]},
+    "weight_kg": {"reducer": "priority", "priority": ["withings", "fitbit", "garmin", "apple_health"]},
+    "body_fat_percentage": {"reducer": "priority", "priority": ["withings", "fitbit", "garmin", "apple_health"]},
+    "stress_score": {"reducer": "priority", "priority": ["garmin", "fitbit", "oura"]},
+}
+
+INTEGER_COLUMNS = {
+    column.name for column in DailyMetric.__table__.columns
+    if getattr(column.type, "python_type", None) is int
+}
+
+
+def _reduce_max(contributions: Dict[str, List], policy: Dict) -> Any:
+    return max(value for value, _ in contributions.values())
+
+
+def _reduce_min(contributions: Dict[str, List], policy: Dict) -> Any:
+    return min(value for value, _ in contributions.values())
+
+
+def _reduce_priority(contributions: Dict[str, List], policy: Dict) -> Any:
+    order = policy["priority"]
+
+    def rank(provider):
+        if provider == LEGACY_SOURCE:
+            return (2, provider)
+        return (0, order.index(provider)) if provider in order else (1, provider)
+
+    return contributions[min(contributions, key=rank)][0]
+
+
+def _reduce_weighted_mean(contributions: Dict[str, List], policy: Dict) -> Any:
+    weights = policy.get("weights", {})
+    total = sum(weights.get(provider, 1) for provider in contributions)
+    return sum(value * weights.get(provider, 1) for provider, (value, _) in contributions.items()) / total
+
+
+REDUCERS = {
+    "max": _reduce_max,
+    "min": _reduce_min,
+    "priority": _reduce_priority,
+    "weighted_mean": _reduce_weighted_mean,
+}
+
+
+class MergeEngine:
+    """
+    Folds one provider's values for a day into a DailyMetric. Policies come
+    from DEFAULT_FIELD_POLICIES overlaid with settings.MERGE_FIELD_POLICIES;
+    fields without a policy use "priority" over settings.MERGE_PROVIDER_PRIORITY.
+    """
+
+    def __init__(
+        self,
+        policies: Optional[Dict[str, Dict[str, Any]]] = None,
+        provider_priority: Optional[Sequence[str]] = None
+    ):
+        priority = list(provider_priority or settings.MERGE_PROVIDER_PRIORITY)
+        overrides = settings.MERGE_FIELD_POLICIES if policies is None else policies
+        self.default_policy = {"reducer": "priority", "priority": priority}
+        self.policies = {}
+        for field, policy in {**DEFAULT_FIELD_POLICIES, **overrides}.items():
+            if policy.get("reducer") not in REDUCERS:
+                raise ValueError(f"Unknown merge reducer for {field}: {policy.get('reducer')}")
+            self.policies[field] = {"priority": priority, **policy}
+
+    def reduce(self, field: str, contributions: Dict[str, List]) -> Any:
+        if not contributions:
+            return None
+        policy = self.policies.get(field, self.default_policy)
+        value = REDUCERS[policy["reducer"]](contributions, policy)
+        if field in INTEGER_COLUMNS and value is not None:
+            value = int(round(value))
+        return value
+
+    def apply(
+        self,
+        metric: DailyMetric,
+        provider: str,
+        values: Dict[str, Any],
+        fetched_at: Optional[datetime] = None
+    ) -> Tuple[List[str], bool]:
+        """
+        Record `provider`'s values on `metric` and recompute the fields they
+        feed. Returns (unified fields whose value changed, whether the row
+        needs writing at all).
+        """
+        fetched = int((fetched_at or datetime.utcnow()).replace(tzinfo=UTC).timestamp())
+        provenance = metric.provenance or {}
+        rebuilt = None  # Copy-on-write: JSON columns only persist on reassignment
+        changed = []
+
+        for field, value in values.items():
+            if value is None:
+                continue
+            contributions = provenance.get(field)
+            if contributions is None:
+                current = getattr(metric, field)
+                # Rows merged before provenance existed keep their value as a contribution
+                contributions = {LEGACY_SOURCE: [current, None]} if current is not None else {}
+            if LEGACY_SOURCE in contributions and provider in (metric.sources or []):
+                # The legacy value is likely this provider's own earlier reading; keeping it
+                # would pin max/min fields and count it twice in weighted means
+                contributions = {p: c for p, c in contributions.items() if p != LEGACY_SOURCE}
+            previous = contributions.get(provider)
+            if previous is not None and previous[0] == value:
+                continue
+
+            if rebuilt is None:
+                rebuilt = dict(provenance)
+            contributions = {**contributions, provider: [value, fetched]}
+            rebuilt[field] = contributions
+
+            unified = self.reduce(field, contributions)
+            if getattr(metric, field) != unified:
+                setattr(metric, field, unified)
+                changed.append(field)
+
+        dirty = rebuilt is not None
+        if dirty:
+            metric.provenance = rebuilt
+        sources = metric.sources or []
+        if provider not in sources:
+            metric.sources = sources + [provider]
+            dirty = True
+        return changed, dirty
+
+    def fold(self, into: DailyMetric, other: DailyMetric) -> List[str]:
+        """
+        Fold another row for the same day into `into`, as when re-bucketing
+        lands two rows on one local date. Each provider keeps its most
+        recently fetched contribution per field; unified values are then
+        recomputed. Returns the unified fields whose value changed.
+        """
+        provenance = {}
+        changed = []
+        for field in DATA_COLUMNS:
+            contributions = {}
+            for metric in (other, into):
+                recorded = (metric.provenance or {}).get(field)
+                if recorded is None:
+                    current = getattr(metric, field)
+                    recorded = {LEGACY_SOURCE: [current, None]} if current is not None else {}
+                for provider, contribution in recorded.items():
+                    kept = contributions.get(provider)
+                    if kept is None or (contribution[1] or 0) >= (kept[1] or 0):
+                        contributions[provider] = contribution
+            if not contributions:
+                continue
+            provenance[field] = contributions
+            unified = self.reduce(field, contributions)
+            if getattr(into, field) != unified:
+                setattr(into, field, unified)
+                changed.append(field)
+
+        into.provenance = provenance
+        into.sources = list(dict.fromkeys((into.sources or []) + (other.sources or [])))
+        return changed
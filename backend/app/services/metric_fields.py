@@ -0,0 +1,53 @@
+"""
+Shared mapping between user-facing metric types and DailyMetric columns.
+Used by heatmaps, trends, goals and streaks so they agree on naming.
+"""
+
+METRIC_FIELDS = {
+    "steps": "steps",
+    "sleep": "sleep_duration_minutes",
+    "heart_rate": "resting_hr",
+    "calories": "active_calories",
+    "stress": "stress_score",
+    "active_minutes": "active_minutes",
+    "distance": "distance_meters",
+    "floors": "floors_climbed",
+    "weight": "weight_kg",
+}
+
+# Metrics that accumulate over a period (weekly steps = sum of daily steps).
+# Everything else is a level, where the latest reading is the progress value.
+ADDITIVE_METRICS = {"steps", "sleep", "calories", "active_minutes", "distance", "floors"}
+
+# Metrics where a lower reading is the better one: a weight goal of 70 kg is
+# met at 68 kg, not at 85 kg.
+LOWER_IS_BETTER = {"weight", "heart_rate", "stress"}
+
+# Columns whose pre-merge values are handed to derived state (goals, streaks,
+# rolling stats); hrv_avg has no heatmap but feeds the HRV baseline
+TRACKED_FIELDS = tuple(sorted(set(METRIC_FIELDS.values()) | {"hrv_avg"}))
+
+
+def metric_field(metric_type: str) -> str:
+    """Return the DailyMetric column for a metric type (falls back to the raw name)."""
+    return METRIC_FIELDS.get(metric_type, metric_type)
+
+
+def meets_target(metric_type: str, value, target) -> bool:
+    """Whether a reading reaches the target, honouring the metric's direction."""
+    if value is None or target is None:
+        return False
+    if metric_type in LOWER_IS_BETTER:
+        # A zero reading means "no data", never "below target"
+        return 0 < value <= target
+    return value >= target
+
+
+def progress_ratio(metric_type: str, value, target) -> float:
+    """Fraction of the way to target in [0, 1]; for lower-is-better metrics
+    this is target / value, so 85 kg against a 70 kg target is ~0.82."""
+    if not value or not target:
+        return 0.0
+    if metric_type in LOWER_IS_BETTER:
+        return min(target / value, 1.0)
+    return min(value / target, 1.0)
@@ -0,0 +1,219 @@
+"""
+Declarative provider payload schemas, compiled once into normalizers.
+
+Each provider declares, per DailyMetric column, which of its payload keys
+carry the value (in precedence order) and in what unit. Every provider
+also inherits GENERIC_SCHEMA, which accepts each column under its own name
+plus the historical aliases, so already-unified records pass through.
+
+Compiling inverts a schema into a single key -> (column, converter) table.
+Normalizing a record then costs one dict probe per key the record actually
+has, instead of a scan over every mapping for every record.
+"""
+
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from sqlalchemy import Float, Integer, JSON
+
+from app.models.user import DailyMetric
+
+
+class FieldSpec(NamedTuple):
+    keys: Tuple[str, ...]  # Payload keys, highest precedence first
+    unit: Optional[str] = None  # Source unit, see UNIT_FACTORS
+    combine: str = "first"  # "first" present key, or "sum" of all present keys
+
+
+def field(*keys: str, unit: Optional[str] = None) -> FieldSpec:
+    return FieldSpec(keys, unit)
+
+
+def total(*keys: str, unit: Optional[str] = None) -> FieldSpec:
+    return FieldSpec(keys, unit, "sum")
+
+
+# Multiplier from the source unit to the column's unit (minutes, meters, kg, percent)
+UNIT_FACTORS = {
+    "seconds": 1 / 60,
+    "milliseconds": 1 / 60000,
+    "km": 1000.0,
+    "miles": 1609.344,
+    "lb": 0.45359237,
+    "grams": 1 / 1000,
+    "fraction": 100.0,
+}
+
+# Columns that are bookkeeping rather than provider data
+_NON_DATA_COLUMNS = {
+    "id", "user_id", "date", "local_date", "sources", "provenance", "is_complete", "created_at", "updated_at",
+}
+DATA_COLUMNS = tuple(
+    column.name for column in DailyMetric.__table__.columns if column.name not in _NON_DATA_COLUMNS
+)
+
+GENERIC_SCHEMA: Dict[str, FieldSpec] = {
+    **{column: field(column) for column in DATA_COLUMNS},
+    "steps": field("steps", "activitySteps", "total_steps"),
+    "active_calories": field("active_calories", "activeCalories", "activityCalories", "calories_out"),
+    "resting_hr": field("resting_hr", "restingHeartRate", "resting_heart_rate"),
+    "sleep_duration_minutes": field("sleep_duration_minutes", "minutesAsleep", "totalSleepTime"),
+}
+
+PROVIDER_SCHEMAS: Dict[str, Dict[str, FieldSpec]] = {
+    # Fitbit Web API: activity time series, daily activity summary, sleep log
+    "fitbit": {
+        "steps": field("steps"),
+        "active_calories": field("activityCalories"),
+        "total_calories": field("caloriesOut"),
+        "resting_calories": field("caloriesBMR"),
+        "active_minutes": total("minutesFairlyActive", "minutesVeryActive"),
+        "distance_meters": field("distance", unit="km"),
+        "floors_climbed": field("floors"),
+        "resting_hr": field("restingHeartRate"),
+        "hr_zones": field("heartRateZones"),
+        "sleep_duration_minutes": field("minutesAsleep"),
+        "sleep_efficiency": field("efficiency"),
+        "awake_minutes": field("minutesAwake"),
+        "weight_kg": field("weight"),
+        "body_fat_percentage": field("fat"),
+        "spo2_avg": field("spo2Avg"),
+        "spo2_min": field("spo2Min"),
+    },
+    # Garmin Health API: dailies, sleeps, stress and body composition summaries
+    "garmin": {
+        "steps": field("steps"),
+        "active_calories": field("activeKilocalories"),
+        "resting_calories": field("bmrKilocalories"),
+        "active_minutes": total(
+            "moderateIntensityDurationInSeconds", "vigorousIntensityDurationInSeconds", unit="seconds"
+        ),
+        "distance_meters": field("distanceInMeters"),
+        "floors_climbed": field("floorsClimbed"),
+        "resting_hr": field("restingHeartRateInBeatsPerMinute"),
+        "avg_hr": field("averageHeartRateInBeatsPerMinute"),
+        "max_hr": field("maxHeartRateInBeatsPerMinute"),
+        "min_hr": field("minHeartRateInBeatsPerMinute"),
+        "sleep_duration_minutes": field("sleepDurationInSeconds", unit="seconds"),
+        "deep_sleep_minutes": field("deepSleepDurationInSeconds", unit="seconds"),
+        "light_sleep_minutes": field("lightSleepDurationInSeconds", unit="seconds"),
+        "rem_sleep_minutes": field("remSleepInSeconds", unit="seconds"),
+        "awake_minutes": field("awakeDurationInSeconds", unit="seconds"),
+        "stress_score": field("averageStressLevel"),
+        "body_battery": field("bodyBatteryChargedValue"),
+        "weight_kg": field("weightInGrams", unit="grams"),
+        "body_fat_percentage": field("bodyFatInPercent"),
+        "muscle_mass_kg": field("muscleMassInGrams", unit="grams"),
+        "spo2_avg": field("averageSpo2"),
+        "spo2_min": field("lowestSpo2"),
+    },
+    # Oura Cloud API v2: daily_activity, sleep, daily_readiness, daily_spo2
+    "oura": {
+        "steps": field("steps"),
+        "active_calories": field("active_calories"),
+        "total_calories": field("total_calories"),
+        "active_minutes": total("high_activity_time", "medium_activity_time", unit="seconds"),
+        "distance_meters": field("equivalent_walking_distance"),
+        "resting_hr": field("lowest_heart_rate"),
+        "hrv_avg": field("average_hrv"),
+        "sleep_duration_minutes": field("total_sleep_duration", unit="seconds"),
+        "sleep_efficiency": field("efficiency"),
+        "deep_sleep_minutes": field("deep_sleep_duration", unit="seconds"),
+        "light_sleep_minutes": field("light_sleep_duration", unit="seconds"),
+        "rem_sleep_minutes": field("rem_sleep_duration", unit="seconds"),
+        "awake_minutes": field("awake_time", unit="seconds"),
+        "readiness_score": field("readiness_score"),
+        "spo2_avg": field("spo2_percentage"),
+    },
+    # HealthKit export, via the iOS app
+    "apple_health": {
+        "steps": field("stepCount"),
+        "active_calories": field("activeEnergyBurned"),
+        "resting_calories": field("basalEnergyBurned"),
+        "active_minutes": field("appleExerciseTime"),
+        "distance_meters": field("distanceWalkingRunning", unit="km"),
+        "floors_climbed": field("flightsClimbed"),
+        "resting_hr": field("restingHeartRate"),
+        "hrv_avg": field("heartRateVariabilitySDNN"),
+        "sleep_duration_minutes": field("sleepAnalysisAsleep", unit="seconds"),
+        "weight_kg": field("bodyMass"),
+        "body_fat_percentage": field("bodyFatPercentage", unit="fraction"),
+        "bp_systolic": field("bloodPressureSystolic"),
+        "bp_diastolic": field("bloodPressureDiastolic"),
+        "spo2_avg": field("oxygenSaturation", unit="fraction"),
+    },
+}
+
+
+def _converter(column: str, unit: Optional[str]) -> Callable:
+    """Unit conversion and the column's type cast, fused into one callable."""
+    column_type = DailyMetric.__table__.columns[column].type
+    factor = UNIT_FACTORS[unit] if unit else None
+
+    if isinstance(column_type, Integer):
+        if factor is None:
+            # Fitbit time series send numbers as strings
+            return lambda value: value if type(value) is int else int(round(float(value)))
+        return lambda value: int(round(float(value) * factor))
+    if isinstance(column_type, Float):
+        if factor is None:
+            return float
+        return lambda value: float(value) * factor
+    if isinstance(column_type, JSON):
+        return lambda value: value
+    raise ValueError(f"Unsupported column type for {column}: {column_type}")
+
+
+class ProviderNormalizer:
+    """A provider schema compiled into a key -> (column, converter) table."""
+
+    def __init__(self, provider: str, schema: Dict[str, FieldSpec]):
+        self.provider = provider
+        lookup = {}
+        rank = 0
+        # Provider-specific keys outrank the generic names and aliases
+        for source in (schema, GENERIC_SCHEMA):
+            for column, spec in source.items():
+                if column not in DATA_COLUMNS:
+                    raise ValueError(f"{provider} schema maps unknown column {column}")
+                convert = _converter(column, spec.unit)
+                for key in spec.keys:
+                    if key not in lookup:
+                        lookup[key] = (column, convert, rank, spec.combine == "sum")
+                        rank += 1
+        self.lookup = lookup
+
+    def normalize(self, record: Dict) -> Dict:
+        return self.normalize_batch((record,))[0]
+
+    def normalize_batch(self, records: Iterable[Dict]) -> List[Dict]:
+        """Normalize many records in one pass; unknown keys and nulls are dropped."""
+        lookup = self.lookup.get
+        batch = []
+        for record in records:
+            out = {}
+            ranks = {}
+            for key, value in record.items():
+                target = lookup(key)
+                if target is None or value is None:
+                    continue
+                column, convert, rank, summed = target
+                if summed:
+                    out[column] = out.get(column, 0) + convert(value)
+                elif ranks.get(column, rank + 1) > rank:
+                    out[column] = convert(value)
+                    ranks[column] = rank
+            batch.append(out)
+        return batch
+
+
+_normalizers: Dict[str, ProviderNormalizer] = {
+    provider: ProviderNormalizer(provider, schema) for provider, schema in PROVIDER_SCHEMAS.items()
+}
+
+
+def get_normalizer(provider: str) -> ProviderNormalizer:
+    """Compiled normalizer for a provider; unknown providers get the generic schema."""
+    normalizer = _normalizers.get(provider)
+    if normalizer is None:
+        normalizer = _normalizers[provider] = ProviderNormalizer(provider, {})
+    return normalizer
@@ -0,0 +1,207 @@
+"""
+Provider push notifications: signature checks, payload parsing and the
+per-connection coalescer that turns bursts of notifications into one
+targeted fetch.
+
+Providers notify "user X has new data for day D" rather than sending the
+data we merge, and a single watch sync can fire a dozen notifications in
+a few seconds (one per collection type). The coalescer collects the
+notified dates per FitnessConnection for WEBHOOK_DEBOUNCE_SECONDS after
+the first notification, then dispatches a single fetch of just those
+dates.
+"""
+
+import asyncio
+import base64
+import hashlib
+import hmac
+import logging
+import time
+from datetime import date, datetime, timedelta
+from typing import Awaitable, Callable, Dict, Iterable, List, NamedTuple, Optional, Set
+
+from app.core.config import settings
+from app.core.timezone import as_date
+
+logger = logging.getLogger("fitlife.webhooks")
+
+# Oura timestamps older than this are treated as replays
+OURA_SIGNATURE_TOLERANCE_SECONDS = 300
+
+
+class Notification(NamedTuple):
+    provider_user_id: Optional[str]
+    access_token: Optional[str]  # Garmin identifies users by their access token
+    dates: List[date]
+
+
+def _digest_matches(expected: bytes, received: Optional[str], encode: Callable[[bytes], str]) -> bool:
+    if not received:
+        return False
+    return hmac.compare_digest(encode(expected), received.strip())
+
+
+def verify_fitbit_signature(body: bytes, signature: Optional[str], client_secret: str) -> bool:
+    """X-Fitbit-Signature: base64 HMAC-SHA1 of the body, keyed with "<client secret>&"."""
+    expected = hmac.new(f"{client_secret}&".encode(), body, hashlib.sha1).digest()
+    return _digest_matches(expected, signature, lambda digest: base64.b64encode(digest).decode())
+
+
+def verify_oura_signature(
+    body: bytes,
+    signature: Optional[str],
+    timestamp: Optional[str],
+    client_secret: str,
+    now: Optional[float] = None
+) -> bool:
+    """x-oura-signature: hex HMAC-SHA256 of x-oura-timestamp + body; stale timestamps are refused."""
+    try:
+        age = (time.time() if now is None else now) - int(timestamp)
+    except (TypeError, ValueError):
+        return False
+    if abs(age) > OURA_SIGNATURE_TOLERANCE_SECONDS:
+        return False
+    expected = hmac.new(client_secret.encode(), timestamp.encode() + body, hashlib.sha256).digest()
+    return _digest_matches(expected, signature and signature.lower(), lambda digest: digest.hex())
+
+
+def verify_garmin_signature(body: bytes, signature: Optional[str], consumer_secret: str) -> bool:
+    """
+    X-Garmin-Signature: hex HMAC-SHA256 of the body, keyed with the consumer
+    secret. Garmin's push service doesn't sign requests itself; the push
+    endpoint is registered behind the gateway that adds this header.
+    """
+    expected = hmac.new(consumer_secret.encode(), body, hashlib.sha256).digest()
+    return _digest_matches(expected, signature and signature.lower(), lambda digest: digest.hex())
+
+
+def parse_fitbit(payload) -> List[Notification]:
+    """Fitbit Subscriptions: a list of {collectionType, date, ownerId, ...}."""
+    notifications = []
+    for item in payload if isinstance(payload, list) else []:
+        if item.get("collectionType") == "userRevokedAccess" or not item.get("date"):
+            continue
+        notifications.append(Notification(item.get("ownerId"), None, [as_date(item["date"])]))
+    return notifications
+
+
+def parse_garmin(payload) -> List[Notification]:
+    """
+    Garmin Push/Ping: {summary type: [{userId, userAccessToken, calendarDate | upload window}]}.
+    Ping notifications carry an upload window instead of a calendar date.
+    """
+    notifications = []
+    for items in (payload.values() if isinstance(payload, dict) else []):
+        for item in items if isinstance(items, list) else []:
+            if item.get("calendarDate"):
+                dates = [as_date(item["calendarDate"])]
+            elif item.get("uploadStartTimeInSeconds") is not None:
+                first = datetime.utcfromtimestamp(int(item["uploadStartTimeInSeconds"])).date()
+                end = item.get("uploadEndTimeInSeconds", item["uploadStartTimeInSeconds"])
+                last = datetime.utcfromtimestamp(int(end)).date()
+                dates = [first + timedelta(days=offset) for offset in range((last - first).days + 1)]
+            else:
+                continue
+            notifications.append(Notification(item.get("userId"), item.get("userAccessToken"), dates))
+    return notifications
+
+
+def parse_oura(payload) -> List[Notification]:
+    """
+    Oura webhooks: {event_type, data_type, user_id, event_time, ...}. Only the
+    event time is given, and a day's documents keep changing into the next
+    morning, so the event's date and the day before are both refetched.
+    """
+    if not isinstance(payload, dict) or payload.get("event_type") == "delete" or not payload.get("event_time"):
+        return []
+    day = as_date(payload["event_time"])
+    return [Notification(payload.get("user_id"), None, [day - timedelta(days=1), day])]
+
+
+PARSERS = {
+    "fitbit": parse_fitbit,
+    "garmin": parse_garmin,
+    "oura": parse_oura,
+}
+
+
+Dispatch = Callable[[int, List[date]], Awaitable[object]]
+
+
+class NotificationCoalescer:
+    """
+    Debounces notifications per connection: the first one opens a window,
+    later ones only add their dates, and when the window closes the union
+    of dates is dispatched once. The window is fixed rather than sliding,
+    so a connection that never goes quiet still syncs every debounce period.
+    """
+
+    def __init__(self, dispatch: Dispatch, debounce_seconds: float, max_dates: int = 31):
+        self.dispatch = dispatch
+        self.debounce_seconds = debounce_seconds
+        self.max_dates = max_dates
+        self._pending: Dict[int, Set[date]] = {}
+        self._timers: Dict[int, asyncio.TimerHandle] = {}
+        self._running: Set[asyncio.Task] = set()
+
+    @property
+    def pending(self) -> Dict[int, List[date]]:
+        return {connection_id: sorted(dates) for connection_id, dates in self._pending.items()}
+
+    def notify(self, connection_id: int, dates: Iterable[date]) -> bool:
+        """Queue dates for a connection; returns False when they joined an open window."""
+        opened = connection_id not in self._pending
+        self._pending.setdefault(connection_id, set()).update(dates)
+        if opened:
+            loop = asyncio.get_running_loop()
+            self._timers[connection_id] = loop.call_later(self.debounce_seconds, self._fire, connection_id)
+        return opened
+
+    def _fire(self, connection_id: int) -> None:
+        self._timers.pop(connection_id, None)
+        dates = self._pending.pop(connection_id, None)
+        if not dates:
+            return
+        # Keep the most recent days if a backfill notified more than one fetch should cover
+        task = asyncio.get_running_loop().create_task(self._run(connection_id, sorted(dates)[-self.max_dates:]))
+        self._running.add(task)
+        task.add_done_callback(self._running.discard)
+
+    async def _run(self, connection_id: int, dates: List[date]) -> None:
+        try:
+            await self.dispatch(connection_id, dates)
+        except Exception:
+            logger.exception("Webhook sync failed for connection %s", connection_id)
+
+    async def flush(self) -> None:
+        """Dispatch every open window now and wait for all in-flight syncs (tests, shutdown)."""
+        for connection_id, timer in list(self._timers.items()):
+            timer.cancel()
+            self._fire(connection_id)
+        if self._running:
+            await asyncio.gather(*self._running)
+
+
+async def sync_notified_dates(connection_id: int, dates: List[date]) -> Dict:
+    """Default dispatch: a targeted sync in its own session, single-flighted per connection."""
+    from app.core.database import SessionLocal
+    from app.services.fitness_aggregator import FitnessDataAggregator
+    from app.services.sync_coordinator import sync_coordinator
+
+    db = SessionLocal()
+    try:
+        aggregator = FitnessDataAggregator(db)
+        result, _ = await sync_coordinator.run(
+            f"connection:{connection_id}",
+            lambda: aggregator.sync_connection_dates(connection_id, dates)
+        )
+        return result
+    finally:
+        db.close()
+
+
+coalescer = NotificationCoalescer(
+    sync_notified_dates,
+    debounce_seconds=settings.WEBHOOK_DEBOUNCE_SECONDS,
+    max_dates=settings.WEBHOOK_MAX_DATES
+)
@@ -0,0 +1,124 @@
+"""
+KLL quantile sketch (Karnin, Lang & Liberty, 2016).
+
+A stream of N values is summarized in O(k log N) space with rank error
+around 1.65/k, and two sketches built over disjoint data merge into a
+sketch of their union. Cohort jobs build one per chunk or shard and
+merge them, so no pass ever has to hold a full population in memory.
+"""
+
+import math
+import random
+from bisect import bisect_right
+from typing import Dict, Iterable, List, Optional
+
+
+class KLLSketch:
+    def __init__(self, k: int = 200, seed: Optional[int] = None):
+        self.k = k
+        self.n = 0
+        # compactors[h] holds items that each stand for 2**h stream values
+        self.compactors: List[List[float]] = [[]]
+        self._size = 0
+        self._max_size = 0
+        self._rng = random.Random(seed)
+        self._cdf = None
+        self._update_max_size()
+
+    def _capacity(self, level: int) -> int:
+        depth = len(self.compactors) - level - 1
+        return int(math.ceil(self.k * (2 / 3) ** depth)) + 1
+
+    def _update_max_size(self) -> None:
+        self._max_size = sum(self._capacity(level) for level in range(len(self.compactors)))
+
+    def update(self, value: float) -> None:
+        self.compactors[0].append(value)
+        self.n += 1
+        self._size += 1
+        self._cdf = None
+        if self._size >= self._max_size:
+            self._compress()
+
+    def extend(self, values: Iterable[float]) -> None:
+        for value in values:
+            self.update(value)
+
+    def _compress(self) -> None:
+        while self._size >= self._max_size:
+            for level, items in enumerate(self.compactors):
+                if len(items) < self._capacity(level):
+                    continue
+                if level + 1 == len(self.compactors):
+                    self.compactors.append([])
+                    self._update_max_size()
+                items.sort()
+                # Keep every other item from a random offset; each survivor
+                # now carries twice the weight at the next level
+                promoted = items[self._rng.random() < 0.5::2]
+                self.compactors[level + 1].extend(promoted)
+                self._size += len(promoted) - len(items)
+                self.compactors[level] = []
+                break
+
+    def merge(self, other: "KLLSketch") -> "KLLSketch":
+        """Fold another sketch into this one (in place) and return self."""
+        while len(self.compactors) < len(other.compactors):
+            self.compactors.append([])
+        for level, items in enumerate(other.compactors):
+            self.compactors[level].extend(items)
+        self.n += other.n
+        self._size = sum(len(items) for items in self.compactors)
+        self._cdf = None
+        self._update_max_size()
+        if self._size >= self._max_size:
+            self._compress()
+        return self
+
+    def _weighted(self):
+        if self._cdf is None:
+            pairs = sorted(
+                (value, 1 << level)
+                for level, items in enumerate(self.compactors)
+                for value in items
+            )
+            values, cumulative, total = [], [], 0
+            for value, weight in pairs:
+                total += weight
+                values.append(value)
+                cumulative.append(total)
+            self._cdf = (values, cumulative, total)
+        return self._cdf
+
+    def rank(self, value: float) -> float:
+        """Estimated fraction of the stream that is <= value."""
+        values, cumulative, total = self._weighted()
+        if not total:
+            return 0.0
+        index = bisect_right(values, value)
+        return cumulative[index - 1] / total if index else 0.0
+
+    def quantile(self, fraction: float) -> Optional[float]:
+        """Smallest summarized value whose rank reaches `fraction`."""
+        values, cumulative, total = self._weighted()
+        if not total:
+            return None
+        target = fraction * total
+        index = bisect_right(cumulative, target - 1e-9)
+        return values[min(index, len(values) - 1)]
+
+    def quantiles(self, points: int = 101) -> List[Optional[float]]:
+        """Evenly spaced quantiles, e.g. points=101 gives p0..p100."""
+        return [self.quantile(i / (points - 1)) for i in range(points)]
+
+    def to_dict(self) -> Dict:
+        return {"k": self.k, "n": self.n, "compactors": self.compactors}
+
+    @classmethod
+    def from_dict(cls, data: Dict, seed: Optional[int] = None) -> "KLLSketch":
+        sketch = cls(k=data["k"], seed=seed)
+        sketch.n = data["n"]
+        sketch.compactors = [list(items) for items in data["compactors"]] or [[]]
+        sketch._size = sum(len(items) for items in sketch.compactors)
+        sketch._update_max_size()
+        return sketch
@@ -0,0 +1,327 @@
+"""
+Rolling statistics over a user's daily metrics: 7- and 28-day averages,
+the acute:chronic workload ratio, and a 28-day baseline band (the HRV
+baseline, for hrv).
+
+Two paths produce the same numbers:
+
+- rolling_series() computes a whole series at once with numpy. Windowed
+  sums are differences of cumulative sums and the EWMAs use a chunked
+  closed form, so a year of history costs O(n) with no per-day Python
+  loop, instead of O(n * window).
+- RollingIndex keeps the state as of the latest day in rolling_stats (the
+  last 28 readings and both EWMAs) and folds newly synced days in at O(1)
+  each, like StreakIndex. Revising a day that was already folded in
+  rebuilds the state from history with the vectorized path.
+
+Days without a reading are gaps: they drop out of window averages and
+leave the EWMAs where they were.
+"""
+
+from datetime import date, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+from app.models.user import User, DailyMetric, RollingStat
+from app.services.metric_fields import METRIC_FIELDS
+
+ACUTE_DAYS = 7
+CHRONIC_DAYS = 28
+
+ROLLING_METRICS = {
+    **{metric: METRIC_FIELDS[metric] for metric in (
+        "steps", "sleep", "heart_rate", "calories", "active_minutes", "stress"
+    )},
+    "hrv": "hrv_avg",
+}
+# A zero from these sensors means the device wasn't worn, not a reading
+ZERO_IS_MISSING = {"heart_rate", "hrv"}
+
+# Leaves (1 - 2/29)^112 ~ 3e-4 of the pre-warmup level in the chronic EWMA
+WARMUP_DAYS = 4 * CHRONIC_DAYS
+EWMA_CHUNK = 64  # Bounds 1/decay growth in the closed form to ~1e8 at a 7-day span
+
+
+def min_readings(window: int) -> int:
+    """Readings a window needs before its average is reported."""
+    return (window + 1) // 2
+
+
+def ewma_alpha(span: int) -> float:
+    return 2.0 / (span + 1)
+
+
+def reading(metric_type: str, value) -> Optional[float]:
+    if value is None or (value == 0 and metric_type in ZERO_IS_MISSING):
+        return None
+    return float(value)
+
+
+def daily_array(
+    metric_type: str,
+    start: date,
+    end: date,
+    rows: Iterable[Tuple[date, object]]
+) -> np.ndarray:
+    """One slot per local day from start to end inclusive, NaN where there's no reading."""
+    values = np.full((end - start).days + 1, np.nan)
+    for day, value in rows:
+        value = reading(metric_type, value)
+        if value is not None and start <= day <= end:
+            values[(day - start).days] = value
+    return values
+
+
+def _trailing_sums(values: np.ndarray, window: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    (count, sum, sum of squared deviations from the mean) over each day's
+    trailing window, all from cumulative sums.
+    """
+    present = ~np.isnan(values)
+    # Centering first keeps the sum-of-squares variance from cancelling on large values
+    shift = float(np.nanmean(values)) if present.any() else 0.0
+    centered = np.where(present, values - shift, 0.0)
+
+    ends = np.arange(1, len(values) + 1)
+    starts = np.maximum(ends - window, 0)
+
+    def trailing(a: np.ndarray) -> np.ndarray:
+        cumulative = np.concatenate(([0.0], np.cumsum(a)))
+        return cumulative[ends] - cumulative[starts]
+
+    count = trailing(present.astype(float))
+    total = trailing(centered)
+    squares = trailing(centered * centered)
+    # Back to uncentered sums for the mean; the squares stay centered
+    return count, total + shift * count, squares - total * total / np.maximum(count, 1)
+
+
+def rolling_mean(values: np.ndarray, window: int) -> np.ndarray:
+    count, total, _ = _trailing_sums(values, window)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(count >= min_readings(window), total / count, np.nan)
+
+
+def rolling_sd(values: np.ndarray, window: int) -> np.ndarray:
+    """Sample standard deviation over each trailing window."""
+    count, _, deviations = _trailing_sums(values, window)
+    enough = count >= max(min_readings(window), 2)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(enough, np.sqrt(np.maximum(deviations, 0.0) / (count - 1)), np.nan)
+
+
+def ewma(values: np.ndarray, span: int, initial: Optional[float] = None) -> np.ndarray:
+    """
+    Exponentially weighted moving average that carries across gaps. With no
+    initial level it starts at the first reading (NaN before it).
+
+    Within a chunk, y_t = D_t * (y_0 + sum_k a_k x_k / D_k) where D is the
+    running product of (1 - a_k); a_k is 0 on gaps. Chunking keeps D away
+    from underflow on long series.
+    """
+    out = np.full(len(values), np.nan)
+    present = ~np.isnan(values)
+    start = 0
+    level = initial
+    if level is None:
+        if not present.any():
+            return out
+        start = int(np.argmax(present))
+        level = float(values[start])
+        out[start] = level
+        start += 1
+
+    alpha = np.where(present, ewma_alpha(span), 0.0)
+    x = np.where(present, values, 0.0)
+    for offset in range(start, len(values), EWMA_CHUNK):
+        chunk = slice(offset, offset + EWMA_CHUNK)
+        decay = np.cumprod(1.0 - alpha[chunk])
+        out[chunk] = decay * (level + np.cumsum(alpha[chunk] * x[chunk] / decay))
+        level = float(out[chunk][-1])
+    return out
+
+
+def _ratio(numerator: np.ndarray, denominator: np.ndarray) -> np.ndarray:
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(denominator > 0, numerator / denominator, np.nan)
+
+
+def window_stats(values: np.ndarray) -> Dict[str, np.ndarray]:
+    """The windowed (non-EWMA) statistics for every day of a dense series."""
+    acute = rolling_mean(values, ACUTE_DAYS)
+    chronic = rolling_mean(values, CHRONIC_DAYS)
+    return {
+        "avg_7d": acute,
+        "avg_28d": chronic,
+        "sd_28d": rolling_sd(values, CHRONIC_DAYS),
+        "acwr": _ratio(acute, chronic),
+    }
+
+
+def rolling_series(values: np.ndarray) -> Dict[str, np.ndarray]:
+    """Every rolling statistic for every day of a dense series, in O(n)."""
+    stats = window_stats(values)
+    stats["ewma_acute"] = ewma(values, ACUTE_DAYS)
+    stats["ewma_chronic"] = ewma(values, CHRONIC_DAYS)
+    stats["acwr_ewma"] = _ratio(stats["ewma_acute"], stats["ewma_chronic"])
+    return stats
+
+
+def _number(value: float, digits: int = 2) -> Optional[float]:
+    return None if np.isnan(value) else round(float(value), digits)
+
+
+def baseline_status(avg_7d: Optional[float], mean: Optional[float], sd: Optional[float]) -> Optional[str]:
+    """Where the last week sits against the 28-day band (mean +/- one SD)."""
+    if avg_7d is None or mean is None or sd is None:
+        return None
+    if avg_7d < mean - sd:
+        return "below"
+    if avg_7d > mean + sd:
+        return "above"
+    return "within"
+
+
+def snapshot(stat: Optional[RollingStat], as_of: date) -> Optional[Dict]:
+    """
+    The latest statistics from materialized state, without touching
+    history. Days after last_date count as gaps.
+    """
+    if stat is None or stat.last_date is None:
+        return None
+    as_of = max(as_of, stat.last_date)
+    window = _shift(stat.window or [], (as_of - stat.last_date).days)
+    values = np.array([np.nan if value is None else value for value in window], dtype=float)
+    stats = {name: _number(series[-1]) for name, series in window_stats(values).items()}
+    acute, chronic = stat.acute_ewma, stat.chronic_ewma
+    stats.update({
+        "ewma_acute": None if acute is None else round(acute, 2),
+        "ewma_chronic": None if chronic is None else round(chronic, 2),
+        "acwr_ewma": round(acute / chronic, 2) if acute is not None and chronic else None,
+    })
+    stats["baseline_status"] = baseline_status(stats["avg_7d"], stats["avg_28d"], stats["sd_28d"])
+    return {"date": as_of.isoformat(), **stats}
+
+
+def _shift(window: List, days: int) -> List:
+    """Advance a window by `days`, the new days being gaps; always CHRONIC_DAYS long."""
+    padded = [None] * (CHRONIC_DAYS - len(window)) + list(window) + [None] * max(days, 0)
+    return padded[-CHRONIC_DAYS:]
+
+
+class RollingIndex:
+    """
+    Maintains rolling state per user and metric as days are merged.
+    Appending the next day is O(1); revisions to days already folded in
+    rebuild from daily_metrics.
+    """
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def apply(self, user: User, changes: List) -> None:
+        """Fold merged (metric, previous values) changes into the user's rolling state."""
+        stats = {
+            s.metric_type: s
+            for s in self.db.query(RollingStat).filter(RollingStat.user_id == user.id).all()
+        }
+
+        for metric_type, field in ROLLING_METRICS.items():
+            days = sorted((
+                (metric.local_date, getattr(metric, field), previous.get(field))
+                for metric, previous in changes
+                if getattr(metric, field) is not None or previous.get(field) is not None
+            ), key=lambda item: item[0])
+            if not days:
+                continue
+
+            stat = stats.get(metric_type)
+            if stat is None:
+                self.rebuild(user.id, metric_type)
+                continue
+
+            for day, value, previous in days:
+                if not self._append(stat, day, reading(metric_type, value), reading(metric_type, previous)):
+                    self.rebuild(user.id, metric_type, stat)
+                    break
+
+    def _append(self, stat: RollingStat, day: date, value: Optional[float], previous: Optional[float]) -> bool:
+        """
+        Apply one day in O(1). Returns False when the day revises history
+        already folded into the EWMAs.
+        """
+        last = stat.last_date
+        if last is not None and day <= last:
+            return value == previous
+
+        gap = CHRONIC_DAYS if last is None else (day - last).days
+        # Reassigned, not mutated in place, so the JSON column is marked dirty
+        stat.window = _shift(stat.window or [], gap - 1)[1:] + [value]
+        stat.last_date = day
+        if value is not None:
+            stat.acute_ewma = _step(stat.acute_ewma, value, ACUTE_DAYS)
+            stat.chronic_ewma = _step(stat.chronic_ewma, value, CHRONIC_DAYS)
+        return True
+
+    def rebuild(self, user_id: int, metric_type: str, stat: Optional[RollingStat] = None) -> RollingStat:
+        """Recompute the state from the full daily history in one vectorized pass."""
+        self.db.flush()
+        column = getattr(DailyMetric, ROLLING_METRICS[metric_type])
+        rows = self.db.query(DailyMetric.local_date, column).filter(
+            DailyMetric.user_id == user_id,
+            column.isnot(None)
+        ).order_by(DailyMetric.local_date).all()
+
+        if stat is None:
+            stat = RollingStat(user_id=user_id, metric_type=metric_type)
+            self.db.add(stat)
+
+        stat.last_date = None
+        stat.window = []
+        stat.acute_ewma = None
+        stat.chronic_ewma = None
+        if not rows:
+            return stat
+
+        values = daily_array(metric_type, rows[0][0], rows[-1][0], rows)
+        stat.last_date = rows[-1][0]
+        stat.window = _shift([None if np.isnan(v) else float(v) for v in values[-CHRONIC_DAYS:]], 0)
+        stat.acute_ewma = _last(ewma(values, ACUTE_DAYS))
+        stat.chronic_ewma = _last(ewma(values, CHRONIC_DAYS))
+        return stat
+
+
+def _step(level: Optional[float], value: float, span: int) -> float:
+    return value if level is None else level + ewma_alpha(span) * (value - level)
+
+
+def _last(series: np.ndarray) -> Optional[float]:
+    return None if not len(series) or np.isnan(series[-1]) else float(series[-1])
+
+
+def rolling_points(db: Session, user_id: int, metric_type: str, start: date, end: date) -> List[Dict]:
+    """
+    Per-day statistics from start to end. History is read from WARMUP_DAYS
+    earlier so the first day's windows are full and its EWMAs have settled.
+    """
+    column = getattr(DailyMetric, ROLLING_METRICS[metric_type])
+    first = start - timedelta(days=WARMUP_DAYS)
+    rows = db.query(DailyMetric.local_date, column).filter(
+        DailyMetric.user_id == user_id,
+        DailyMetric.local_date >= first,
+        DailyMetric.local_date <= end,
+        column.isnot(None)
+    ).all()
+    values = daily_array(metric_type, first, end, rows)
+    stats = rolling_series(values)
+    offset = WARMUP_DAYS
+    return [
+        {
+            "date": (start + timedelta(days=i)).isoformat(),
+            "value": _number(values[offset + i]),
+            **{name: _number(series[offset + i]) for name, series in stats.items()},
+        }
+        for i in range(len(values) - offset)
+    ]
@@ -0,0 +1,147 @@
+from typing import List, Dict, Optional, Iterable
+from datetime import date, timedelta
+from sqlalchemy.orm import Session
+from app.models.user import User, DailyMetric, Goal, MetricStreak
+from app.services.metric_fields import METRIC_FIELDS, meets_target
+
+# Metrics with a streak index, and the default bar a day has to clear.
+# None means any recorded value counts (e.g. wearing the device overnight for HR).
+DEFAULT_STREAK_THRESHOLDS = {
+    "steps": 10000,
+    "sleep": 420,
+    "calories": 300,
+    "active_minutes": 30,
+    "heart_rate": None,
+    "stress": None,
+}
+
+
+def _qualifies(metric_type: str, value, threshold: Optional[float]) -> bool:
+    """Whether a day clears the bar; lower-is-better metrics must stay at or under it."""
+    if value is None:
+        return False
+    return threshold is None or meets_target(metric_type, value, threshold)
+
+
+def current_streak_as_of(streak: Optional[MetricStreak], today: date) -> int:
+    """
+    The streak as the user sees it today. Today's data may still be syncing,
+    so a run ending yesterday is still alive; anything older is broken.
+    """
+    if not streak or not streak.last_qualified_date:
+        return 0
+    if streak.last_qualified_date < today - timedelta(days=1):
+        return 0
+    return streak.current_streak or 0
+
+
+class StreakIndex:
+    """
+    Maintains current/longest streaks per user and metric as days are merged.
+    Appending the next day is O(1); only revisions to days inside already
+    counted history (rare) fall back to rebuilding from daily_metrics.
+    """
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def apply(self, user: User, changes: List, goals: Optional[Iterable[Goal]] = None) -> None:
+        """Fold merged (metric, previous values) changes into the user's streaks."""
+        if goals is None:
+            goals = self.db.query(Goal).filter(
+                Goal.user_id == user.id,
+                Goal.is_active == True
+            ).all()
+        thresholds = self.thresholds(goals)
+
+        streaks = {
+            s.metric_type: s
+            for s in self.db.query(MetricStreak).filter(MetricStreak.user_id == user.id).all()
+        }
+
+        for metric_type, threshold in thresholds.items():
+            field = METRIC_FIELDS[metric_type]
+            days = sorted((
+                (metric.local_date, getattr(metric, field), previous.get(field))
+                for metric, previous in changes
+                if getattr(metric, field) is not None or previous.get(field) is not None
+            ), key=lambda item: item[0])
+            if not days:
+                continue
+
+            streak = streaks.get(metric_type)
+            if streak is None or streak.threshold != threshold:
+                # First sight of this metric or a new bar to clear: derive from history once
+                self.rebuild(user.id, metric_type, threshold, streak)
+                continue
+
+            for day, value, previous in days:
+                if not self._append(streak, day, _qualifies(metric_type, value, threshold),
+                                    _qualifies(metric_type, previous, threshold)):
+                    self.rebuild(user.id, metric_type, threshold, streak)
+                    break
+
+    def thresholds(self, goals: Iterable[Goal]) -> Dict[str, Optional[float]]:
+        """
+        Daily goals override the default threshold for their metric. For
+        lower-is-better metrics (heart_rate, stress) the goal is a ceiling.
+        """
+        thresholds = dict(DEFAULT_STREAK_THRESHOLDS)
+        for goal in goals:
+            if goal.period == "daily" and goal.metric_type in thresholds:
+                thresholds[goal.metric_type] = goal.target_value
+        return thresholds
+
+    def _append(self, streak: MetricStreak, day: date, qualifies: bool, qualified_before: bool) -> bool:
+        """
+        Apply one day in O(1). Returns False when the day revises counted
+        history in a way that needs a rebuild.
+        """
+        last = streak.last_qualified_date
+
+        if last is None or day > last:
+            if not qualifies:
+                # A miss after the run just means the run doesn't extend
+                return True
+            if last is not None and day == last + timedelta(days=1):
+                streak.current_streak = (streak.current_streak or 0) + 1
+            else:
+                streak.current_streak = 1
+                streak.run_start_date = day
+            streak.last_qualified_date = day
+            streak.longest_streak = max(streak.longest_streak or 0, streak.current_streak)
+            return True
+
+        # Revisions to days we have already counted (or skipped) are no-ops
+        # unless they flip whether the day qualifies
+        return qualifies == qualified_before
+
+    def rebuild(
+        self,
+        user_id: int,
+        metric_type: str,
+        threshold: Optional[float],
+        streak: Optional[MetricStreak] = None
+    ) -> MetricStreak:
+        """Recompute a streak from the full daily history."""
+        self.db.flush()
+        column = getattr(DailyMetric, METRIC_FIELDS[metric_type])
+        rows = self.db.query(DailyMetric.local_date, column).filter(
+            DailyMetric.user_id == user_id,
+            column.isnot(None)
+        ).order_by(DailyMetric.local_date).all()
+
+        if streak is None:
+            streak = MetricStreak(user_id=user_id, metric_type=metric_type)
+            self.db.add(streak)
+
+        streak.threshold = threshold
+        streak.current_streak = 0
+        streak.longest_streak = 0
+        streak.run_start_date = None
+        streak.last_qualified_date = None
+
+        for day, value in rows:
+            self._append(streak, day, _qualifies(metric_type, value, threshold), False)
+
+        return streak
@@ -1,8 +1,21 @@
-import stripe
-from typing import Optional, Dict
+from datetime import datetime
+from typing import Optional, Dict, Iterable
+from sqlalchemy.orm import Session
 from app.core.config import settings
+from app.models.user import User
 
-stripe.api_key = settings.STRIPE_SECRET_KEY
+# Stripe statuses that grant access to FitLife Pro
+PREMIUM_STATUSES = {"active", "trialing"}
+
+
+def get_stripe():
+    """
+    Import the Stripe SDK on first use. It is one of the slowest imports in
+    the app and only billing paths need it, so workers don't pay for it at boot.
+    """
+    import stripe
+    stripe.api_key = settings.STRIPE_SECRET_KEY
+    return stripe
 
 
 class SubscriptionService:
@@ -13,6 +26,7 @@ class SubscriptionService:
     @staticmethod
     def create_customer(email: str, name: Optional[str] = None) -> str:
         """Create a Stripe customer."""
+        stripe = get_stripe()
         customer = stripe.Customer.create(
             email=email,
             name=name
@@ -25,6 +39,7 @@ class SubscriptionService:
         Create a subscription for the customer.
         Returns the client secret for the subscription (for Stripe Elements).
         """
+        stripe = get_stripe()
         if not price_id:
             price_id = settings.STRIPE_PRICE_ID
         
@@ -45,6 +60,7 @@ class SubscriptionService:
     @staticmethod
     def cancel_subscription(subscription_id: str) -> bool:
         """Cancel a subscription at period end."""
+        stripe = get_stripe()
         try:
             stripe.Subscription.modify(
                 subscription_id,
@@ -57,6 +73,7 @@ class SubscriptionService:
     @staticmethod
     def get_subscription_status(subscription_id: str) -> str:
         """Get the current status of a subscription."""
+        stripe = get_stripe()
         try:
             subscription = stripe.Subscription.retrieve(subscription_id)
             return subscription.status  # active, canceled, past_due, etc.
@@ -66,6 +83,7 @@ class SubscriptionService:
     @staticmethod
     def create_checkout_session(customer_id: str, success_url: str, cancel_url: str) -> Dict:
         """Create a Stripe Checkout session for subscription."""
+        stripe = get_stripe()
         session = stripe.checkout.Session.create(
             customer=customer_id,
             payment_method_types=["card"],
@@ -85,6 +103,7 @@ class SubscriptionService:
     @staticmethod
     def handle_webhook(payload: bytes, sig_header: str) -> Dict:
         """Handle Stripe webhook events."""
+        stripe = get_stripe()
         try:
             event = stripe.Webhook.construct_event(
                 payload, sig_header, settings.STRIPE_WEBHOOK_SECRET
@@ -106,18 +125,23 @@ class SubscriptionService:
             result["customer_id"] = data.get("customer")
             result["subscription_id"] = data.get("id")
             result["status"] = data.get("status")
+            result["current_period_end"] = data.get("current_period_end")
+            result["cancel_at_period_end"] = data.get("cancel_at_period_end")
             result["handled"] = True
             
         elif event_type == "customer.subscription.updated":
             result["customer_id"] = data.get("customer")
             result["subscription_id"] = data.get("id")
             result["status"] = data.get("status")
+            result["current_period_end"] = data.get("current_period_end")
             result["cancel_at_period_end"] = data.get("cancel_at_period_end")
             result["handled"] = True
             
         elif event_type == "customer.subscription.deleted":
             result["customer_id"] = data.get("customer")
             result["subscription_id"] = data.get("id")
+            result["status"] = data.get("status") or "canceled"
+            result["current_period_end"] = data.get("current_period_end")
             result["handled"] = True
             
         elif event_type == "invoice.payment_succeeded":
@@ -132,9 +156,102 @@ class SubscriptionService:
         
         return result
     
+    @staticmethod
+    def apply_subscription_state(
+        user: User,
+        status: Optional[str],
+        current_period_end: Optional[int] = None,
+        cancel_at_period_end: Optional[bool] = None
+    ) -> bool:
+        """
+        Write Stripe subscription state onto the local user row.
+        Returns True if anything changed, so callers can skip no-op commits.
+        """
+        values = {
+            "subscription_status": status,
+            "is_premium": status in PREMIUM_STATUSES,
+            "subscription_cancel_at_period_end": bool(cancel_at_period_end),
+        }
+        if current_period_end is not None:
+            values["subscription_expires_at"] = datetime.utcfromtimestamp(current_period_end)
+        
+        changed = False
+        for field, value in values.items():
+            if getattr(user, field) != value:
+                setattr(user, field, value)
+                changed = True
+        
+        user.subscription_synced_at = datetime.utcnow()
+        return changed
+    
+    @staticmethod
+    def reconcile_subscriptions(db: Session, client=None, page_size: int = 100) -> Dict:
+        """
+        Batch-list subscriptions from Stripe and fix drift in the local state.
+        Webhooks are the primary writer; this catches missed or out-of-order events.
+        """
+        client = client or get_stripe()
+        stats = {"seen": 0, "updated": 0, "unmatched": 0}
+        # Customer -> chosen subscription, carried across pages so a customer
+        # whose subscriptions straddle a page boundary is settled consistently
+        chosen = {}
+        
+        listing = client.Subscription.list(status="all", limit=page_size)
+        page = []
+        for subscription in listing.auto_paging_iter():
+            page.append(subscription)
+            if len(page) >= page_size:
+                SubscriptionService._reconcile_page(db, page, chosen, stats)
+                page = []
+        if page:
+            SubscriptionService._reconcile_page(db, page, chosen, stats)
+        
+        db.commit()
+        return stats
+    
+    @staticmethod
+    def _reconcile_page(db: Session, subscriptions: Iterable, chosen: Dict, stats: Dict) -> None:
+        """Apply one page of Stripe subscriptions with a single user lookup."""
+        changed = {}
+        first_seen = set()
+        for sub in subscriptions:
+            # Stripe lists newest first; keep it unless an older one still grants access
+            customer = sub["customer"]
+            current = chosen.get(customer)
+            if current is None:
+                first_seen.add(customer)
+            if current is None or (
+                sub["status"] in PREMIUM_STATUSES and current["status"] not in PREMIUM_STATUSES
+            ):
+                chosen[customer] = sub
+                changed[customer] = sub
+        
+        stats["seen"] += len(first_seen)
+        if not changed:
+            return
+
+        users = db.query(User).filter(
+            User.stripe_customer_id.in_(list(changed.keys()))
+        ).all()
+        matched = {user.stripe_customer_id for user in users}
+        stats["unmatched"] += len(first_seen - matched)
+        
+        for user in users:
+            sub = changed[user.stripe_customer_id]
+            user.stripe_subscription_id = sub["id"]
+            updated = SubscriptionService.apply_subscription_state(
+                user,
+                sub["status"],
+                sub.get("current_period_end"),
+                sub.get("cancel_at_period_end")
+            )
+            if updated:
+                stats["updated"] += 1
+    
     @staticmethod
     def create_portal_session(customer_id: str, return_url: str) -> str:
         """Create a Stripe Customer Portal session."""
+        stripe = get_stripe()
         session = stripe.billing_portal.Session.create(
             customer=customer_id,
             return_url=return_url,
@@ -0,0 +1,192 @@
+"""
+Single-flight syncs: concurrent requests for the same key (a user, or a
+connection for webhook-driven syncs) share one run and its result.
+
+Two layers:
+
+- In-process, callers attach to the running sync's future.
+- Across workers, the first caller takes a lease row in sync_leases. The
+  row is claimed with an INSERT, or with a conditional UPDATE once the
+  previous lease finished or expired, so exactly one worker wins on any
+  database. Losers poll the row until the holder stores its result.
+  Holders renew the lease while running, so a crashed worker's lease
+  simply runs out and the next caller takes over.
+
+Postgres advisory locks would avoid the table, but they belong to a
+connection, and a sync holds its lock across awaits and pooled sessions.
+"""
+
+import asyncio
+import uuid
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from sqlalchemy import or_, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.user import SyncLease
+
+SyncCall = Callable[[], Awaitable[Any]]
+
+
+class SingleFlight:
+    """In-process: one running call per key, with every concurrent caller awaiting it."""
+
+    def __init__(self):
+        self._flights: Dict[str, asyncio.Future] = {}
+
+    def in_flight(self, key: str) -> bool:
+        return key in self._flights
+
+    async def do(self, key: str, fn: SyncCall) -> Tuple[Any, bool]:
+        """Returns (result, whether it was shared with an earlier caller)."""
+        flight = self._flights.get(key)
+        if flight is not None:
+            # Shielded so a disconnecting waiter doesn't cancel everyone's sync
+            return await asyncio.shield(flight), True
+
+        flight = self._flights[key] = asyncio.get_running_loop().create_future()
+        try:
+            result = await fn()
+        except asyncio.CancelledError:
+            flight.cancel()
+            raise
+        except Exception as exc:
+            flight.set_exception(exc)
+            flight.exception()  # Retrieved here, so a waiter-less failure isn't logged twice
+            raise
+        else:
+            flight.set_result(result)
+            return result, False
+        finally:
+            del self._flights[key]
+
+
+class SyncCoordinator:
+    """SingleFlight in front of a database lease shared by every worker."""
+
+    def __init__(
+        self,
+        session_factory: Optional[Callable[[], Session]] = None,
+        lease_seconds: Optional[float] = None,
+        poll_seconds: Optional[float] = None
+    ):
+        self.session_factory = session_factory
+        self.lease_seconds = lease_seconds or settings.SYNC_LEASE_SECONDS
+        self.poll_seconds = poll_seconds or settings.SYNC_LEASE_POLL_SECONDS
+        self.local = SingleFlight()
+
+    def _session(self) -> Session:
+        if self.session_factory is None:
+            from app.core.database import SessionLocal
+            return SessionLocal()
+        return self.session_factory()
+
+    async def run(self, key: str, fn: SyncCall) -> Tuple[Any, bool]:
+        """
+        Run fn unless a sync for key is already running here or on another
+        worker, in which case wait for that one. Returns (result, shared).
+        """
+        (result, shared_remote), shared_local = await self.local.do(key, lambda: self._run_leased(key, fn))
+        return result, shared_local or shared_remote
+
+    async def _run_leased(self, key: str, fn: SyncCall) -> Tuple[Any, bool]:
+        owner = uuid.uuid4().hex
+        while True:
+            acquired, holder = self.acquire(key, owner)
+            if acquired:
+                break
+            finished, result = await self._wait(key, holder)
+            if finished:
+                return result, True
+            # The holder's lease lapsed without a result (crashed worker); contend again
+
+        heartbeat = asyncio.get_running_loop().create_task(self._renew_periodically(key, owner))
+        result = None
+        try:
+            result = await fn()
+            return result, False
+        finally:
+            heartbeat.cancel()
+            self.release(key, owner, result)
+
+    def acquire(self, key: str, owner: str) -> Tuple[bool, Optional[str]]:
+        """Try to take the lease for key; returns (acquired, current holder's token)."""
+        now = datetime.utcnow()
+        expires_at = now + timedelta(seconds=self.lease_seconds)
+        db = self._session()
+        try:
+            db.add(SyncLease(key=key, owner=owner, expires_at=expires_at, acquired_at=now))
+            try:
+                db.commit()
+                return True, owner
+            except IntegrityError:
+                db.rollback()
+
+            claimed = db.execute(
+                update(SyncLease)
+                .where(
+                    SyncLease.key == key,
+                    or_(SyncLease.finished_at.isnot(None), SyncLease.expires_at < now)
+                )
+                .values(owner=owner, expires_at=expires_at, acquired_at=now, finished_at=None, result=None)
+            ).rowcount
+            db.commit()
+            if claimed:
+                return True, owner
+            return False, db.query(SyncLease.owner).filter(SyncLease.key == key).scalar()
+        finally:
+            db.close()
+
+    def renew(self, key: str, owner: str) -> bool:
+        db = self._session()
+        try:
+            renewed = db.execute(
+                update(SyncLease)
+                .where(SyncLease.key == key, SyncLease.owner == owner, SyncLease.finished_at.is_(None))
+                .values(expires_at=datetime.utcnow() + timedelta(seconds=self.lease_seconds))
+            ).rowcount
+            db.commit()
+            return bool(renewed)
+        finally:
+            db.close()
+
+    def release(self, key: str, owner: str, result: Any = None) -> None:
+        """Mark the lease finished and publish the result to waiting workers (None when the sync raised)."""
+        db = self._session()
+        try:
+            db.execute(
+                update(SyncLease)
+                .where(SyncLease.key == key, SyncLease.owner == owner)
+                .values(finished_at=datetime.utcnow(), result=result)
+            )
+            db.commit()
+        finally:
+            db.close()
+
+    async def _renew_periodically(self, key: str, owner: str) -> None:
+        while True:
+            await asyncio.sleep(self.lease_seconds / 3)
+            self.renew(key, owner)
+
+    async def _wait(self, key: str, holder: str) -> Tuple[bool, Any]:
+        """Poll another worker's lease: (True, result) once it finishes, (False, None) if it lapses or fails."""
+        while True:
+            await asyncio.sleep(self.poll_seconds)
+            db = self._session()
+            try:
+                lease = db.get(SyncLease, key)
+                if lease is None or lease.owner != holder:
+                    return False, None
+                if lease.finished_at is not None:
+                    # No result means the holder's sync raised; let the caller run its own
+                    return lease.result is not None, lease.result
+                if lease.expires_at < datetime.utcnow():
+                    return False, None
+            finally:
+                db.close()
+
+
+sync_coordinator = SyncCoordinator()
@@ -0,0 +1,224 @@
+"""
+Sync execution: provider payloads are fetched on the event loop and
+parsed, normalized and day-bucketed off it.
+
+FitnessDataAggregator fetches every connection of a sync concurrently
+and hands the raw response bodies to SyncEngine.prepare(). Large
+payloads (backfills, long webhook windows) go to a process pool, so JSON
+decoding and the per-record normalization work scale with cores instead
+of stalling the event loop; small ones are cheaper to handle inline than
+to ship to a worker. Merging stays on the caller's database session.
+
+Both directions of the pool round trip use compact formats, so pickling
+costs little next to the work it offloads:
+
+- in:  Payload, the undecoded response bodies keyed by resource;
+- out: PreparedBatch, columnar: numpy arrays of instants and local-day
+       ordinals, plus one value list per unified column.
+"""
+
+import asyncio
+import json
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass
+from datetime import date, datetime
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+import numpy as np
+
+from app.core.config import settings
+from app.core.metrics import SYNC_PREPARE_BATCHES
+from app.core.timezone import bucket_timestamp, get_zone
+from app.services.provider_schemas import get_normalizer
+
+# Undecoded provider response bodies for one fetch window, keyed by resource
+Payload = Dict[str, bytes]
+
+
+def records_by_day(rows: Iterable[tuple]) -> List[Dict]:
+    """Fold (day, field, value) triples from several endpoints into one record per day."""
+    by_day: Dict[str, Dict] = {}
+    for day, field, value in rows:
+        if value is None:
+            continue
+        by_day.setdefault(day, {"date": day})[field] = value
+    return [by_day[day] for day in sorted(by_day)]
+
+
+# Payload keys and units are left as providers send them; see provider_schemas
+
+def parse_fitbit(payload: Payload) -> List[Dict]:
+    """Fitbit Web API time series: steps, activityCalories, heart and sleep."""
+    steps, calories, heart, sleep = (
+        json.loads(payload[resource]) for resource in ("steps", "calories", "heart", "sleep")
+    )
+    rows = []
+    for item in steps.get("activities-steps", []):
+        rows.append((item["dateTime"], "steps", item["value"]))
+    for item in calories.get("activities-activityCalories", []):
+        rows.append((item["dateTime"], "activityCalories", item["value"]))
+    for item in heart.get("activities-heart", []):
+        value = item.get("value", {})
+        rows.append((item["dateTime"], "restingHeartRate", value.get("restingHeartRate")))
+        rows.append((item["dateTime"], "heartRateZones", value.get("heartRateZones")))
+    for item in sleep.get("sleep", []):
+        if item.get("isMainSleep", True):
+            for key in ("minutesAsleep", "minutesAwake", "efficiency"):
+                rows.append((item["dateOfSleep"], key, item.get(key)))
+    return records_by_day(rows)
+
+
+def parse_garmin(payload: Payload) -> List[Dict]:
+    """Garmin Health API dailies and sleeps; summaries pass through whole."""
+    rows = []
+    for item in json.loads(payload["dailies"]):
+        rows.extend((item["calendarDate"], key, value) for key, value in item.items())
+    for item in json.loads(payload["sleeps"]):
+        # A sleep's durationInSeconds would collide with the daily summary's
+        rows.extend(
+            (item["calendarDate"], "sleepDurationInSeconds" if key == "durationInSeconds" else key, value)
+            for key, value in item.items()
+        )
+    return records_by_day(rows)
+
+
+def parse_oura(payload: Payload) -> List[Dict]:
+    """Oura Cloud API v2 daily activity and sleep documents; naps are skipped."""
+    rows = []
+    for item in json.loads(payload["daily_activity"]).get("data", []):
+        rows.extend((item["day"], key, value) for key, value in item.items())
+    for item in json.loads(payload["sleep"]).get("data", []):
+        if item.get("type", "long_sleep") == "long_sleep":
+            rows.extend((item["day"], key, value) for key, value in item.items())
+    return records_by_day(rows)
+
+
+PARSERS: Dict[str, Callable[[Payload], List[Dict]]] = {
+    "fitbit": parse_fitbit,
+    "garmin": parse_garmin,
+    "oura": parse_oura,
+}
+
+
+@dataclass
+class PreparedBatch:
+    """Normalized, day-bucketed records in columnar form; row i is one provider record."""
+
+    instants: np.ndarray  # datetime64[us], naive UTC
+    days: np.ndarray  # int64 local-date ordinals
+    columns: Dict[str, list]  # unified column -> values per row, None where the record had none
+
+    def __len__(self) -> int:
+        return len(self.days)
+
+    def rows(self) -> Iterator[Tuple[datetime, date, Dict]]:
+        """(instant, local date, normalized values) per record, in payload order."""
+        names = list(self.columns)
+        for i, (instant, ordinal) in enumerate(zip(self.instants.tolist(), self.days.tolist())):
+            values = {}
+            for name in names:
+                value = self.columns[name][i]
+                if value is not None:
+                    values[name] = value
+            yield instant, date.fromordinal(ordinal), values
+
+
+def prepare_records(
+    provider: str,
+    records: List[Dict],
+    timezone: Optional[str],
+    days: Optional[Set[str]] = None
+) -> PreparedBatch:
+    """
+    Bucket records into the user's local days and normalize them in one
+    pass. Records without a date, or outside `days` when given, are dropped.
+    """
+    zone = get_zone(timezone)
+    kept = [
+        record for record in records
+        if record.get("date") and (days is None or record["date"] in days)
+    ]
+    instants = np.empty(len(kept), dtype="datetime64[us]")
+    ordinals = np.empty(len(kept), dtype=np.int64)
+    for i, record in enumerate(kept):
+        instant, local_date = bucket_timestamp(record["date"], zone)
+        instants[i] = instant
+        ordinals[i] = local_date.toordinal()
+
+    columns: Dict[str, list] = {}
+    for i, values in enumerate(get_normalizer(provider).normalize_batch(kept)):
+        for name, value in values.items():
+            column = columns.get(name)
+            if column is None:
+                column = columns[name] = [None] * len(kept)
+            column[i] = value
+    return PreparedBatch(instants, ordinals, columns)
+
+
+def prepare_payloads(
+    provider: str,
+    payloads: List[Payload],
+    timezone: Optional[str],
+    days: Optional[Set[str]] = None
+) -> PreparedBatch:
+    """Decode, bucket and normalize a connection's fetched windows. Runs in pool workers."""
+    parse = PARSERS.get(provider)
+    records = [record for payload in payloads for record in parse(payload)] if parse else []
+    return prepare_records(provider, records, timezone, days)
+
+
+class SyncEngine:
+    """
+    Runs prepare_payloads for syncs: in a process pool of `processes`
+    workers when a sync's payloads reach offload_min_bytes, inline
+    otherwise. processes=0 keeps everything on the event loop.
+    """
+
+    def __init__(self, processes: int = 0, offload_min_bytes: int = 256 * 1024):
+        self.processes = processes
+        self.offload_min_bytes = offload_min_bytes
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    def _executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(self.processes, mp_context=multiprocessing.get_context("spawn"))
+            return self._pool
+
+    async def prepare(
+        self,
+        provider: str,
+        payloads: List[Payload],
+        timezone: Optional[str],
+        days: Optional[Set[str]] = None
+    ) -> PreparedBatch:
+        size = sum(len(body) for payload in payloads for body in payload.values())
+        if self.processes <= 0 or size < self.offload_min_bytes:
+            SYNC_PREPARE_BATCHES.inc(where="inline")
+            return prepare_payloads(provider, payloads, timezone, days)
+
+        SYNC_PREPARE_BATCHES.inc(where="process")
+        pool = self._executor()
+        try:
+            return await asyncio.get_running_loop().run_in_executor(
+                pool, prepare_payloads, provider, payloads, timezone, days
+            )
+        except BrokenProcessPool:
+            # A worker died (OOM, killed); the next batch gets a fresh pool
+            with self._lock:
+                if self._pool is pool:
+                    self._pool = None
+            raise
+
+    def shutdown(self) -> None:
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=True, cancel_futures=True)
+
+
+sync_engine = SyncEngine(settings.SYNC_PROCESS_WORKERS, settings.SYNC_OFFLOAD_MIN_BYTES)
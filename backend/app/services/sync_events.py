@@ -0,0 +1,109 @@
+"""
+Live sync progress, published per user and streamed to the dashboard as
+server-sent events.
+
+Event sequence for one sync:
+
+    sync_started       {"providers": [...], "start_date", "end_date"}
+    provider_started   {"provider"}
+    provider_finished  {"provider", "status", "records_created", "records_updated"[, "error"]}
+    data_changed       {"metrics": {"steps": {"start": "2024-03-01", "end": "2024-03-07"}, ...}}
+    sync_finished      {"synced_providers", "errors", "records_created", "records_updated"}
+
+data_changed is only sent when a unified value actually moved, and names
+the heatmap metric types and local-day ranges affected, so the client can
+refetch just those instead of polling the whole dashboard.
+"""
+
+import asyncio
+import json
+from datetime import date
+from typing import AsyncIterator, Dict, Iterable, Optional
+
+from app.core.pubsub import get_pubsub
+from app.services.metric_fields import METRIC_FIELDS
+
+# DailyMetric column -> heatmap metric type
+FIELD_METRICS = {field: metric_type for metric_type, field in METRIC_FIELDS.items()}
+
+KEEPALIVE_SECONDS = 15
+
+
+def channel(user_id: int) -> str:
+    return f"sync-events:{user_id}"
+
+
+class ChangedRanges:
+    """Accumulates the local-day range touched per metric type during a sync."""
+
+    def __init__(self):
+        self.ranges: Dict[str, list] = {}
+
+    def add(self, day: date, fields: Iterable[str]) -> None:
+        for field in fields:
+            metric_type = FIELD_METRICS.get(field)
+            if metric_type is None:
+                continue
+            span = self.ranges.get(metric_type)
+            if span is None:
+                self.ranges[metric_type] = [day, day]
+            else:
+                span[0] = min(span[0], day)
+                span[1] = max(span[1], day)
+
+    def as_event(self) -> Dict:
+        return {
+            metric_type: {"start": start.isoformat(), "end": end.isoformat()}
+            for metric_type, (start, end) in sorted(self.ranges.items())
+        }
+
+
+class SyncEventPublisher:
+    """Publishes one user's sync events; a no-op when pubsub is None."""
+
+    def __init__(self, user_id: int, pubsub=None):
+        self.channel = channel(user_id)
+        self.pubsub = pubsub
+
+    async def emit(self, event: str, **data) -> None:
+        if self.pubsub is not None:
+            await self.pubsub.publish(self.channel, {"event": event, **data})
+
+
+def format_sse(event: str, data: Dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, default=str, separators=(',', ':'))}\n\n"
+
+
+async def sse_stream(
+    user_id: int,
+    once: bool = False,
+    pubsub=None,
+    keepalive_seconds: float = KEEPALIVE_SECONDS
+) -> AsyncIterator[str]:
+    """
+    A user's sync events as SSE frames. Comment frames keep idle proxies
+    from closing the connection; with once=True the stream ends after the
+    next sync_finished.
+    """
+    pubsub = pubsub or get_pubsub()
+    async with pubsub.subscribe(channel(user_id)) as messages:
+        yield ": connected\n\n"
+        pending: Optional[asyncio.Task] = None
+        try:
+            while True:
+                if pending is None:
+                    pending = asyncio.ensure_future(messages.__anext__())
+                done, _ = await asyncio.wait({pending}, timeout=keepalive_seconds)
+                if not done:
+                    yield ": keepalive\n\n"
+                    continue
+                message = pending.result()
+                pending = None
+                # The message is shared by every subscriber of the channel; read it, don't change it
+                event = message["event"]
+                yield format_sse(event, {key: value for key, value in message.items() if key != "event"})
+                if once and event == "sync_finished":
+                    return
+        finally:
+            if pending is not None:
+                pending.cancel()
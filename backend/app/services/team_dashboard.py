@@ -0,0 +1,158 @@
+"""
+Team dashboard: one page of a team's roster with a summary per member.
+
+The page is built from a fixed set of set-based queries, however many
+members it holds:
+
+1. the roster page, with the team size from a count(*) OVER () window
+   so pagination needs no separate count query;
+2. two weeks of daily metrics for every member on the page
+   (user_id IN (...)), reduced per member with numpy bincounts;
+3. each member's latest day with data, grouped in the database;
+4. the members' steps streaks.
+
+"Today" and the 7-day windows follow each member's own timezone, exactly
+as on their personal dashboard.
+"""
+
+from datetime import date, datetime
+from typing import Dict, List, Optional
+
+import numpy as np
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app.core.timezone import local_today
+from app.models.user import User, DailyMetric, MetricStreak, TeamMember
+from app.services.streaks import current_streak_as_of
+
+# DailyMetric columns summarized per member
+SUMMARY_FIELDS = ("steps", "sleep_duration_minutes", "resting_hr", "active_minutes")
+WEEK_DAYS = 7
+
+
+def _member_page(db: Session, team_id: int, page: int, page_size: int):
+    return db.query(
+        User.id, User.first_name, User.last_name, User.timezone, User.last_sync_at,
+        TeamMember.role, func.count().over().label("total")
+    ).join(TeamMember, TeamMember.user_id == User.id).filter(
+        TeamMember.team_id == team_id,
+        TeamMember.status == "accepted"  # Invitees aren't on the roster until they accept
+    ).order_by(User.last_name, User.first_name, User.id).offset((page - 1) * page_size).limit(page_size).all()
+
+
+def summarize_members(
+    user_ids: List[int],
+    todays: List[int],
+    rows: List,
+) -> Dict[str, np.ndarray]:
+    """
+    Per-member weekly statistics from (user_id, local_date, *SUMMARY_FIELDS)
+    rows in one vectorized pass. todays are the members' local today as
+    date ordinals, aligned with user_ids. The week is the 7 full days before
+    today (as in the personal rollup) and is compared with the 7 before it.
+    """
+    members = len(user_ids)
+    position = {user_id: i for i, user_id in enumerate(user_ids)}
+    index = np.fromiter((position[row[0]] for row in rows), dtype=np.intp, count=len(rows))
+    ordinals = np.fromiter((row[1].toordinal() for row in rows), dtype=np.int64, count=len(rows))
+    days_ago = np.asarray(todays, dtype=np.int64)[index] - ordinals
+    this_week = (days_ago >= 1) & (days_ago <= WEEK_DAYS)
+    last_week = (days_ago > WEEK_DAYS) & (days_ago <= 2 * WEEK_DAYS)
+    today = days_ago == 0
+
+    def column(offset: int) -> np.ndarray:
+        return np.array([np.nan if row[offset] is None else row[offset] for row in rows], dtype=float)
+
+    def mean_by_member(values: np.ndarray, mask: np.ndarray) -> np.ndarray:
+        mask = mask & ~np.isnan(values)
+        totals = np.bincount(index[mask], weights=values[mask], minlength=members)
+        counts = np.bincount(index[mask], minlength=members)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return np.where(counts > 0, totals / counts, np.nan)
+
+    summary = {}
+    any_reading = np.zeros(len(rows), dtype=bool)
+    for offset, field in enumerate(SUMMARY_FIELDS, start=2):
+        values = column(offset)
+        any_reading |= ~np.isnan(values)
+        summary[f"avg_{field}"] = mean_by_member(values, this_week)
+        if field == "steps":
+            summary["today_steps"] = mean_by_member(values, today)  # One row per day, so the value itself
+            previous = mean_by_member(values, last_week)
+            with np.errstate(invalid="ignore", divide="ignore"):
+                summary["steps_change_percent"] = np.where(
+                    previous > 0, (summary["avg_steps"] - previous) / previous * 100, np.nan
+                )
+    summary["days_with_data_7d"] = np.bincount(index[this_week & any_reading], minlength=members)
+    return summary
+
+
+def _number(value, digits: int = 1) -> Optional[float]:
+    value = float(value)
+    return None if np.isnan(value) else round(value, digits)
+
+
+def team_dashboard(db: Session, team_id: int, page: int = 1, page_size: int = 50,
+                   now: Optional[datetime] = None) -> Dict:
+    members = _member_page(db, team_id, page, page_size)
+    if members:
+        total = members[0].total
+    else:
+        # Past the last page: the window count came back with no rows
+        total = db.query(func.count(TeamMember.id)).filter(
+            TeamMember.team_id == team_id,
+            TeamMember.status == "accepted"
+        ).scalar()
+
+    result = {"page": page, "page_size": page_size, "total": total, "members": []}
+    if not members:
+        return result
+
+    user_ids = [member.id for member in members]
+    todays = [local_today(member.timezone, now) for member in members]
+    first_day = min(todays).toordinal() - 2 * WEEK_DAYS
+
+    rows = db.query(
+        DailyMetric.user_id, DailyMetric.local_date, *(getattr(DailyMetric, field) for field in SUMMARY_FIELDS)
+    ).filter(
+        DailyMetric.user_id.in_(user_ids),
+        DailyMetric.local_date >= date.fromordinal(first_day),
+        DailyMetric.local_date <= max(todays)
+    ).all()
+
+    last_days = dict(db.query(DailyMetric.user_id, func.max(DailyMetric.local_date)).filter(
+        DailyMetric.user_id.in_(user_ids)
+    ).group_by(DailyMetric.user_id).all())
+
+    streaks = {
+        streak.user_id: streak
+        for streak in db.query(MetricStreak).filter(
+            MetricStreak.user_id.in_(user_ids),
+            MetricStreak.metric_type == "steps"
+        ).all()
+    }
+
+    summary = summarize_members(user_ids, [day.toordinal() for day in todays], rows)
+
+    for i, (member, today) in enumerate(zip(members, todays)):
+        last_day = last_days.get(member.id)
+        result["members"].append({
+            "user_id": member.id,
+            "first_name": member.first_name,
+            "last_name": member.last_name,
+            "role": member.role,
+            "last_sync_at": member.last_sync_at.isoformat() if member.last_sync_at else None,
+            "last_data_date": last_day.isoformat() if last_day else None,
+            "days_with_data_7d": int(summary["days_with_data_7d"][i]),
+            "today_steps": _number(summary["today_steps"][i], 0),
+            "weekly_average": {
+                "steps": _number(summary["avg_steps"][i], 0),
+                "sleep_hours": _number(summary["avg_sleep_duration_minutes"][i] / 60),
+                "resting_hr": _number(summary["avg_resting_hr"][i]),
+                "active_minutes": _number(summary["avg_active_minutes"][i]),
+            },
+            "steps_change_percent": _number(summary["steps_change_percent"][i]),
+            "steps_streak": current_streak_as_of(streaks.get(member.id), today),
+        })
+    return result
@@ -0,0 +1,270 @@
+"""
+Provider OAuth token refresh, kept off the fetch path.
+
+A background sweep refreshes tokens that expire within
+TOKEN_REFRESH_MARGIN_SECONDS. It runs one batch at a time per provider,
+concurrency-bounded and rate-limited, so a fleet of tokens minted at the
+same hour doesn't hammer a provider's token endpoint. Fetches ask
+access_token(), which answers from an in-memory cache. A token that's
+still valid but inside the margin is returned at once while a refresh
+runs in the background; only a token that has actually expired makes
+the caller wait.
+
+Refresh tokens are single-use for Fitbit (and rotate for Oura), so two
+concurrent refreshes of one connection would lock its owner out.
+Refreshes go through the sync coordinator, which single-flights them in
+process and across workers.
+"""
+
+import asyncio
+import base64
+import logging
+from datetime import datetime, timedelta
+from typing import TYPE_CHECKING, Callable, Dict, List, NamedTuple, Optional, Set, Tuple
+
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.user import FitnessConnection
+from app.services.sync_coordinator import SyncCoordinator, sync_coordinator
+
+if TYPE_CHECKING:
+    import httpx
+
+logger = logging.getLogger("fitlife.tokens")
+
+
+class ReauthRequired(Exception):
+    """The provider rejects the connection's tokens and none can be refreshed; the user must reconnect."""
+
+
+class OAuthClient(NamedTuple):
+    token_url: str
+    client_id: Optional[str]
+    client_secret: Optional[str]
+    basic_auth: bool  # Client credentials in an Authorization header rather than the form
+
+
+# Garmin's Health API uses non-expiring OAuth 1.0a tokens; Apple Health has none
+OAUTH_CLIENTS: Dict[str, Callable[[], OAuthClient]] = {
+    "fitbit": lambda: OAuthClient(
+        f"{settings.FITBIT_API_BASE_URL}/oauth2/token",
+        settings.FITBIT_CLIENT_ID, settings.FITBIT_CLIENT_SECRET, True
+    ),
+    "oura": lambda: OAuthClient(
+        f"{settings.OURA_API_BASE_URL}/oauth/token",
+        settings.OURA_CLIENT_ID, settings.OURA_CLIENT_SECRET, False
+    ),
+}
+
+
+class RateLimiter:
+    """Spaces calls at least 1/rate seconds apart, across concurrent callers."""
+
+    def __init__(self, rate_per_second: float):
+        self.interval = 1 / rate_per_second if rate_per_second > 0 else 0.0
+        self._next_slot = 0.0
+
+    async def acquire(self) -> None:
+        now = asyncio.get_running_loop().time()
+        slot = max(now, self._next_slot)
+        self._next_slot = slot + self.interval
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
+
+class TokenManager:
+    def __init__(
+        self,
+        session_factory: Optional[Callable[[], Session]] = None,
+        http_client: Optional["httpx.AsyncClient"] = None,
+        coordinator: Optional[SyncCoordinator] = None,
+        margin_seconds: Optional[float] = None,
+        batch_size: Optional[int] = None,
+        concurrency: Optional[int] = None,
+        rate_per_second: Optional[float] = None
+    ):
+        self.session_factory = session_factory
+        # Injectable so tests can point refreshes at a fake OAuth server
+        self.http_client = http_client
+        self.coordinator = coordinator or sync_coordinator
+        self.margin = timedelta(seconds=margin_seconds or settings.TOKEN_REFRESH_MARGIN_SECONDS)
+        self.batch_size = batch_size or settings.TOKEN_REFRESH_BATCH_SIZE
+        self.concurrency = concurrency or settings.TOKEN_REFRESH_CONCURRENCY
+        self.rate_per_second = rate_per_second or settings.TOKEN_REFRESH_RATE_PER_SECOND
+        self._cache: Dict[int, Tuple[str, datetime]] = {}  # connection id -> (access token, expires at)
+        self._limiters: Dict[str, RateLimiter] = {}
+        self._background: Set[asyncio.Task] = set()
+
+    def _session(self) -> Session:
+        if self.session_factory is None:
+            from app.core.database import SessionLocal
+            return SessionLocal()
+        return self.session_factory()
+
+    def _limiter(self, provider: str) -> RateLimiter:
+        limiter = self._limiters.get(provider)
+        if limiter is None:
+            limiter = self._limiters[provider] = RateLimiter(self.rate_per_second)
+        return limiter
+
+    def _remember(self, conn: FitnessConnection) -> None:
+        if conn.access_token and conn.token_expires_at:
+            self._cache[conn.id] = (conn.access_token, conn.token_expires_at)
+
+    async def access_token(self, conn: FitnessConnection, force_refresh: bool = False) -> Optional[str]:
+        """
+        A usable access token for conn. Only blocks on a refresh when the
+        token has expired (or the provider just rejected it: force_refresh).
+        """
+        token, expires_at = conn.access_token, conn.token_expires_at
+        cached = self._cache.get(conn.id)
+        if cached and (expires_at is None or cached[1] > expires_at):
+            # conn may be a stale row from a session opened before the last refresh
+            token, expires_at = cached
+
+        if conn.provider not in OAUTH_CLIENTS or not conn.refresh_token:
+            return token
+        now = datetime.utcnow()
+        if force_refresh or (expires_at is not None and expires_at <= now):
+            await self.refresh(conn.id, force=force_refresh)
+            cached = self._cache.get(conn.id)
+            return cached[0] if cached else token
+        if expires_at is not None and expires_at - now <= self.margin:
+            self._refresh_in_background(conn.id)
+        return token
+
+    def _refresh_in_background(self, connection_id: int) -> None:
+        task = asyncio.get_running_loop().create_task(self.refresh(connection_id))
+        self._background.add(task)
+        task.add_done_callback(self._background.discard)
+
+    async def refresh(self, connection_id: int, force: bool = False) -> Dict:
+        """Refresh one connection's token; concurrent calls for the same connection share one request."""
+        try:
+            result, _ = await self.coordinator.run(
+                f"token:{connection_id}", lambda: self._refresh(connection_id, force)
+            )
+        except Exception as e:
+            logger.warning("Token refresh failed for connection %s: %s", connection_id, e)
+            return {"refreshed": False, "error": str(e)}
+        if not result.get("refreshed"):
+            # Refreshed by another worker, or not at all; either way the row is current
+            db = self._session()
+            try:
+                conn = db.get(FitnessConnection, connection_id)
+                if conn:
+                    self._remember(conn)
+            finally:
+                db.close()
+        return result
+
+    async def _refresh(self, connection_id: int, force: bool) -> Dict:
+        db = self._session()
+        try:
+            conn = db.get(FitnessConnection, connection_id)
+            if conn is None or not conn.refresh_token or conn.provider not in OAUTH_CLIENTS:
+                return {"refreshed": False}
+            now = datetime.utcnow()
+            if not force and conn.token_expires_at and conn.token_expires_at - now > self.margin:
+                return {"refreshed": False}  # Another worker got here first
+
+            oauth = OAUTH_CLIENTS[conn.provider]()
+            form = {"grant_type": "refresh_token", "refresh_token": conn.refresh_token}
+            headers = {}
+            if oauth.basic_auth:
+                credentials = base64.b64encode(f"{oauth.client_id}:{oauth.client_secret}".encode()).decode()
+                headers["Authorization"] = f"Basic {credentials}"
+            else:
+                form.update(client_id=oauth.client_id, client_secret=oauth.client_secret)
+
+            await self._limiter(conn.provider).acquire()
+            client = self.http_client
+            if client is None:
+                import httpx  # deferred: only refreshes need it, and it's slow to import
+                async with httpx.AsyncClient(timeout=settings.PROVIDER_HTTP_TIMEOUT_SECONDS) as client:
+                    response = await client.post(oauth.token_url, data=form, headers=headers)
+            else:
+                response = await client.post(oauth.token_url, data=form, headers=headers)
+
+            if response.status_code in (400, 401):
+                # invalid_grant: the refresh token was revoked or already used; the user must reconnect.
+                # Dropping it keeps the sweep from presenting it again.
+                conn.refresh_token = None
+                conn.last_sync_status = "reauth_required"
+                conn.last_error_message = f"Token refresh rejected: {response.text[:200]}"
+                db.commit()
+                self._cache.pop(connection_id, None)
+                return {"refreshed": False, "error": "invalid_grant"}
+            response.raise_for_status()
+
+            payload = response.json()
+            conn.access_token = payload["access_token"]
+            conn.refresh_token = payload.get("refresh_token", conn.refresh_token)
+            conn.token_expires_at = now + timedelta(seconds=int(payload.get("expires_in", 3600)))
+            db.commit()
+            self._remember(conn)
+            return {"refreshed": True, "expires_at": conn.token_expires_at.isoformat()}
+        finally:
+            db.close()
+
+    def _due(self, provider: str, now: datetime, after_id: int) -> List[int]:
+        """The next batch of connection ids whose tokens expire within the margin (keyset paged)."""
+        db = self._session()
+        try:
+            rows = db.query(FitnessConnection.id).filter(
+                FitnessConnection.provider == provider,
+                FitnessConnection.is_active == True,
+                FitnessConnection.refresh_token.isnot(None),
+                FitnessConnection.token_expires_at <= now + self.margin,
+                FitnessConnection.id > after_id
+            ).order_by(FitnessConnection.id).limit(self.batch_size).all()
+            return [row.id for row in rows]
+        finally:
+            db.close()
+
+    async def _sweep_provider(self, provider: str, now: datetime) -> Dict:
+        refreshed = failed = 0
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def bounded(connection_id):
+            async with semaphore:
+                return await self.refresh(connection_id)
+
+        after_id = 0
+        while True:
+            batch = self._due(provider, now, after_id)
+            if not batch:
+                break
+            for result in await asyncio.gather(*(bounded(connection_id) for connection_id in batch)):
+                if result.get("refreshed"):
+                    refreshed += 1
+                elif result.get("error"):
+                    failed += 1
+            after_id = batch[-1]
+        return {"refreshed": refreshed, "failed": failed}
+
+    async def sweep(self, now: Optional[datetime] = None) -> Dict[str, Dict]:
+        """Refresh every token due within the margin, providers in parallel; one worker sweeps each provider."""
+        now = now or datetime.utcnow()
+
+        async def leased(provider):
+            result, _ = await self.coordinator.run(
+                f"token-sweep:{provider}", lambda: self._sweep_provider(provider, now)
+            )
+            return provider, result
+
+        return dict(await asyncio.gather(*(leased(provider) for provider in OAUTH_CLIENTS)))
+
+    async def run_periodically(self, interval_seconds: float) -> None:
+        """Background sweep loop, started from the app lifespan."""
+        while True:
+            await asyncio.sleep(interval_seconds)
+            try:
+                results = await self.sweep()
+                logger.info("Token sweep: %s", results)
+            except Exception:
+                logger.exception("Token sweep failed")
+
+
+token_manager = TokenManager()
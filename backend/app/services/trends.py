@@ -0,0 +1,168 @@
+"""
+Least-squares trend and outlier detection for one metric, computed in the
+database so only summary numbers leave it.
+
+Each day's value is regressed on its day index (days since the start of
+the period). PostgreSQL has the regression aggregates built in
+(regr_slope, regr_intercept, regr_r2, ...); other databases (SQLite in
+development and tests) return count/sum/sum-of-products aggregates and
+the same quantities are finished in Python from those. A second query
+returns only the days whose residual from the fitted line is more than
+OUTLIER_Z residual standard deviations out; z-scores are taken around the
+trend rather than the mean, so a steady climb isn't all "outliers".
+"""
+
+import math
+from datetime import date
+from typing import Dict, List, Optional
+
+from sqlalchemy import Date, Float, cast, func, literal
+from sqlalchemy.orm import Session
+
+from app.models.user import DailyMetric
+
+OUTLIER_Z = 2.5
+CONFIDENCE_LEVEL = 0.95  # Slope confidence needed before a direction is reported
+MIN_CHANGE_PERCENT = 5  # ...and the fitted change over the period, relative to the mean
+MIN_POINTS = 3  # A line through two points has no residual to judge it by
+
+
+def t_confidence(t: float, df: int) -> float:
+    """
+    P(|T| <= t) for Student's t with df degrees of freedom, from the
+    finite series for integer df (Abramowitz & Stegun 26.7.3-4).
+    """
+    theta = math.atan(abs(t) / math.sqrt(df))
+    cos2 = math.cos(theta) ** 2
+    if df % 2 == 0:
+        term = total = 1.0
+        for k in range(2, df, 2):
+            term *= cos2 * (k - 1) / k
+            total += term
+        return min(1.0, math.sin(theta) * total)
+    if df == 1:
+        return 2 * theta / math.pi
+    term = total = math.cos(theta)
+    for k in range(3, df - 1, 2):
+        term *= cos2 * (k - 1) / k
+        total += term
+    return min(1.0, 2 / math.pi * (theta + math.sin(theta) * total))
+
+
+def _day_index(dialect: str, start: date):
+    if dialect == "postgresql":
+        # date - date is an integer day count
+        return cast(DailyMetric.local_date - literal(start, Date), Float)
+    return func.julianday(DailyMetric.local_date) - func.julianday(literal(start, Date))
+
+
+def _aggregates(dialect: str, column, x) -> List:
+    y = cast(column, Float)
+    extremes = [func.avg(y), func.min(column), func.max(column)]
+    if dialect == "postgresql":
+        return [
+            func.regr_count(y, x), func.regr_slope(y, x), func.regr_intercept(y, x),
+            func.regr_r2(y, x), func.regr_sxx(y, x), func.regr_syy(y, x), *extremes
+        ]
+    return [func.count(y), func.sum(x), func.sum(y), func.sum(x * x), func.sum(x * y), func.sum(y * y), *extremes]
+
+
+def _fit(db: Session, dialect: str, column, x, filters) -> Optional[Dict]:
+    """One aggregate row -> n, slope, intercept, r2, sxx, syy, mean, min, max."""
+    row = db.query(*_aggregates(dialect, column, x)).filter(*filters).one()
+    if not row[0]:
+        return None
+
+    if dialect == "postgresql":
+        n, slope, intercept, r2, sxx, syy, mean, low, high = row
+        return {"n": n, "slope": slope, "intercept": intercept, "r2": r2, "sxx": sxx or 0.0,
+                "syy": syy or 0.0, "mean": mean, "min": low, "max": high}
+
+    n, sum_x, sum_y, sum_xx, sum_xy, sum_yy, mean, low, high = row
+    sxx = max(sum_xx - sum_x * sum_x / n, 0.0)
+    syy = max(sum_yy - sum_y * sum_y / n, 0.0)
+    sxy = sum_xy - sum_x * sum_y / n
+    slope = sxy / sxx if sxx else None
+    intercept = (sum_y - slope * sum_x) / n if slope is not None else None
+    # Same conventions as regr_r2: undefined without x spread, 1 for a flat series
+    r2 = None if not sxx else (1.0 if not syy else min(sxy * sxy / (sxx * syy), 1.0))
+    return {"n": n, "slope": slope, "intercept": intercept, "r2": r2, "sxx": sxx,
+            "syy": syy, "mean": mean, "min": low, "max": high}
+
+
+def analyze_trend(db: Session, user_id: int, field: str, start: date, end: date) -> Optional[Dict]:
+    """
+    Fit, confidence and outliers for one DailyMetric column over an
+    inclusive range of local days. None when there are no readings.
+    """
+    dialect = db.get_bind().dialect.name
+    column = getattr(DailyMetric, field)
+    x = _day_index(dialect, start)
+    filters = (
+        DailyMetric.user_id == user_id,
+        DailyMetric.local_date >= start,
+        DailyMetric.local_date <= end,
+        column.isnot(None),
+    )
+
+    fit = _fit(db, dialect, column, x, filters)
+    if fit is None:
+        return None
+
+    n, slope, intercept = fit["n"], fit["slope"], fit["intercept"]
+    result = {
+        "data_points": n,
+        "average": fit["mean"],
+        "min": fit["min"],
+        "max": fit["max"],
+        "slope": slope,
+        "intercept": intercept,
+        "r_squared": fit["r2"],
+        "slope_stderr": None,
+        "confidence": None,
+        "outliers": [],
+    }
+    if n < MIN_POINTS or slope is None:
+        return result
+
+    df = n - 2
+    residual_sd = math.sqrt(max(fit["syy"] * (1 - fit["r2"]), 0.0) / df)
+    stderr = residual_sd / math.sqrt(fit["sxx"])
+    result["slope_stderr"] = stderr
+    if stderr:
+        result["confidence"] = t_confidence(slope / stderr, df)
+    else:
+        # A perfect fit: any slope is certain, and a flat line is certainly flat
+        result["confidence"] = 1.0
+
+    if residual_sd:
+        residual = cast(column, Float) - (intercept + slope * x)
+        rows = db.query(DailyMetric.local_date, column, residual).filter(
+            *filters, func.abs(residual) > OUTLIER_Z * residual_sd
+        ).order_by(DailyMetric.local_date).all()
+        result["outliers"] = [
+            {"date": day.isoformat(), "value": value, "z_score": round(resid / residual_sd, 2)}
+            for day, value, resid in rows
+        ]
+    return result
+
+
+def classify(analysis: Dict, period_days: int, lower_is_better: bool = False) -> Dict:
+    """
+    Direction and size of the fitted change. A direction is only reported
+    when the slope is both statistically confident and large enough to
+    matter over the period.
+    """
+    slope, mean = analysis["slope"], analysis["average"]
+    change_percent = slope * period_days / mean * 100 if slope is not None and mean else 0.0
+
+    if analysis["confidence"] is None:
+        trend = "insufficient_data"
+    elif analysis["confidence"] < CONFIDENCE_LEVEL or abs(change_percent) < MIN_CHANGE_PERCENT or not slope:
+        trend = "stable"
+    else:
+        trend = "improving" if slope > 0 else "declining"
+        if lower_is_better:
+            # A falling resting heart rate or weight is the improvement
+            trend = "declining" if trend == "improving" else "improving"
+    return {"trend": trend, "change_percent": round(change_percent, 2)}
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Microbenchmark: provider record normalization.
+
+Compares the previous per-record path (a mapping dict rebuilt and scanned
+for every record, four columns only) against the compiled provider_schemas
+normalizers, both on the same already-flattened records and on full
+Garmin payloads (20+ fields with unit conversions).
+
+Run from backend/:  python -m benchmarks.bench_normalize [--records 100000]
+"""
+
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import argparse
+import random
+import time
+from datetime import date, timedelta
+
+from app.services.provider_schemas import get_normalizer
+
+
+def previous_normalize_record(record, provider):
+    """FitnessDataAggregator._normalize_record as it was before the schema registry."""
+    normalized = {
+        "sources": [provider],
+        "is_complete": False
+    }
+    field_mappings = {
+        "steps": ["steps", "activitySteps", "total_steps"],
+        "active_calories": ["activeCalories", "activityCalories", "calories_out"],
+        "resting_hr": ["restingHeartRate", "resting_hr", "resting_heart_rate"],
+        "sleep_duration_minutes": ["totalSleepTime", "duration", "minutesAsleep"],
+    }
+    for unified_field, possible_names in field_mappings.items():
+        for name in possible_names:
+            if name in record and record[name] is not None:
+                normalized[unified_field] = record[name]
+                break
+    return normalized
+
+
+def flat_records(count, rng):
+    """Records as the fetchers used to emit them: four pre-converted fields."""
+    start = date(2024, 1, 1)
+    return [{
+        "date": (start + timedelta(days=i % 365)).isoformat(),
+        "steps": rng.randint(2000, 20000),
+        "activeCalories": rng.randint(100, 900),
+        "restingHeartRate": rng.randint(48, 80),
+        "minutesAsleep": rng.randint(300, 540),
+    } for i in range(count)]
+
+
+def garmin_records(count, rng):
+    """A Garmin daily summary folded with its sleep summary, as fetched now."""
+    start = date(2024, 1, 1)
+    return [{
+        "date": (start + timedelta(days=i % 365)).isoformat(),
+        "calendarDate": (start + timedelta(days=i % 365)).isoformat(),
+        "summaryId": f"x{i}",
+        "steps": rng.randint(2000, 20000),
+        "activeKilocalories": rng.randint(100, 900),
+        "bmrKilocalories": rng.randint(1400, 1900),
+        "distanceInMeters": rng.uniform(1000, 15000),
+        "floorsClimbed": rng.randint(0, 30),
+        "moderateIntensityDurationInSeconds": rng.randint(0, 3600),
+        "vigorousIntensityDurationInSeconds": rng.randint(0, 1800),
+        "restingHeartRateInBeatsPerMinute": rng.randint(48, 80),
+        "averageHeartRateInBeatsPerMinute": rng.randint(60, 90),
+        "maxHeartRateInBeatsPerMinute": rng.randint(120, 190),
+        "minHeartRateInBeatsPerMinute": rng.randint(40, 60),
+        "averageStressLevel": rng.randint(10, 70),
+        "bodyBatteryChargedValue": rng.randint(10, 90),
+        "durationInSeconds": 86400,
+        "sleepDurationInSeconds": rng.randint(18000, 32400),
+        "deepSleepDurationInSeconds": rng.randint(3000, 7200),
+        "lightSleepDurationInSeconds": rng.randint(9000, 18000),
+        "remSleepInSeconds": rng.randint(3000, 7200),
+        "awakeDurationInSeconds": rng.randint(0, 3600),
+        "averageSpo2": rng.uniform(93, 99),
+        "lowestSpo2": rng.uniform(85, 93),
+    } for i in range(count)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--records", type=int, default=100_000)
+    args = parser.parse_args()
+
+    rng = random.Random(7)
+    flat = flat_records(args.records, rng)
+    garmin = garmin_records(args.records, rng)
+    generic = get_normalizer("fitbit")
+    compiled_garmin = get_normalizer("garmin")
+
+    cases = [
+        ("previous per-record (4 columns)", lambda: [previous_normalize_record(r, "fitbit") for r in flat]),
+        ("compiled batch, same records", lambda: generic.normalize_batch(flat)),
+        ("compiled batch, garmin payloads", lambda: compiled_garmin.normalize_batch(garmin)),
+    ]
+
+    baseline = None
+    print(f"{args.records:,} records per case, best of 3")
+    for name, fn in cases:
+        best = float("inf")
+        for _ in range(3):
+            started = time.perf_counter()
+            output = fn()
+            best = min(best, time.perf_counter() - started)
+        rate = args.records / best
+        baseline = baseline or rate
+        columns = len(output[0]) - (2 if "sources" in output[0] else 0)
+        print(f"{name:<34} {rate:>12,.0f} records/s  {columns:3d} columns  {rate / baseline:5.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Microbenchmark: dashboard summary serialization.
+
+Compares the previous path (Pydantic heatmap models -> response_model
+re-validation -> stdlib json) against prebuilt dicts encoded with orjson,
+in both the rows and the columnar wire format.
+
+Run from backend/:  python -m benchmarks.bench_serialization [--points 182]
+"""
+
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import argparse
+import json
+import random
+import timeit
+from datetime import date, datetime, timedelta
+
+from fastapi.responses import ORJSONResponse
+
+from app.schemas.user import DashboardSummary, MultiDimensionalHeatmap
+
+METRICS = ["steps", "sleep", "heart_rate", "calories"]
+
+
+def _heatmap(metric_type: str, points: int, columnar: bool) -> dict:
+    end = date(2024, 6, 30)
+    dates = [(end - timedelta(days=points - i)).isoformat() for i in range(points)]
+    raw = [random.randint(2000, 20000) for _ in range(points)]
+    lo, hi = min(raw), max(raw)
+    values = [round((r - lo) / (hi - lo) * 100, 2) for r in raw]
+    sources = [random.sample(["fitbit", "garmin", "oura"], 2) for _ in range(points)]
+    heatmap = {
+        "metric_type": metric_type,
+        "start_date": dates[0],
+        "end_date": dates[-1],
+        "average": round(sum(raw) / points, 2),
+        "streak_days": 3,
+        "longest_streak": 12,
+    }
+    if columnar:
+        heatmap.update({"dates": dates, "values": values, "raw": raw,
+                        "sources": sources, "best_day_index": raw.index(hi)})
+    else:
+        data = [{"date": d, "value": v, "raw_value": r, "metric_type": metric_type, "sources": s}
+                for d, v, r, s in zip(dates, values, raw, sources)]
+        heatmap.update({"data": data, "best_day": data[raw.index(hi)]})
+    return heatmap
+
+
+def _summary(heatmaps: list) -> dict:
+    return {
+        "user": {
+            "email": "bench@fitlife.app", "first_name": "Bench", "last_name": "User",
+            "id": 1, "avatar_url": None, "is_premium": True, "timezone": "UTC",
+            "units": "metric", "created_at": datetime(2024, 1, 1), "last_sync_at": None,
+        },
+        "connections": [],
+        "today_metrics": None,
+        "weekly_average": {"steps": 8432, "active_minutes": 45, "sleep_hours": 7.2, "resting_hr": 62},
+        "heatmaps": heatmaps,
+        "active_goals": [],
+        "is_premium": True,
+        "days_remaining_trial": None,
+    }
+
+
+def previous_path(rows: list) -> bytes:
+    # Model per heatmap (and per point), then FastAPI re-validates against
+    # response_model, dumps to JSON-able data and encodes with json.dumps
+    summary = DashboardSummary(**_summary([MultiDimensionalHeatmap(**h) for h in rows]))
+    validated = DashboardSummary.model_validate(summary.model_dump())
+    content = validated.model_dump(mode="json")
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode()
+
+
+def orjson_rows(rows: list) -> bytes:
+    return ORJSONResponse(_summary(rows)).body
+
+
+def orjson_columnar(columns: list) -> bytes:
+    return ORJSONResponse(_summary(columns)).body
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--points", type=int, default=182, help="points per heatmap (26 weeks = 182)")
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    random.seed(7)
+    rows = [_heatmap(m, args.points, columnar=False) for m in METRICS]
+    columns = [_heatmap(m, args.points, columnar=True) for m in METRICS]
+
+    cases = [
+        ("pydantic + response_model + json", lambda: previous_path(rows)),
+        ("prebuilt dicts + orjson (rows)", lambda: orjson_rows(rows)),
+        ("prebuilt dicts + orjson (columnar)", lambda: orjson_columnar(columns)),
+    ]
+
+    baseline = None
+    print(f"{len(METRICS)} heatmaps x {args.points} points, {args.repeat} iterations")
+    for name, fn in cases:
+        size = len(fn())
+        seconds = min(timeit.repeat(fn, number=args.repeat, repeat=3)) / args.repeat
+        baseline = baseline or seconds
+        print(f"{name:<38} {seconds * 1000:8.3f} ms  {size / 1024:7.1f} KiB  {baseline / seconds:5.1f}x")
+
+
+if __name__ == "__main__":
+    main()
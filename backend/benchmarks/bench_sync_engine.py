@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Benchmark: sync payload preparation (JSON decode, day bucketing and
+normalization) inline versus across a SyncEngine process pool.
+
+Builds raw Fitbit / Garmin / Oura bodies for a backfill of many users
+from the fake provider farm, then prepares every (user, provider) batch
+concurrently, as a sync worker draining a backlog would. Also reports
+what crosses the process boundary per record: the raw bodies going in
+and the columnar PreparedBatch coming back, against pickling decoded
+record dicts.
+
+Run from backend/:  python -m benchmarks.bench_sync_engine [--users 64] [--days 365] [--processes 0 1 2 4]
+"""
+
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import argparse
+import asyncio
+import json
+import pickle
+import time
+from datetime import date, datetime, timedelta, timezone
+
+from benchmarks.fake_providers import FakeProviderFarm
+from app.services.sync_engine import PARSERS, SyncEngine, prepare_payloads
+
+
+def build_payloads(users, days, seed=7):
+    """(provider, payload) per user and provider, as the fetchers return them."""
+    farm = FakeProviderFarm(seed=seed, max_days=days)
+    end = date(2024, 12, 31)
+    start = end - timedelta(days=days - 1)
+
+    def body(path, params, token):
+        return json.dumps(farm.respond(path, params, token)[1]).encode()
+
+    span_path = f"date/{start.isoformat()}/{end.isoformat()}.json"
+    garmin = {
+        "uploadStartTimeInSeconds": int(datetime(start.year, start.month, start.day, tzinfo=timezone.utc).timestamp()),
+        "uploadEndTimeInSeconds": int(datetime(end.year, end.month, end.day, tzinfo=timezone.utc).timestamp()),
+    }
+    oura = {"start_date": start.isoformat(), "end_date": end.isoformat()}
+
+    batches = []
+    for user in range(users):
+        token = f"tok-{user}"
+        batches.append(("fitbit", {
+            "steps": body(f"/1/user/-/activities/steps/{span_path}", {}, token),
+            "calories": body(f"/1/user/-/activities/activityCalories/{span_path}", {}, token),
+            "heart": body(f"/1/user/-/activities/heart/{span_path}", {}, token),
+            "sleep": body(f"/1.2/user/-/sleep/{span_path}", {}, token),
+        }))
+        batches.append(("garmin", {
+            "dailies": body("/wellness-api/rest/dailies", garmin, token),
+            "sleeps": body("/wellness-api/rest/sleeps", garmin, token),
+        }))
+        batches.append(("oura", {
+            "daily_activity": body("/v2/usercollection/daily_activity", oura, token),
+            "sleep": body("/v2/usercollection/sleep", oura, token),
+        }))
+    return batches
+
+
+async def prepare_all(engine, batches):
+    return await asyncio.gather(*(
+        engine.prepare(provider, [payload], "America/New_York") for provider, payload in batches
+    ))
+
+
+def transfer_costs(batches):
+    """Per record, what the pool round trip pickles: (bytes, microseconds to dump and load) per format."""
+    formats = {"raw bodies in": [], "prepared batch out": [], "decoded dicts": []}
+    records = 0
+    for provider, payload in batches[:30]:
+        batch = prepare_payloads(provider, [payload], "America/New_York")
+        records += len(batch)
+        formats["raw bodies in"].append(payload)
+        formats["prepared batch out"].append(batch)
+        formats["decoded dicts"].append(PARSERS[provider](payload))
+
+    costs = {}
+    for name, objects in formats.items():
+        started = time.perf_counter()
+        size = 0
+        for obj in objects:
+            data = pickle.dumps(obj, protocol=pickle.HIGHEST_PROTOCOL)
+            pickle.loads(data)
+            size += len(data)
+        costs[name] = (size / records, (time.perf_counter() - started) / records * 1e6)
+    return costs
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=64)
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--processes", type=int, nargs="+",
+                        default=sorted({0, 1, 2, 4, os.cpu_count() or 1}))
+    args = parser.parse_args()
+
+    batches = build_payloads(args.users, args.days)
+    records = sum(len(PARSERS[provider](payload)) for provider, payload in batches)
+    print(f"{len(batches)} batches, {records:,} records, {os.cpu_count()} CPUs, best of 3")
+    print("pickled per record:")
+    for name, (size, micros) in transfer_costs(batches).items():
+        print(f"  {name:<20} {size:6.0f} B  {micros:6.2f} us")
+
+    baseline = None
+    for processes in args.processes:
+        engine = SyncEngine(processes, offload_min_bytes=0)
+        try:
+            asyncio.run(prepare_all(engine, batches[:max(processes, 1) * 3]))  # Spawn and import in the workers
+            best = float("inf")
+            for _ in range(3):
+                started = time.perf_counter()
+                asyncio.run(prepare_all(engine, batches))
+                best = min(best, time.perf_counter() - started)
+        finally:
+            engine.shutdown()
+        rate = records / best
+        baseline = baseline or rate
+        label = "inline (event loop)" if processes == 0 else f"{processes} process{'es' if processes > 1 else ''}"
+        print(f"{label:<22} {rate:>12,.0f} records/s  {rate / baseline:5.2f}x")
+
+
+if __name__ == "__main__":
+    main()
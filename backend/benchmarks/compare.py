@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+Compare two benchmark result files (from benchmarks.run).
+
+Run from backend/:
+  python -m benchmarks.compare benchmarks/results/base.json benchmarks/results/head.json [--threshold 0.1]
+
+Exits non-zero when any benchmark's median regressed by more than the threshold.
+"""
+
+import argparse
+import json
+import sys
+
+
+def compare(base: dict, head: dict, threshold: float = 0.10):
+    rows = []
+    regressions = []
+    for name, head_result in head["results"].items():
+        base_result = base["results"].get(name)
+        if base_result is None:
+            rows.append((name, None, head_result["median"], None))
+            continue
+        change = (head_result["median"] - base_result["median"]) / base_result["median"] if base_result["median"] else 0.0
+        rows.append((name, base_result["median"], head_result["median"], change))
+        if change > threshold:
+            regressions.append(name)
+    return rows, regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare two benchmark result files")
+    parser.add_argument("base")
+    parser.add_argument("head")
+    parser.add_argument("--threshold", type=float, default=0.10, help="allowed median slowdown (0.10 = 10%%)")
+    args = parser.parse_args(argv)
+
+    with open(args.base) as f:
+        base = json.load(f)
+    with open(args.head) as f:
+        head = json.load(f)
+
+    if base["meta"].get("dialect") != head["meta"].get("dialect"):
+        print(f"warning: comparing {base['meta'].get('dialect')} against {head['meta'].get('dialect')}")
+
+    print(f"{'benchmark':14s} {base['meta'].get('commit') or 'base':>12s} {head['meta'].get('commit') or 'head':>12s}   change")
+    rows, regressions = compare(base, head, args.threshold)
+    for name, base_median, head_median, change in rows:
+        if change is None:
+            print(f"{name:14s} {'-':>12s} {head_median:12.3f}   new")
+            continue
+        flag = "  REGRESSION" if name in regressions else ""
+        print(f"{name:14s} {base_median:12.3f} {head_median:12.3f}   {change:+7.1%}{flag}")
+
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,74 @@
+"""
+Synthetic benchmark dataset: N users x M years of DailyMetric rows across
+providers, built with the bulk generator in scripts/generate_mock_data.py.
+
+Reproducible for a given seed, so results from different commits are
+measured against the same data.
+"""
+
+from datetime import date
+from typing import Dict, Optional, Sequence
+
+from sqlalchemy import inspect, select, table
+
+import app.models.user  # noqa: F401 - registers the tables on Base.metadata
+from app.core.database import Base
+from scripts.generate_mock_data import generate
+
+BENCH_PASSWORD = "bench-password"
+BENCH_EMAIL = "bench{id}@fitlife.app"
+PROVIDERS = ("fitbit", "garmin", "oura")
+
+
+def bench_email(user_id: int) -> str:
+    return BENCH_EMAIL.format(id=user_id)
+
+
+def prepare_database(engine, owned: bool, reset: bool = False) -> None:
+    """
+    Give the benchmark an empty schema. A database the script created itself
+    is reset freely; a user-supplied one must be empty unless reset is asked for,
+    so pointing a benchmark at a dev or staging database can't silently wipe it.
+    """
+    if not owned and not reset:
+        with engine.connect() as conn:
+            populated = [
+                name for name in inspect(conn).get_table_names()
+                if conn.execute(select(1).select_from(table(name)).limit(1)).first() is not None
+            ]
+        if populated:
+            raise SystemExit(
+                f"{engine.url.render_as_string(hide_password=True)} is not empty "
+                f"({', '.join(sorted(populated))}); pass --reset to drop and recreate the app tables in it"
+            )
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+
+
+def generate_dataset(
+    engine,
+    users: int = 100,
+    years: float = 1,
+    providers: Sequence[str] = PROVIDERS,
+    seed: int = 42,
+    end: Optional[date] = None,
+    workers: int = 1
+) -> Dict:
+    """
+    Insert `users` users with connections and `years` of daily history each.
+    Returns counts and the id range of the generated users.
+    """
+    return generate(
+        engine,
+        users=users,
+        days=int(365 * years),
+        end=end,
+        workers=workers,
+        seed=seed,
+        demo=False,
+        email_pattern=BENCH_EMAIL,
+        password=BENCH_PASSWORD,
+        providers=providers,
+        timezones=("UTC",),
+        log=lambda message: None
+    )
@@ -0,0 +1,211 @@
+"""
+Deterministic fake Fitbit / Garmin / Oura APIs.
+
+transport() serves the farm through an httpx.MockTransport, so the real
+provider fetchers run end to end without network access; build_farm_app()
+serves the same farm over HTTP for the load-test harness.
+
+Values are derived from (seed, provider, token, day), so a re-sync of the
+same window returns the same numbers and merge work is reproducible.
+FakeOAuthServer does the same for the providers' token endpoints.
+"""
+
+import asyncio
+import base64
+import random
+import re
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Tuple
+from urllib.parse import parse_qs
+
+import httpx
+
+_FITBIT = re.compile(
+    r"^/1(?:\.2)?/user/-/(activities/steps|activities/activityCalories|activities/heart|sleep)"
+    r"/date/(\d{4}-\d{2}-\d{2})/(\d{4}-\d{2}-\d{2})\.json$"
+)
+_GARMIN = re.compile(r"^/wellness-api/rest/(dailies|sleeps)$")
+_OURA = re.compile(r"^/v2/usercollection/(daily_activity|sleep)$")
+
+
+def _days(start: date, end: date) -> List[date]:
+    return [start + timedelta(days=offset) for offset in range((end - start).days + 1)]
+
+
+class FakeProviderFarm:
+    def __init__(self, seed: int = 0, latency: float = 0.0, error_rate: float = 0.0, max_days: int = 400):
+        self.seed = seed
+        self.latency = latency
+        self.error_rate = error_rate
+        self.max_days = max_days
+        self.requests = 0
+        self._errors = random.Random(seed)
+
+    def day_values(self, provider: str, token: str, day: date) -> Dict:
+        rng = random.Random(f"{self.seed}:{provider}:{token}:{day.isoformat()}")
+        weekend = day.weekday() >= 5
+        steps = max(500, int(rng.gauss(9000 if weekend else 7000, 2500)))
+        return {
+            "steps": steps,
+            "calories": int(steps * 0.04 + rng.gauss(0, 40)),
+            "resting_hr": int(rng.gauss(62, 4)),
+            "sleep_minutes": int(rng.gauss(430, 45)),
+        }
+
+    def respond(self, path: str, params: Dict, token: str) -> Tuple[int, object]:
+        """Route a provider request to a (status, JSON body) pair."""
+        self.requests += 1
+        if self.error_rate and self._errors.random() < self.error_rate:
+            return 503, {"error": "provider unavailable"}
+
+        match = _FITBIT.match(path)
+        if match:
+            resource, start, end = match.groups()
+            return 200, self._fitbit(resource, token, date.fromisoformat(start), date.fromisoformat(end))
+
+        match = _GARMIN.match(path)
+        if match:
+            start = datetime.utcfromtimestamp(int(params["uploadStartTimeInSeconds"])).date()
+            end = datetime.utcfromtimestamp(int(params["uploadEndTimeInSeconds"])).date()
+            return 200, self._garmin(match.group(1), token, start, end)
+
+        match = _OURA.match(path)
+        if match:
+            start = date.fromisoformat(params["start_date"])
+            end = date.fromisoformat(params["end_date"])
+            return 200, self._oura(match.group(1), token, start, end)
+
+        return 404, {"error": f"unknown resource {path}"}
+
+    def transport(self) -> httpx.MockTransport:
+        async def handler(request: httpx.Request) -> httpx.Response:
+            if self.latency:
+                await asyncio.sleep(self.latency)
+            token = request.headers.get("authorization", "").removeprefix("Bearer ")
+            status, body = self.respond(request.url.path, dict(request.url.params), token)
+            return httpx.Response(status, json=body)
+
+        return httpx.MockTransport(handler)
+
+    def client(self) -> httpx.AsyncClient:
+        return httpx.AsyncClient(transport=self.transport())
+
+    def _window(self, start: date, end: date) -> List[date]:
+        days = _days(start, end)
+        return days[-self.max_days:]
+
+    def _fitbit(self, resource: str, token: str, start: date, end: date) -> Dict:
+        days = self._window(start, end)
+        values = [(day, self.day_values("fitbit", token, day)) for day in days]
+        if resource == "activities/steps":
+            return {"activities-steps": [{"dateTime": d.isoformat(), "value": str(v["steps"])} for d, v in values]}
+        if resource == "activities/activityCalories":
+            return {"activities-activityCalories": [
+                {"dateTime": d.isoformat(), "value": str(v["calories"])} for d, v in values
+            ]}
+        if resource == "activities/heart":
+            return {"activities-heart": [
+                {"dateTime": d.isoformat(), "value": {"restingHeartRate": v["resting_hr"]}} for d, v in values
+            ]}
+        return {"sleep": [
+            {"dateOfSleep": d.isoformat(), "minutesAsleep": v["sleep_minutes"], "isMainSleep": True}
+            for d, v in values
+        ]}
+
+    def _garmin(self, resource: str, token: str, start: date, end: date) -> List[Dict]:
+        values = [(day, self.day_values("garmin", token, day)) for day in self._window(start, end)]
+        if resource == "dailies":
+            return [{
+                "calendarDate": d.isoformat(),
+                "steps": v["steps"],
+                "activeKilocalories": v["calories"],
+                "restingHeartRateInBeatsPerMinute": v["resting_hr"],
+            } for d, v in values]
+        return [{"calendarDate": d.isoformat(), "durationInSeconds": v["sleep_minutes"] * 60} for d, v in values]
+
+    def _oura(self, resource: str, token: str, start: date, end: date) -> Dict:
+        values = [(day, self.day_values("oura", token, day)) for day in self._window(start, end)]
+        if resource == "daily_activity":
+            return {"data": [
+                {"day": d.isoformat(), "steps": v["steps"], "active_calories": v["calories"]} for d, v in values
+            ]}
+        return {"data": [{
+            "day": d.isoformat(),
+            "total_sleep_duration": v["sleep_minutes"] * 60,
+            "lowest_heart_rate": v["resting_hr"],
+        } for d, v in values]}
+
+
+class FakeOAuthServer:
+    """
+    Fitbit (/oauth2/token) and Oura (/oauth/token) refresh-token grants.
+    Refresh tokens rotate and are single-use, like Fitbit's: replaying one
+    gets invalid_grant, so duplicate concurrent refreshes show up as failures.
+    """
+
+    def __init__(self, client_id: str, client_secret: str, expires_in: int = 28800, latency: float = 0.0):
+        self.client_id = client_id
+        self.client_secret = client_secret
+        self.expires_in = expires_in
+        self.latency = latency
+        self.live: Dict[str, str] = {}  # refresh token -> provider
+        self.calls: List[Tuple[str, float]] = []  # (refresh token presented, loop time)
+        self._issued = 0
+
+    def grant(self, provider: str, refresh_token: str) -> None:
+        self.live[refresh_token] = provider
+
+    def respond(self, path: str, form: Dict[str, str], authorization: str) -> Tuple[int, object]:
+        provider = {"/oauth2/token": "fitbit", "/oauth/token": "oura"}.get(path)
+        if provider is None:
+            return 404, {"error": f"unknown resource {path}"}
+        if provider == "fitbit":
+            expected = base64.b64encode(f"{self.client_id}:{self.client_secret}".encode()).decode()
+            authorized = authorization == f"Basic {expected}"
+        else:
+            authorized = (form.get("client_id"), form.get("client_secret")) == (self.client_id, self.client_secret)
+        if not authorized:
+            return 401, {"error": "invalid_client"}
+
+        token = form.get("refresh_token")
+        if form.get("grant_type") != "refresh_token" or self.live.pop(token, None) != provider:
+            return 400, {"error": "invalid_grant"}
+        self._issued += 1
+        refresh_token = f"{provider}-refresh-{self._issued}"
+        self.live[refresh_token] = provider
+        return 200, {
+            "access_token": f"{provider}-access-{self._issued}",
+            "refresh_token": refresh_token,
+            "expires_in": self.expires_in,
+            "token_type": "Bearer",
+        }
+
+    def transport(self) -> httpx.MockTransport:
+        async def handler(request: httpx.Request) -> httpx.Response:
+            form = {key: values[0] for key, values in parse_qs(request.content.decode()).items()}
+            self.calls.append((form.get("refresh_token"), asyncio.get_running_loop().time()))
+            if self.latency:
+                await asyncio.sleep(self.latency)
+            status, body = self.respond(request.url.path, form, request.headers.get("authorization", ""))
+            return httpx.Response(status, json=body)
+
+        return httpx.MockTransport(handler)
+
+    def client(self) -> httpx.AsyncClient:
+        return httpx.AsyncClient(transport=self.transport())
+
+
+def build_farm_app(farm: FakeProviderFarm):
+    """The farm as an ASGI app, for serving over real HTTP with uvicorn."""
+    from starlette.applications import Starlette
+    from starlette.responses import JSONResponse
+    from starlette.routing import Route
+
+    async def endpoint(request):
+        if farm.latency:
+            await asyncio.sleep(farm.latency)
+        token = request.headers.get("authorization", "").removeprefix("Bearer ")
+        status, body = farm.respond(request.url.path, dict(request.query_params), token)
+        return JSONResponse(body, status_code=status)
+
+    return Starlette(routes=[Route("/{path:path}", endpoint)])
@@ -0,0 +1,265 @@
+#!/usr/bin/env python3
+"""
+HTTP load test: one uvicorn worker against a seeded database and a local
+fake Fitbit/Garmin/Oura farm.
+
+- Seeds a dataset (benchmarks.dataset) into the target database
+- Serves benchmarks.fake_providers over HTTP with configurable latency and
+  error rate, and points the app's provider base URLs at it
+- Boots `uvicorn main:app` in a subprocess (a single worker)
+- Drives an open-loop mixed workload at a target RPS. Latency is measured
+  from each request's scheduled start, so queueing inside the server is
+  not hidden (no coordinated omission).
+- Reports throughput, p50/p95/p99 and error rate per endpoint; syncs that
+  complete with some provider errors are counted as partial, not failed
+
+Run from backend/:
+  python -m benchmarks.load_test --rps 50 --duration 30 --users 200
+  python -m benchmarks.load_test --rps 20 --provider-latency 0.25 --provider-error-rate 0.05 --output load.json
+"""
+
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import argparse
+import asyncio
+import json
+import random
+import socket
+import subprocess
+import tempfile
+import threading
+import time
+from collections import defaultdict
+
+import httpx
+
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+# Relative weights of the mixed workload
+DEFAULT_MIX = {"login": 5, "summary": 40, "heatmap": 25, "trends": 20, "sync": 10}
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def percentile(ordered, fraction):
+    if not ordered:
+        return None
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+def start_farm(latency: float, error_rate: float, seed: int):
+    """Serve the fake provider farm from a background thread."""
+    import uvicorn
+    from benchmarks.fake_providers import FakeProviderFarm, build_farm_app
+
+    farm = FakeProviderFarm(seed=seed, latency=latency, error_rate=error_rate)
+    port = free_port()
+    server = uvicorn.Server(uvicorn.Config(
+        build_farm_app(farm), host="127.0.0.1", port=port, log_level="warning"
+    ))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.05)
+    return server, f"http://127.0.0.1:{port}"
+
+
+def start_app(env: dict, port: int) -> subprocess.Popen:
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1",
+         "--port", str(port), "--workers", "1", "--log-level", "warning"],
+        cwd=BACKEND_DIR, env=env
+    )
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        try:
+            if httpx.get(f"http://127.0.0.1:{port}/health", timeout=1).status_code == 200:
+                return process
+        except httpx.HTTPError:
+            pass
+        if process.poll() is not None:
+            raise RuntimeError("uvicorn exited during startup")
+        time.sleep(0.1)
+    process.terminate()
+    raise RuntimeError("uvicorn did not become healthy within 30s")
+
+
+class Workload:
+    def __init__(self, user_ids, mix, seed):
+        from app.core.auth import create_access_token
+        from benchmarks.dataset import BENCH_PASSWORD, bench_email
+
+        self.user_ids = list(user_ids)
+        self.rng = random.Random(seed)
+        self.names = list(mix)
+        self.weights = [mix[name] for name in self.names]
+        self.password = BENCH_PASSWORD
+        self.email = bench_email
+        # Pre-mint tokens so the driver doesn't spend its time signing JWTs
+        self.tokens = {
+            user_id: {"Authorization": f"Bearer {create_access_token({'sub': str(user_id)})}"}
+            for user_id in self.user_ids
+        }
+
+    def next_request(self):
+        name = self.rng.choices(self.names, self.weights)[0]
+        user_id = self.rng.choice(self.user_ids)
+        headers = self.tokens[user_id]
+        if name == "login":
+            return name, "POST", "/api/auth/login", {"json": {"email": self.email(user_id), "password": self.password}}
+        if name == "summary":
+            return name, "GET", "/api/dashboard/summary", {"headers": headers}
+        if name == "heatmap":
+            metric = self.rng.choice(["steps", "sleep", "heart_rate", "calories"])
+            return name, "GET", f"/api/dashboard/heatmap/{metric}", {"headers": headers}
+        if name == "trends":
+            return name, "GET", "/api/dashboard/trends", {
+                "headers": headers, "params": {"metric": "steps", "period": "90d"}
+            }
+        return name, "POST", "/api/dashboard/sync", {"headers": headers, "params": {"days": 7}}
+
+
+async def drive(base_url, workload, rps, duration, max_in_flight):
+    samples = defaultdict(list)
+    errors = defaultdict(int)
+    partial = defaultdict(int)  # syncs that succeeded but had provider errors
+    in_flight = asyncio.Semaphore(max_in_flight)
+    limits = httpx.Limits(max_connections=max_in_flight, max_keepalive_connections=max_in_flight)
+
+    async with httpx.AsyncClient(base_url=base_url, timeout=60, limits=limits) as client:
+        async def one(scheduled, name, method, path, kwargs):
+            async with in_flight:
+                try:
+                    response = await client.request(method, path, **kwargs)
+                    ok = response.status_code < 400
+                    if ok and name == "sync" and response.json().get("errors"):
+                        partial[name] += 1
+                except httpx.HTTPError:
+                    ok = False
+            samples[name].append((time.perf_counter() - scheduled) * 1000)
+            if not ok:
+                errors[name] += 1
+
+        loop_start = time.perf_counter()
+        interval = 1.0 / rps
+        tasks = []
+        sent = 0
+        while True:
+            scheduled = loop_start + sent * interval
+            if scheduled - loop_start >= duration:
+                break
+            delay = scheduled - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            tasks.append(asyncio.create_task(one(scheduled, *workload.next_request())))
+            sent += 1
+        await asyncio.gather(*tasks)
+        elapsed = time.perf_counter() - loop_start
+
+    return samples, errors, partial, elapsed
+
+
+def report(samples, errors, partial, elapsed):
+    endpoints = {}
+    for name in sorted(samples):
+        ordered = sorted(samples[name])
+        endpoints[name] = {
+            "requests": len(ordered),
+            "throughput_rps": round(len(ordered) / elapsed, 2),
+            "error_rate": round(errors[name] / len(ordered), 4),
+            "partial_rate": round(partial[name] / len(ordered), 4),
+            "p50_ms": round(percentile(ordered, 0.50), 2),
+            "p95_ms": round(percentile(ordered, 0.95), 2),
+            "p99_ms": round(percentile(ordered, 0.99), 2),
+        }
+    total = sum(len(values) for values in samples.values())
+    return {
+        "elapsed_seconds": round(elapsed, 2),
+        "requests": total,
+        "throughput_rps": round(total / elapsed, 2),
+        "error_rate": round(sum(errors.values()) / total, 4) if total else 0,
+        "endpoints": endpoints,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", help="defaults to a fresh SQLite file in a temp dir")
+    parser.add_argument("--reset", action="store_true",
+                        help="drop and recreate the app tables in a non-empty --database-url")
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--years", type=float, default=1)
+    parser.add_argument("--rps", type=float, default=20)
+    parser.add_argument("--duration", type=float, default=30, help="seconds")
+    parser.add_argument("--max-in-flight", type=int, default=256)
+    parser.add_argument("--provider-latency", type=float, default=0.05, help="seconds per provider call")
+    parser.add_argument("--provider-error-rate", type=float, default=0.0)
+    parser.add_argument("--mix", help="e.g. summary=60,heatmap=30,sync=10 (default: %s)" % DEFAULT_MIX)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="write the report JSON here")
+    args = parser.parse_args(argv)
+
+    mix = DEFAULT_MIX
+    if args.mix:
+        mix = {name: float(weight) for name, weight in (part.split("=") for part in args.mix.split(","))}
+
+    database_url = args.database_url or f"sqlite:///{tempfile.mkdtemp(prefix='fitlife-load-')}/load.db"
+    os.environ["DATABASE_URL"] = database_url
+
+    from app.core.database import engine
+    from benchmarks.dataset import generate_dataset, prepare_database
+
+    prepare_database(engine, owned=args.database_url is None, reset=args.reset)
+    info = generate_dataset(engine, users=args.users, years=args.years, seed=args.seed)
+    print(f"seeded {info['daily_metrics']} daily_metrics for {info['users']} users")
+
+    farm, farm_url = start_farm(args.provider_latency, args.provider_error_rate, args.seed)
+    app_port = free_port()
+    env = {
+        **os.environ,
+        "DATABASE_URL": database_url,
+        "FITBIT_API_BASE_URL": farm_url,
+        "GARMIN_API_BASE_URL": farm_url,
+        "OURA_API_BASE_URL": farm_url,
+    }
+    app = start_app(env, app_port)
+
+    try:
+        workload = Workload(range(info["first_user_id"], info["last_user_id"] + 1), mix, args.seed)
+        print(f"driving {args.rps} rps for {args.duration}s ({', '.join(f'{k}={v}' for k, v in mix.items())})")
+        samples, errors, partial, elapsed = asyncio.run(
+            drive(f"http://127.0.0.1:{app_port}", workload, args.rps, args.duration, args.max_in_flight)
+        )
+    finally:
+        app.terminate()
+        app.wait(timeout=10)
+        farm.should_exit = True
+
+    result = report(samples, errors, partial, elapsed)
+    result["config"] = {
+        "rps": args.rps, "duration": args.duration, "users": args.users, "years": args.years,
+        "provider_latency": args.provider_latency, "provider_error_rate": args.provider_error_rate,
+        "mix": mix, "database": engine.dialect.name,
+    }
+
+    print(f"\n{'endpoint':10s} {'reqs':>6s} {'rps':>7s} {'err%':>6s} {'p50':>9s} {'p95':>9s} {'p99':>9s}")
+    for name, stats in result["endpoints"].items():
+        print(f"{name:10s} {stats['requests']:6d} {stats['throughput_rps']:7.2f} {stats['error_rate'] * 100:5.1f}% "
+              f"{stats['p50_ms']:8.1f}ms {stats['p95_ms']:8.1f}ms {stats['p99_ms']:8.1f}ms")
+    print(f"{'total':10s} {result['requests']:6d} {result['throughput_rps']:7.2f} {result['error_rate'] * 100:5.1f}%")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(result, f, indent=2)
+        print(f"wrote {args.output}")
+    return result
+
+
+if __name__ == "__main__":
+    main()
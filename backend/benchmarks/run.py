@@ -0,0 +1,290 @@
+#!/usr/bin/env python3
+"""
+Benchmark suite for the sync, dashboard and auth paths.
+
+Seeds a synthetic dataset (benchmarks.dataset), then times:
+  sync_initial   first sync of fresh users through fake provider transports
+  sync_resync    re-sync of seeded users (merge/update path)
+  heatmap        FitnessDataAggregator.generate_heatmap_data
+  summary        GET /api/dashboard/summary
+  trends         GET /api/dashboard/trends
+  login          POST /api/auth/login
+  cold_start     fresh interpreter: `import main` plus lifespan startup
+
+Results are written as JSON; compare two runs with benchmarks.compare.
+
+Run from backend/:
+  python -m benchmarks.run --users 200 --years 1 --output benchmarks/results/sqlite.json
+  python -m benchmarks.run --database-url postgresql://localhost/fitlife_bench --users 1000 --years 5
+"""
+
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import argparse
+import asyncio
+import json
+import platform
+import random
+import statistics
+import subprocess
+import tempfile
+import time
+from datetime import datetime
+
+BENCHMARKS = ("sync_initial", "sync_resync", "heatmap", "summary", "trends", "login", "cold_start")
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+# Runs in a fresh interpreter; prints one JSON line with the boot phases
+COLD_START_PROBE = """
+import asyncio, json, sys, time
+started = time.perf_counter()
+import main
+imported = time.perf_counter()
+
+async def boot():
+    async with main.app.router.lifespan_context(main.app):
+        pass
+
+asyncio.run(boot())
+print(json.dumps({
+    "import_ms": (imported - started) * 1000,
+    "startup_ms": (time.perf_counter() - imported) * 1000,
+    "modules": len(sys.modules),
+}))
+"""
+
+
+def summarize(samples_ms, **extra):
+    ordered = sorted(samples_ms)
+    result = {
+        "unit": "ms",
+        "n": len(ordered),
+        "min": round(ordered[0], 3),
+        "median": round(statistics.median(ordered), 3),
+        "p95": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))], 3),
+        "mean": round(statistics.fmean(ordered), 3),
+    }
+    result.update(extra)
+    return result
+
+
+def measure(fn, repeat, warmup=1):
+    for _ in range(warmup):
+        fn()
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    return samples
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], stderr=subprocess.DEVNULL, text=True
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+class Suite:
+    def __init__(self, args, info):
+        from fastapi.testclient import TestClient
+        from app.core.database import SessionLocal, engine
+        from app.core.auth import create_access_token
+        from main import app
+
+        self.args = args
+        self.info = info
+        self.engine = engine
+        self.SessionLocal = SessionLocal
+        self.rng = random.Random(args.seed)
+        self.user_ids = list(range(info["first_user_id"], info["last_user_id"] + 1))
+        self.client = TestClient(app)
+        self.create_access_token = create_access_token
+
+    def _headers(self, user_id):
+        return {"Authorization": f"Bearer {self.create_access_token({'sub': str(user_id)})}"}
+
+    def _sample_user(self):
+        return self.rng.choice(self.user_ids)
+
+    def _sync(self, user_ids, days_back):
+        from benchmarks.fake_providers import FakeProviderFarm
+        from app.services.fitness_aggregator import FitnessDataAggregator
+
+        farm = FakeProviderFarm(seed=self.args.seed)
+        totals = {"records": 0, "seconds": 0.0, "samples": []}
+
+        async def run():
+            async with farm.client() as http_client:
+                for user_id in user_ids:
+                    db = self.SessionLocal()
+                    try:
+                        started = time.perf_counter()
+                        result = await FitnessDataAggregator(db, http_client=http_client).sync_user_data(
+                            user_id, days_back=days_back
+                        )
+                        elapsed = time.perf_counter() - started
+                        totals["seconds"] += elapsed
+                        totals["samples"].append(elapsed * 1000)
+                        totals["records"] += result["records_created"] + result["records_updated"]
+                    finally:
+                        db.close()
+
+        asyncio.run(run())
+        return totals
+
+    def sync_initial(self):
+        from benchmarks.dataset import generate_dataset
+
+        fresh = generate_dataset(self.engine, users=self.args.sync_users, years=0, seed=self.args.seed + 1)
+        user_ids = range(fresh["first_user_id"], fresh["last_user_id"] + 1)
+        return self._sync_result(self._sync(user_ids, days_back=self.args.sync_days))
+
+    def sync_resync(self):
+        user_ids = [self._sample_user() for _ in range(self.args.sync_users)]
+        return self._sync_result(self._sync(user_ids, days_back=self.args.sync_days))
+
+    @staticmethod
+    def _sync_result(totals):
+        """Per-user sync latency plus merge throughput."""
+        return summarize(
+            totals["samples"],
+            records=totals["records"],
+            records_per_second=round(totals["records"] / totals["seconds"], 1) if totals["seconds"] else None
+        )
+
+    def heatmap(self):
+        from app.services.fitness_aggregator import FitnessDataAggregator
+
+        db = self.SessionLocal()
+        try:
+            aggregator = FitnessDataAggregator(db)
+            return summarize(measure(
+                lambda: aggregator.generate_heatmap_data(self._sample_user(), "steps"),
+                self.args.repeat
+            ))
+        finally:
+            db.close()
+
+    def summary(self):
+        def call():
+            response = self.client.get("/api/dashboard/summary", headers=self._headers(self._sample_user()))
+            assert response.status_code == 200, response.text
+
+        return summarize(measure(call, self.args.repeat))
+
+    def trends(self):
+        def call():
+            response = self.client.get(
+                "/api/dashboard/trends", params={"metric": "steps", "period": "1y"},
+                headers=self._headers(self._sample_user())
+            )
+            assert response.status_code == 200, response.text
+
+        return summarize(measure(call, self.args.repeat))
+
+    def login(self):
+        from benchmarks.dataset import BENCH_PASSWORD, bench_email
+
+        def call():
+            response = self.client.post(
+                "/api/auth/login",
+                json={"email": bench_email(self._sample_user()), "password": BENCH_PASSWORD}
+            )
+            assert response.status_code == 200, response.text
+
+        return summarize(measure(call, max(1, self.args.repeat // 4)))
+
+    def cold_start(self):
+        """
+        Wall time of a fresh worker process, with the import and lifespan
+        phases reported separately, with and without AUTO_CREATE_SCHEMA.
+        """
+        def boot(auto_create_schema):
+            env = {**os.environ, "AUTO_CREATE_SCHEMA": str(auto_create_schema).lower()}
+            started = time.perf_counter()
+            output = subprocess.check_output(
+                [sys.executable, "-c", COLD_START_PROBE], cwd=BACKEND_DIR, env=env, text=True
+            )
+            wall = (time.perf_counter() - started) * 1000
+            return wall, json.loads(output.strip().splitlines()[-1])
+
+        runs = max(3, self.args.repeat // 5)
+        walls, phases, with_schema = [], [], []
+        for _ in range(runs):
+            wall, probe = boot(False)
+            walls.append(wall)
+            phases.append(probe)
+            with_schema.append(boot(True)[1]["startup_ms"])
+        return summarize(
+            walls,
+            import_ms=round(statistics.median(p["import_ms"] for p in phases), 3),
+            startup_ms=round(statistics.median(p["startup_ms"] for p in phases), 3),
+            startup_with_create_all_ms=round(statistics.median(with_schema), 3),
+            modules=phases[-1]["modules"]
+        )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", help="defaults to a fresh SQLite file in a temp dir")
+    parser.add_argument("--reset", action="store_true",
+                        help="drop and recreate the app tables in a non-empty --database-url")
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--years", type=float, default=1)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--repeat", type=int, default=30)
+    parser.add_argument("--sync-users", type=int, default=10)
+    parser.add_argument("--sync-days", type=int, default=30)
+    parser.add_argument("--only", help=f"comma-separated subset of {','.join(BENCHMARKS)}")
+    parser.add_argument("--output", help="write results JSON here")
+    args = parser.parse_args(argv)
+
+    database_url = args.database_url or f"sqlite:///{tempfile.mkdtemp(prefix='fitlife-bench-')}/bench.db"
+    # Settings are read at import time, so point the app at the bench DB first
+    os.environ["DATABASE_URL"] = database_url
+
+    from app.core.database import engine
+    from benchmarks.dataset import generate_dataset, prepare_database
+
+    prepare_database(engine, owned=args.database_url is None, reset=args.reset)
+    started = time.perf_counter()
+    info = generate_dataset(engine, users=args.users, years=args.years, seed=args.seed)
+    info["seed_seconds"] = round(time.perf_counter() - started, 2)
+    print(f"seeded {info['daily_metrics']} daily_metrics for {info['users']} users in {info['seed_seconds']}s")
+
+    suite = Suite(args, info)
+    selected = args.only.split(",") if args.only else BENCHMARKS
+    results = {}
+    for name in selected:
+        results[name] = getattr(suite, name)()
+        print(f"{name:14s} median {results[name]['median']:9.3f} ms  p95 {results[name]['p95']:9.3f} ms")
+
+    report = {
+        "meta": {
+            "commit": git_commit(),
+            "timestamp": datetime.utcnow().isoformat(timespec="seconds"),
+            "dialect": engine.dialect.name,
+            "python": platform.python_version(),
+            "users": args.users,
+            "years": args.years,
+            "seed": args.seed,
+            "dataset": info,
+        },
+        "results": results,
+    }
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"wrote {args.output}")
+    return report
+
+
+if __name__ == "__main__":
+    main()
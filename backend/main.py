@@ -1,19 +1,64 @@
-from fastapi import FastAPI
+import time
+_import_started = time.perf_counter()
+
+import asyncio
+import hmac
+
+from fastapi import FastAPI, Request
+from fastapi.responses import PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
 
-from app.core.database import engine, Base
-from app.routers import auth, dashboard, subscriptions
+from app.core.database import engine, Base, query_diagnostics, replica_router
+from app.routers import auth, dashboard, subscriptions, teams, webhooks
 from app.core.config import settings
+from app.core.compression import CompressionMiddleware, available_encoders
+from app.core.metrics import MetricsMiddleware, registry
+from app.core.query_diagnostics import QueryDiagnosticsMiddleware
+from app.services.provider_webhooks import coalescer as webhook_coalescer
+from app.services.sync_engine import sync_engine
+from app.services.token_manager import token_manager
+
+# Boot cost per worker: module imports, then the lifespan startup
+STARTUP_TIMING = {"import": time.perf_counter() - _import_started, "startup": 0.0}
+registry.callback(
+    "fitlife_startup_import_seconds", "Time spent importing the application",
+    lambda: STARTUP_TIMING["import"]
+)
+registry.callback(
+    "fitlife_startup_seconds", "Time spent in lifespan startup",
+    lambda: STARTUP_TIMING["startup"]
+)
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    # Startup: Create tables
-    Base.metadata.create_all(bind=engine)
-    print(f"🚀 {settings.APP_NAME} is starting up...")
+    started = time.perf_counter()
+    # Startup: create tables when AUTO_CREATE_SCHEMA is on (defaults to DEBUG);
+    # otherwise the schema is owned by migrations run before deploy
+    if settings.AUTO_CREATE_SCHEMA:
+        Base.metadata.create_all(bind=engine)
+    # Proactive provider token refresh, so syncs never wait on a token endpoint
+    token_sweep = None
+    if settings.TOKEN_REFRESH_INTERVAL_SECONDS > 0:
+        token_sweep = asyncio.create_task(token_manager.run_periodically(settings.TOKEN_REFRESH_INTERVAL_SECONDS))
+    # Heartbeat that replicas replay, so their lag can be measured
+    heartbeat = None
+    if replica_router.replicas and settings.REPLICA_HEARTBEAT_SECONDS > 0:
+        heartbeat = asyncio.create_task(replica_router.run_heartbeat(settings.REPLICA_HEARTBEAT_SECONDS))
+    STARTUP_TIMING["startup"] = time.perf_counter() - started
+    print(
+        f"🚀 {settings.APP_NAME} is starting up... "
+        f"(imports {STARTUP_TIMING['import'] * 1000:.0f} ms, startup {STARTUP_TIMING['startup'] * 1000:.0f} ms)"
+    )
     yield
-    # Shutdown
+    # Shutdown: don't drop provider notifications still inside their debounce window
+    await webhook_coalescer.flush()
+    if token_sweep:
+        token_sweep.cancel()
+    if heartbeat:
+        heartbeat.cancel()
+    sync_engine.shutdown()
     print(f"👋 {settings.APP_NAME} is shutting down...")
 
 
@@ -33,10 +78,32 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Compression (outermost, so it sees final response bodies)
+app.add_middleware(
+    CompressionMiddleware,
+    minimum_size=settings.COMPRESSION_MINIMUM_SIZE,
+    encoders=available_encoders(
+        gzip_level=settings.COMPRESSION_GZIP_LEVEL,
+        brotli_quality=settings.COMPRESSION_BROTLI_QUALITY,
+        zstd_level=settings.COMPRESSION_ZSTD_LEVEL
+    ),
+    cache_paths=settings.COMPRESSION_CACHE_PATHS,
+)
+
+# N+1 / slow-query reports per request (development aid)
+if settings.QUERY_DIAGNOSTICS_ENABLED:
+    app.add_middleware(QueryDiagnosticsMiddleware, diagnostics=query_diagnostics)
+
+# Request metrics (outermost, so latency includes compression)
+if settings.METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
+
 # Include routers
 app.include_router(auth.router, prefix="/api")
 app.include_router(dashboard.router, prefix="/api")
 app.include_router(subscriptions.router, prefix="/api")
+app.include_router(teams.router, prefix="/api")
+app.include_router(webhooks.router, prefix="/api")
 
 
 @app.get("/")
@@ -54,6 +121,25 @@ def health_check():
     return {"status": "healthy", "service": "fitlife-aggregator"}
 
 
+@app.get("/metrics", include_in_schema=False)
+def metrics(request: Request):
+    """Prometheus scrape endpoint; open to allowlisted addresses or holders of METRICS_TOKEN."""
+    if not settings.METRICS_ENABLED:
+        return PlainTextResponse("metrics disabled\n", status_code=404)
+    if not _may_scrape(request):
+        return PlainTextResponse("forbidden\n", status_code=403)
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
+
+
+def _may_scrape(request: Request) -> bool:
+    if request.client is not None and request.client.host in settings.METRICS_ALLOWED_CLIENTS:
+        return True
+    authorization = request.headers.get("authorization", "")
+    return bool(settings.METRICS_TOKEN) and hmac.compare_digest(
+        authorization.encode(), f"Bearer {settings.METRICS_TOKEN}".encode()
+    )
+
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run("main:app", host="0.0.0.0", port=8000, reload=True)
@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+"""
+Rebuild cohort distributions and per-user percentiles.
+Run nightly (e.g. from cron) after the day's syncs have settled.
+
+    python scripts/compute_cohorts.py
+    python scripts/compute_cohorts.py --workers 8 --chunk-users 20000
+    python scripts/compute_cohorts.py --as-of 2024-03-31
+"""
+
+import sys
+import os
+import argparse
+import time
+from datetime import date
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app.services.cohorts import compute_cohorts
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", help="defaults to settings.DATABASE_URL")
+    parser.add_argument("--as-of", type=date.fromisoformat, help="last local day to include (default: yesterday)")
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--chunk-users", type=int, default=5000)
+    args = parser.parse_args(argv)
+
+    if args.database_url:
+        from sqlalchemy import create_engine
+        engine = create_engine(args.database_url)
+    else:
+        from app.core.database import engine
+
+    started = time.perf_counter()
+    stats = compute_cohorts(engine, as_of=args.as_of, workers=args.workers, chunk_users=args.chunk_users)
+    print(
+        f"Ranked {stats['users_ranked']} users as of {stats['as_of']}: "
+        f"{stats['distributions']} distributions, {stats['percentiles']} percentiles "
+        f"from {stats['chunks']} chunks in {time.perf_counter() - started:.1f}s"
+    )
+    return stats
+
+
+if __name__ == "__main__":
+    main()
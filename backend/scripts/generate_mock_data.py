@@ -1,128 +1,372 @@
 #!/usr/bin/env python3
 """
-Generate mock fitness data for demonstration purposes.
-Run this script to populate the database with sample data.
+Generate mock fitness data, from one demo account up to millions of rows.
+
+    python scripts/generate_mock_data.py                                # demo user, 180 days
+    python scripts/generate_mock_data.py --users 50000 --days 365 --workers 8
+    python scripts/generate_mock_data.py --database-url postgresql://localhost/fitlife --users 30000 --days 365
+
+Signals are simulated per user with NumPy: a personal baseline, weekly
+seasonality, autocorrelated day-to-day noise, steps driving calories,
+distance and active minutes, fitness lowering resting HR, occasional
+illness episodes (fewer steps, higher HR and stress, more sleep) and days
+the device wasn't worn.
+
+Rows are written with COPY on PostgreSQL (each worker process writes its
+own chunks) and with executemany in large transactions on SQLite (workers
+generate, the parent writes, since SQLite has a single writer).
 """
 
 import sys
 import os
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
 
-from datetime import datetime, timedelta
-import random
-from sqlalchemy.orm import Session
-from app.core.database import SessionLocal, engine, Base
-from app.models.user import User, DailyMetric, FitnessConnection
-from app.core.auth import get_password_hash
+import argparse
+import csv
+import io
+import json
+import multiprocessing
+import time
+from datetime import date, datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+from zoneinfo import ZoneInfo
 
-def create_mock_data():
-    db = SessionLocal()
-    
+import numpy as np
+
+DEMO_EMAIL = "demo@fitlife.app"
+DEMO_PASSWORD = "demo123"
+EMAIL_PATTERN = "user{id}@mock.fitlife.app"
+PROVIDERS = ("fitbit", "garmin", "apple_health", "oura")
+TIMEZONES = (
+    "America/New_York", "America/Chicago", "America/Los_Angeles", "Europe/London",
+    "Europe/Berlin", "Asia/Tokyo", "Australia/Sydney", "UTC",
+)
+METRIC_COLUMNS = (
+    "user_id", "date", "local_date", "steps", "active_calories", "active_minutes",
+    "distance_meters", "floors_climbed", "resting_hr", "hrv_avg",
+    "sleep_duration_minutes", "stress_score", "sources", "is_complete",
+)
+FLOAT_COLUMNS = {"distance_meters", "hrv_avg"}
+
+# Monday..Sunday activity multipliers
+WEEKLY_PATTERN = np.array([0.96, 1.0, 1.0, 0.98, 1.04, 1.22, 1.08])
+ILLNESS_RATE = 1 / 150  # episode onsets per user-day
+ILLNESS_DAYS = 5
+NOT_WORN_RATE = 0.03
+
+
+def simulate(rng: np.random.Generator, n_users: int, days: int, start: date) -> Dict[str, np.ndarray]:
+    """Correlated daily signals for n_users x days; NaN marks days without data."""
+    shape = (n_users, days)
+    weekday = (np.arange(days) + start.weekday()) % 7
+    weekly = WEEKLY_PATTERN[weekday]
+    weekend = (weekday >= 5).astype(float)
+
+    # Per-user traits
+    base_steps = rng.lognormal(np.log(7500), 0.35, n_users)[:, None]
+    fitness = np.log(base_steps / 7500)
+    base_hr = 64 - 5 * fitness + rng.normal(0, 4, (n_users, 1))
+    base_hrv = 50 + 12 * fitness + rng.normal(0, 10, (n_users, 1))
+    stride_m = rng.uniform(0.65, 0.82, (n_users, 1))
+    calorie_factor = rng.uniform(0.035, 0.055, (n_users, 1))
+
+    # AR(1) activity noise: a lazy day tends to follow a lazy day
+    shocks = rng.normal(0, 0.2, shape)
+    noise = np.empty(shape)
+    noise[:, 0] = shocks[:, 0]
+    for t in range(1, days):
+        noise[:, t] = 0.55 * noise[:, t - 1] + shocks[:, t]
+
+    # Illness: each onset makes the next ILLNESS_DAYS days sick
+    onsets = (rng.random(shape) < ILLNESS_RATE).cumsum(axis=1)
+    lagged = np.zeros(shape)
+    lagged[:, ILLNESS_DAYS:] = onsets[:, :-ILLNESS_DAYS]
+    sick = ((onsets - lagged) > 0).astype(float)
+
+    steps = base_steps * weekly * np.exp(noise) * (1 - 0.65 * sick)
+    steps = np.clip(steps, 0, 60000).round()
+    resting_hr = np.clip(base_hr + rng.normal(0, 2, shape) + 7 * sick, 38, 110).round()
+    hrv = np.clip(base_hrv - 0.8 * (resting_hr - base_hr) + rng.normal(0, 5, shape) - 12 * sick, 5, 200)
+    sleep = np.clip(rng.normal(435, 40, shape) + 35 * weekend + 50 * sick, 180, 720).round()
+    stress = np.clip(
+        40 + rng.normal(0, 12, shape) + 20 * sick - 10 * (steps / base_steps - 1), 0, 100
+    ).round()
+
+    return {
+        "present": rng.random(shape) >= NOT_WORN_RATE,
+        "steps": steps,
+        "active_calories": (steps * calorie_factor + rng.normal(0, 40, shape)).clip(0).round(),
+        "active_minutes": (steps / 140 * np.exp(rng.normal(0, 0.2, shape))).round(),
+        "distance_meters": (steps * stride_m).round(1),
+        "floors_climbed": rng.poisson(steps / 1000),
+        "resting_hr": resting_hr,
+        "hrv_avg": hrv.round(1),
+        "sleep_duration_minutes": sleep,
+        "stress_score": stress,
+    }
+
+
+def build_rows(
+    user_ids: Sequence[int],
+    utc_offsets: Sequence[float],
+    sources: Sequence[str],
+    start: date,
+    days: int,
+    seed: int
+) -> List[Tuple]:
+    """Simulate a chunk of users and flatten it to DailyMetric row tuples."""
+    if days <= 0 or not user_ids:
+        return []
+    rng = np.random.default_rng(seed)
+    signals = simulate(rng, len(user_ids), days, start)
+    present = signals.pop("present")
+    user_index, day_index = np.nonzero(present)
+
+    day_list = [start + timedelta(days=offset) for offset in range(days)]
+    local_dates = np.array([d.isoformat() for d in day_list], dtype=object)
+    # Bare provider dates are anchored at local noon (see bucket_timestamp);
+    # format each (utc offset, day) instant once rather than once per row
+    distinct_offsets, offset_index = np.unique(np.asarray(utc_offsets, dtype=float), return_inverse=True)
+    instant_text = np.array([
+        [
+            (datetime.combine(d, datetime.min.time()) + timedelta(hours=12 - hours)).strftime("%Y-%m-%d %H:%M:%S.%f")
+            for d in day_list
+        ]
+        for hours in distinct_offsets
+    ], dtype=object)
+
+    columns = [
+        np.asarray(user_ids)[user_index].tolist(),
+        instant_text[offset_index[user_index], day_index].tolist(),
+        local_dates[day_index].tolist(),
+    ]
+    for name in METRIC_COLUMNS[3:-2]:
+        values = signals[name][user_index, day_index]
+        columns.append(values.tolist() if name in FLOAT_COLUMNS else values.astype(np.int64).tolist())
+    columns.append(np.asarray(sources, dtype=object)[user_index].tolist())
+    columns.append([1] * len(user_index))
+    return list(zip(*columns))
+
+
+def write_rows(dbapi_conn, dialect: str, rows: Iterable[Tuple]) -> None:
+    cursor = dbapi_conn.cursor()
     try:
-        # Create test user
-        test_user = db.query(User).filter(User.email == "demo@fitlife.app").first()
-        if not test_user:
-            test_user = User(
-                email="demo@fitlife.app",
-                hashed_password=get_password_hash("demo123"),
-                first_name="Demo",
-                last_name="User",
-                is_premium=True,
-                timezone="America/New_York"
+        if dialect == "postgresql":
+            buffer = io.StringIO()
+            csv.writer(buffer).writerows(rows)
+            buffer.seek(0)
+            cursor.copy_expert(
+                f"COPY daily_metrics ({', '.join(METRIC_COLUMNS)}) FROM STDIN WITH (FORMAT csv)", buffer
+            )
+        else:
+            placeholder = "?" if dialect == "sqlite" else "%s"
+            cursor.executemany(
+                f"INSERT INTO daily_metrics ({', '.join(METRIC_COLUMNS)}) "
+                f"VALUES ({', '.join([placeholder] * len(METRIC_COLUMNS))})",
+                rows
             )
-            db.add(test_user)
+    finally:
+        cursor.close()
+
+
+def _chunk_worker(task: Dict):
+    rows = build_rows(task["user_ids"], task["offsets"], task["sources"], task["start"], task["days"], task["seed"])
+    if not task["write"]:
+        return rows
+    # PostgreSQL: each worker streams its own chunk through COPY
+    from sqlalchemy import create_engine
+
+    engine = create_engine(task["database_url"])
+    try:
+        dbapi_conn = engine.raw_connection()
+        try:
+            write_rows(dbapi_conn, "postgresql", rows)
+            dbapi_conn.commit()
+        finally:
+            dbapi_conn.close()
+    finally:
+        engine.dispose()
+    return len(rows)
+
+
+def _utc_offset_hours(tz_name: str, on: date) -> float:
+    noon = datetime.combine(on, datetime.min.time()) + timedelta(hours=12)
+    return noon.replace(tzinfo=ZoneInfo(tz_name)).utcoffset().total_seconds() / 3600
+
+
+def generate(
+    engine,
+    users: int = 1,
+    days: int = 180,
+    end: Optional[date] = None,
+    workers: int = 1,
+    seed: int = 0,
+    chunk_users: int = 500,
+    demo: bool = True,
+    email_pattern: str = EMAIL_PATTERN,
+    password: str = DEMO_PASSWORD,
+    providers: Sequence[str] = PROVIDERS,
+    timezones: Sequence[str] = TIMEZONES,
+    log=print
+) -> Dict:
+    """
+    Create `users` users (the first one is the demo account when demo=True)
+    with connections and `days` days of history each. Returns counts and the
+    id range of the users created.
+    
+    An existing demo account fills the demo slot and is left as it is, so
+    re-running the default (demo only) changes nothing.
+    """
+    from sqlalchemy import func, insert, select, text
+    from app.core.auth import get_password_hash
+    from app.models.user import User, FitnessConnection
+
+    rng = np.random.default_rng(seed)
+    end = end or datetime.utcnow().date()
+    start = end - timedelta(days=days - 1)
+    hashed = get_password_hash(password)  # bcrypt once, not per user
+    dialect = engine.dialect.name
+
+    with engine.begin() as conn:
+        first_id = (conn.execute(select(func.max(User.id))).scalar() or 0) + 1
+        if demo and conn.execute(select(User.id).where(User.email == DEMO_EMAIL)).first():
+            demo = False  # Already seeded; it counts as the first user
+            users -= 1
+
+        user_rows, connection_rows, user_sources, user_offsets = [], [], [], []
+        # Own stream, so adding fields doesn't reshuffle the seeded signals
+        birth_years = np.random.default_rng([seed, 1]).integers(1950, 2006, users)
+        for index in range(users):
+            user_id = first_id + index
+            is_demo = demo and index == 0
+            tz_name = "America/New_York" if is_demo else timezones[rng.integers(len(timezones))]
+            connected = sorted(rng.choice(providers, size=rng.integers(1, 4), replace=False).tolist())
+            user_rows.append({
+                "id": user_id,
+                "email": DEMO_EMAIL if is_demo else email_pattern.format(id=user_id),
+                "hashed_password": get_password_hash(DEMO_PASSWORD) if is_demo else hashed,
+                "first_name": "Demo" if is_demo else "Mock",
+                "last_name": "User" if is_demo else str(user_id),
+                "is_premium": is_demo or bool(rng.random() < 0.2),
+                "birth_year": 1990 if is_demo else int(birth_years[index]),
+                "timezone": tz_name,
+                "units": "metric",
+            })
+            connection_rows.extend({
+                "user_id": user_id,
+                "provider": provider,
+                "access_token": f"mock-{user_id}-{provider}",
+                "is_active": True,
+                "is_syncing": False,
+                "last_sync_at": datetime.utcnow() - timedelta(hours=2),
+                "last_sync_status": "success",
+                "data_types": ["steps", "sleep", "heart_rate"],
+            } for provider in connected)
+            user_sources.append(json.dumps(connected))
+            user_offsets.append(_utc_offset_hours(tz_name, start + timedelta(days=days // 2)))
+
+        if user_rows:
+            # Ids are explicit so emails can embed them; move the serial past them
+            conn.execute(insert(User), user_rows)
+            conn.execute(insert(FitnessConnection), connection_rows)
+            if dialect == "postgresql":
+                conn.execute(text("SELECT setval(pg_get_serial_sequence('users', 'id'), :last_id)"),
+                             {"last_id": first_id + users - 1})
+    log(f"Created {users} users with {len(connection_rows)} connections")
+
+    tasks = [{
+        "user_ids": list(range(first_id + lo, first_id + min(lo + chunk_users, users))),
+        "offsets": user_offsets[lo:lo + chunk_users],
+        "sources": user_sources[lo:lo + chunk_users],
+        "start": start,
+        "days": days,
+        "seed": seed * 1_000_003 + lo,
+        "write": dialect == "postgresql",
+        "database_url": engine.url.render_as_string(hide_password=False),
+    } for lo in range(0, users, chunk_users)]
+
+    started = time.perf_counter()
+    rows = 0
+    pool = multiprocessing.get_context("spawn").Pool(workers) if workers > 1 and len(tasks) > 1 else None
+    try:
+        results = pool.imap_unordered(_chunk_worker, tasks) if pool else map(_chunk_worker, tasks)
+        if dialect == "postgresql":
+            for count in results:
+                rows += count
+        else:
+            dbapi_conn = engine.raw_connection()
+            try:
+                if dialect == "sqlite":
+                    cursor = dbapi_conn.cursor()
+                    cursor.execute("PRAGMA synchronous=OFF")
+                    cursor.close()
+                for chunk in results:
+                    write_rows(dbapi_conn, dialect, chunk)
+                    if (rows + len(chunk)) // 1_000_000 > rows // 1_000_000:
+                        log(f"  {rows + len(chunk):,} rows...")
+                    rows += len(chunk)
+                dbapi_conn.commit()
+            finally:
+                dbapi_conn.close()
+    finally:
+        if pool:
+            pool.close()
+            pool.join()
+
+    elapsed = time.perf_counter() - started
+    log(f"Created {rows:,} daily metric records in {elapsed:.1f}s ({rows / max(elapsed, 1e-9):,.0f} rows/s)")
+    return {
+        "users": users,
+        "first_user_id": first_id,
+        "last_user_id": first_id + users - 1,
+        "daily_metrics": rows,
+        "start": start.isoformat(),
+        "end": end.isoformat(),
+        "demo_user_id": first_id if demo else None,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", help="defaults to settings.DATABASE_URL")
+    parser.add_argument("--users", type=int, default=1)
+    parser.add_argument("--days", type=int, default=180)
+    parser.add_argument("--workers", type=int, default=max(1, (os.cpu_count() or 2) - 1))
+    parser.add_argument("--chunk-users", type=int, default=500)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--no-demo", action="store_true", help="don't create demo@fitlife.app")
+    args = parser.parse_args(argv)
+
+    if args.database_url:
+        os.environ["DATABASE_URL"] = args.database_url
+
+    from app.core.database import SessionLocal, engine, Base
+    from app.services.streaks import StreakIndex, DEFAULT_STREAK_THRESHOLDS
+
+    # Create tables if they don't exist
+    Base.metadata.create_all(bind=engine)
+
+    db = SessionLocal()
+    try:
+        stats = generate(
+            engine, users=args.users, days=args.days, workers=args.workers,
+            seed=args.seed, chunk_users=args.chunk_users, demo=not args.no_demo
+        )
+        if stats["demo_user_id"]:
+            # Bulk rows bypass the sync path, so derive the demo account's streaks here
+            index = StreakIndex(db)
+            for metric_type, threshold in DEFAULT_STREAK_THRESHOLDS.items():
+                index.rebuild(stats["demo_user_id"], metric_type, threshold)
             db.commit()
-            db.refresh(test_user)
-            print(f"Created test user: {test_user.email}")
-        
-        # Create fitness connections
-        providers = ["fitbit", "garmin", "apple_health"]
-        for provider in providers:
-            existing = db.query(FitnessConnection).filter(
-                FitnessConnection.user_id == test_user.id,
-                FitnessConnection.provider == provider
-            ).first()
-            
-            if not existing:
-                conn = FitnessConnection(
-                    user_id=test_user.id,
-                    provider=provider,
-                    is_active=True,
-                    is_syncing=False,
-                    last_sync_at=datetime.utcnow() - timedelta(hours=2),
-                    last_sync_status="success",
-                    sources=[provider]
-                )
-                db.add(conn)
-        
-        db.commit()
-        print("Created fitness connections")
-        
-        # Generate 6 months of daily metrics
-        end_date = datetime.utcnow()
-        start_date = end_date - timedelta(days=180)
-        
-        current_date = start_date
-        records_created = 0
-        
-        while current_date <= end_date:
-            # Check if record exists
-            existing = db.query(DailyMetric).filter(
-                DailyMetric.user_id == test_user.id,
-                DailyMetric.date == current_date
-            ).first()
-            
-            if not existing:
-                # Generate realistic data with patterns
-                # Weekends typically have more steps
-                is_weekend = current_date.weekday() >= 5
-                base_steps = 8000 if is_weekend else 6000
-                steps = int(base_steps + random.gauss(0, 2000))
-                steps = max(2000, min(25000, steps))  # Clamp to realistic range
-                
-                # Sleep varies between 5-9 hours
-                sleep_minutes = int(420 + random.gauss(0, 60))
-                sleep_minutes = max(300, min(540, sleep_minutes))
-                
-                # Resting HR typically 55-75
-                resting_hr = int(65 + random.gauss(0, 5))
-                resting_hr = max(50, min(80, resting_hr))
-                
-                # Calories based on steps
-                active_calories = int(steps * 0.04 + random.gauss(0, 50))
-                
-                # Stress score 20-80
-                stress_score = int(50 + random.gauss(0, 15))
-                stress_score = max(20, min(80, stress_score))
-                
-                metric = DailyMetric(
-                    user_id=test_user.id,
-                    date=current_date,
-                    steps=steps,
-                    active_calories=active_calories,
-                    resting_hr=resting_hr,
-                    sleep_duration_minutes=sleep_minutes,
-                    stress_score=stress_score,
-                    sources=[random.choice(["fitbit", "garmin", "apple_health"])],
-                    is_complete=True
-                )
-                db.add(metric)
-                records_created += 1
-            
-            current_date += timedelta(days=1)
-        
-        db.commit()
-        print(f"Created {records_created} daily metric records")
-        print("\nMock data generation complete!")
-        print(f"Login with: demo@fitlife.app / demo123")
-        
+            print(f"\nLogin with: {DEMO_EMAIL} / {DEMO_PASSWORD}")
+        print("Mock data generation complete!")
     except Exception as e:
         print(f"Error: {e}")
         db.rollback()
+        raise
     finally:
         db.close()
 
+
 if __name__ == "__main__":
-    # Create tables if they don't exist
-    Base.metadata.create_all(bind=engine)
-    create_mock_data()
+    main()
@@ -0,0 +1,43 @@
+#!/usr/bin/env python3
+"""
+Re-bucket daily metrics into each user's local calendar days.
+Use after bulk timezone changes, or to backfill local_date on existing rows.
+"""
+
+import sys
+import os
+import argparse
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app.core.database import SessionLocal
+from app.models.user import User
+from app.services.day_buckets import rebucket_user_days
+
+
+def rebucket(user_ids=None):
+    db = SessionLocal()
+    
+    try:
+        query = db.query(User)
+        if user_ids:
+            query = query.filter(User.id.in_(user_ids))
+        
+        total = 0
+        for user in query.order_by(User.id).all():
+            stats = rebucket_user_days(db, user)
+            total += stats["rebucketed"]
+            if stats["collisions"]:
+                print(f"User {user.id}: folded {stats['folded']} records into {stats['collisions']} days")
+        
+        print(f"Re-bucketed {total} daily metric records")
+    except Exception as e:
+        print(f"Error: {e}")
+        db.rollback()
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--user-id", type=int, action="append", help="Limit to these users")
+    args = parser.parse_args()
+    rebucket(args.user_id)
@@ -0,0 +1,31 @@
+#!/usr/bin/env python3
+"""
+Reconcile local subscription state with Stripe.
+Run periodically (e.g. hourly from cron) to fix drift from missed webhooks.
+"""
+
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app.core.database import SessionLocal
+from app.services.subscription import SubscriptionService
+
+
+def reconcile():
+    db = SessionLocal()
+    
+    try:
+        stats = SubscriptionService.reconcile_subscriptions(db)
+        print(
+            f"Reconciled {stats['seen']} subscriptions: "
+            f"{stats['updated']} updated, {stats['unmatched']} without a local user"
+        )
+    except Exception as e:
+        print(f"Error: {e}")
+        db.rollback()
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    reconcile()
@@ -1,13 +1,13 @@
 'use client';
 
-import { useEffect } from 'react';
+import { useEffect, useRef } from 'react';
 import { useQuery } from 'react-query';
 import { motion } from 'framer-motion';
 import ActivityHeatmap from './ActivityHeatmap';
 import MetricCard from './MetricCard';
 import ConnectionStatus from './ConnectionStatus';
 import SubscriptionBanner from './SubscriptionBanner';
-import { dashboardApi } from '@/lib/api';
+import { dashboardApi, streamSyncEvents } from '@/lib/api';
 import { useDashboardStore, useUIStore } from '@/lib/store';
 import { 
   Footprints, 
@@ -36,9 +36,24 @@ export default function Dashboard() {
     }
   );
 
+  // Refetch when a sync (manual, webhook or another device) actually changed data
+  const streamLive = useRef(false);
+  useEffect(() => {
+    const controller = new AbortController();
+    streamLive.current = true;
+    streamSyncEvents((message) => {
+      if (message.event === 'data_changed') refetch();
+    }, controller.signal)
+      .catch(() => {})
+      .finally(() => {
+        streamLive.current = false;
+      });
+    return () => controller.abort();
+  }, [refetch]);
+
   const handleSync = async () => {
     await dashboardApi.syncData(30);
-    refetch();
+    if (!streamLive.current) refetch();
   };
 
   if (isLoading) {
@@ -121,7 +136,7 @@ export default function Dashboard() {
               unit="steps"
               icon={<Footprints className="w-5 h-5" />}
               color="blue"
-              trend={data.weekly_average.steps > 8000 ? 'up' : 'neutral'}
+              trend={(data.weekly_average.steps ?? 0) > 8000 ? 'up' : 'neutral'}
             />
             <MetricCard
               title="Active Calories"
@@ -221,25 +236,25 @@ export default function Dashboard() {
                 <div className="flex items-center justify-between">
                   <span className="text-gray-600">Steps</span>
                   <span className="font-semibold text-gray-900">
-                    {data.weekly_average.steps.toLocaleString()}
+                    {data.weekly_average.steps?.toLocaleString() ?? '–'}
                   </span>
                 </div>
                 <div className="flex items-center justify-between">
                   <span className="text-gray-600">Active Minutes</span>
                   <span className="font-semibold text-gray-900">
-                    {data.weekly_average.active_minutes}m
+                    {data.weekly_average.active_minutes ?? '–'}m
                   </span>
                 </div>
                 <div className="flex items-center justify-between">
                   <span className="text-gray-600">Sleep</span>
                   <span className="font-semibold text-gray-900">
-                    {data.weekly_average.sleep_hours}h
+                    {data.weekly_average.sleep_hours ?? '–'}h
                   </span>
                 </div>
                 <div className="flex items-center justify-between">
                   <span className="text-gray-600">Resting HR</span>
                   <span className="font-semibold text-gray-900">
-                    {data.weekly_average.resting_hr} bpm
+                    {data.weekly_average.resting_hr ?? '–'} bpm
                   </span>
                 </div>
               </div>
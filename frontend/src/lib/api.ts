@@ -1,5 +1,5 @@
 import axios from 'axios';
-import { DashboardSummary, HeatmapData, TrendData } from '@/types';
+import { DashboardSummary, HeatmapData, RollingData, TrendData } from '@/types';
 
 const API_URL = process.env.NEXT_PUBLIC_API_URL || 'http://localhost:8000';
 
@@ -76,8 +76,65 @@ export const dashboardApi = {
   
   getTrends: (metric: string, period: string = '30d') =>
     api.get<TrendData>('/dashboard/trends', { params: { metric, period } }),
+  
+  getRollingStats: (metric: string, period: string = '30d') =>
+    api.get<RollingData>('/dashboard/rolling', { params: { metric, period } }),
+};
+
+// Teams API (coaches and wellness admins)
+export const teamsApi = {
+  list: () => api.get('/teams'),
+  
+  listInvitations: () => api.get('/teams/invitations'),
+  
+  invite: (teamId: number, email: string, role: string = 'member') =>
+    api.post(`/teams/${teamId}/members`, { email, role }),
+  
+  acceptInvitation: (teamId: number) => api.post(`/teams/${teamId}/accept`),
+  
+  declineInvitation: (teamId: number) => api.post(`/teams/${teamId}/decline`),
+  
+  getDashboard: (teamId: number, page: number = 1, pageSize: number = 50) =>
+    api.get(`/teams/${teamId}/dashboard`, { params: { page, page_size: pageSize } }),
 };
 
+// Live sync events (server-sent events). Uses fetch rather than EventSource,
+// which can't send the bearer token. Resolves when the stream closes.
+export interface SyncEvent {
+  event: string;
+  data: any;
+}
+
+export async function streamSyncEvents(onEvent: (event: SyncEvent) => void, signal: AbortSignal) {
+  const token = localStorage.getItem('access_token');
+  const response = await fetch(`${API_URL}/api/dashboard/sync/stream`, {
+    headers: token ? { Authorization: `Bearer ${token}` } : {},
+    signal,
+  });
+  if (!response.ok || !response.body) {
+    throw new Error(`sync stream failed: ${response.status}`);
+  }
+
+  const reader = response.body.pipeThrough(new TextDecoderStream()).getReader();
+  let buffer = '';
+  for (;;) {
+    const { value, done } = await reader.read();
+    if (done) return;
+    buffer += value;
+    const frames = buffer.split('\n\n');
+    buffer = frames.pop() ?? '';
+    for (const frame of frames) {
+      let event = 'message';
+      let data = '';
+      for (const line of frame.split('\n')) {
+        if (line.startsWith('event: ')) event = line.slice(7);
+        else if (line.startsWith('data: ')) data += line.slice(6);
+      }
+      if (data) onEvent({ event, data: JSON.parse(data) });
+    }
+  }
+}
+
 // Subscription API
 export const subscriptionApi = {
   createCustomer: () => api.post('/subscriptions/create-customer'),
@@ -46,6 +46,22 @@ export interface HeatmapData {
   average: number;
   best_day?: HeatmapPoint;
   streak_days: number;
+  longest_streak?: number;
+}
+
+// Compact wire format (`?format=columnar`): parallel arrays instead of point objects
+export interface ColumnarHeatmapData {
+  metric_type: string;
+  start_date: string;
+  end_date: string;
+  dates: string[];
+  values: number[];
+  raw: number[];
+  sources: string[][];
+  average: number;
+  best_day_index: number | null;
+  streak_days: number;
+  longest_streak: number;
 }
 
 export interface DashboardSummary {
@@ -53,15 +69,21 @@ export interface DashboardSummary {
   connections: FitnessConnection[];
   today_metrics?: DailyMetric;
   weekly_average: {
-    steps: number;
-    active_minutes: number;
-    sleep_hours: number;
-    resting_hr: number;
+    steps: number | null;
+    active_minutes: number | null;
+    sleep_hours: number | null;
+    resting_hr: number | null;
   };
   heatmaps: HeatmapData[];
   active_goals: Array<{
+    id: number;
     type: string;
     target: number;
+    current: number;
+    period: 'daily' | 'weekly' | 'monthly';
+    period_start: string;
+    progress_percent: number;
+    completed: boolean;
   }>;
   is_premium: boolean;
   days_remaining_trial?: number;
@@ -74,6 +96,28 @@ export interface TrendData {
   average: number;
   trend: 'improving' | 'declining' | 'stable' | 'insufficient_data';
   change_percent: number;
+  slope_per_day: number | null;
+  r_squared: number | null;
+  confidence: number | null;
+  outliers: { date: string; value: number; z_score: number }[];
   best_day: number;
   worst_day: number;
 }
+
+export interface RollingStats {
+  date: string;
+  avg_7d: number | null;
+  avg_28d: number | null;
+  sd_28d: number | null;
+  acwr: number | null;
+  ewma_acute: number | null;
+  ewma_chronic: number | null;
+  acwr_ewma: number | null;
+}
+
+export interface RollingData {
+  metric: string;
+  period: string;
+  current: (RollingStats & { baseline_status: 'below' | 'within' | 'above' | null }) | null;
+  series: (RollingStats & { value: number | null })[];
+}
@@ -0,0 +1,79 @@
+import os
+import sys
+import tempfile
+from contextlib import contextmanager
+from pathlib import Path
+
+import pytest
+
+BACKEND_DIR = Path(__file__).resolve().parents[1] / "backend"
+sys.path.insert(0, str(BACKEND_DIR))
+
+_db_dir = tempfile.mkdtemp(prefix="fitlife-tests-")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{_db_dir}/fitlife-test.db")
+
+from app.core.database import Base, SessionLocal, engine, query_diagnostics  # noqa: E402
+from app.core.auth import create_access_token  # noqa: E402
+from app.models.user import User  # noqa: E402
+
+
+@pytest.fixture
+def db():
+    Base.metadata.create_all(bind=engine)
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+        Base.metadata.drop_all(bind=engine)
+
+
+@pytest.fixture
+def user(db):
+    user = User(
+        email="runner@fitlife.app",
+        hashed_password="not-a-real-hash",
+        first_name="Test",
+        last_name="Runner",
+        timezone="UTC",
+    )
+    db.add(user)
+    db.commit()
+    db.refresh(user)
+    return user
+
+
+@pytest.fixture
+def auth_headers(user):
+    token = create_access_token(data={"sub": str(user.id)})
+    return {"Authorization": f"Bearer {token}"}
+
+
+@pytest.fixture
+def client(db):
+    from fastapi.testclient import TestClient
+    from main import app
+
+    with TestClient(app) as test_client:
+        yield test_client
+
+
+@pytest.fixture
+def query_budget():
+    """
+    Fail the test when a block issues more statements than budgeted, or
+    repeats a SELECT often enough to look like an N+1:
+
+        with query_budget(6):
+            client.get("/api/dashboard/summary", headers=auth_headers)
+    """
+    @contextmanager
+    def budget(max_queries: int, allow_n_plus_one: bool = False):
+        with query_diagnostics.capture("query_budget", process_wide=True) as report:
+            yield report
+        if report.count > max_queries:
+            pytest.fail(f"query budget {max_queries} exceeded\n{report.format()}")
+        if not allow_n_plus_one and report.n_plus_one():
+            pytest.fail(f"N+1 query pattern\n{report.format()}")
+
+    return budget
@@ -0,0 +1,105 @@
+import random
+from datetime import date, datetime, timedelta
+
+from app.core.database import engine
+from app.models.user import User, DailyMetric, CohortDistribution, UserPercentile
+from app.services.cohorts import compute_cohorts, top_percent
+from app.services.quantile_sketch import KLLSketch
+
+AS_OF = date(2024, 3, 31)
+
+
+def _exact_rank(ordered, value):
+    return sum(1 for v in ordered if v <= value) / len(ordered)
+
+
+def test_merged_sketches_match_exact_ranks():
+    rng = random.Random(3)
+    values = [rng.lognormvariate(9, 0.4) for _ in range(50_000)]
+    shards = [KLLSketch(seed=i) for i in range(4)]
+    for index, value in enumerate(values):
+        shards[index % 4].update(value)
+
+    merged = KLLSketch.from_dict(shards[0].to_dict())
+    for shard in shards[1:]:
+        merged.merge(KLLSketch.from_dict(shard.to_dict()))
+
+    assert merged.n == len(values)
+    ordered = sorted(values)
+    for fraction in (0.01, 0.1, 0.25, 0.5, 0.75, 0.9, 0.99):
+        probe = ordered[int(fraction * len(ordered))]
+        assert abs(merged.rank(probe) - _exact_rank(ordered, probe)) < 0.02
+    # Space stays bounded no matter how many values went in
+    assert sum(len(items) for items in merged.compactors) < 1000
+
+
+def _seed_population(db):
+    """Ten users in their 30s, ten in their 60s; steps grow with the index."""
+    users = []
+    for index in range(20):
+        user = User(
+            email=f"cohort{index}@fitlife.app", hashed_password="x",
+            birth_year=1990 if index < 10 else 1960, timezone="UTC"
+        )
+        db.add(user)
+        users.append(user)
+    db.flush()
+    for index, user in enumerate(users):
+        for offset in range(30):
+            day = AS_OF - timedelta(days=offset)
+            db.add(DailyMetric(
+                user_id=user.id, date=datetime.combine(day, datetime.min.time()), local_date=day,
+                steps=5000 + 500 * (index % 10) + (3000 if index >= 10 else 0),
+                resting_hr=70 - (index % 10)
+            ))
+    db.commit()
+    return users
+
+
+def test_percentiles_rank_users_within_their_age_cohort(db):
+    users = _seed_population(db)
+
+    stats = compute_cohorts(engine, as_of=AS_OF, chunk_users=7)
+
+    assert stats["users_ranked"] == 20
+    assert stats["chunks"] == 3
+    cohorts = {row.cohort: row.population for row in db.query(CohortDistribution).filter_by(
+        metric_type="steps", period="30d"
+    )}
+    assert cohorts == {"all": 20, "30-39": 10, "60+": 10}
+
+    def percentile(user, metric="steps"):
+        return db.query(UserPercentile).filter_by(user_id=user.id, metric_type=metric, period="30d").one()
+
+    # The top stepper of each age band leads their own cohort
+    assert percentile(users[9]).percentile == 100
+    assert percentile(users[19]).percentile == 100
+    assert percentile(users[9]).population_percentile < 100
+    assert percentile(users[0]).cohort == "30-39"
+    # Lower resting heart rate is the better one
+    assert top_percent("heart_rate", percentile(users[9], "heart_rate").percentile) <= 10
+    assert top_percent("steps", percentile(users[0]).percentile) >= 90
+
+    # A rerun replaces rather than duplicates
+    compute_cohorts(engine, as_of=AS_OF)
+    assert db.query(UserPercentile).count() == stats["percentiles"]
+
+
+def test_percentile_endpoint_reads_precomputed_rows(client, db, user, auth_headers, query_budget):
+    db.add(UserPercentile(
+        user_id=user.id, metric_type="steps", period="30d", cohort="30-39",
+        value=9000, percentile=82.0, population_percentile=75.0, population=1200, as_of=AS_OF
+    ))
+    db.commit()
+
+    with query_budget(2):  # the user, then one keyed percentile lookup
+        response = client.get("/api/dashboard/percentiles", headers=auth_headers)
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body["as_of"] == "2024-03-31"
+    assert body["metrics"]["steps"]["top_percent"] == 18
+    assert body["metrics"]["steps"]["cohort_size"] == 1200
+    assert client.get(
+        "/api/dashboard/percentiles", params={"metric": "bogus"}, headers=auth_headers
+    ).status_code == 400
@@ -0,0 +1,48 @@
+import asyncio
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+import main
+from app.core.config import Settings, settings
+
+BACKEND_DIR = Path(__file__).resolve().parents[1] / "backend"
+
+
+def _run_lifespan():
+    async def boot():
+        async with main.app.router.lifespan_context(main.app):
+            pass
+
+    asyncio.run(boot())
+
+
+def test_importing_the_app_defers_heavy_sdks():
+    output = subprocess.check_output(
+        [sys.executable, "-c", "import sys, main; print(sorted({'stripe', 'httpx', 'passlib'} & set(sys.modules)))"],
+        cwd=BACKEND_DIR, text=True
+    )
+    assert output.strip().splitlines()[-1] == "[]"
+
+
+def test_lifespan_create_all_is_optional(monkeypatch):
+    calls = []
+    monkeypatch.setattr(main.Base.metadata, "create_all", lambda **kwargs: calls.append(kwargs))
+
+    monkeypatch.setattr(settings, "AUTO_CREATE_SCHEMA", False)
+    _run_lifespan()
+    assert calls == []
+
+    monkeypatch.setattr(settings, "AUTO_CREATE_SCHEMA", True)
+    _run_lifespan()
+    assert len(calls) == 1
+    assert main.STARTUP_TIMING["import"] > 0
+
+
+@pytest.mark.parametrize("debug", [True, False])
+def test_schema_creation_defaults_to_debug(debug):
+    resolved = Settings(DEBUG=debug, _env_file=None)
+    assert resolved.AUTO_CREATE_SCHEMA is debug
+    assert Settings(DEBUG=debug, AUTO_CREATE_SCHEMA=True, _env_file=None).AUTO_CREATE_SCHEMA is True
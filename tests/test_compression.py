@@ -0,0 +1,119 @@
+import asyncio
+import gzip
+import json
+
+import brotli
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse, StreamingResponse
+from starlette.routing import Route
+
+from app.core.cache import ResponseCache
+from app.core.compression import (
+    BrotliEncoder, CompressionMiddleware, GzipEncoder, ZstdEncoder, parse_accept_encoding
+)
+
+PAYLOAD = {"data": [{"date": f"2024-01-{d:02d}", "value": d * 3.5} for d in range(1, 29)] * 4}
+
+
+async def big(request):
+    return JSONResponse(PAYLOAD)
+
+
+async def small(request):
+    return JSONResponse({"ok": True})
+
+
+async def stream(request):
+    async def events():
+        for i in range(3):
+            yield f"data: {i}\n\n"
+    return StreamingResponse(events(), media_type="text/event-stream")
+
+
+def _app(cache):
+    inner = Starlette(routes=[
+        Route("/api/dashboard/big", big),
+        Route("/api/other/big", big),
+        Route("/small", small),
+        Route("/stream", stream),
+    ])
+    return CompressionMiddleware(
+        inner,
+        minimum_size=500,
+        encoders=[ZstdEncoder(), BrotliEncoder(), GzipEncoder()],
+        cache=cache,
+        cache_paths=["/api/dashboard/"],
+    )
+
+
+def _request(app, path, accept_encoding):
+    messages = []
+    scope = {
+        "type": "http", "method": "GET", "path": path, "raw_path": path.encode(),
+        "query_string": b"", "root_path": "", "scheme": "http", "server": ("test", 80),
+        "headers": [(b"accept-encoding", accept_encoding.encode())],
+    }
+
+    requested = []
+
+    async def receive():
+        if requested:
+            # Nothing more to read; park until the response is done
+            await asyncio.Event().wait()
+        requested.append(True)
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        messages.append(message)
+
+    asyncio.run(app(scope, receive, send))
+    headers = {k.decode(): v.decode() for k, v in messages[0]["headers"]}
+    return headers, [m.get("body", b"") for m in messages[1:]]
+
+
+def test_negotiation_honours_q_values():
+    middleware = _app(None)
+    assert parse_accept_encoding("gzip;q=0.5, br") == {"gzip": 0.5, "br": 1.0}
+    assert middleware.negotiate("gzip, deflate").name == "gzip"
+    assert middleware.negotiate("gzip, br").name == "br"
+    assert middleware.negotiate("br;q=0.1, gzip;q=0.9").name == "gzip"
+    assert middleware.negotiate("*").name == "zstd"
+    assert middleware.negotiate("identity") is None
+
+
+def test_large_bodies_are_compressed_and_small_ones_are_not():
+    app = _app(None)
+
+    headers, chunks = _request(app, "/api/dashboard/big", "br")
+    assert headers["content-encoding"] == "br"
+    assert headers["vary"] == "Accept-Encoding"
+    assert int(headers["content-length"]) == len(chunks[0])
+    assert json.loads(brotli.decompress(chunks[0])) == PAYLOAD
+
+    headers, chunks = _request(app, "/small", "br")
+    assert "content-encoding" not in headers
+    assert headers["vary"] == "Accept-Encoding"
+    assert json.loads(chunks[0]) == {"ok": True}
+
+
+def test_streaming_responses_are_compressed_incrementally():
+    headers, chunks = _request(_app(None), "/stream", "gzip")
+
+    assert headers["content-encoding"] == "gzip"
+    assert "content-length" not in headers
+    # Each event is flushed in its own compressed chunk
+    assert len([c for c in chunks if c]) >= 3
+    assert gzip.decompress(b"".join(chunks)) == b"data: 0\n\ndata: 1\n\ndata: 2\n\n"
+
+
+def test_compressed_dashboard_bodies_are_cached():
+    cache = ResponseCache()
+    app = _app(cache)
+
+    _, first = _request(app, "/api/dashboard/big", "gzip")
+    _, second = _request(app, "/api/dashboard/big", "gzip")
+    assert first == second
+    assert (cache.hits, cache.misses) == (1, 1)
+
+    _request(app, "/api/other/big", "gzip")
+    assert len(cache) == 1
@@ -0,0 +1,134 @@
+import asyncio
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+from sqlalchemy import event
+
+from app.core.database import engine
+from app.core.timezone import local_today
+from app.models.user import FitnessConnection, Goal
+from app.services.fitness_aggregator import FitnessDataAggregator
+from app.services.metric_fields import METRIC_FIELDS
+
+# auth user, connections, rollup, heatmap rows, streaks, goals
+SUMMARY_QUERY_BUDGET = 6
+
+
+@contextmanager
+def count_queries():
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+
+
+def _seed(db, user, days=20):
+    today = local_today(user.timezone)
+    records = [
+        {
+            "date": (today - timedelta(days=offset)).isoformat(),
+            "steps": 1000 * offset,
+            "active_calories": 10 * offset,
+            "restingHeartRate": 60 + offset % 3,
+            "minutesAsleep": 420,
+        }
+        for offset in range(days)
+    ]
+    asyncio.run(FitnessDataAggregator(db)._merge_provider_data(user.id, "fitbit", records))
+    return today
+
+
+def test_rollup_returns_today_and_trailing_week(db, user):
+    today = _seed(db, user)
+    rollup = FitnessDataAggregator(db).get_dashboard_rollup(user.id, today)
+
+    assert rollup["today_metrics"]["steps"] == 0
+    assert rollup["today_metrics"]["sleep_duration_minutes"] == 420
+    # Days 1..7 before today: mean of 1000..7000
+    assert rollup["weekly_average"]["steps"] == 4000
+    assert rollup["weekly_average"]["sleep_hours"] == 7.0
+    assert rollup["weekly_average"]["active_minutes"] is None
+
+
+def test_summary_issues_a_fixed_number_of_queries(client, db, user, auth_headers, query_budget):
+    _seed(db, user)
+    for provider in ("fitbit", "garmin", "oura"):
+        db.add(FitnessConnection(user_id=user.id, provider=provider, data_types=["steps"]))
+    for metric in ("steps", "sleep"):
+        db.add(Goal(user_id=user.id, metric_type=metric, target_value=1,
+                    period="daily", start_date=datetime(2024, 1, 1)))
+    db.commit()
+
+    with query_budget(SUMMARY_QUERY_BUDGET):
+        response = client.get("/api/dashboard/summary", headers=auth_headers)
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body["today_metrics"]["steps"] == 0
+    assert len(body["heatmaps"]) == 4
+    assert len(body["connections"]) == 3
+
+
+def test_heatmap_queries_do_not_grow_with_metric_count(db, user):
+    today = _seed(db, user)
+    user_id = user.id  # load outside the counted blocks
+    aggregator = FitnessDataAggregator(db)
+
+    with count_queries() as single:
+        one = aggregator.generate_heatmaps(user_id, ["steps"], today=today)
+    with count_queries() as every:
+        many = aggregator.generate_heatmaps(user_id, list(METRIC_FIELDS), today=today)
+
+    assert len(one) == 1
+    assert len(many) == len(METRIC_FIELDS)
+    assert len(every) == len(single), every
+
+
+def test_summary_without_data(client, auth_headers):
+    response = client.get("/api/dashboard/summary", headers=auth_headers)
+
+    assert response.status_code == 200
+    assert response.json()["today_metrics"] is None
+    assert response.json()["weekly_average"]["steps"] is None
+
+
+def test_heatmap_columnar_format_matches_rows(client, db, user, auth_headers):
+    _seed(db, user, days=10)
+
+    rows = client.get("/api/dashboard/heatmap/steps", headers=auth_headers).json()
+    columns = client.get(
+        "/api/dashboard/heatmap/steps", params={"format": "columnar"}, headers=auth_headers
+    ).json()
+
+    assert columns["dates"] == [point["date"] for point in rows["data"]]
+    assert columns["values"] == [point["value"] for point in rows["data"]]
+    assert columns["raw"] == [point["raw_value"] for point in rows["data"]]
+    assert columns["sources"] == [point["sources"] for point in rows["data"]]
+    assert rows["data"][columns["best_day_index"]] == rows["best_day"]
+    assert columns["average"] == rows["average"]
+
+    summary = client.get(
+        "/api/dashboard/summary", params={"format": "columnar"}, headers=auth_headers
+    ).json()
+    assert summary["heatmaps"][0]["dates"] == columns["dates"]
+
+
+def test_trends_use_shared_metric_mapping(client, db, user, auth_headers):
+    _seed(db, user, days=10)
+
+    response = client.get("/api/dashboard/trends", params={"metric": "bogus"}, headers=auth_headers)
+    assert response.status_code == 400
+
+    response = client.get("/api/dashboard/trends", params={"metric": "weight"}, headers=auth_headers)
+    assert response.status_code == 200
+    assert response.json()["trend"] == "insufficient_data"
+
+    # Steps were seeded as 1000 * days_ago, so they fall over the window
+    steps = client.get("/api/dashboard/trends", params={"metric": "steps"}, headers=auth_headers)
+    assert steps.json()["trend"] == "declining"
@@ -0,0 +1,112 @@
+import asyncio
+from datetime import date, datetime, timezone, timedelta
+
+from app.core.timezone import bucket_timestamp, get_zone
+from app.models.user import DailyMetric, MetricStreak
+from app.services.day_buckets import rebucket_user_days
+from app.services.fitness_aggregator import FitnessDataAggregator
+
+
+def _merge(db, user, records, provider="fitbit"):
+    aggregator = FitnessDataAggregator(db)
+    return asyncio.run(aggregator._merge_provider_data(user.id, provider, records))
+
+
+def test_bucket_timestamp_rules():
+    new_york = get_zone("America/New_York")
+
+    # Naive datetimes are UTC instants: 02:00 UTC is still the previous evening in New York
+    instant, day = bucket_timestamp(datetime(2024, 3, 2, 2, 0), new_york)
+    assert instant == datetime(2024, 3, 2, 2, 0)
+    assert day == date(2024, 3, 1)
+
+    aware = datetime(2024, 3, 2, 2, 0, tzinfo=timezone(timedelta(hours=9)))
+    assert bucket_timestamp(aware, new_york) == (datetime(2024, 3, 1, 17, 0), date(2024, 3, 1))
+    assert bucket_timestamp("2024-03-01T17:00:00Z", new_york)[1] == date(2024, 3, 1)
+
+    # Bare dates are already local days, anchored at local noon
+    assert bucket_timestamp("2024-03-01", new_york) == (datetime(2024, 3, 1, 17, 0), date(2024, 3, 1))
+
+
+def test_merge_buckets_once_and_dedupes_within_a_batch(db, user):
+    user.timezone = "America/Los_Angeles"
+    db.commit()
+
+    stats = _merge(db, user, [
+        {"date": "2024-03-01T20:00:00Z", "steps": 3000},
+        {"date": "2024-03-02T03:00:00Z", "steps": 4000},  # same LA day
+        {"date": "2024-03-02", "steps": 9000},
+    ])
+    assert stats == {"created": 2, "updated": 1}
+
+    rows = db.query(DailyMetric).order_by(DailyMetric.local_date).all()
+    assert [(r.local_date, r.steps) for r in rows] == [
+        (date(2024, 3, 1), 4000),
+        (date(2024, 3, 2), 9000),
+    ]
+
+    metrics = FitnessDataAggregator(db).get_unified_metrics(user.id, date(2024, 3, 2), date(2024, 3, 2))
+    assert [m.steps for m in metrics] == [9000]
+
+
+def test_timezone_change_rebuckets_and_rebuilds_streaks(client, db, user, auth_headers):
+    _merge(db, user, [
+        {"date": datetime(2024, 3, 1, 23, 30), "steps": 12000},
+        {"date": datetime(2024, 3, 2, 23, 30), "steps": 12000},
+        {"date": datetime(2024, 3, 4, 1, 0), "steps": 12000},
+    ])
+    streak = db.query(MetricStreak).filter(MetricStreak.metric_type == "steps").one()
+    assert streak.longest_streak == 2
+
+    # In Kolkata (UTC+5:30) the 23:30 UTC readings fall on the next local day
+    response = client.patch("/api/auth/me", json={"timezone": "Asia/Kolkata"}, headers=auth_headers)
+    assert response.status_code == 200
+    assert response.json()["timezone"] == "Asia/Kolkata"
+
+    db.expire_all()
+    days = [m.local_date for m in db.query(DailyMetric).order_by(DailyMetric.local_date)]
+    assert days == [date(2024, 3, 2), date(2024, 3, 3), date(2024, 3, 4)]
+    assert db.query(MetricStreak).filter(MetricStreak.metric_type == "steps").one().longest_streak == 3
+
+    # Nothing moves when re-bucketing into the same zone
+    assert rebucket_user_days(db, db.get(type(user), user.id))["rebucketed"] == 0
+
+
+def test_unknown_timezone_is_rejected(client, auth_headers):
+    response = client.patch("/api/auth/me", json={"timezone": "Mars/Olympus"}, headers=auth_headers)
+    assert response.status_code == 400
+
+
+def test_null_timezone_or_units_is_rejected(client, db, user, auth_headers):
+    for field in ("timezone", "units"):
+        response = client.patch("/api/auth/me", json={field: None}, headers=auth_headers)
+        assert response.status_code == 400
+
+    db.refresh(user)
+    assert user.timezone == "UTC"
+    assert user.units is not None
+
+    response = client.patch("/api/auth/me", json={"first_name": "Sam"}, headers=auth_headers)
+    assert response.status_code == 200
+    assert response.json()["timezone"] == "UTC"
+
+
+def test_large_offset_change_folds_colliding_days(client, db, user, auth_headers):
+    _merge(db, user, [{"date": datetime(2024, 3, 1, 23, 30), "steps": 5000}], provider="fitbit")
+    _merge(db, user, [{"date": datetime(2024, 3, 2, 8, 0), "steps": 7000, "resting_hr": 58}], provider="garmin")
+    assert db.query(DailyMetric).count() == 2
+
+    # UTC+14: both instants fall on 2 March
+    response = client.patch("/api/auth/me", json={"timezone": "Pacific/Kiritimati"}, headers=auth_headers)
+    assert response.status_code == 200
+
+    db.expire_all()
+    metric = db.query(DailyMetric).one()
+    assert metric.local_date == date(2024, 3, 2)
+    assert (metric.steps, metric.resting_hr) == (7000, 58)
+    assert sorted(metric.sources) == ["fitbit", "garmin"]
+    assert {p: raw for p, (raw, _) in metric.provenance["steps"].items()} == {"fitbit": 5000, "garmin": 7000}
+
+    # Later syncs merge into the surviving row instead of orphaning one
+    _merge(db, user, [{"date": datetime(2024, 3, 2, 8, 0), "steps": 9000}], provider="garmin")
+    assert [m.steps for m in db.query(DailyMetric)] == [9000]
@@ -0,0 +1,95 @@
+import asyncio
+from datetime import date, datetime, timedelta
+
+from app.core.timezone import local_today, period_bounds
+from app.models.user import Goal
+from app.services.fitness_aggregator import FitnessDataAggregator
+from app.services.goal_progress import GoalProgressEngine, goal_progress
+
+
+def _day(d: date) -> datetime:
+    return datetime.combine(d, datetime.min.time())
+
+
+def _merge(db, user, provider, records):
+    aggregator = FitnessDataAggregator(db)
+    return asyncio.run(aggregator._merge_provider_data(user.id, provider, records))
+
+
+def _goal(db, user, metric_type, period, target):
+    goal = Goal(
+        user_id=user.id,
+        metric_type=metric_type,
+        target_value=target,
+        period=period,
+        start_date=datetime(2020, 1, 1),
+    )
+    db.add(goal)
+    db.commit()
+    return goal
+
+
+def test_weekly_goal_accumulates_merged_deltas(db, user):
+    today = local_today(user.timezone)
+    week_start, _ = period_bounds("weekly", today)
+    goal = _goal(db, user, "steps", "weekly", 50000)
+
+    _merge(db, user, "fitbit", [{"date": _day(week_start), "steps": 4000}])
+    assert goal.current_value == 4000
+
+    _merge(db, user, "fitbit", [
+        {"date": _day(week_start + timedelta(days=1)), "steps": 6000},
+        {"date": _day(week_start - timedelta(days=1)), "steps": 9999},  # last week
+    ])
+    assert goal.current_value == 10000
+
+    # Garmin reports more steps for the first day: only the delta is applied
+    _merge(db, user, "garmin", [{"date": _day(week_start), "steps": 5500}])
+    assert goal.current_value == 11500
+
+    progress = goal_progress(goal, today)
+    assert progress["current"] == 11500
+    assert progress["progress_percent"] == 23.0
+    assert not progress["completed"]
+
+
+def test_level_goal_keeps_latest_reading(db, user):
+    today = local_today(user.timezone)
+    goal = _goal(db, user, "weight", "monthly", 70)
+    month_start, _ = period_bounds("monthly", today)
+
+    _merge(db, user, "withings", [{"date": _day(today), "weight_kg": 72.5}])
+    db.refresh(goal)
+    assert goal.progress_period_start == month_start
+
+    engine = GoalProgressEngine(db)
+    later = [(type("Row", (), {"local_date": today, "weight_kg": 71.9})(), {"weight_kg": 72.5})]
+    earlier = [(type("Row", (), {"local_date": month_start - timedelta(days=1), "weight_kg": 60})(), {})]
+    engine.apply(user, later + earlier)
+    assert goal.current_value == 71.9
+
+    # Weight is lower-is-better: 71.9 kg against a 70 kg target is not done
+    progress = goal_progress(goal, today)
+    assert progress["current"] == 71.9
+    assert not progress["completed"]
+    assert progress["progress_percent"] == 97.4
+
+    goal.current_value = 85
+    progress = goal_progress(goal, today)
+    assert not progress["completed"]
+    assert progress["progress_percent"] == 82.4
+
+    goal.current_value = 68.5
+    progress = goal_progress(goal, today)
+    assert progress["completed"]
+    assert progress["progress_percent"] == 100.0
+
+
+def test_stale_period_reads_as_zero_without_queries(db, user):
+    goal = _goal(db, user, "steps", "daily", 10000)
+    goal.current_value = 8000
+    goal.progress_period_start = date(2021, 5, 1)
+
+    progress = goal_progress(goal, date(2021, 5, 2))
+    assert progress["current"] == 0
+    assert goal_progress(goal, date(2021, 5, 1))["current"] == 8000
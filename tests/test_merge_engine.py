@@ -0,0 +1,88 @@
+from datetime import date, datetime
+
+import pytest
+
+from app.models.user import DailyMetric
+from app.services.merge_engine import LEGACY_SOURCE, MergeEngine
+
+FETCHED = datetime(2024, 3, 1, 12, 0)
+FETCHED_TS = 1709294400  # FETCHED as a UTC instant
+
+
+def _metric(**values):
+    return DailyMetric(user_id=1, date=FETCHED, local_date=date(2024, 3, 1), **values)
+
+
+def test_reducers_combine_contributions_per_field():
+    engine = MergeEngine(policies={}, provider_priority=["oura", "garmin", "fitbit"])
+    metric = _metric()
+
+    engine.apply(metric, "fitbit", {"steps": 9000, "resting_hr": 60, "sleep_duration_minutes": 400}, FETCHED)
+    engine.apply(metric, "oura", {"steps": 8000, "resting_hr": 56, "sleep_duration_minutes": 430}, FETCHED)
+
+    assert metric.steps == 9000  # max
+    assert metric.sleep_duration_minutes == 430  # priority: Oura before Fitbit
+    assert metric.resting_hr == 58  # weighted mean, Oura 3 : Fitbit 2 -> 57.6
+    assert metric.sources == ["fitbit", "oura"]
+    assert metric.provenance["steps"] == {
+        "fitbit": [9000, FETCHED_TS],
+        "oura": [8000, FETCHED_TS],
+    }
+
+
+def test_only_changed_contributions_recompute():
+    engine = MergeEngine(policies={})
+    metric = _metric()
+    engine.apply(metric, "fitbit", {"steps": 9000, "active_calories": 300}, FETCHED)
+    snapshot = metric.provenance
+
+    assert engine.apply(metric, "fitbit", {"steps": 9000, "active_calories": 300}, FETCHED) == ([], False)
+    assert metric.provenance is snapshot
+
+    # A lower reading from the same provider is still its latest contribution
+    changed, dirty = engine.apply(metric, "fitbit", {"steps": 8500}, FETCHED)
+    assert (changed, dirty) == (["steps"], True)
+    assert metric.steps == 8500
+
+    # A new contribution that doesn't move the unified value still records provenance
+    changed, dirty = engine.apply(metric, "garmin", {"steps": 8000}, FETCHED)
+    assert (changed, dirty) == ([], True)
+    assert metric.provenance["steps"]["garmin"][0] == 8000
+
+
+def test_legacy_values_are_kept_as_lowest_priority_contributions():
+    engine = MergeEngine(policies={}, provider_priority=["oura", "fitbit"])
+    metric = _metric(steps=12000, sleep_duration_minutes=380, sources=["fitbit"])
+
+    engine.apply(metric, "oura", {"steps": 10000, "sleep_duration_minutes": 420}, FETCHED)
+
+    assert metric.steps == 12000
+    assert metric.sleep_duration_minutes == 420
+    assert metric.provenance["steps"][LEGACY_SOURCE] == [12000, None]
+
+
+def test_legacy_value_gives_way_to_a_source_re_reporting_it():
+    engine = MergeEngine(policies={})
+    metric = _metric(steps=9000, resting_hr=60, sources=["fitbit"])
+
+    # A corrected re-sync from the provider that wrote the legacy value
+    engine.apply(metric, "fitbit", {"steps": 8500, "resting_hr": 56}, FETCHED)
+
+    assert metric.steps == 8500
+    assert metric.resting_hr == 56  # Not averaged with its own earlier reading
+    assert LEGACY_SOURCE not in metric.provenance["steps"]
+    # Stored legacy contributions are dropped the same way
+    metric = _metric(steps=9000, sources=["fitbit", "oura"], provenance={"steps": {LEGACY_SOURCE: [9000, None]}})
+    engine.apply(metric, "oura", {"steps": 7000}, FETCHED)
+    assert (metric.steps, metric.provenance["steps"]) == (7000, {"oura": [7000, FETCHED_TS]})
+
+
+def test_policies_are_configurable():
+    engine = MergeEngine(policies={"steps": {"reducer": "priority", "priority": ["garmin", "fitbit"]}})
+    metric = _metric()
+    engine.apply(metric, "fitbit", {"steps": 9000}, FETCHED)
+    engine.apply(metric, "garmin", {"steps": 7000}, FETCHED)
+    assert metric.steps == 7000
+
+    with pytest.raises(ValueError):
+        MergeEngine(policies={"steps": {"reducer": "median"}})
@@ -0,0 +1,96 @@
+import asyncio
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+
+from app.core.config import settings
+from app.core.database import engine
+from app.core.metrics import MetricsRegistry, PROVIDER_FETCH_ERRORS, PROVIDER_FETCH_SECONDS
+from app.models.user import FitnessConnection
+from app.services.fitness_aggregator import FitnessDataAggregator
+
+
+def test_registry_renders_prometheus_text():
+    registry = MetricsRegistry()
+    requests = registry.counter("demo_requests_total", "Requests", ["route"])
+    latency = registry.histogram("demo_latency_seconds", "Latency", buckets=(0.1, 1.0))
+    requests.inc(route="/a")
+    requests.inc(2, route="/a")
+    latency.observe(0.05)
+    latency.observe(0.5)
+    latency.observe(5)
+
+    text = registry.render()
+    assert "# TYPE demo_requests_total counter" in text
+    assert 'demo_requests_total{route="/a"} 3' in text
+    assert 'demo_latency_seconds_bucket{le="0.1"} 1' in text
+    assert 'demo_latency_seconds_bucket{le="1"} 2' in text
+    assert 'demo_latency_seconds_bucket{le="+Inf"} 3' in text
+    assert "demo_latency_seconds_count 3" in text
+
+
+def test_profile_header_returns_span_breakdown(client, auth_headers, monkeypatch):
+    monkeypatch.setattr(settings, "METRICS_PROFILE_HEADER", True)
+    plain = client.get("/api/dashboard/summary", headers=auth_headers)
+    assert "server-timing" not in plain.headers
+
+    profiled = client.get("/api/dashboard/summary", headers={**auth_headers, "X-Profile": "1"})
+    timing = profiled.headers["server-timing"]
+    spans = [part.split(";")[0] for part in timing.split(", ")]
+    assert spans[:2] == ["total", "db"]
+    assert {"rollup", "heatmaps", "goals"} <= set(spans)
+    assert 'queries"' in timing
+
+
+def test_profile_header_is_ignored_unless_enabled(client, auth_headers, monkeypatch):
+    monkeypatch.setattr(settings, "METRICS_PROFILE_HEADER", False)
+    profiled = client.get("/api/dashboard/summary", headers={**auth_headers, "X-Profile": "1"})
+    assert "server-timing" not in profiled.headers
+
+
+def test_metrics_endpoint_reports_routes_and_queries(client, auth_headers, monkeypatch):
+    monkeypatch.setattr(settings, "METRICS_TOKEN", "scrape-secret")
+    client.get("/api/dashboard/heatmap/steps", headers=auth_headers)
+
+    body = client.get("/metrics", headers={"Authorization": "Bearer scrape-secret"}).text
+    assert 'fitlife_http_request_duration_seconds_count{method="GET",route="/api/dashboard/heatmap/{metric_type}",status="200"}' in body
+    assert 'fitlife_db_queries_total{route="/api/dashboard/heatmap/{metric_type}"}' in body
+    assert "fitlife_response_cache_hits_total" in body
+    # The scrape itself isn't recorded
+    assert 'route="/metrics"' not in body
+
+
+def test_metrics_endpoint_needs_token_or_allowlisted_client(client, monkeypatch):
+    # TestClient requests come from "testclient", which isn't on the allowlist
+    assert client.get("/metrics").status_code == 403
+    monkeypatch.setattr(settings, "METRICS_TOKEN", "scrape-secret")
+    assert client.get("/metrics", headers={"Authorization": "Bearer wrong"}).status_code == 403
+
+    monkeypatch.setattr(settings, "METRICS_ALLOWED_CLIENTS", ["testclient"])
+    assert client.get("/metrics").status_code == 200
+
+
+def test_failed_statements_dont_leave_timing_state_behind(db):
+    with engine.connect() as conn:
+        with pytest.raises(OperationalError):
+            conn.execute(text("SELECT * FROM no_such_table"))
+        assert conn.info.get("fitlife_query_start") == []
+
+
+def test_provider_fetch_latency_and_errors_are_recorded(db, user, monkeypatch):
+    db.add(FitnessConnection(user_id=user.id, provider="garmin"))
+    db.commit()
+
+    async def broken(self, conn, start, end):
+        raise RuntimeError("garmin is down")
+
+    monkeypatch.setattr(FitnessDataAggregator, "_fetch_garmin", broken)
+    errors = PROVIDER_FETCH_ERRORS.value(provider="garmin")
+    fetches = PROVIDER_FETCH_SECONDS.count(provider="garmin")
+
+    result = asyncio.run(FitnessDataAggregator(db).sync_user_data(user.id))
+
+    assert result["errors"][0]["provider"] == "garmin"
+    assert PROVIDER_FETCH_ERRORS.value(provider="garmin") == errors + 1
+    assert PROVIDER_FETCH_SECONDS.count(provider="garmin") == fetches + 1
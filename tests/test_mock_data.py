@@ -0,0 +1,28 @@
+from app.core.database import engine
+from app.models.user import DailyMetric, User
+from scripts.generate_mock_data import DEMO_EMAIL, generate
+
+
+def _counts(db):
+    return db.query(User).count(), db.query(DailyMetric).count()
+
+
+def test_rerunning_the_default_seed_changes_nothing(db):
+    first = generate(engine, days=10, log=lambda message: None)
+    seeded = _counts(db)
+
+    again = generate(engine, days=10, log=lambda message: None)
+
+    assert first["demo_user_id"] is not None and again["users"] == 0
+    assert _counts(db) == seeded
+    assert db.query(User).filter(User.email == DEMO_EMAIL).count() == 1
+
+
+def test_orm_inserts_after_a_bulk_seed_get_fresh_ids(db):
+    stats = generate(engine, users=3, days=5, demo=False, log=lambda message: None)
+
+    user = User(email="new@fitlife.app", hashed_password="x")
+    db.add(user)
+    db.commit()
+
+    assert user.id > stats["last_user_id"]
@@ -0,0 +1,63 @@
+import pytest
+
+from app.services.provider_schemas import (
+    DATA_COLUMNS,
+    PROVIDER_SCHEMAS,
+    ProviderNormalizer,
+    field,
+    get_normalizer,
+)
+
+
+def test_every_schema_maps_known_columns():
+    for schema in PROVIDER_SCHEMAS.values():
+        assert set(schema) <= set(DATA_COLUMNS)
+
+    with pytest.raises(ValueError):
+        ProviderNormalizer("bogus", {"not_a_column": field("x")})
+
+
+def test_units_and_types_are_converted():
+    garmin = get_normalizer("garmin").normalize({
+        "sleepDurationInSeconds": 27000,
+        "weightInGrams": 72500,
+        "moderateIntensityDurationInSeconds": 1200,
+        "vigorousIntensityDurationInSeconds": 600,
+        "summaryId": "ignored",
+    })
+    assert garmin == {"sleep_duration_minutes": 450, "weight_kg": 72.5, "active_minutes": 30}
+
+    # Fitbit time series send strings; distance is in km
+    fitbit = get_normalizer("fitbit").normalize({"steps": "8123", "distance": "5.2"})
+    assert fitbit == {"steps": 8123, "distance_meters": pytest.approx(5200.0)}
+
+    apple = get_normalizer("apple_health").normalize({"bodyFatPercentage": 0.21, "oxygenSaturation": None})
+    assert apple == {"body_fat_percentage": pytest.approx(21.0)}
+
+
+def test_provider_keys_outrank_generic_aliases():
+    normalizer = get_normalizer("fitbit")
+    # activityCalories is Fitbit's own key; calories_out is only a generic alias
+    for record in ({"calories_out": 900, "activityCalories": 350}, {"activityCalories": 350, "calories_out": 900}):
+        assert normalizer.normalize(record)["active_calories"] == 350
+
+
+def test_unknown_provider_uses_generic_schema():
+    normalized = get_normalizer("whoop").normalize({
+        "steps": 7000,
+        "restingHeartRate": 52,
+        "minutesAsleep": 410,
+        "hrv_avg": 61.5,
+        "duration": 999,
+    })
+    assert normalized == {"steps": 7000, "resting_hr": 52, "sleep_duration_minutes": 410, "hrv_avg": 61.5}
+    assert get_normalizer("whoop") is get_normalizer("whoop")
+
+
+def test_batch_matches_single_record_normalization():
+    normalizer = get_normalizer("oura")
+    records = [
+        {"steps": 9000 + i, "total_sleep_duration": 25200 + 60 * i, "efficiency": 88, "day": "2024-03-01"}
+        for i in range(5)
+    ]
+    assert normalizer.normalize_batch(records) == [normalizer.normalize(r) for r in records]
@@ -0,0 +1,68 @@
+import asyncio
+from datetime import timedelta
+
+from benchmarks.fake_providers import FakeProviderFarm
+from app.core.timezone import local_today
+from app.core.database import query_diagnostics
+from app.models.user import DailyMetric, FitnessConnection
+from app.services.fitness_aggregator import FitnessDataAggregator
+
+
+def _connect(db, user, *providers):
+    for provider in providers:
+        db.add(FitnessConnection(user_id=user.id, provider=provider, access_token=f"tok-{provider}"))
+    db.commit()
+
+
+def _sync(db, user, farm, days_back=7):
+    async def run():
+        async with farm.client() as http_client:
+            aggregator = FitnessDataAggregator(db, http_client=http_client)
+            return await aggregator.sync_user_data(user.id, days_back=days_back)
+
+    return asyncio.run(run())
+
+
+def test_sync_fetches_and_merges_every_provider(db, user):
+    _connect(db, user, "fitbit", "garmin", "oura")
+    farm = FakeProviderFarm(seed=7)
+
+    result = _sync(db, user, farm)
+
+    assert result["errors"] == []
+    assert sorted(result["synced_providers"]) == ["fitbit", "garmin", "oura"]
+    today = local_today(user.timezone)
+    metric = db.query(DailyMetric).filter(DailyMetric.local_date == today - timedelta(days=1)).one()
+    assert sorted(metric.sources) == ["fitbit", "garmin", "oura"]
+
+    # Steps take the max across providers; sleep prefers Oura by priority
+    values = {p: farm.day_values(p, f"tok-{p}", metric.local_date) for p in ("fitbit", "garmin", "oura")}
+    assert metric.steps == max(v["steps"] for v in values.values())
+    assert metric.sleep_duration_minutes == values["oura"]["sleep_minutes"]
+    assert metric.resting_hr is not None and metric.active_calories is not None
+    # Each provider's raw contribution is kept alongside the unified value
+    assert {p: raw for p, (raw, _) in metric.provenance["steps"].items()} == {
+        p: v["steps"] for p, v in values.items()
+    }
+
+
+def test_provider_errors_are_reported_per_connection(db, user):
+    _connect(db, user, "fitbit")
+    result = _sync(db, user, FakeProviderFarm(error_rate=1.0))
+
+    assert result["synced_providers"] == []
+    assert result["errors"][0]["provider"] == "fitbit"
+    assert "503" in result["errors"][0]["error"]
+
+
+def test_unchanged_resync_writes_no_daily_metrics(db, user):
+    _connect(db, user, "fitbit", "garmin")
+    farm = FakeProviderFarm(seed=7)
+    _sync(db, user, farm)
+
+    with query_diagnostics.capture("resync", process_wide=True) as report:
+        result = _sync(db, user, farm)
+
+    assert result["records_created"] == 0
+    assert result["records_updated"] == 0
+    assert not [r for r in report.records if r.fingerprint.startswith("UPDATE daily_metrics")]
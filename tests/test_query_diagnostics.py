@@ -0,0 +1,62 @@
+import logging
+
+import pytest
+
+from app.core.database import query_diagnostics
+from app.core.query_diagnostics import fingerprint
+from app.models.user import DailyMetric, User
+
+
+def test_fingerprint_ignores_literals_and_in_list_length():
+    a = fingerprint("SELECT * FROM users WHERE id = 3 AND email = 'a@b.c'")
+    b = fingerprint("SELECT *  FROM users\nWHERE id = 42 AND email = 'x''y@z'")
+    assert a == b == "SELECT * FROM users WHERE id = ? AND email = ?"
+
+    assert fingerprint("SELECT 1 FROM t WHERE id IN (?, ?, ?)") == fingerprint(
+        "SELECT 1 FROM t WHERE id IN (%(id_1)s)"
+    )
+
+
+def _per_user_lookups(db, user_ids):
+    for user_id in user_ids:
+        db.query(DailyMetric).filter(DailyMetric.user_id == user_id).first()
+
+
+def test_repeated_selects_are_reported_with_call_sites(db, user, caplog):
+    with query_diagnostics.capture("lookups") as report:
+        _per_user_lookups(db, range(6))
+        db.query(User).all()
+
+    assert report.count == 7
+    [(key, count, sites)] = report.n_plus_one()
+    assert count == 6
+    assert "FROM daily_metrics" in key
+    assert sites and "test_query_diagnostics.py" in sites[0] and "_per_user_lookups" in sites[0]
+
+    with caplog.at_level(logging.WARNING, logger="fitlife.queries"):
+        report.log()
+    assert "N+1 x6" in caplog.text
+
+
+def test_slow_queries_are_flagged(db, user):
+    report_threshold = query_diagnostics.slow_threshold_ms
+    query_diagnostics.slow_threshold_ms = 0
+    try:
+        with query_diagnostics.capture("slow") as report:
+            db.query(User).all()
+    finally:
+        query_diagnostics.slow_threshold_ms = report_threshold
+
+    assert len(report.slow()) == 1
+    assert "slow" in report.format()
+
+
+def test_query_budget_fixture_fails_over_budget(db, user, query_budget):
+    with pytest.raises(pytest.fail.Exception, match="query budget 1 exceeded"):
+        with query_budget(1):
+            db.query(User).all()
+            db.query(User).all()
+
+    with pytest.raises(pytest.fail.Exception, match="N\\+1"):
+        with query_budget(100):
+            _per_user_lookups(db, range(5))
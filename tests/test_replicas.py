@@ -0,0 +1,140 @@
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import create_engine, delete, insert, select
+
+from app.core import database
+from app.core.database import Base, engine
+from app.core.metrics import DB_READ_ROUTES
+from app.core.replicas import ReadOnlySessionError, ReplicaRouter
+from app.core.timezone import local_today
+from app.models.user import DailyMetric, ReplicaHeartbeat, Team, User
+
+REPLICATED = (User.__table__, DailyMetric.__table__, ReplicaHeartbeat.__table__)
+
+
+@pytest.fixture
+def replica(tmp_path):
+    replica_engine = create_engine(f"sqlite:///{tmp_path}/replica.db", connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=replica_engine)
+    yield replica_engine
+    replica_engine.dispose()
+
+
+@pytest.fixture
+def router(replica, monkeypatch):
+    router = ReplicaRouter(primary=engine, replicas=[replica], max_lag_seconds=10,
+                           sticky_seconds=30, lag_check_seconds=0)
+    monkeypatch.setattr(database, "replica_router", router)
+    return router
+
+
+def _replay(router, replica, beat_at):
+    """Stand-in for streaming replication: copy the primary's rows across with the heartbeat stamped at beat_at."""
+    router.beat(now=beat_at)
+    with engine.connect() as source, replica.begin() as target:
+        for table in REPLICATED:
+            target.execute(delete(table))
+            rows = source.execute(select(table)).mappings().all()
+            if rows:
+                target.execute(insert(table), [dict(row) for row in rows])
+
+
+def _seed(db, user, steps=1000):
+    today = local_today(user.timezone)
+    db.add_all(
+        DailyMetric(user_id=user.id, date=datetime.combine(today - timedelta(days=d), datetime.min.time()),
+                    local_date=today - timedelta(days=d), steps=steps + d)
+        for d in range(5)
+    )
+    db.commit()
+
+
+def _mark_replica(replica, user):
+    """Give the replica a value the primary doesn't have, to see who answered."""
+    with replica.begin() as conn:
+        conn.execute(DailyMetric.__table__.update().where(DailyMetric.user_id == user.id).values(steps=4242))
+
+
+def _served_steps(client, auth_headers):
+    heatmap = client.get("/api/dashboard/heatmap/steps", headers=auth_headers).json()
+    return {point["raw_value"] for point in heatmap["data"]}
+
+
+def test_reads_go_to_a_current_replica(client, db, user, auth_headers, router, replica):
+    _seed(db, user)
+    _replay(router, replica, datetime.utcnow())
+    _mark_replica(replica, user)
+    before = DB_READ_ROUTES.value(target="replica")
+
+    assert _served_steps(client, auth_headers) == {4242}
+    assert client.get("/api/dashboard/trends", params={"metric": "steps"}, headers=auth_headers).json()["average"] == 4242
+    assert DB_READ_ROUTES.value(target="replica") == before + 2
+
+
+def test_user_reads_their_sync_until_replica_replays_it(client, db, user, auth_headers, router, replica):
+    _seed(db, user)
+    _replay(router, replica, datetime.utcnow() - timedelta(seconds=3))
+    _mark_replica(replica, user)
+    user.last_sync_at = datetime.utcnow()  # Synced after the replica's last replayed heartbeat
+    db.commit()
+
+    assert _served_steps(client, auth_headers) == {1000, 1001, 1002, 1003, 1004}
+    assert router.engine_for(user.last_sync_at)[1] == "primary_sticky"
+
+    _replay(router, replica, datetime.utcnow())
+    _mark_replica(replica, user)
+    assert _served_steps(client, auth_headers) == {4242}
+
+
+def test_stickiness_expires(db, router, replica):
+    _replay(router, replica, datetime.utcnow())
+    synced_long_ago = datetime.utcnow() - timedelta(seconds=31)
+    # The replica is current, just never replayed anything newer than this user's last sync
+    assert router.engine_for(synced_long_ago)[1] == "replica"
+
+
+def test_lagging_or_unreachable_replicas_fall_back_to_primary(client, db, user, auth_headers, router, replica, tmp_path):
+    _seed(db, user)
+    _replay(router, replica, datetime.utcnow() - timedelta(seconds=60))
+    _mark_replica(replica, user)
+
+    assert _served_steps(client, auth_headers) == {1000, 1001, 1002, 1003, 1004}
+    assert router.engine_for()[1] == "primary_fallback"
+
+    router.replicas = [create_engine(f"sqlite:///{tmp_path}/missing/replica.db")]
+    assert router.engine_for()[1] == "primary_fallback"
+
+
+def test_lag_checks_are_cached(db, router, replica):
+    router.lag_check_seconds = 60
+    _replay(router, replica, datetime.utcnow() - timedelta(seconds=60))
+    assert router.engine_for()[1] == "primary_fallback"
+
+    _replay(router, replica, datetime.utcnow())
+    assert router.engine_for()[1] == "primary_fallback"  # Still the cached reading
+    router._replayed.clear()
+    assert router.engine_for()[1] == "replica"
+
+
+def test_read_sessions_refuse_writes(db, user, router, replica):
+    _replay(router, replica, datetime.utcnow())
+    session = database.read_session()
+    try:
+        assert session.info["read_target"] == "replica"
+        session.add(DailyMetric(user_id=user.id, date=datetime.utcnow(), steps=1))
+        with pytest.raises(ReadOnlySessionError):
+            session.flush()
+    finally:
+        session.close()
+
+
+def test_writes_stay_on_the_primary(client, db, user, auth_headers, router, replica):
+    _replay(router, replica, datetime.utcnow())
+
+    response = client.post("/api/teams", json={"name": "Harriers"}, headers=auth_headers)
+
+    assert response.status_code == 201
+    assert db.query(Team).count() == 1
+    with replica.connect() as conn:
+        assert conn.execute(select(Team.__table__.c.id)).all() == []
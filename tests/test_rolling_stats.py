@@ -0,0 +1,167 @@
+import asyncio
+from datetime import date, datetime, timedelta
+
+import numpy as np
+import pytest
+
+from app.core.timezone import local_today
+from app.models.user import RollingStat
+from app.services.day_buckets import rebucket_user_days
+from app.services.fitness_aggregator import FitnessDataAggregator
+from app.services.rolling_stats import (
+    CHRONIC_DAYS, RollingIndex, daily_array, ewma, ewma_alpha, min_readings, rolling_mean,
+    rolling_sd, rolling_series,
+)
+
+
+def _day(d: date) -> datetime:
+    return datetime.combine(d, datetime.min.time())
+
+
+def _merge(db, user, records, provider="fitbit"):
+    aggregator = FitnessDataAggregator(db)
+    asyncio.run(aggregator._merge_provider_data(user.id, provider, records))
+
+
+def _stat(db, user, metric_type="steps") -> RollingStat:
+    return db.query(RollingStat).filter(
+        RollingStat.user_id == user.id,
+        RollingStat.metric_type == metric_type
+    ).one()
+
+
+def _series(n=400, seed=3):
+    rng = np.random.default_rng(seed)
+    values = rng.normal(9000, 2500, n)
+    values[rng.random(n) < 0.2] = np.nan
+    values[50:70] = np.nan  # A gap longer than the acute window
+    return values
+
+
+def _naive(values, window, reduce, minimum):
+    out = []
+    for i in range(len(values)):
+        chunk = values[max(0, i - window + 1):i + 1]
+        chunk = chunk[~np.isnan(chunk)]
+        out.append(reduce(chunk) if len(chunk) >= minimum else np.nan)
+    return np.array(out)
+
+
+def _naive_ewma(values, span):
+    level, out = None, []
+    for value in values:
+        if not np.isnan(value):
+            level = value if level is None else level + ewma_alpha(span) * (value - level)
+        out.append(np.nan if level is None else level)
+    return np.array(out)
+
+
+@pytest.mark.parametrize("window", [7, 28])
+def test_windowed_stats_match_naive_windows(window):
+    values = _series()
+
+    np.testing.assert_allclose(
+        rolling_mean(values, window), _naive(values, window, np.mean, min_readings(window)), rtol=1e-9
+    )
+    np.testing.assert_allclose(
+        rolling_sd(values, window),
+        _naive(values, window, lambda c: np.std(c, ddof=1), max(min_readings(window), 2)),
+        rtol=1e-7
+    )
+
+
+@pytest.mark.parametrize("span", [7, 28])
+def test_ewma_matches_recurrence_across_chunks_and_gaps(span):
+    values = _series(n=1000)
+    values[:5] = np.nan
+
+    np.testing.assert_allclose(ewma(values, span), _naive_ewma(values, span), rtol=1e-9)
+
+
+def test_appending_days_matches_vectorized_history(db, user, monkeypatch):
+    start = date(2024, 1, 1)
+    values = _series(n=45, seed=8)
+    _merge(db, user, [{"date": _day(start), "steps": 9000}])
+    monkeypatch.setattr(RollingIndex, "rebuild", lambda *args: pytest.fail("append should be O(1)"))
+
+    for offset in range(1, len(values)):
+        if not np.isnan(values[offset]):
+            _merge(db, user, [{"date": _day(start + timedelta(days=offset)), "steps": int(values[offset])}])
+
+    history = daily_array("steps", start, start + timedelta(days=len(values) - 1), [
+        (start + timedelta(days=i), 9000 if i == 0 else int(v)) for i, v in enumerate(values) if not np.isnan(v)
+    ])
+    expected = rolling_series(history)
+    stat = _stat(db, user)
+    assert stat.last_date == start + timedelta(days=int(np.flatnonzero(~np.isnan(values))[-1]))
+    assert len(stat.window) == CHRONIC_DAYS
+    assert stat.acute_ewma == pytest.approx(expected["ewma_acute"][-1])
+    assert stat.chronic_ewma == pytest.approx(expected["ewma_chronic"][-1])
+
+
+def test_revising_folded_day_rebuilds(db, user):
+    start = date(2024, 3, 1)
+    _merge(db, user, [{"date": _day(start + timedelta(days=i)), "steps": 8000} for i in range(10)])
+    assert _stat(db, user).acute_ewma == pytest.approx(8000)
+
+    _merge(db, user, [{"date": _day(start + timedelta(days=2)), "steps": 20000}], provider="garmin")
+
+    stat = _stat(db, user)
+    history = daily_array("steps", start, start + timedelta(days=9), [
+        (start + timedelta(days=i), 20000 if i == 2 else 8000) for i in range(10)
+    ])
+    assert stat.acute_ewma == pytest.approx(ewma(history, 7)[-1])
+    assert stat.window[-10:] == list(history)
+
+
+def test_timezone_change_rebuilds_rolling_state(db, user):
+    start = date(2024, 3, 1)
+    _merge(db, user, [
+        {"date": _day(start + timedelta(days=i)) + timedelta(hours=23, minutes=30), "steps": 6000 + 500 * i}
+        for i in range(10)
+    ])
+    assert _stat(db, user).last_date == start + timedelta(days=9)
+
+    # In Kolkata (UTC+5:30) every 23:30 UTC reading falls on the next local day
+    user.timezone = "Asia/Kolkata"
+    rebucket_user_days(db, user)
+
+    stat = _stat(db, user)
+    history = daily_array("steps", start + timedelta(days=1), start + timedelta(days=10), [
+        (start + timedelta(days=i + 1), 6000 + 500 * i) for i in range(10)
+    ])
+    assert stat.last_date == start + timedelta(days=10)
+    assert stat.window[-10:] == list(history)
+    assert stat.acute_ewma == pytest.approx(ewma(history, 7)[-1])
+
+
+def test_rolling_endpoint_reports_hrv_baseline(client, db, user, auth_headers):
+    today = local_today(user.timezone)
+    # A steady month, then a week well below it
+    hrv = [60.0 + (i % 3) for i in range(28)] + [40.0] * 7
+    start = today - timedelta(days=len(hrv) - 1)
+    _merge(db, user, [
+        {"date": _day(start + timedelta(days=i)), "average_hrv": value} for i, value in enumerate(hrv)
+    ], provider="oura")
+
+    response = client.get("/api/dashboard/rolling", params={"metric": "hrv", "period": "7d"}, headers=auth_headers)
+
+    assert response.status_code == 200
+    body = response.json()
+    assert [point["date"] for point in body["series"]] == [
+        (today - timedelta(days=i)).isoformat() for i in range(6, -1, -1)
+    ]
+    latest = body["series"][-1]
+    current = body["current"]
+    assert current["date"] == today.isoformat()
+    assert current["avg_7d"] == latest["avg_7d"] == 40.0
+    assert current["avg_28d"] == pytest.approx(np.mean(hrv[-28:]), abs=0.01)
+    for name in ("sd_28d", "acwr", "ewma_acute", "ewma_chronic", "acwr_ewma"):
+        assert current[name] == pytest.approx(latest[name], abs=0.01)
+    assert current["baseline_status"] == "below"
+    assert current["acwr"] < 1
+
+
+def test_rolling_endpoint_rejects_unknown_metric(client, auth_headers):
+    response = client.get("/api/dashboard/rolling", params={"metric": "bogus"}, headers=auth_headers)
+    assert response.status_code == 400
@@ -0,0 +1,111 @@
+import asyncio
+from datetime import date, datetime, timedelta
+
+from app.core.timezone import local_today
+from app.models.user import Goal, MetricStreak
+from app.services.fitness_aggregator import FitnessDataAggregator
+from app.services.streaks import StreakIndex, current_streak_as_of
+
+
+def _day(d: date) -> datetime:
+    return datetime.combine(d, datetime.min.time())
+
+
+def _merge(db, user, records, provider="fitbit"):
+    aggregator = FitnessDataAggregator(db)
+    asyncio.run(aggregator._merge_provider_data(user.id, provider, records))
+
+
+def _steps_streak(db, user) -> MetricStreak:
+    return db.query(MetricStreak).filter(
+        MetricStreak.user_id == user.id,
+        MetricStreak.metric_type == "steps"
+    ).one()
+
+
+def test_appending_days_extends_and_breaks_runs(db, user):
+    start = date(2024, 3, 1)
+    steps = [12000, 11000, 4000, 10500, 10001, 15000]  # miss on day 3
+    for offset, value in enumerate(steps):
+        _merge(db, user, [{"date": _day(start + timedelta(days=offset)), "steps": value}])
+
+    streak = _steps_streak(db, user)
+    assert streak.current_streak == 3
+    assert streak.longest_streak == 3
+    assert streak.run_start_date == start + timedelta(days=3)
+    assert streak.last_qualified_date == start + timedelta(days=5)
+
+
+def test_appends_do_not_rescan_history(db, user, monkeypatch):
+    start = date(2024, 3, 1)
+    _merge(db, user, [{"date": _day(start), "steps": 12000}])
+
+    def fail(*args, **kwargs):
+        raise AssertionError("append should be O(1)")
+
+    monkeypatch.setattr(StreakIndex, "rebuild", fail)
+    _merge(db, user, [{"date": _day(start + timedelta(days=1)), "steps": 12000}])
+    assert _steps_streak(db, user).current_streak == 2
+
+
+def test_backfill_that_bridges_a_gap_rebuilds(db, user):
+    start = date(2024, 3, 1)
+    _merge(db, user, [
+        {"date": _day(start), "steps": 12000},
+        {"date": _day(start + timedelta(days=1)), "steps": 500},
+        {"date": _day(start + timedelta(days=2)), "steps": 12000},
+    ])
+    assert _steps_streak(db, user).longest_streak == 1
+
+    # Another provider saw the walk on day 2
+    _merge(db, user, [{"date": _day(start + timedelta(days=1)), "steps": 13000}], provider="garmin")
+
+    streak = _steps_streak(db, user)
+    assert streak.current_streak == 3
+    assert streak.longest_streak == 3
+
+
+def test_daily_goal_sets_threshold(db, user):
+    db.add(Goal(user_id=user.id, metric_type="steps", target_value=5000,
+                period="daily", start_date=datetime(2024, 1, 1)))
+    db.commit()
+    _merge(db, user, [{"date": _day(date(2024, 3, 1)), "steps": 6000}])
+
+    streak = _steps_streak(db, user)
+    assert streak.threshold == 5000
+    assert streak.current_streak == 1
+
+
+def test_heatmap_reports_streak_relative_to_local_today(db, user):
+    today = local_today(user.timezone)
+    _merge(db, user, [
+        {"date": _day(today - timedelta(days=2)), "steps": 12000},
+        {"date": _day(today - timedelta(days=1)), "steps": 12000},
+    ])
+
+    heatmap = FitnessDataAggregator(db).generate_heatmap_data(user.id, "steps")
+    assert heatmap["streak_days"] == 2
+
+    streak = _steps_streak(db, user)
+    assert current_streak_as_of(streak, today + timedelta(days=1)) == 0
+
+
+def test_lower_is_better_goal_is_a_ceiling(db, user):
+    db.add(Goal(user_id=user.id, metric_type="heart_rate", target_value=60,
+                period="daily", start_date=datetime(2024, 1, 1)))
+    db.commit()
+    start = date(2024, 3, 1)
+    _merge(db, user, [
+        {"date": _day(start + timedelta(days=offset)), "restingHeartRate": hr}
+        for offset, hr in enumerate([58, 59, 72, 57, 60])
+    ])
+
+    streak = db.query(MetricStreak).filter(
+        MetricStreak.user_id == user.id,
+        MetricStreak.metric_type == "heart_rate"
+    ).one()
+    assert streak.threshold == 60
+    # 72 bpm breaks the run; 57 and 60 are at or under the ceiling
+    assert streak.longest_streak == 2
+    assert streak.current_streak == 2
+    assert streak.run_start_date == start + timedelta(days=3)
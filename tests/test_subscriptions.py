@@ -0,0 +1,154 @@
+import hashlib
+import hmac
+import json
+import time
+
+import pytest
+import stripe
+
+from app.core.config import settings
+from app.services.subscription import SubscriptionService
+
+WEBHOOK_SECRET = "whsec_test_secret"
+
+
+class FakeListing:
+    def __init__(self, items):
+        self.items = items
+
+    def auto_paging_iter(self):
+        return iter(self.items)
+
+
+class FakeStripe:
+    """Stand-in for the stripe module; records calls instead of hitting the network."""
+
+    def __init__(self, subscriptions):
+        self.calls = []
+        fake = self
+
+        class Subscription:
+            @staticmethod
+            def list(**params):
+                fake.calls.append(("list", params))
+                return FakeListing(subscriptions)
+
+        self.Subscription = Subscription
+
+
+def _signed(payload: dict):
+    body = json.dumps(payload)
+    timestamp = int(time.time())
+    signature = hmac.new(
+        WEBHOOK_SECRET.encode(), f"{timestamp}.{body}".encode(), hashlib.sha256
+    ).hexdigest()
+    return body, f"t={timestamp},v1={signature}"
+
+
+def _construct_event(payload, sig_header, secret):
+    # Verify like Stripe does, but skip its StripeObject conversion
+    stripe.WebhookSignature.verify_header(payload.decode(), sig_header, secret)
+    return json.loads(payload)
+
+
+def _event(event_type: str, data: dict) -> dict:
+    return {"id": "evt_1", "object": "event", "type": event_type, "data": {"object": data}}
+
+
+@pytest.fixture
+def customer(db, user):
+    user.stripe_customer_id = "cus_123"
+    db.commit()
+    return user
+
+
+def test_webhook_writes_local_state_and_status_is_served_locally(
+    client, db, customer, auth_headers, monkeypatch
+):
+    monkeypatch.setattr(settings, "STRIPE_WEBHOOK_SECRET", WEBHOOK_SECRET)
+    monkeypatch.setattr(stripe.Webhook, "construct_event", _construct_event)
+    period_end = 1_900_000_000
+    body, signature = _signed(_event("customer.subscription.updated", {
+        "id": "sub_1",
+        "object": "subscription",
+        "customer": "cus_123",
+        "status": "active",
+        "current_period_end": period_end,
+        "cancel_at_period_end": True,
+    }))
+
+    response = client.post(
+        "/api/subscriptions/webhook",
+        content=body,
+        headers={"Stripe-Signature": signature, "Content-Type": "application/json"},
+    )
+    assert response.json() == {"received": True}
+
+    def no_network(subscription_id):
+        raise AssertionError("status must not be fetched from Stripe")
+
+    monkeypatch.setattr(SubscriptionService, "get_subscription_status", no_network)
+    status = client.get("/api/subscriptions/status", headers=auth_headers).json()
+
+    assert status["is_premium"] is True
+    assert status["stripe_status"] == "active"
+    assert status["subscription_id"] == "sub_1"
+    assert status["cancel_at_period_end"] is True
+    assert status["current_period_end"].startswith("2030-03-17")
+
+
+def test_reconcile_fixes_drift_in_batches(db, customer):
+    customer.stripe_subscription_id = "sub_1"
+    customer.subscription_status = "active"
+    customer.is_premium = True
+    db.commit()
+
+    fake = FakeStripe([
+        {"id": "sub_1", "customer": "cus_123", "status": "past_due",
+         "current_period_end": 1_900_000_000, "cancel_at_period_end": False},
+        {"id": "sub_9", "customer": "cus_unknown", "status": "active",
+         "current_period_end": 1_900_000_000, "cancel_at_period_end": False},
+    ])
+
+    stats = SubscriptionService.reconcile_subscriptions(db, client=fake)
+
+    db.refresh(customer)
+    assert stats == {"seen": 2, "updated": 1, "unmatched": 1}
+    assert customer.subscription_status == "past_due"
+    assert customer.is_premium is False
+    assert fake.calls == [("list", {"status": "all", "limit": 100})]
+
+    # A second pass with no drift is a no-op
+    stats = SubscriptionService.reconcile_subscriptions(db, client=fake)
+    assert stats["updated"] == 0
+
+
+def test_reconcile_settles_a_customer_across_page_boundaries(db, customer):
+    fake = FakeStripe([
+        {"id": "sub_2", "customer": "cus_123", "status": "active",
+         "current_period_end": 1_900_000_000, "cancel_at_period_end": False},
+        {"id": "sub_1", "customer": "cus_123", "status": "canceled",
+         "current_period_end": 1_800_000_000, "cancel_at_period_end": False},
+    ])
+
+    stats = SubscriptionService.reconcile_subscriptions(db, client=fake, page_size=1)
+
+    db.refresh(customer)
+    assert stats == {"seen": 1, "updated": 1, "unmatched": 0}
+    # The older, canceled subscription on page two must not override the newer one
+    assert customer.stripe_subscription_id == "sub_2"
+    assert customer.subscription_status == "active"
+    assert customer.is_premium is True
+
+    # An older subscription that still grants access wins over a newer lapsed one
+    fake = FakeStripe([
+        {"id": "sub_3", "customer": "cus_123", "status": "incomplete_expired",
+         "current_period_end": 1_900_000_000, "cancel_at_period_end": False},
+        {"id": "sub_2", "customer": "cus_123", "status": "active",
+         "current_period_end": 1_900_000_000, "cancel_at_period_end": False},
+    ])
+    SubscriptionService.reconcile_subscriptions(db, client=fake, page_size=1)
+
+    db.refresh(customer)
+    assert customer.stripe_subscription_id == "sub_2"
+    assert customer.is_premium is True
@@ -0,0 +1,175 @@
+import asyncio
+from datetime import datetime, timedelta
+
+import httpx
+import pytest
+
+from benchmarks.fake_providers import FakeProviderFarm
+from app.core.database import SessionLocal
+from app.models.user import FitnessConnection, SyncLease
+from app.services.fitness_aggregator import FitnessDataAggregator
+from app.services.sync_coordinator import SyncCoordinator
+
+
+def _worker(**overrides):
+    """A coordinator as another worker process would have it: its own in-process flights, the same database."""
+    return SyncCoordinator(session_factory=SessionLocal, **{"lease_seconds": 5, "poll_seconds": 0.01, **overrides})
+
+
+def _slow_sync(calls, result, delay=0.05):
+    async def sync():
+        calls.append(1)
+        await asyncio.sleep(delay)
+        return result
+
+    return sync
+
+
+def test_concurrent_callers_in_one_process_share_a_sync(db):
+    coordinator = _worker()
+    calls = []
+
+    async def run():
+        return await asyncio.gather(*(
+            coordinator.run("user:1", _slow_sync(calls, {"records_created": 3})) for _ in range(5)
+        ))
+
+    outcomes = asyncio.run(run())
+    assert len(calls) == 1
+    assert [result for result, _ in outcomes] == [{"records_created": 3}] * 5
+    assert sorted(shared for _, shared in outcomes) == [False, True, True, True, True]
+
+
+def test_callers_on_other_workers_receive_the_holders_result(db):
+    first, second = _worker(), _worker()
+    calls = []
+
+    async def run():
+        holder = asyncio.ensure_future(first.run("user:1", _slow_sync(calls, {"records_created": 3}, delay=0.1)))
+        await asyncio.sleep(0.02)
+        waiter = await second.run("user:1", _slow_sync(calls, {"records_created": 99}))
+        return await holder, waiter
+
+    holder, waiter = asyncio.run(run())
+    assert len(calls) == 1
+    assert holder == ({"records_created": 3}, False)
+    assert waiter == ({"records_created": 3}, True)
+
+    # A finished lease is free again
+    assert asyncio.run(second.run("user:1", _slow_sync(calls, {"records_created": 0}, delay=0))) == (
+        {"records_created": 0}, False
+    )
+
+
+def test_expired_leases_of_crashed_workers_are_taken_over(db):
+    db.add(SyncLease(
+        key="user:1", owner="crashed-worker",
+        expires_at=datetime.utcnow() + timedelta(seconds=0.05), acquired_at=datetime.utcnow()
+    ))
+    db.commit()
+    calls = []
+
+    result = asyncio.run(_worker().run("user:1", _slow_sync(calls, {"records_created": 1}, delay=0)))
+
+    assert result == ({"records_created": 1}, False)
+    assert len(calls) == 1
+
+
+def test_a_failed_sync_does_not_strand_its_waiters(db):
+    first, second = _worker(), _worker()
+
+    async def failing():
+        await asyncio.sleep(0.05)
+        raise RuntimeError("provider outage")
+
+    async def run():
+        holder = asyncio.ensure_future(first.run("user:1", failing))
+        await asyncio.sleep(0.01)
+        waiter = await second.run("user:1", _slow_sync([], {"records_created": 2}, delay=0))
+        with pytest.raises(RuntimeError):
+            await holder
+        return waiter
+
+    assert asyncio.run(run()) == ({"records_created": 2}, False)
+
+
+def test_sync_endpoint_deduplicates_concurrent_requests(db, user, auth_headers, monkeypatch):
+    from main import app
+
+    calls = []
+
+    async def fake_sync(self, user_id, days_back=30):
+        calls.append(user_id)
+        await asyncio.sleep(0.05)
+        return {"user_id": user_id, "synced_providers": ["fitbit"], "errors": []}
+
+    monkeypatch.setattr(FitnessDataAggregator, "sync_user_data", fake_sync)
+
+    async def run():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await asyncio.gather(*(
+                client.post("/api/dashboard/sync", headers=auth_headers) for _ in range(3)
+            ))
+
+    responses = asyncio.run(run())
+    assert calls == [user.id]
+    assert [r.json()["synced_providers"] for r in responses] == [["fitbit"]] * 3
+    assert sorted(r.json()["shared"] for r in responses) == [False, True, True]
+
+
+def test_connections_are_flagged_while_syncing(db, user):
+    db.add(FitnessConnection(user_id=user.id, provider="fitbit", access_token="tok-fitbit"))
+    db.commit()
+    seen = []
+
+    class Watching(FitnessDataAggregator):
+        async def _fetch_from_provider(self, connection, start_date, end_date):
+            check = SessionLocal()
+            try:
+                seen.append(check.get(FitnessConnection, connection.id).is_syncing)
+            finally:
+                check.close()
+            return await super()._fetch_from_provider(connection, start_date, end_date)
+
+    async def run():
+        async with FakeProviderFarm().client() as http_client:
+            await Watching(db, http_client=http_client).sync_user_data(user.id, days_back=2)
+
+    asyncio.run(run())
+    assert seen == [True]
+    db.expire_all()
+    assert db.query(FitnessConnection).one().is_syncing is False
+
+
+def test_flags_are_cleared_when_a_sync_fails_before_its_connections_run(db, user):
+    for provider in ("fitbit", "oura"):
+        db.add(FitnessConnection(user_id=user.id, provider=provider, access_token=f"tok-{provider}"))
+    db.commit()
+
+    class Unannounced(FitnessDataAggregator):
+        async def _start_events(self, *args):
+            raise ConnectionError("pubsub is down")
+
+    with pytest.raises(ConnectionError):
+        asyncio.run(Unannounced(db).sync_user_data(user.id, days_back=2))
+
+    db.expire_all()
+    assert [conn.is_syncing for conn in db.query(FitnessConnection)] == [False, False]
+
+
+def test_flags_are_cleared_when_a_sync_is_cancelled(db, user):
+    for provider in ("fitbit", "oura"):
+        db.add(FitnessConnection(user_id=user.id, provider=provider, access_token=f"tok-{provider}"))
+    db.commit()
+
+    async def run():
+        async with FakeProviderFarm(latency=5).client() as http_client:
+            sync = FitnessDataAggregator(db, http_client=http_client).sync_user_data(user.id, days_back=2)
+            await asyncio.wait_for(sync, timeout=0.1)
+
+    with pytest.raises(asyncio.TimeoutError):
+        asyncio.run(run())
+
+    db.expire_all()
+    assert [conn.is_syncing for conn in db.query(FitnessConnection)] == [False, False]
@@ -0,0 +1,138 @@
+import asyncio
+import json
+import pickle
+import time
+from datetime import date, timedelta
+
+import pytest
+
+from benchmarks.fake_providers import FakeProviderFarm
+from app.core.metrics import SYNC_PREPARE_BATCHES
+from app.models.user import DailyMetric, FitnessConnection, User
+from app.services.fitness_aggregator import FitnessDataAggregator
+from app.services.sync_engine import SyncEngine, prepare_payloads
+
+PROVIDERS = ("fitbit", "garmin", "oura")
+START, END = date(2024, 1, 1), date(2024, 12, 30)
+
+
+def _payload(farm, provider, token="tok"):
+    """The raw bodies a fetcher would hand over for START..END."""
+    def body(path, params=None):
+        return json.dumps(farm.respond(path, params or {}, token)[1]).encode()
+
+    span_path = f"date/{START.isoformat()}/{END.isoformat()}.json"
+    if provider == "fitbit":
+        return {
+            "steps": body(f"/1/user/-/activities/steps/{span_path}"),
+            "calories": body(f"/1/user/-/activities/activityCalories/{span_path}"),
+            "heart": body(f"/1/user/-/activities/heart/{span_path}"),
+            "sleep": body(f"/1.2/user/-/sleep/{span_path}"),
+        }
+    if provider == "garmin":
+        params = {"uploadStartTimeInSeconds": 1704067200, "uploadEndTimeInSeconds": 1735516800}
+        return {
+            "dailies": body("/wellness-api/rest/dailies", params),
+            "sleeps": body("/wellness-api/rest/sleeps", params),
+        }
+    params = {"start_date": START.isoformat(), "end_date": END.isoformat()}
+    return {
+        "daily_activity": body("/v2/usercollection/daily_activity", params),
+        "sleep": body("/v2/usercollection/sleep", params),
+    }
+
+
+@pytest.mark.parametrize("provider", PROVIDERS)
+def test_prepared_batches_carry_every_normalized_record(provider):
+    farm = FakeProviderFarm(seed=3)
+    batch = prepare_payloads(provider, [_payload(farm, provider)], "Asia/Tokyo")
+
+    rows = list(batch.rows())
+    assert len(rows) == (END - START).days + 1
+    day, values = rows[40][1], rows[40][2]
+    assert day == START + timedelta(days=40)  # Bare provider dates are already local days
+    expected = farm.day_values(provider, "tok", day)
+    assert values["steps"] == expected["steps"]
+    assert values["sleep_duration_minutes"] == expected["sleep_minutes"]
+    assert set(values) <= set(batch.columns)
+
+
+def test_batch_format_is_smaller_than_records():
+    batch = prepare_payloads("garmin", [_payload(FakeProviderFarm(), "garmin")], "UTC")
+    as_records = [(instant, day, values) for instant, day, values in batch.rows()]
+
+    assert len(pickle.dumps(batch)) < len(pickle.dumps(as_records)) / 2
+    assert list(pickle.loads(pickle.dumps(batch)).rows()) == as_records
+
+
+def test_days_filter_is_applied_while_preparing():
+    farm = FakeProviderFarm()
+    wanted = {"2024-03-01", "2024-03-03"}
+    batch = prepare_payloads("oura", [_payload(farm, "oura")], "UTC", days=wanted)
+
+    assert [day.isoformat() for _, day, _ in batch.rows()] == sorted(wanted)
+
+
+def _connect(db, user, *providers):
+    for provider in providers:
+        db.add(FitnessConnection(user_id=user.id, provider=provider, access_token=f"tok-{provider}"))
+    db.commit()
+
+
+def _sync(db, user, farm, engine=None, days_back=7):
+    async def run():
+        async with farm.client() as http_client:
+            aggregator = FitnessDataAggregator(db, http_client=http_client, engine=engine)
+            return await aggregator.sync_user_data(user.id, days_back=days_back)
+
+    return asyncio.run(run())
+
+
+def _stored(db, user):
+    return [
+        (m.local_date, m.steps, m.active_calories, m.resting_hr, m.sleep_duration_minutes, sorted(m.sources))
+        for m in db.query(DailyMetric).filter(DailyMetric.user_id == user.id).order_by(DailyMetric.local_date)
+    ]
+
+
+def test_process_pool_sync_matches_inline_sync(db, user):
+    twin = User(email="twin@fitlife.app", hashed_password="x", timezone=user.timezone)
+    db.add(twin)
+    db.commit()
+    _connect(db, user, *PROVIDERS)
+    _connect(db, twin, *PROVIDERS)  # Same tokens, so the farm serves the same values
+    farm = FakeProviderFarm(seed=5)
+    pool = SyncEngine(processes=2, offload_min_bytes=0)
+    offloaded = SYNC_PREPARE_BATCHES.value(where="process")
+
+    try:
+        inline = _sync(db, user, farm, engine=SyncEngine(processes=0), days_back=60)
+        pooled = _sync(db, twin, farm, engine=pool, days_back=60)
+    finally:
+        pool.shutdown()
+
+    assert pooled["errors"] == inline["errors"] == []
+    assert pooled["records_created"] == inline["records_created"] > 60
+    assert SYNC_PREPARE_BATCHES.value(where="process") == offloaded + 3
+    assert _stored(db, twin) == _stored(db, user)
+
+
+def test_small_syncs_stay_inline(db, user):
+    _connect(db, user, "fitbit")
+    engine = SyncEngine(processes=2, offload_min_bytes=1 << 20)
+
+    _sync(db, user, FakeProviderFarm(), engine=engine, days_back=2)
+
+    assert engine._pool is None
+
+
+def test_connections_fetch_concurrently(db, user):
+    _connect(db, user, *PROVIDERS)
+    farm = FakeProviderFarm(latency=0.3)
+
+    started = time.perf_counter()
+    result = _sync(db, user, farm, days_back=2)
+    elapsed = time.perf_counter() - started
+
+    assert sorted(result["synced_providers"]) == sorted(PROVIDERS)
+    assert elapsed < 0.6  # One provider round trip; one after another would take 0.9s
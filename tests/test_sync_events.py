@@ -0,0 +1,149 @@
+import asyncio
+import json
+import threading
+from datetime import timedelta
+
+import httpx
+
+from benchmarks.fake_providers import FakeProviderFarm
+from app.core.pubsub import InMemoryPubSub, get_pubsub
+from app.core.timezone import local_today
+from app.models.user import DailyMetric, FitnessConnection
+from app.services.fitness_aggregator import FitnessDataAggregator
+from app.services.sync_events import channel, sse_stream
+
+
+def _parse(body: str):
+    events = []
+    for frame in body.split("\n\n"):
+        lines = dict(line.split(": ", 1) for line in frame.splitlines() if not line.startswith(":"))
+        if "event" in lines:
+            events.append((lines["event"], json.loads(lines["data"])))
+    return events
+
+
+async def _sync(db, user_id, farm, pubsub=None, days_back=2):
+    async with farm.client() as http_client:
+        aggregator = FitnessDataAggregator(db, http_client=http_client, pubsub=pubsub)
+        return await aggregator.sync_user_data(user_id, days_back=days_back)
+
+
+async def _stream_during_sync(db, user, auth_headers, farm):
+    """Open /sync/stream, run a sync once it's subscribed, and return the stream's events."""
+    from main import app
+
+    pubsub = get_pubsub()
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        stream = asyncio.ensure_future(
+            client.get("/api/dashboard/sync/stream", params={"once": "true"}, headers=auth_headers)
+        )
+        while not pubsub.subscriber_count(channel(user.id)):
+            await asyncio.sleep(0.005)
+        await _sync(db, user.id, farm)
+        response = await asyncio.wait_for(stream, timeout=5)
+    assert response.headers["content-type"].startswith("text/event-stream")
+    return _parse(response.text)
+
+
+def _connect(db, user, *providers):
+    for provider in providers:
+        db.add(FitnessConnection(user_id=user.id, provider=provider, access_token=f"tok-{provider}"))
+    db.commit()
+
+
+def test_stream_reports_progress_and_changed_ranges(db, user, auth_headers):
+    _connect(db, user, "fitbit", "garmin")
+    farm = FakeProviderFarm(seed=11)
+
+    events = asyncio.run(_stream_during_sync(db, user, auth_headers, farm))
+
+    assert [name for name, _ in events] == [
+        "sync_started",
+        "provider_started", "provider_finished",
+        "provider_started", "provider_finished",
+        "data_changed",
+        "sync_finished",
+    ]
+    days = sorted(day for (day,) in db.query(DailyMetric.local_date))
+    progress = [data for name, data in events if name == "provider_finished"]
+    # Fitbit creates every day; Garmin merges into them
+    assert [(p["provider"], p["status"], p["records_created"]) for p in progress] == [
+        ("fitbit", "success", len(days)), ("garmin", "success", 0)
+    ]
+    assert progress[1]["records_updated"] == len(days)
+    changed = dict(events)["data_changed"]["metrics"]
+    assert changed["steps"] == {"start": days[0].isoformat(), "end": days[-1].isoformat()}
+    assert days[0] == local_today(user.timezone) - timedelta(days=2)
+    assert {"sleep", "heart_rate", "calories"} <= set(changed)
+    assert dict(events)["sync_finished"]["records_created"] == len(days)
+
+
+def test_unchanged_resync_sends_no_data_changed(db, user, auth_headers):
+    _connect(db, user, "fitbit")
+    farm = FakeProviderFarm(seed=11)
+    asyncio.run(_sync(db, user.id, farm))
+
+    events = asyncio.run(_stream_during_sync(db, user, auth_headers, farm))
+
+    assert "data_changed" not in [name for name, _ in events]
+    assert events[-1][0] == "sync_finished"
+
+
+def test_events_reach_subscribers_on_other_event_loops(db, user):
+    """A subscriber on another loop stands in for an SSE client attached to a different worker."""
+    _connect(db, user, "oura")
+    pubsub = InMemoryPubSub()
+    subscribed = threading.Event()
+    frames = []
+
+    async def listen():
+        stream = sse_stream(user.id, once=True, pubsub=pubsub, keepalive_seconds=5)
+        async for frame in stream:
+            subscribed.set()
+            frames.append(frame)
+
+    listener = threading.Thread(target=lambda: asyncio.run(listen()))
+    listener.start()
+    assert subscribed.wait(5)
+    asyncio.run(_sync(db, user.id, FakeProviderFarm(), pubsub=pubsub))
+    listener.join(5)
+
+    assert not listener.is_alive()
+    assert [name for name, _ in _parse("".join(frames))][-2:] == ["data_changed", "sync_finished"]
+    assert pubsub.subscriber_count(channel(user.id)) == 0
+
+
+def test_every_subscriber_gets_the_whole_event(db, user):
+    _connect(db, user, "fitbit")
+    pubsub = InMemoryPubSub()
+
+    async def run():
+        streams = [sse_stream(user.id, once=True, pubsub=pubsub, keepalive_seconds=5) for _ in range(2)]
+        for stream in streams:
+            await stream.__anext__()  # Subscribed
+
+        async def drain(stream):
+            return _parse("".join([frame async for frame in stream]))
+
+        readers = [asyncio.ensure_future(drain(stream)) for stream in streams]
+        await _sync(db, user.id, FakeProviderFarm(), pubsub=pubsub)
+        return await asyncio.wait_for(asyncio.gather(*readers), timeout=5)
+
+    first, second = asyncio.run(run())
+    assert first == second
+    assert first[-1][0] == "sync_finished"
+
+
+def test_idle_streams_send_keepalives():
+    async def first_frames():
+        stream = sse_stream(1, pubsub=InMemoryPubSub(), keepalive_seconds=0.01)
+        frames = [await stream.__anext__() for _ in range(2)]
+        await stream.aclose()
+        return frames
+
+    assert asyncio.run(first_frames()) == [": connected\n\n", ": keepalive\n\n"]
+
+
+def test_stream_requires_authentication(client):
+    assert client.get("/api/dashboard/sync/stream").status_code in (401, 403)
@@ -0,0 +1,193 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.core.auth import create_access_token
+from app.core.timezone import local_today
+from app.models.user import DailyMetric, MetricStreak, Team, TeamMember, User
+
+# auth user, membership, roster page, metrics, latest days, streaks
+TEAM_DASHBOARD_QUERY_BUDGET = 6
+
+
+def _headers(user):
+    return {"Authorization": f"Bearer {create_access_token(data={'sub': str(user.id)})}"}
+
+
+def _team(db, coach, members=0, timezones=("UTC", "America/Los_Angeles", "Asia/Tokyo")):
+    team = Team(name="Harriers", created_by=coach.id)
+    team.members.append(TeamMember(user_id=coach.id, role="coach"))
+    db.add(team)
+    db.flush()
+    users = [
+        User(email=f"member{i}@team{team.id}.fitlife.app", hashed_password="x", first_name=f"M{i}",
+             last_name=f"Member{i:03d}", timezone=timezones[i % len(timezones)])
+        for i in range(members)
+    ]
+    db.add_all(users)
+    db.flush()
+    db.add_all(TeamMember(team_id=team.id, user_id=u.id) for u in users)
+    metrics = []
+    for u in users:
+        today = local_today(u.timezone)
+        metrics += [
+            DailyMetric(user_id=u.id, date=datetime.combine(today - timedelta(days=d), datetime.min.time()),
+                        local_date=today - timedelta(days=d), steps=1000 * d, sleep_duration_minutes=420,
+                        resting_hr=55)
+            for d in range(0, 15)
+        ]
+    db.add_all(metrics)
+    db.commit()
+    return team, users
+
+
+def test_member_summaries_follow_each_members_local_week(client, db, user, auth_headers):
+    team, members = _team(db, user, members=3)
+
+    body = client.get(f"/api/teams/{team.id}/dashboard", headers=auth_headers).json()
+
+    assert body["total"] == 4
+    summaries = {m["user_id"]: m for m in body["members"]}
+    for member in members:
+        summary = summaries[member.id]
+        today = local_today(member.timezone)
+        assert summary["today_steps"] == 0
+        # Days 1..7 before today: mean of 1000..7000; the week before averaged 11000
+        assert summary["weekly_average"] == {
+            "steps": 4000, "sleep_hours": 7.0, "resting_hr": 55.0, "active_minutes": None
+        }
+        assert summary["steps_change_percent"] == round((4000 - 11000) / 11000 * 100, 1)
+        assert summary["days_with_data_7d"] == 7
+        assert summary["last_data_date"] == today.isoformat()
+    coach = summaries[user.id]
+    assert (coach["role"], coach["days_with_data_7d"], coach["weekly_average"]["steps"]) == ("coach", 0, None)
+
+
+def test_query_count_is_constant_in_team_size(client, db, user, auth_headers, query_budget):
+    small, _ = _team(db, user, members=4)
+    other_coach = User(email="coach2@fitlife.app", hashed_password="x", timezone="UTC")
+    db.add(other_coach)
+    db.commit()
+    large, members = _team(db, other_coach, members=120)
+    db.add_all(MetricStreak(user_id=m.id, metric_type="steps", current_streak=3,
+                            last_qualified_date=local_today(m.timezone)) for m in members)
+    db.commit()
+
+    counts = []
+    for url, headers, page_size in (
+        (f"/api/teams/{small.id}/dashboard", auth_headers, 50),
+        (f"/api/teams/{large.id}/dashboard", _headers(other_coach), 200),
+    ):
+        with query_budget(TEAM_DASHBOARD_QUERY_BUDGET) as report:
+            body = client.get(url, params={"page_size": page_size}, headers=headers).json()
+        counts.append(report.count)
+
+    assert counts[0] == counts[1]
+    assert len(body["members"]) == 121
+    assert {m["steps_streak"] for m in body["members"] if m["role"] == "member"} == {3}
+
+
+def test_pages_walk_the_roster_in_name_order(client, db, user, auth_headers):
+    team, _ = _team(db, user, members=25)
+
+    pages = [
+        client.get(f"/api/teams/{team.id}/dashboard", params={"page": page, "page_size": 10},
+                   headers=auth_headers).json()
+        for page in (1, 2, 3, 4)
+    ]
+
+    assert [p["total"] for p in pages] == [26] * 4
+    names = [m["last_name"] for p in pages for m in p["members"]]
+    assert len(names) == 26 and pages[3]["members"] == []
+    assert names[1:] == sorted(names[1:])  # The coach's null last name sorts first
+
+
+def test_only_staff_see_the_dashboard(client, db, user, auth_headers):
+    team, members = _team(db, user, members=1)
+    outsider = User(email="outsider@fitlife.app", hashed_password="x", timezone="UTC")
+    db.add(outsider)
+    db.commit()
+
+    assert client.get(f"/api/teams/{team.id}/dashboard", headers=_headers(members[0])).status_code == 403
+    assert client.get(f"/api/teams/{team.id}/dashboard", headers=_headers(outsider)).status_code == 404
+
+
+def test_admins_manage_membership(client, db, user, auth_headers):
+    newcomer = User(email="newcomer@fitlife.app", hashed_password="x", timezone="UTC")
+    db.add(newcomer)
+    db.commit()
+
+    created = client.post("/api/teams", json={"name": "Wellness"}, headers=auth_headers)
+    assert created.status_code == 201
+    team_id = created.json()["id"]
+
+    invite = {"email": "newcomer@fitlife.app"}
+    assert client.post(f"/api/teams/{team_id}/members", json=invite, headers=auth_headers).status_code == 202
+    assert client.get("/api/teams/invitations", headers=_headers(newcomer)).json() == [
+        {"id": team_id, "name": "Wellness", "role": "member"}
+    ]
+    accepted = client.post(f"/api/teams/{team_id}/accept", headers=_headers(newcomer))
+    assert accepted.json() == {"id": team_id, "name": "Wellness", "role": "member"}
+    assert client.post(f"/api/teams/{team_id}/accept", headers=_headers(newcomer)).status_code == 404
+    # Plain members can't add people
+    assert client.post(f"/api/teams/{team_id}/members", json={"email": "runner@fitlife.app"},
+                       headers=_headers(newcomer)).status_code == 403
+    assert client.get("/api/teams", headers=_headers(newcomer)).json() == [
+        {"id": team_id, "name": "Wellness", "role": "member"}
+    ]
+
+    assert client.delete(f"/api/teams/{team_id}/members/{newcomer.id}", headers=auth_headers).status_code == 204
+    assert client.get("/api/teams", headers=_headers(newcomer)).json() == []
+
+
+def test_invitees_stay_invisible_until_they_accept(client, db, user, auth_headers):
+    team, _ = _team(db, user, members=1)
+    db.query(TeamMember).filter(TeamMember.team_id == team.id).update({"role": "admin"})
+    invitee = User(email="invitee@fitlife.app", hashed_password="x", timezone="UTC", last_name="Invitee")
+    db.add(invitee)
+    db.commit()
+
+    responses = [
+        client.post(f"/api/teams/{team.id}/members", json={"email": email, "role": "coach"}, headers=auth_headers)
+        for email in ("invitee@fitlife.app", "invitee@fitlife.app", "nobody@fitlife.app")
+    ]
+    # Known, repeated and unknown emails can't be told apart
+    assert {r.status_code for r in responses} == {202}
+    assert [{**r.json(), "email": None} for r in responses] == [
+        {"team_id": team.id, "email": None, "role": "coach", "status": "invited"}
+    ] * 3
+
+    def roster():
+        body = client.get(f"/api/teams/{team.id}/dashboard", headers=auth_headers).json()
+        return body["total"], {m["user_id"] for m in body["members"]}
+
+    total, members = roster()
+    assert (total, invitee.id in members) == (2, False)
+    # A pending coach has none of the role's access yet
+    assert client.get(f"/api/teams/{team.id}/dashboard", headers=_headers(invitee)).status_code == 404
+    assert client.get("/api/teams", headers=_headers(invitee)).json() == []
+
+    assert client.post(f"/api/teams/{team.id}/accept", headers=_headers(invitee)).status_code == 200
+    total, members = roster()
+    assert (total, invitee.id in members) == (3, True)
+    assert client.get(f"/api/teams/{team.id}/dashboard", headers=_headers(invitee)).status_code == 200
+
+
+def test_declined_invitations_are_dropped(client, db, user, auth_headers):
+    team = client.post("/api/teams", json={"name": "Wellness"}, headers=auth_headers).json()
+    invitee = User(email="invitee@fitlife.app", hashed_password="x", timezone="UTC")
+    db.add(invitee)
+    db.commit()
+    client.post(f"/api/teams/{team['id']}/members", json={"email": invitee.email}, headers=auth_headers)
+
+    assert client.post(f"/api/teams/{team['id']}/decline", headers=_headers(invitee)).status_code == 204
+    assert client.get("/api/teams/invitations", headers=_headers(invitee)).json() == []
+    assert db.query(TeamMember).filter(TeamMember.user_id == invitee.id).count() == 0
+
+
+@pytest.mark.parametrize("page_size", [0, 201])
+def test_page_size_is_bounded(client, db, user, auth_headers, page_size):
+    team, _ = _team(db, user)
+    response = client.get(f"/api/teams/{team.id}/dashboard", params={"page_size": page_size},
+                          headers=auth_headers)
+    assert response.status_code == 422
@@ -0,0 +1,165 @@
+import asyncio
+from datetime import datetime, timedelta
+
+import httpx
+import pytest
+
+from benchmarks.fake_providers import FakeOAuthServer, FakeProviderFarm
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.core.timezone import local_today
+from app.models.user import DailyMetric, FitnessConnection
+from app.services.fitness_aggregator import FitnessDataAggregator
+from app.services.sync_coordinator import SyncCoordinator
+from app.services.token_manager import TokenManager
+
+
+@pytest.fixture
+def oauth(monkeypatch):
+    for name, value in {
+        "FITBIT_CLIENT_ID": "fitlife-client", "FITBIT_CLIENT_SECRET": "s3cret",
+        "OURA_CLIENT_ID": "fitlife-client", "OURA_CLIENT_SECRET": "s3cret",
+    }.items():
+        monkeypatch.setattr(settings, name, value)
+    return FakeOAuthServer("fitlife-client", "s3cret")
+
+
+def _manager(oauth, **overrides):
+    options = {"margin_seconds": 900, "batch_size": 3, "concurrency": 2, "rate_per_second": 50, **overrides}
+    return TokenManager(
+        session_factory=SessionLocal,
+        http_client=oauth.client(),
+        coordinator=SyncCoordinator(session_factory=SessionLocal, lease_seconds=5, poll_seconds=0.01),
+        **options
+    )
+
+
+def _connection(db, user, oauth, provider, expires_in, refresh_token):
+    conn = FitnessConnection(
+        user_id=user.id, provider=provider, access_token=f"old-{refresh_token}", refresh_token=refresh_token,
+        token_expires_at=datetime.utcnow() + timedelta(seconds=expires_in)
+    )
+    db.add(conn)
+    db.commit()
+    oauth.grant(provider, refresh_token)
+    return conn
+
+
+def test_sweep_refreshes_due_tokens_in_rate_limited_batches(db, user, oauth):
+    due = [_connection(db, user, oauth, "fitbit", 300, f"fb-{i}") for i in range(7)]
+    due += [_connection(db, user, oauth, "oura", -60, f"oura-{i}") for i in range(3)]
+    later = _connection(db, user, oauth, "fitbit", 5 * 3600, "fb-later")
+
+    results = asyncio.run(_manager(oauth).sweep())
+
+    assert results == {"fitbit": {"refreshed": 7, "failed": 0}, "oura": {"refreshed": 3, "failed": 0}}
+    db.expire_all()
+    assert all(conn.access_token.startswith(f"{conn.provider}-access-") for conn in due)
+    assert all(conn.token_expires_at > datetime.utcnow() + timedelta(hours=7) for conn in due)
+    assert later.access_token == "old-fb-later"
+
+    fitbit_calls = sorted(at for token, at in oauth.calls if token.startswith("fb-"))
+    assert len(fitbit_calls) == 7
+    # 50/s per provider: seven requests can't fit in less than six intervals
+    assert fitbit_calls[-1] - fitbit_calls[0] >= 6 / 50 * 0.8
+
+
+def test_concurrent_refreshes_of_one_connection_share_a_request(db, user, oauth):
+    conn = _connection(db, user, oauth, "fitbit", -60, "fb-1")
+    manager = _manager(oauth)
+
+    async def run():
+        return await asyncio.gather(*(manager.access_token(conn) for _ in range(5)))
+
+    tokens = asyncio.run(run())
+
+    # The refresh token is single-use, so a duplicate request would have failed
+    assert len(oauth.calls) == 1
+    assert tokens == ["fitbit-access-1"] * 5
+    db.refresh(conn)
+    assert conn.refresh_token in oauth.live
+
+
+def test_refreshed_tokens_are_served_from_memory(db, user, oauth):
+    conn = _connection(db, user, oauth, "fitbit", -60, "fb-1")
+    manager = _manager(oauth)
+    stale = FitnessConnection(
+        id=conn.id, provider="fitbit", access_token=conn.access_token,
+        refresh_token=conn.refresh_token, token_expires_at=conn.token_expires_at
+    )
+    asyncio.run(manager.access_token(conn))
+    calls = len(oauth.calls)
+
+    # A row loaded before the refresh still gets the new token, without a request
+    assert asyncio.run(manager.access_token(stale)) == "fitbit-access-1"
+    assert len(oauth.calls) == calls
+
+
+def test_tokens_near_expiry_refresh_without_blocking(db, user, oauth):
+    conn = _connection(db, user, oauth, "fitbit", 300, "fb-1")
+    oauth.latency = 0.05
+    manager = _manager(oauth)
+
+    async def run():
+        token = await manager.access_token(conn)
+        pending = list(manager._background)
+        await asyncio.gather(*pending)
+        return token, len(pending)
+
+    token, background = asyncio.run(run())
+    assert (token, background) == ("old-fb-1", 1)
+    assert manager._cache[conn.id][0] == "fitbit-access-1"
+
+
+def test_rejected_refresh_marks_connection_for_reauth(db, user, oauth):
+    conn = _connection(db, user, oauth, "oura", -60, "revoked")
+    oauth.live.clear()
+
+    manager = _manager(oauth)
+    assert asyncio.run(manager.access_token(conn)) == "old-revoked"
+    db.refresh(conn)
+    assert conn.last_sync_status == "reauth_required"
+    assert conn.refresh_token is None
+
+    # Later sweeps don't present the dead refresh token again
+    assert asyncio.run(manager.sweep())["oura"] == {"refreshed": 0, "failed": 0}
+    assert len(oauth.calls) == 1
+
+
+def test_sync_with_revoked_tokens_asks_for_reauth(db, user, oauth):
+    conn = _connection(db, user, oauth, "fitbit", 3600, "revoked")
+    oauth.live.clear()
+    farm = FakeProviderFarm()
+    serve = farm.transport().handle_async_request
+
+    async def handler(request):
+        if request.headers.get("authorization") == f"Bearer {conn.access_token}":
+            return httpx.Response(401, json={"errors": [{"errorType": "expired_token"}]})
+        return await serve(request)
+
+    async def run():
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as http_client:
+            aggregator = FitnessDataAggregator(db, http_client=http_client, tokens=_manager(oauth))
+            return await aggregator.sync_user_data(user.id, days_back=1)
+
+    result = asyncio.run(run())
+    assert [error["provider"] for error in result["errors"]] == ["fitbit"]
+    assert len(oauth.calls) == 1  # One refresh attempt, shared by the resource fetches
+    db.expire_all()
+    assert (conn.last_sync_status, conn.refresh_token, conn.is_syncing) == ("reauth_required", None, False)
+
+
+def test_sync_uses_refreshed_token(db, user, oauth):
+    _connection(db, user, oauth, "fitbit", -60, "fb-1")
+    farm = FakeProviderFarm(seed=5)
+
+    async def run():
+        async with farm.client() as http_client:
+            aggregator = FitnessDataAggregator(db, http_client=http_client, tokens=_manager(oauth))
+            return await aggregator.sync_user_data(user.id, days_back=1)
+
+    assert asyncio.run(run())["errors"] == []
+    assert len(oauth.calls) == 1  # Once per sync, not once per resource
+    day = local_today(user.timezone)
+    metric = db.query(DailyMetric).filter(DailyMetric.local_date == day).one()
+    assert metric.steps == farm.day_values("fitbit", "fitbit-access-1", day)["steps"]
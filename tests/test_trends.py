@@ -0,0 +1,115 @@
+from datetime import date, datetime, timedelta
+
+import numpy as np
+import pytest
+from sqlalchemy import select
+from sqlalchemy.dialects import postgresql
+
+from app.core.timezone import local_today
+from app.models.user import DailyMetric
+from app.services import trends
+from app.services.trends import OUTLIER_Z, analyze_trend, t_confidence
+
+START = date(2024, 1, 1)
+
+
+def _insert(db, user, values, field="steps"):
+    db.add_all([
+        DailyMetric(user_id=user.id, date=datetime.combine(START + timedelta(days=i), datetime.min.time()),
+                    local_date=START + timedelta(days=i), **{field: value})
+        for i, value in enumerate(values) if value is not None
+    ])
+    db.commit()
+
+
+def _synthetic(n=120, slope=35.0, seed=4):
+    rng = np.random.default_rng(seed)
+    values = 8000 + slope * np.arange(n) + rng.normal(0, 600, n)
+    values[[17, 60, 101]] += [6000, -5500, 7000]  # Injected anomalies
+    values = [int(v) for v in values]
+    for gap in (5, 6, 40, 77):
+        values[gap] = None
+    return values
+
+
+def _reference(values):
+    """numpy least squares on the same days, with residual z-scores."""
+    x = np.array([i for i, v in enumerate(values) if v is not None], dtype=float)
+    y = np.array([v for v in values if v is not None], dtype=float)
+    slope, intercept = np.polyfit(x, y, 1)
+    residuals = y - (intercept + slope * x)
+    residual_sd = np.sqrt((residuals ** 2).sum() / (len(y) - 2))
+    r2 = np.corrcoef(x, y)[0, 1] ** 2
+    z = residuals / residual_sd
+    outliers = [(START + timedelta(days=int(d)), round(s, 2)) for d, s in zip(x, z) if abs(s) > OUTLIER_Z]
+    stderr = residual_sd / np.sqrt(((x - x.mean()) ** 2).sum())
+    return slope, intercept, r2, stderr, outliers
+
+
+def test_fit_and_outliers_match_numpy_reference(db, user):
+    values = _synthetic()
+    _insert(db, user, values)
+
+    analysis = analyze_trend(db, user.id, "steps", START, START + timedelta(days=len(values) - 1))
+
+    slope, intercept, r2, stderr, outliers = _reference(values)
+    assert analysis["data_points"] == sum(v is not None for v in values)
+    assert analysis["slope"] == pytest.approx(slope, rel=1e-9)
+    assert analysis["intercept"] == pytest.approx(intercept, rel=1e-9)
+    assert analysis["r_squared"] == pytest.approx(r2, rel=1e-9)
+    assert analysis["slope_stderr"] == pytest.approx(stderr, rel=1e-9)
+    assert [(o["date"], o["z_score"]) for o in analysis["outliers"]] == [
+        (day.isoformat(), z) for day, z in outliers
+    ]
+    assert {o["date"] for o in analysis["outliers"]} >= {
+        (START + timedelta(days=d)).isoformat() for d in (17, 60, 101)
+    }
+    assert analysis["confidence"] > 0.999
+
+
+def test_noise_without_trend_has_low_confidence(db, user):
+    _insert(db, user, _synthetic(slope=0.0, seed=9))
+
+    analysis = analyze_trend(db, user.id, "steps", START, START + timedelta(days=119))
+
+    assert analysis["confidence"] < 0.95
+    assert trends.classify(analysis, 120)["trend"] == "stable"
+
+
+@pytest.mark.parametrize("t, df, expected", [
+    (12.706, 1, 0.95), (4.303, 2, 0.95), (3.182, 3, 0.95), (2.228, 10, 0.95),
+    (2.845, 20, 0.99), (1.645, 10_000, 0.90), (0.0, 7, 0.0),
+])
+def test_t_confidence_matches_critical_values(t, df, expected):
+    assert t_confidence(t, df) == pytest.approx(expected, abs=5e-4)
+
+
+def test_postgres_path_uses_regression_aggregates():
+    x = trends._day_index("postgresql", START)
+    sql = str(select(*trends._aggregates("postgresql", DailyMetric.steps, x)).compile(dialect=postgresql.dialect()))
+
+    assert "regr_slope" in sql and "regr_r2" in sql
+    assert "julianday" not in sql
+
+
+def test_trends_endpoint_reports_fit_and_outliers(client, db, user, auth_headers, query_budget):
+    today = local_today(user.timezone)
+    values = [60 - 0.2 * i for i in range(30)]
+    values[12] = 75  # One bad night
+    db.add_all([
+        DailyMetric(user_id=user.id, date=datetime.combine(today - timedelta(days=29 - i), datetime.min.time()),
+                    local_date=today - timedelta(days=29 - i), resting_hr=int(round(value)))
+        for i, value in enumerate(values)
+    ])
+    db.commit()
+
+    with query_budget(3):  # auth user, aggregate fit, outlier rows
+        body = client.get(
+            "/api/dashboard/trends", params={"metric": "heart_rate"}, headers=auth_headers
+        ).json()
+
+    assert body["data_points"] == 30
+    assert body["slope_per_day"] < 0
+    assert body["trend"] == "improving"  # Resting HR falling
+    assert [o["date"] for o in body["outliers"]] == [(today - timedelta(days=17)).isoformat()]
+    assert body["best_day"] == min(int(round(v)) for v in values)
@@ -0,0 +1,198 @@
+import asyncio
+import base64
+import hashlib
+import hmac
+import json
+import time
+from datetime import date
+
+import pytest
+
+from benchmarks.fake_providers import FakeProviderFarm
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.models.user import DailyMetric, FitnessConnection
+from app.services.fitness_aggregator import FitnessDataAggregator
+from app.services.provider_webhooks import (
+    NotificationCoalescer,
+    coalescer,
+    parse_garmin,
+    verify_fitbit_signature,
+    verify_oura_signature,
+)
+
+FITBIT_SECRET = "fitbit-client-secret"
+OURA_SECRET = "oura-client-secret"
+GARMIN_SECRET = "garmin-consumer-secret"
+
+
+def _fitbit_signed(payload):
+    body = json.dumps(payload).encode()
+    digest = hmac.new(f"{FITBIT_SECRET}&".encode(), body, hashlib.sha1).digest()
+    return body, {"X-Fitbit-Signature": base64.b64encode(digest).decode(), "Content-Type": "application/json"}
+
+
+def _oura_signed(payload, timestamp=None):
+    body = json.dumps(payload).encode()
+    timestamp = str(int(time.time()) if timestamp is None else timestamp)
+    signature = hmac.new(OURA_SECRET.encode(), timestamp.encode() + body, hashlib.sha256).hexdigest().upper()
+    return body, {"x-oura-signature": signature, "x-oura-timestamp": timestamp}
+
+
+def _garmin_signed(payload):
+    body = json.dumps(payload).encode()
+    return body, {"X-Garmin-Signature": hmac.new(GARMIN_SECRET.encode(), body, hashlib.sha256).hexdigest()}
+
+
+@pytest.fixture
+def webhooks(monkeypatch):
+    """Configure provider secrets and route coalesced syncs to a fake provider farm."""
+    monkeypatch.setattr(settings, "FITBIT_CLIENT_SECRET", FITBIT_SECRET)
+    monkeypatch.setattr(settings, "OURA_CLIENT_SECRET", OURA_SECRET)
+    monkeypatch.setattr(settings, "GARMIN_CONSUMER_SECRET", GARMIN_SECRET)
+    farm = FakeProviderFarm(seed=3)
+    dispatched = []
+
+    async def dispatch(connection_id, dates):
+        dispatched.append((connection_id, dates))
+        db = SessionLocal()
+        try:
+            async with farm.client() as http_client:
+                return await FitnessDataAggregator(db, http_client=http_client).sync_connection_dates(
+                    connection_id, dates
+                )
+        finally:
+            db.close()
+
+    monkeypatch.setattr(coalescer, "dispatch", dispatch)
+    farm.dispatched = dispatched
+    return farm
+
+
+def _connection(db, user, provider, provider_user_id):
+    conn = FitnessConnection(
+        user_id=user.id, provider=provider, access_token=f"tok-{provider}", provider_user_id=provider_user_id
+    )
+    db.add(conn)
+    db.commit()
+    return conn
+
+
+def test_signatures_are_verified():
+    body, headers = _fitbit_signed([{"collectionType": "activities"}])
+    assert verify_fitbit_signature(body, headers["X-Fitbit-Signature"], FITBIT_SECRET)
+    assert not verify_fitbit_signature(body, headers["X-Fitbit-Signature"], "other-secret")
+    assert not verify_fitbit_signature(body, None, FITBIT_SECRET)
+
+    body, headers = _oura_signed({"event_type": "create"}, timestamp=1_700_000_000)
+    sig, ts = headers["x-oura-signature"], headers["x-oura-timestamp"]
+    assert verify_oura_signature(body, sig, ts, OURA_SECRET, now=1_700_000_060)
+    assert not verify_oura_signature(body, sig, ts, OURA_SECRET, now=1_700_001_000)  # replayed
+    assert not verify_oura_signature(body + b" ", sig, ts, OURA_SECRET, now=1_700_000_060)
+
+
+def test_coalescer_merges_a_burst_into_one_dispatch():
+    calls = []
+
+    async def dispatch(connection_id, dates):
+        calls.append((connection_id, dates))
+
+    async def run():
+        pending = NotificationCoalescer(dispatch, debounce_seconds=0.05, max_dates=3)
+        assert pending.notify(1, [date(2024, 3, 2)]) is True
+        assert pending.notify(1, [date(2024, 3, 1), date(2024, 3, 2)]) is False
+        pending.notify(2, [date(2024, 2, 1), date(2024, 2, 2), date(2024, 2, 3), date(2024, 2, 4)])
+        await asyncio.sleep(0.1)
+        assert pending.pending == {}
+
+    asyncio.run(run())
+    assert sorted(calls) == [
+        (1, [date(2024, 3, 1), date(2024, 3, 2)]),
+        (2, [date(2024, 2, 2), date(2024, 2, 3), date(2024, 2, 4)]),  # Latest max_dates kept
+    ]
+
+
+def test_garmin_ping_windows_expand_to_dates():
+    notifications = parse_garmin({"dailies": [{
+        "userId": "G1", "userAccessToken": "tok",
+        "uploadStartTimeInSeconds": 1709251200, "uploadEndTimeInSeconds": 1709424000,
+    }]})
+    assert notifications[0].dates == [date(2024, 3, 1), date(2024, 3, 2), date(2024, 3, 3)]
+
+
+def test_fitbit_notifications_fetch_only_notified_dates(client, db, user, webhooks):
+    conn = _connection(db, user, "fitbit", "FB1")
+    payload = [
+        {"collectionType": "activities", "date": "2024-03-01", "ownerId": "FB1", "ownerType": "user"},
+        {"collectionType": "sleep", "date": "2024-03-02", "ownerId": "FB1", "ownerType": "user"},
+        {"collectionType": "activities", "date": "2024-03-02", "ownerId": "FB1", "ownerType": "user"},
+        {"collectionType": "activities", "date": "2024-03-09", "ownerId": "FB1", "ownerType": "user"},
+        {"collectionType": "activities", "date": "2024-03-01", "ownerId": "someone-else", "ownerType": "user"},
+    ]
+    body, headers = _fitbit_signed(payload)
+
+    response = client.post("/api/webhooks/fitbit", content=body, headers=headers)
+    assert response.status_code == 204
+    assert coalescer.pending == {conn.id: [date(2024, 3, 1), date(2024, 3, 2), date(2024, 3, 9)]}
+    assert webhooks.requests == 0  # Nothing fetched inside the debounce window
+
+    client.portal.call(coalescer.flush)
+
+    assert len(webhooks.dispatched) == 1
+    assert webhooks.requests == 8  # Two runs of dates x four Fitbit resources
+    db.expire_all()
+    days = [m.local_date for m in db.query(DailyMetric).order_by(DailyMetric.local_date)]
+    assert days == [date(2024, 3, 1), date(2024, 3, 2), date(2024, 3, 9)]
+    expected = webhooks.day_values("fitbit", "tok-fitbit", date(2024, 3, 2))
+    assert db.query(DailyMetric).filter(DailyMetric.local_date == date(2024, 3, 2)).one().steps == expected["steps"]
+    assert db.get(FitnessConnection, conn.id).last_sync_status == "success"
+
+
+def test_bad_signatures_are_rejected(client, db, user, webhooks):
+    _connection(db, user, "fitbit", "FB1")
+    body, headers = _fitbit_signed([{"collectionType": "activities", "date": "2024-03-01", "ownerId": "FB1"}])
+
+    response = client.post("/api/webhooks/fitbit", content=body + b" ", headers=headers)
+    assert response.status_code == 401
+
+    body, headers = _oura_signed({"event_type": "create", "event_time": "2024-03-02T07:00:00+00:00"})
+    headers["x-oura-signature"] = "0" * 64
+    assert client.post("/api/webhooks/oura", content=body, headers=headers).status_code == 401
+    assert coalescer.pending == {}
+
+
+def test_oura_and_garmin_notifications_are_queued(client, db, user, webhooks):
+    oura = _connection(db, user, "oura", "OURA1")
+    garmin = _connection(db, user, "garmin", None)
+
+    body, headers = _oura_signed({
+        "event_type": "update", "data_type": "sleep", "user_id": "OURA1", "event_time": "2024-03-02T07:00:00+00:00"
+    })
+    assert client.post("/api/webhooks/oura", content=body, headers=headers).json() == {"queued": 1}
+
+    body, headers = _garmin_signed({
+        "dailies": [{"userId": "G-unknown", "userAccessToken": "tok-garmin", "calendarDate": "2024-03-02"}],
+        "sleeps": [{"userId": "G-unknown", "userAccessToken": "tok-garmin", "calendarDate": "2024-03-02"}],
+    })
+    assert client.post("/api/webhooks/garmin", content=body, headers=headers).json() == {"queued": 2}
+
+    assert coalescer.pending == {
+        oura.id: [date(2024, 3, 1), date(2024, 3, 2)],
+        garmin.id: [date(2024, 3, 2)],
+    }
+    client.portal.call(coalescer.flush)
+    assert sorted(len(dates) for _, dates in webhooks.dispatched) == [1, 2]
+    db.expire_all()
+    assert sorted(db.query(DailyMetric).filter(DailyMetric.local_date == date(2024, 3, 2)).one().sources) == [
+        "garmin", "oura"
+    ]
+
+
+def test_verification_handshakes(client, monkeypatch):
+    monkeypatch.setattr(settings, "FITBIT_SUBSCRIBER_VERIFICATION_CODE", "fb-code")
+    monkeypatch.setattr(settings, "OURA_WEBHOOK_VERIFICATION_TOKEN", "oura-token")
+
+    assert client.get("/api/webhooks/fitbit", params={"verify": "fb-code"}).status_code == 204
+    assert client.get("/api/webhooks/fitbit", params={"verify": "wrong"}).status_code == 404
+    response = client.get("/api/webhooks/oura", params={"verification_token": "oura-token", "challenge": "abc"})
+    assert response.json() == {"challenge": "abc"}